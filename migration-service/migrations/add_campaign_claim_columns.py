@@ -0,0 +1,60 @@
+"""
+Add campaign claim and checkpoint columns
+
+This migration supports running the email campaign scheduler in several
+workers at once:
+- ecommerce_scheduled_emails.locked_by / locked_until: worker lease
+- ecommerce_email_logs.scheduled_email_id: links each sent email to its
+  campaign, which is the resume checkpoint after a crashed run
+"""
+
+from sqlalchemy import text
+import logging
+
+def upgrade(connection):
+    """Add campaign lease and email log campaign columns."""
+    try:
+        logging.info("Starting campaign claim columns migration...")
+
+        connection.execute(text("""
+            ALTER TABLE ecommerce_scheduled_emails
+            ADD COLUMN IF NOT EXISTS locked_by VARCHAR(100),
+            ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP
+        """))
+        # Claim query: due pending campaigns and expired leases
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_scheduled_emails_status_scheduled
+            ON ecommerce_scheduled_emails(status, scheduled_for)
+        """))
+
+        connection.execute(text("""
+            ALTER TABLE ecommerce_email_logs
+            ADD COLUMN IF NOT EXISTS scheduled_email_id UUID
+            REFERENCES ecommerce_scheduled_emails(id) ON DELETE SET NULL
+        """))
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_email_logs_scheduled_email
+            ON ecommerce_email_logs(scheduled_email_id, recipient_email)
+        """))
+
+        logging.info("Successfully completed campaign claim columns migration")
+
+    except Exception as e:
+        logging.error(f"Error in campaign claim columns migration: {e}")
+        raise e
+
+def downgrade(connection):
+    """Drop campaign lease and email log campaign columns."""
+    try:
+        connection.execute(text("DROP INDEX IF EXISTS idx_email_logs_scheduled_email"))
+        connection.execute(text("ALTER TABLE ecommerce_email_logs DROP COLUMN IF EXISTS scheduled_email_id"))
+        connection.execute(text("DROP INDEX IF EXISTS idx_scheduled_emails_status_scheduled"))
+        connection.execute(text("""
+            ALTER TABLE ecommerce_scheduled_emails
+            DROP COLUMN IF EXISTS locked_until,
+            DROP COLUMN IF EXISTS locked_by
+        """))
+        logging.info("Dropped campaign claim columns")
+    except Exception as e:
+        logging.error(f"Error dropping campaign claim columns: {e}")
+        raise e
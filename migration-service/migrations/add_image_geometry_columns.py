@@ -0,0 +1,74 @@
+"""
+Add image geometry columns
+
+Stores the geometry of design and mockup images measured at ingest, so
+gang sheet layout, mockup fitting and DPI normalization can plan from the
+row instead of decoding the file:
+- width_px / height_px / channels: decoded pixel size and channel count
+- dpi_x / dpi_y: DPI from the file header
+- alpha_bbox: [x, y, width, height] of the non-transparent pixels
+- content_hash: BLAKE2b of the decoded pixels
+Rows ingested earlier keep NULLs and are decoded as before.
+"""
+
+from sqlalchemy import text
+import logging
+
+GEOMETRY_TABLES = {
+    'design_images': 'JSONB',
+    'mockup_images': 'JSON',
+}
+
+def upgrade(connection):
+    """Add geometry columns to design_images and mockup_images."""
+    try:
+        logging.info("Starting image geometry columns migration...")
+
+        for table, json_type in GEOMETRY_TABLES.items():
+            connection.execute(text(f"""
+                ALTER TABLE {table}
+                ADD COLUMN IF NOT EXISTS width_px INTEGER,
+                ADD COLUMN IF NOT EXISTS height_px INTEGER,
+                ADD COLUMN IF NOT EXISTS dpi_x DOUBLE PRECISION,
+                ADD COLUMN IF NOT EXISTS dpi_y DOUBLE PRECISION,
+                ADD COLUMN IF NOT EXISTS channels INTEGER,
+                ADD COLUMN IF NOT EXISTS alpha_bbox {json_type},
+                ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)
+            """))
+
+        # Planners look geometry up by file path
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_mockup_images_file_path
+            ON mockup_images(file_path)
+        """))
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_design_images_file_path
+            ON design_images(file_path)
+        """))
+
+        logging.info("Successfully completed image geometry columns migration")
+
+    except Exception as e:
+        logging.error(f"Error in image geometry columns migration: {e}")
+        raise e
+
+def downgrade(connection):
+    """Drop geometry columns."""
+    try:
+        connection.execute(text("DROP INDEX IF EXISTS idx_design_images_file_path"))
+        connection.execute(text("DROP INDEX IF EXISTS idx_mockup_images_file_path"))
+        for table in GEOMETRY_TABLES:
+            connection.execute(text(f"""
+                ALTER TABLE {table}
+                DROP COLUMN IF EXISTS content_hash,
+                DROP COLUMN IF EXISTS alpha_bbox,
+                DROP COLUMN IF EXISTS channels,
+                DROP COLUMN IF EXISTS dpi_y,
+                DROP COLUMN IF EXISTS dpi_x,
+                DROP COLUMN IF EXISTS height_px,
+                DROP COLUMN IF EXISTS width_px
+            """))
+        logging.info("Dropped image geometry columns")
+    except Exception as e:
+        logging.error(f"Error dropping image geometry columns: {e}")
+        raise e
@@ -0,0 +1,57 @@
+"""
+Add print job runner columns
+
+This migration supports claiming print jobs from several workers:
+- printer_id: printer the job runs on, for per-printer concurrency limits
+- locked_by / heartbeat_at: claiming worker and its last heartbeat, so jobs
+  of a dead worker can be requeued
+- Status indexes for the SKIP LOCKED claim query and heartbeat expiry
+"""
+
+from sqlalchemy import text
+import logging
+
+def upgrade(connection):
+    """Add print job claim columns and queue indexes."""
+    try:
+        logging.info("Starting print job runner columns migration...")
+
+        connection.execute(text("""
+            ALTER TABLE print_jobs
+            ADD COLUMN IF NOT EXISTS printer_id UUID REFERENCES printers(id) ON DELETE SET NULL,
+            ADD COLUMN IF NOT EXISTS locked_by VARCHAR(100),
+            ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP
+        """))
+
+        # Claim query: oldest queued job
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_print_jobs_status_created
+            ON print_jobs(status, created_at)
+        """))
+        # Per-printer limits and heartbeat expiry scan processing jobs
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_print_jobs_status_printer
+            ON print_jobs(status, printer_id, heartbeat_at)
+        """))
+
+        logging.info("Successfully completed print job runner columns migration")
+
+    except Exception as e:
+        logging.error(f"Error in print job runner columns migration: {e}")
+        raise e
+
+def downgrade(connection):
+    """Drop print job claim columns."""
+    try:
+        connection.execute(text("DROP INDEX IF EXISTS idx_print_jobs_status_printer"))
+        connection.execute(text("DROP INDEX IF EXISTS idx_print_jobs_status_created"))
+        connection.execute(text("""
+            ALTER TABLE print_jobs
+            DROP COLUMN IF EXISTS heartbeat_at,
+            DROP COLUMN IF EXISTS locked_by,
+            DROP COLUMN IF EXISTS printer_id
+        """))
+        logging.info("Dropped print job runner columns")
+    except Exception as e:
+        logging.error(f"Error dropping print job runner columns: {e}")
+        raise e
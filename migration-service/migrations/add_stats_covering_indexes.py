@@ -0,0 +1,56 @@
+"""
+Add covering indexes for stats panels
+
+The print job, event and printer stats are single grouped aggregates over an
+org (or user) and a created_at window. These indexes carry every column the
+aggregates read, so PostgreSQL answers them with index-only scans:
+- print_jobs(org_id, created_at) INCLUDE status, job_type and timings
+- events(org_id, created_at) INCLUDE event_type, entity_type; replaces the
+  plain idx_events_org_created (created on every partition)
+- printers(user_id, org_id) INCLUDE type, flags and dpi
+"""
+
+from sqlalchemy import text
+import logging
+
+def upgrade(connection):
+    """Create covering indexes for the stats queries."""
+    try:
+        logging.info("Starting stats covering indexes migration...")
+
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_print_jobs_org_created_stats
+            ON print_jobs(org_id, created_at)
+            INCLUDE (status, job_type, started_at, completed_at)
+        """))
+
+        connection.execute(text("DROP INDEX IF EXISTS idx_events_org_created"))
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_events_org_created
+            ON events(org_id, created_at)
+            INCLUDE (event_type, entity_type)
+        """))
+
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_printers_user_org_stats
+            ON printers(user_id, org_id)
+            INCLUDE (printer_type, is_active, is_default, dpi)
+        """))
+
+        logging.info("Successfully completed stats covering indexes migration")
+
+    except Exception as e:
+        logging.error(f"Error in stats covering indexes migration: {e}")
+        raise e
+
+def downgrade(connection):
+    """Drop the covering indexes and restore the plain events index."""
+    try:
+        connection.execute(text("DROP INDEX IF EXISTS idx_printers_user_org_stats"))
+        connection.execute(text("DROP INDEX IF EXISTS idx_events_org_created"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS idx_events_org_created ON events(org_id, created_at)"))
+        connection.execute(text("DROP INDEX IF EXISTS idx_print_jobs_org_created_stats"))
+        logging.info("Dropped stats covering indexes")
+    except Exception as e:
+        logging.error(f"Error dropping stats covering indexes: {e}")
+        raise e
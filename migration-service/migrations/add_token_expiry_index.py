@@ -0,0 +1,35 @@
+"""
+Add token expiry index to platform_connections
+
+The OAuth refresh service scans only connections whose token expires within
+its threshold; this index lets that range scan skip every other connection.
+"""
+
+from sqlalchemy import text
+import logging
+
+def upgrade(connection):
+    """Create the token_expires_at index."""
+    try:
+        logging.info("Starting token expiry index migration...")
+
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_platform_connections_token_expires
+            ON platform_connections(token_expires_at)
+            WHERE token_expires_at IS NOT NULL
+        """))
+
+        logging.info("Successfully completed token expiry index migration")
+
+    except Exception as e:
+        logging.error(f"Error in token expiry index migration: {e}")
+        raise e
+
+def downgrade(connection):
+    """Drop the token_expires_at index."""
+    try:
+        connection.execute(text("DROP INDEX IF EXISTS idx_platform_connections_token_expires"))
+        logging.info("Dropped token expiry index")
+    except Exception as e:
+        logging.error(f"Error dropping token expiry index: {e}")
+        raise e
@@ -0,0 +1,109 @@
+"""
+Create Shopify bulk sync tables
+
+This migration creates the tables used by the Shopify GraphQL bulk sync:
+- shopify_orders: Local copy of store orders for analytics
+- shopify_sync_state: Bulk operation status per store and resource
+It also indexes shopify_products for local facet queries.
+"""
+
+from sqlalchemy import text
+import logging
+
+def upgrade(connection):
+    """Create Shopify sync tables and indexes."""
+    try:
+        logging.info("Starting Shopify sync tables migration...")
+
+        result = connection.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_name = 'shopify_orders'
+        """))
+
+        if not result.fetchone():
+            logging.info("Creating shopify_orders table...")
+            connection.execute(text("""
+                CREATE TABLE shopify_orders (
+                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                    store_id UUID NOT NULL REFERENCES shopify_stores(id) ON DELETE CASCADE,
+
+                    shopify_order_id VARCHAR NOT NULL UNIQUE,
+                    name VARCHAR,
+                    email VARCHAR,
+                    financial_status VARCHAR,
+                    fulfillment_status VARCHAR,
+                    total_price DOUBLE PRECISION,
+                    currency VARCHAR(3),
+                    line_items JSON,
+                    item_count INTEGER,
+
+                    order_created_at TIMESTAMPTZ,
+                    order_updated_at TIMESTAMPTZ,
+                    cancelled_at TIMESTAMPTZ,
+
+                    created_at TIMESTAMPTZ DEFAULT NOW(),
+                    updated_at TIMESTAMPTZ DEFAULT NOW()
+                )
+            """))
+            connection.execute(text("""
+                CREATE INDEX idx_shopify_orders_store_created
+                ON shopify_orders(store_id, order_created_at)
+            """))
+        else:
+            logging.info("shopify_orders table already exists")
+
+        result = connection.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_name = 'shopify_sync_state'
+        """))
+
+        if not result.fetchone():
+            logging.info("Creating shopify_sync_state table...")
+            connection.execute(text("""
+                CREATE TABLE shopify_sync_state (
+                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                    store_id UUID NOT NULL REFERENCES shopify_stores(id) ON DELETE CASCADE,
+                    resource VARCHAR(20) NOT NULL,
+
+                    bulk_operation_id VARCHAR,
+                    status VARCHAR(20) NOT NULL DEFAULT 'idle',
+                    object_count INTEGER,
+                    error_message TEXT,
+
+                    started_at TIMESTAMPTZ,
+                    last_synced_at TIMESTAMPTZ,
+
+                    created_at TIMESTAMPTZ DEFAULT NOW(),
+                    updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+                    CONSTRAINT uq_shopify_sync_state_store_resource UNIQUE (store_id, resource)
+                )
+            """))
+        else:
+            logging.info("shopify_sync_state table already exists")
+
+        # Facet queries (product types, vendors, tags) filter by store
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_shopify_products_store_id
+            ON shopify_products(store_id)
+        """))
+
+        logging.info("Successfully completed Shopify sync tables migration")
+
+    except Exception as e:
+        logging.error(f"Error in Shopify sync tables migration: {e}")
+        raise e
+
+def downgrade(connection):
+    """Drop Shopify sync tables."""
+    try:
+        connection.execute(text("DROP INDEX IF EXISTS idx_shopify_products_store_id"))
+        connection.execute(text("DROP TABLE IF EXISTS shopify_sync_state"))
+        connection.execute(text("DROP TABLE IF EXISTS shopify_orders"))
+        logging.info("Dropped Shopify sync tables")
+    except Exception as e:
+        logging.error(f"Error dropping Shopify sync tables: {e}")
+        raise e
@@ -0,0 +1,133 @@
+"""
+Partition events table by month
+
+This migration converts the events audit table into a table range-partitioned
+on created_at:
+- One partition per calendar month (events_yYYYYmMM), created from the oldest
+  existing event through three months ahead, plus events_default
+- Primary key (id, created_at), since the partition key must be part of it
+- Indexes on the parent, which cascade to every partition
+- events_archive: system errors/warnings kept when old months are dropped
+Existing rows are copied into the new table.
+"""
+
+from datetime import datetime
+from sqlalchemy import text
+import logging
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(value, months):
+    index = value.year * 12 + (value.month - 1) + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _is_partitioned(connection, table_name):
+    return connection.execute(text("""
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :table_name
+    """), {'table_name': table_name}).fetchone() is not None
+
+
+def _has_column(connection, table_name, column_name):
+    return connection.execute(text("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = :table_name AND column_name = :column_name
+    """), {'table_name': table_name, 'column_name': column_name}).fetchone() is not None
+
+
+def _create_partitions(connection, first_month):
+    current = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month = first_month
+    while month <= _add_months(current, MONTHS_AHEAD):
+        name = f"events_y{month.year:04d}m{month.month:02d}"
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF events "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        ))
+        month = _add_months(month, 1)
+    connection.execute(text("CREATE TABLE IF NOT EXISTS events_default PARTITION OF events DEFAULT"))
+
+
+def upgrade(connection):
+    """Convert events to a monthly partitioned table."""
+    try:
+        logging.info("Starting events partitioning migration...")
+
+        result = connection.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_name = 'events'
+        """))
+        if not result.fetchone():
+            logging.info("events table does not exist, skipping")
+            return
+
+        if _is_partitioned(connection, 'events'):
+            logging.info("events table already partitioned")
+            return
+
+        # The partition key must be NOT NULL to be part of the primary key
+        connection.execute(text("UPDATE events SET created_at = NOW() WHERE created_at IS NULL"))
+
+        oldest = connection.execute(text("SELECT MIN(created_at) FROM events")).scalar()
+        first_month = (oldest or datetime.utcnow()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        logging.info("Creating partitioned events table...")
+        connection.execute(text("ALTER TABLE events RENAME TO events_unpartitioned"))
+        connection.execute(text("""
+            CREATE TABLE events (LIKE events_unpartitioned INCLUDING DEFAULTS)
+            PARTITION BY RANGE (created_at)
+        """))
+        connection.execute(text("ALTER TABLE events ALTER COLUMN created_at SET NOT NULL"))
+        _create_partitions(connection, first_month)
+
+        logging.info("Copying existing events...")
+        connection.execute(text("INSERT INTO events SELECT * FROM events_unpartitioned"))
+        connection.execute(text("DROP TABLE events_unpartitioned CASCADE"))
+
+        connection.execute(text("ALTER TABLE events ADD PRIMARY KEY (id, created_at)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_events_created_at ON events(created_at)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS idx_events_user_created ON events(user_id, created_at)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS idx_events_entity ON events(entity_type, entity_id)"))
+        if _has_column(connection, 'events', 'org_id'):
+            connection.execute(text("CREATE INDEX IF NOT EXISTS idx_events_org_created ON events(org_id, created_at)"))
+            connection.execute(text("CREATE INDEX IF NOT EXISTS idx_events_org_type ON events(org_id, event_type, created_at)"))
+
+        logging.info("Creating events_archive table...")
+        connection.execute(text("""
+            CREATE TABLE IF NOT EXISTS events_archive (LIKE events INCLUDING DEFAULTS)
+        """))
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_events_archive_created ON events_archive(created_at)
+        """))
+
+        logging.info("Successfully completed events partitioning migration")
+
+    except Exception as e:
+        logging.error(f"Error in events partitioning migration: {e}")
+        raise e
+
+
+def downgrade(connection):
+    """Convert events back to a regular table."""
+    try:
+        if not _is_partitioned(connection, 'events'):
+            return
+
+        connection.execute(text("ALTER TABLE events RENAME TO events_partitioned"))
+        connection.execute(text("CREATE TABLE events (LIKE events_partitioned INCLUDING DEFAULTS)"))
+        connection.execute(text("INSERT INTO events SELECT * FROM events_partitioned"))
+        connection.execute(text("INSERT INTO events SELECT * FROM events_archive"))
+        connection.execute(text("DROP TABLE events_partitioned CASCADE"))
+        connection.execute(text("DROP TABLE IF EXISTS events_archive"))
+        connection.execute(text("ALTER TABLE events ADD PRIMARY KEY (id)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_events_created_at ON events(created_at)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS idx_events_user_created ON events(user_id, created_at)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS idx_events_entity ON events(entity_type, entity_id)"))
+        logging.info("Converted events back to a regular table")
+    except Exception as e:
+        logging.error(f"Error reverting events partitioning: {e}")
+        raise e
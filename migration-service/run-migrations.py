@@ -103,6 +103,7 @@ def discover_migrations():
         "add_etsy_shop_id",               # Adds Etsy shop ID fields
         "fix_platform_constraint_case",    # Fix constraint to accept both cases BEFORE migrations
         "separate_platform_connections",   # Separates platform connections
+        "add_token_expiry_index",         # Indexes token_expires_at for the OAuth refresh scan
         "fix_platform_enum_case",          # Ensures platform values are uppercase
         "remove_shopify_unique_constraint", # Removes Shopify constraints
         "add_production_partner_ids",  # Adds production_partner_ids column
@@ -111,6 +112,8 @@ def discover_migrations():
         "add_org_id_to_shopify_templates", # Adds org_id column to shopify templates if missing
         "add_variant_configs_to_shopify_templates", # Adds variant_configs JSON column for nested variants
         "add_craftflow_commerce_templates", # Adds CraftFlow Commerce templates table and mockups support
+        "create_shopify_sync_tables",     # Adds shopify_orders and shopify_sync_state for GraphQL bulk sync
+        "partition_events_table",         # Converts events to monthly range partitions for cheap retention
 
         # Design-related migrations
         "add_phash_to_designs",           # Adds phash column to designs
@@ -118,9 +121,12 @@ def discover_migrations():
         "update_phash_hash_size",         # Updates phash column size and generates all hashes
         "add_tags_to_design_images",      # Adds tags and tags_metadata for automatic image tagging
         "add_platform_to_designs",        # Adds platform column to separate Shopify and Etsy designs
+        "add_image_geometry_columns",     # Adds pixel size, DPI, alpha bbox and content hash to design and mockup images
         "import_local_designs",           # Import local designs with all hash calculations
         "run_canvas_size_migration",      # Canvas size updates
         "migration_add_printers_and_canvas_updates", # Printer and canvas updates
+        "add_print_job_runner_columns",   # Adds printer_id, lease and heartbeat columns for the print job runner
+        "add_stats_covering_indexes",     # Covering indexes for print job, event and printer stats
 
         # Ecommerce migrations
         "create_ecommerce_tables",        # Creates all ecommerce tables for storefront
@@ -133,6 +139,7 @@ def discover_migrations():
         "populate_shipping_from_env",  # Optional: Populate shipping settings from environment variables
         "add_handling_fee_to_storefront_settings",  # Adds handling_fee column for additional shipping charges
         "create_email_tables",  # Creates email messaging system tables for transactional and marketing emails
+        "add_campaign_claim_columns",  # Adds worker lease columns and campaign ID on email logs for resumable sends
 
         # User and subscription migrations
         "create_subscription_tables",          # Creates subscriptions, subscription_usage, billing_history tables
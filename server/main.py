@@ -86,14 +86,17 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️  Warning: Failed to start OAuth token refresh service: {e}")
 
-    # Start email campaign scheduler
-    try:
-        from server.src.services.email_campaign_scheduler import start_email_campaign_scheduler
-        print("🔄 Starting email campaign scheduler service...")
-        asyncio.create_task(start_email_campaign_scheduler())
-        print("✅ Email campaign scheduler started")
-    except Exception as e:
-        print(f"⚠️  Warning: Failed to start email campaign scheduler: {e}")
+    # Email campaigns run in the worker; single-process deployments can opt in here
+    if os.getenv('EMAIL_CAMPAIGN_SCHEDULER_IN_API', 'false').lower() == 'true':
+        try:
+            from server.src.services.email_campaign_scheduler import start_email_campaign_scheduler
+            print("🔄 Starting email campaign scheduler service...")
+            asyncio.create_task(start_email_campaign_scheduler())
+            print("✅ Email campaign scheduler started")
+        except Exception as e:
+            print(f"⚠️  Warning: Failed to start email campaign scheduler: {e}")
+    else:
+        print("ℹ️  Email campaign scheduler runs in the worker service")
 
     # Only start legacy token refresh service in production after API is fully ready
     if os.getenv('RAILWAY_ENVIRONMENT') == 'production':
@@ -142,6 +145,38 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️  Warning: Error stopping email campaign scheduler: {e}")
 
+    # Flush buffered audit events
+    try:
+        from server.src.services.event_writer import audit_event_writer
+        audit_event_writer.stop()
+        print("✅ Audit event writer flushed")
+    except Exception as e:
+        print(f"⚠️  Warning: Error flushing audit event writer: {e}")
+
+    # Stop image processing workers
+    try:
+        from server.src.services.image_process_pool import image_process_pool
+        image_process_pool.shutdown()
+        print("✅ Image process pool stopped")
+    except Exception as e:
+        print(f"⚠️  Warning: Error stopping image process pool: {e}")
+
+    # Stop background PNG recompression (unfinished files keep their upload encoding)
+    try:
+        from server.src.services.png_recompressor import png_recompressor
+        png_recompressor.stop()
+        print("✅ PNG recompressor stopped")
+    except Exception as e:
+        print(f"⚠️  Warning: Error stopping PNG recompressor: {e}")
+
+    # Stop background tagging (untagged designs are picked up by backfill_design_tags)
+    try:
+        from server.src.services.design_tagging_pipeline import design_tagging_pipeline
+        design_tagging_pipeline.stop()
+        print("✅ Design tagging pipeline stopped")
+    except Exception as e:
+        print(f"⚠️  Warning: Error stopping design tagging pipeline: {e}")
+
     # Shutdown cache service
     try:
         from server.src.services.cache_service import cache_service
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark the stats panel queries.
+
+Runs the previous per-metric query pattern and the current single-pass
+aggregates for print job, event and printer stats against the configured
+database, and reports round-trips and latency for each. The stats cache is
+bypassed so every run hits the database.
+
+Usage:
+    python server/scripts/benchmark_stats_queries.py --org-id <uuid> --user-id <uuid> [--days 30] [--runs 20]
+"""
+
+import sys
+import time
+import argparse
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from statistics import median
+from uuid import UUID
+
+from sqlalchemy import event, func
+
+# Add the repository root to the path so server.src imports resolve
+repo_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(repo_root))
+
+from server.src.database.core import SessionLocal, engine
+from server.src.entities.event import Event
+from server.src.entities.print_job import PrintJob, PrintJobStatus
+from server.src.entities.printer import Printer
+from server.src.routes.events.service import EventService
+from server.src.routes.print_jobs.service import PrintJobService
+from server.src.routes.printers.service import PrinterService
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class StatementCounter:
+    """Counts statements sent to the database"""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def legacy_job_stats(db, org_id, days):
+    """Per-metric print job stats queries as they were before the rewrite"""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    window = (PrintJob.org_id == org_id, PrintJob.created_at >= start_date)
+    db.query(func.count(PrintJob.id)).filter(*window).scalar()
+    db.query(PrintJob.status, func.count(PrintJob.id)).filter(*window).group_by(PrintJob.status).all()
+    db.query(PrintJob.job_type, func.count(PrintJob.id)).filter(*window).group_by(PrintJob.job_type).all()
+    db.query(func.avg(func.extract('epoch', PrintJob.completed_at - PrintJob.started_at))).filter(
+        *window,
+        PrintJob.status == PrintJobStatus.COMPLETED,
+        PrintJob.started_at.isnot(None),
+        PrintJob.completed_at.isnot(None)
+    ).scalar()
+
+
+def legacy_event_stats(db, org_id, days):
+    """Per-metric event stats queries as they were before the rewrite"""
+    now = datetime.utcnow()
+    window = (Event.org_id == org_id, Event.created_at >= now - timedelta(days=days), Event.created_at <= now)
+    db.query(func.count(Event.id)).filter(*window).scalar()
+    db.query(Event.event_type, func.count(Event.id)).filter(*window).group_by(Event.event_type).all()
+    db.query(Event.entity_type, func.count(Event.id)).filter(
+        *window, Event.entity_type.isnot(None)
+    ).group_by(Event.entity_type).all()
+    db.query(func.count(Event.id)).filter(
+        Event.org_id == org_id, Event.created_at >= now - timedelta(hours=24), Event.created_at <= now
+    ).scalar()
+
+
+def legacy_printer_stats(db, user_id, org_id):
+    """Per-metric printer stats queries as they were before the rewrite"""
+    scope = (Printer.user_id == user_id, Printer.org_id == org_id)
+    active = Printer.is_active == True
+    db.query(func.count(Printer.id)).filter(*scope).scalar()
+    db.query(func.count(Printer.id)).filter(*scope, active).scalar()
+    db.query(Printer.printer_type, func.count(Printer.id)).filter(*scope, active).group_by(Printer.printer_type).all()
+    db.query(Printer).filter(*scope, active, Printer.is_default == True).first()
+    db.query(func.avg(Printer.dpi)).filter(*scope, active).scalar()
+
+
+def measure(name, fn, runs, counter):
+    """Run fn repeatedly and report statements per call and median latency"""
+    db = SessionLocal()
+    try:
+        fn(db)  # warm up connection and plan cache
+        timings = []
+        counter.count = 0
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn(db)
+            timings.append((time.perf_counter() - start) * 1000)
+        statements = counter.count / runs
+    finally:
+        db.close()
+
+    logger.info(f"{name:<28} {statements:>5.1f} round-trips   median {median(timings):8.2f} ms")
+    return statements, median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stats panel queries")
+    parser.add_argument("--org-id", type=UUID, required=True)
+    parser.add_argument("--user-id", type=UUID, required=True)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    counter = StatementCounter()
+    cases = [
+        ("print job stats",
+         lambda db: legacy_job_stats(db, args.org_id, args.days),
+         lambda db: PrintJobService._compute_job_stats(db, args.org_id, args.days)),
+        ("event stats",
+         lambda db: legacy_event_stats(db, args.org_id, args.days),
+         lambda db: EventService._compute_event_stats(db, args.org_id, args.days)),
+        ("printer stats",
+         lambda db: legacy_printer_stats(db, args.user_id, args.org_id),
+         lambda db: PrinterService._compute_printer_stats(db, args.user_id, args.org_id)),
+    ]
+
+    for name, legacy, current in cases:
+        legacy_statements, legacy_ms = measure(f"{name} (per-metric)", legacy, args.runs, counter)
+        current_statements, current_ms = measure(f"{name} (single pass)", current, args.runs, counter)
+        logger.info(
+            f"{name}: {legacy_statements:.0f} -> {current_statements:.0f} round-trips, "
+            f"{legacy_ms / current_ms if current_ms else 0:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
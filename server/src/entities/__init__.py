@@ -14,6 +14,8 @@ from .mockup import Mockups, MockupImage, MockupMaskData
 from .third_party_oauth import ThirdPartyOAuthToken
 from .shopify_store import ShopifyStore
 from .shopify_product import ShopifyProduct
+from .shopify_order import ShopifyOrder
+from .shopify_sync_state import ShopifySyncState
 
 # Multi-tenant entities (conditionally imported)
 if os.getenv('ENABLE_MULTI_TENANT', 'false').lower() == 'true':
@@ -49,6 +51,8 @@ __all__ = [
     'ThirdPartyOAuthToken',
     'ShopifyStore',
     'ShopifyProduct',
+    'ShopifyOrder',
+    'ShopifySyncState',
     'File',
     'PrintJob',
     'Event',
@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import Column, String, Boolean, DateTime, func, ForeignKey, Table
+from sqlalchemy import Column, String, Boolean, DateTime, Float, Integer, func, ForeignKey, Table
 from sqlalchemy.orm import relationship
 from server.src.database.core import Base
 import uuid
@@ -35,6 +35,14 @@ class DesignImages(Base):
     whash = Column(String(64), nullable=True)  # Perceptual hash for duplicate detection
     tags = Column(JSONB, nullable=True, default=list)  # AI-generated tags for searchability
     tags_metadata = Column(JSONB, nullable=True)  # Metadata about tag generation (model, processing time, categories)
+    # Geometry of the stored file, recorded at ingest so planners don't decode it (utils/image_geometry.py)
+    width_px = Column(Integer, nullable=True)
+    height_px = Column(Integer, nullable=True)
+    dpi_x = Column(Float, nullable=True)
+    dpi_y = Column(Float, nullable=True)
+    channels = Column(Integer, nullable=True)
+    alpha_bbox = Column(JSONB, nullable=True)  # [x, y, width, height] of the non-transparent pixels
+    content_hash = Column(String(64), nullable=True)  # BLAKE2b of the decoded pixels
     canvas_config_id = Column(UUID(as_uuid=True), ForeignKey('canvas_configs.id'), nullable=True)
     platform = Column(String(20), default='etsy', nullable=False)  # 'etsy' or 'shopify'
     is_active = Column(Boolean, default=True)
@@ -25,6 +25,7 @@ class EmailLog(Base):
     # Related entities
     order_id = Column(UUID(as_uuid=True), ForeignKey("ecommerce_orders.id", ondelete="SET NULL"), nullable=True)
     customer_id = Column(UUID(as_uuid=True), ForeignKey("ecommerce_customers.id", ondelete="SET NULL"), nullable=True)
+    scheduled_email_id = Column(UUID(as_uuid=True), ForeignKey("ecommerce_scheduled_emails.id", ondelete="SET NULL"), nullable=True)
 
     # SendGrid tracking
     sendgrid_message_id = Column(String(255))
@@ -31,6 +31,10 @@ class ScheduledEmail(Base):
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
 
+    # Worker lease; an expired lease lets another worker resume the campaign
+    locked_by = Column(String(100))
+    locked_until = Column(DateTime)
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -32,13 +32,15 @@ class Event(Base):
     # Event payload
     payload = Column(JSONB, default={})  # Additional event data
     
-    # Timestamp
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    # Timestamp - also the partition key (monthly range partitions), so it is
+    # part of the primary key
+    created_at = Column(DateTime, primary_key=True, default=lambda: datetime.now(timezone.utc), index=True)
     
     # Indexes for performance - conditionally include org_id indexes
     if MULTI_TENANT_ENABLED:
         __table_args__ = (
-            Index('idx_events_org_type', 'org_id', 'event_type'),
+            Index('idx_events_org_created', 'org_id', 'created_at', postgresql_include=['event_type', 'entity_type']),
+            Index('idx_events_org_type', 'org_id', 'event_type', 'created_at'),
             Index('idx_events_user_created', 'user_id', 'created_at'),
             Index('idx_events_entity', 'entity_type', 'entity_id'),
         )
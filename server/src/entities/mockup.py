@@ -37,6 +37,14 @@ class MockupImage(Base):
     file_path = Column(String, nullable=False)  # Path for base mockup image
     watermark_path = Column(String, nullable=True)
     image_type = Column(String, nullable=True) 
+    # Geometry of the base image, recorded at ingest so planners don't decode it (utils/image_geometry.py)
+    width_px = Column(Integer, nullable=True)
+    height_px = Column(Integer, nullable=True)
+    dpi_x = Column(Float, nullable=True)
+    dpi_y = Column(Float, nullable=True)
+    channels = Column(Integer, nullable=True)
+    alpha_bbox = Column(JSON, nullable=True)  # [x, y, width, height] of the non-transparent pixels
+    content_hash = Column(String(64), nullable=True)  # BLAKE2b of the decoded pixels
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     mockups = relationship('Mockups', back_populates='mockup_images')
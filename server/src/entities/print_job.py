@@ -43,6 +43,7 @@ class PrintJob(Base):
     job_type = Column(Enum(PrintJobType), nullable=False)
     status = Column(Enum(PrintJobStatus), default=PrintJobStatus.QUEUED)
     template_name = Column(String(255))
+    printer_id = Column(UUID(as_uuid=True), ForeignKey('printers.id', ondelete='SET NULL'), nullable=True)
     
     # Job data
     config = Column(JSONB, default={})  # Job-specific configuration
@@ -53,6 +54,10 @@ class PrintJob(Base):
     error_message = Column(Text)
     retry_count = Column(String(10), default='0')
     
+    # Runner claim: worker holding the job and its last heartbeat
+    locked_by = Column(String(100))
+    heartbeat_at = Column(DateTime)
+    
     # Timing
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
@@ -72,6 +77,7 @@ class PrintJob(Base):
             'job_type': self.job_type.value if self.job_type else None,
             'status': self.status.value if self.status else None,
             'template_name': self.template_name,
+            'printer_id': str(self.printer_id) if self.printer_id else None,
             'config': self.config,
             'input_data': self.input_data,
             'output_files': [str(file_id) for file_id in (self.output_files or [])],
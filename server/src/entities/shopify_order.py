@@ -0,0 +1,59 @@
+from sqlalchemy import Column, DateTime, func, ForeignKey, String, Float, Integer, JSON, Index
+from server.src.database.core import Base
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+
+class ShopifyOrder(Base):
+    """
+    Local copy of a Shopify order, populated by the GraphQL bulk sync.
+    line_items are stored in the REST order shape so analytics code can use
+    either source interchangeably.
+    """
+    __tablename__ = 'shopify_orders'
+    __table_args__ = (
+        Index('idx_shopify_orders_store_created', 'store_id', 'order_created_at'),
+        {'extend_existing': True}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    store_id = Column(UUID(as_uuid=True), ForeignKey('shopify_stores.id'), nullable=False)
+
+    # Shopify order information
+    shopify_order_id = Column(String, nullable=False, unique=True)
+    name = Column(String, nullable=True)  # e.g. #1001
+    email = Column(String, nullable=True)
+    financial_status = Column(String, nullable=True)
+    fulfillment_status = Column(String, nullable=True)
+    total_price = Column(Float, nullable=True)
+    currency = Column(String(3), nullable=True)
+    line_items = Column(JSON, nullable=True)
+    item_count = Column(Integer, nullable=True)
+
+    # Shopify timestamps
+    order_created_at = Column(DateTime(timezone=True), nullable=True)
+    order_updated_at = Column(DateTime(timezone=True), nullable=True)
+    cancelled_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Audit fields
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def to_rest_dict(self) -> dict:
+        """Render in the shape returned by the Shopify REST orders endpoint"""
+        return {
+            'id': self.shopify_order_id,
+            'name': self.name,
+            'email': self.email,
+            'financial_status': self.financial_status,
+            'fulfillment_status': self.fulfillment_status,
+            'total_price': str(self.total_price or 0),
+            'currency': self.currency,
+            'created_at': self.order_created_at.isoformat() if self.order_created_at else None,
+            'updated_at': self.order_updated_at.isoformat() if self.order_updated_at else None,
+            'cancelled_at': self.cancelled_at.isoformat() if self.cancelled_at else None,
+            'line_items': self.line_items or []
+        }
+
+    def __repr__(self):
+        return f"<ShopifyOrder(id={self.id}, shopify_order_id={self.shopify_order_id}, name={self.name})>"
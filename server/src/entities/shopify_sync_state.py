@@ -0,0 +1,35 @@
+from sqlalchemy import Column, DateTime, func, ForeignKey, String, Integer, Text, UniqueConstraint
+from server.src.database.core import Base
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+
+class ShopifySyncState(Base):
+    """
+    Tracks GraphQL bulk operation syncs per store and resource
+    (products, orders), so local queries know whether synced data exists.
+    """
+    __tablename__ = 'shopify_sync_state'
+    __table_args__ = (
+        UniqueConstraint('store_id', 'resource', name='uq_shopify_sync_state_store_resource'),
+        {'extend_existing': True}
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    store_id = Column(UUID(as_uuid=True), ForeignKey('shopify_stores.id'), nullable=False)
+    resource = Column(String(20), nullable=False)  # products, orders
+
+    # Current/last bulk operation
+    bulk_operation_id = Column(String, nullable=True)
+    status = Column(String(20), nullable=False, default='idle')  # idle, running, completed, failed
+    object_count = Column(Integer, nullable=True)
+    error_message = Column(Text, nullable=True)
+
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)  # Last successful completion
+
+    # Audit fields
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ShopifySyncState(store_id={self.store_id}, resource={self.resource}, status={self.status})>"
@@ -284,6 +284,10 @@ class ThirdPartyListingDeleteError(ThirdPartyListingError):
     def __init__(self, listing_id: int):
         super().__init__(status_code=500, detail=f"Could not delete third party listing with ID: {listing_id}.")
 
+class ThirdPartyListingBulkJobNotFoundError(ThirdPartyListingError):
+    def __init__(self, job_id: str):
+        super().__init__(status_code=404, detail=f"Bulk update job with ID: {job_id} could not be found.")
+
 # Error Messages
 ERROR_MESSAGES = {
     'oauth_failed': 'OAuth authentication failed',
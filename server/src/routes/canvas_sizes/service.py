@@ -17,6 +17,7 @@ from server.src.message import(
     CanvasConfigUpdateError,
     CanvasConfigDeleteError
 )
+from server.src.services.sizing_registry import sizing_registry
 import logging
 
 def create_canvas_config(canvas_config: model.CanvasConfigCreate, product_template_id: UUID, db: Session) -> model.CanvasConfigResponse:
@@ -48,6 +49,7 @@ def create_canvas_config(canvas_config: model.CanvasConfigCreate, product_templa
         
         db.add(db_canvas_config)
         db.commit()
+        sizing_registry.invalidate(product_template_id)
         db.refresh(db_canvas_config)
         logging.info(f"Successfully created new canvas config with name: {canvas_config.name} for product_template ID: {product_template_id}")
 
@@ -117,6 +119,7 @@ def update_canvas_config(canvas_config: model.CanvasConfigUpdate, canvas_config_
             setattr(db_canvas_config, field, value)
         
         db.commit()
+        sizing_registry.invalidate(product_template_id)
         db.refresh(db_canvas_config)
         
         logging.info(f"Successfully updated canvas config with ID: {product_template_id}")
@@ -141,6 +144,7 @@ def delete_canvas_config(canvas_config_id: UUID, product_template_id: UUID, db:
         
         db.delete(db_canvas_config)
         db.commit()
+        sizing_registry.invalidate(product_template_id)
         logging.info(f"Successfully deleted canvas config with ID: {canvas_config_id} and product template ID: {product_template_id}")
 
     except Exception as e:
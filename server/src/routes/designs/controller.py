@@ -1,5 +1,6 @@
-from fastapi import APIRouter, status, Query, UploadFile, File, Depends, Form, HTTPException
+from fastapi import APIRouter, status, Query, UploadFile, File, Depends, Form, HTTPException, Request
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List
 from uuid import UUID
 from sqlalchemy.orm import Session
@@ -8,6 +9,7 @@ from server.src.routes.auth.service import CurrentUser
 from server.src.message import InvalidUserToken
 from server.src.utils.progress_manager import progress_manager
 from server.src.services.cache_service import ApiCache
+from server.src.services.upload_spool import MultipartSpoolParser, UploadSpool, UploadStreamError
 from . import model
 from . import service
 import json
@@ -184,6 +186,87 @@ async def create_design(
 
     return await create_design_threaded()
 
+@router.post('/stream', response_model=model.DesignImageListResponse, status_code=status.HTTP_201_CREATED)
+async def create_design_streaming(
+    request: Request,
+    current_user: CurrentUser,
+    db: Session = Depends(get_db)
+):
+    """
+    Create designs from a streaming upload (threaded processing)
+
+    Takes the same form as POST /designs/, with design_data and session_id
+    sent before the files. Files are spooled to disk and processed as each
+    one arrives instead of after the whole body has been read; reading
+    pauses while UPLOAD_STREAM_MAX_INFLIGHT_MB is received but unprocessed.
+    """
+    user_id = current_user.get_uuid()
+    if not user_id:
+        raise InvalidUserToken()
+
+    total_bytes = int(request.headers.get('content-length') or 0)
+    spool = UploadSpool()
+    session_id = None
+    progress_callback = None
+    processing = None
+
+    def on_file(spooled):
+        logging.info(f"📥 Received {spooled.filename} ({spooled.size / 1024 / 1024:.2f}MB)")
+        if progress_callback:
+            received = spool.received_bytes / total_bytes if total_bytes else 0
+            progress_callback(0, f"Received {spooled.filename}", 4, min(received, 1.0), spooled.filename)
+
+    try:
+        try:
+            parser = MultipartSpoolParser(request.headers.get('content-type'), spool, on_file=on_file)
+        except UploadStreamError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        async for chunk in request.stream():
+            await run_in_threadpool(parser.write, chunk)
+
+            if processing is None and spool.file_count:
+                # Form fields precede the files, so everything needed to start is here
+                if 'design_data' not in parser.fields:
+                    raise HTTPException(status_code=400, detail="design_data must be sent before the files")
+                design_model = model.DesignImageCreate(**json.loads(parser.fields['design_data']))
+                session_id = parser.fields.get('session_id') or None
+                if session_id:
+                    def progress_callback(step: int, message: str, total_steps: int = 4, file_progress: float = 0, current_file: str = ""):
+                        progress_manager.update_progress(session_id, step + 1, total_steps, message, file_progress, current_file)
+                processing = asyncio.get_event_loop().run_in_executor(
+                    thread_pool,
+                    functools.partial(service.create_design_from_stream, db, user_id, design_model, spool, progress_callback)
+                )
+
+            # Backpressure: stop reading the request until processing catches up
+            while spool.over_capacity() and not processing.done():
+                await run_in_threadpool(spool.wait_for_capacity, 1.0)
+
+        await run_in_threadpool(parser.finalize)
+        if processing is None:
+            raise HTTPException(status_code=400, detail="No files uploaded")
+
+        result = await processing
+        if session_id:
+            progress_manager.complete_session(session_id, success=True, final_message="Upload completed successfully")
+        return result
+
+    except Exception as e:
+        spool.abort()
+        if processing is not None:
+            try:
+                await processing
+            except Exception:
+                pass
+        if session_id:
+            progress_manager.complete_session(session_id, success=False, final_message=f"Upload failed: {str(e)}")
+        if isinstance(e, UploadStreamError):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise
+    finally:
+        spool.cleanup()
+
 @router.get('/list', response_model=model.DesignImageListResponse)
 async def get_designs(
     current_user: CurrentUser,
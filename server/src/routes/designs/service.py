@@ -36,6 +36,12 @@ import cv2
 from server.src.utils.cropping import crop_transparent
 from server.src.utils.resizing import resize_image_by_inches
 from server.src.utils.util import find_png_files
+from server.src.utils.perceptual_hash import compute_hashes, compute_hashes_batch
+from server.src.utils.image_geometry import measure_array
+from server.src.utils.png_encoding import DESIGN_PNG_PROFILE, encode_png
+from server.src.services.png_recompressor import png_recompressor
+from server.src.services.design_tagging_pipeline import TagRequest, design_tagging_pipeline
+from server.src.services.sizing_registry import sizing_registry
 from server.src.utils.railway_cache import railway_cached, cache_design_list, get_cached_design_list, invalidate_user_cache
 
 
@@ -93,6 +99,11 @@ def get_shopify_shop_name(db: Session, user_id: UUID) -> str:
     """Get the Shopify shop name for a user (convenience wrapper)"""
     return get_platform_shop_name(db, user_id, platform='shopify')
 
+
+# Images hashed together by build_hash_db_from_processed
+HASH_BATCH_SIZE = 32
+
+
 def calculate_multiple_hashes(image_path: str = None, image=None, hash_size: int = 16) -> dict:
     """
     Calculate multiple perceptual hashes for better duplicate detection.
@@ -111,12 +122,7 @@ def calculate_multiple_hashes(image_path: str = None, image=None, hash_size: int
                 raise ValueError("Either image_path or image must be provided")
             image = Image.open(image_path)
 
-        return {
-            'phash': str(imagehash.phash(image, hash_size=hash_size)),
-            'ahash': str(imagehash.average_hash(image, hash_size=hash_size)),
-            'dhash': str(imagehash.dhash(image, hash_size=hash_size)),
-            'whash': str(imagehash.whash(image, hash_size=hash_size))
-        }
+        return compute_hashes(image, hash_size=hash_size)
     except Exception as e:
         logging.error(f"Error calculating hashes for {image_path}: {e}")
         raise
@@ -155,6 +161,8 @@ def process_images_for_comparison(image_paths, db=None, canvas_id=None, product_
         list: List of processed image arrays
     """
     processed_images = []
+    # Resolved once for all images
+    configs = sizing_registry.get(db, canvas_id, product_template_id)
 
     for image_path in image_paths:
         try:
@@ -166,12 +174,10 @@ def process_images_for_comparison(image_paths, db=None, canvas_id=None, product_
                 resized_image = resize_image_by_inches(
                     image_path=image_path,
                     image_type="UVDTF 16oz",  # Default type
-                    db=db,
-                    canvas_id=canvas_id,
-                    product_template_id=product_template_id,
                     image_size="",
                     image=cropped_image,
-                    target_dpi=target_dpi
+                    target_dpi=target_dpi,
+                    configs=configs
                 )
                 processed_images.append(resized_image)
             else:
@@ -188,32 +194,26 @@ def process_images_for_comparison(image_paths, db=None, canvas_id=None, product_
 def build_hash_db_from_processed(image_paths, processed_images, hash_size=16):
     """
     Build hash database from processed images.
+
+    Hashes are computed HASH_BATCH_SIZE images at a time; if a batch fails,
+    its images are hashed one by one so only the bad image is skipped.
     """
     hash_db = {}
-    for i, path in enumerate(image_paths):
-        if i < len(processed_images) and processed_images[i] is not None:
-            try:
-                # Convert OpenCV image (BGR/BGRA) to RGB for PIL
-                img_array = processed_images[i]
-                if len(img_array.shape) == 3:
-                    if img_array.shape[2] == 4:  # BGRA
-                        img_rgb = cv2.cvtColor(img_array, cv2.COLOR_BGRA2RGBA)
-                    else:  # BGR
-                        img_rgb = cv2.cvtColor(img_array, cv2.COLOR_BGR2RGB)
-                else:  # Grayscale
-                    img_rgb = img_array
-
-                # Convert to PIL Image
-                pil_img = Image.fromarray(img_rgb)
-
-                hash_db[path] = {
-                    'phash': imagehash.phash(pil_img, hash_size=hash_size),
-                    'ahash': imagehash.average_hash(pil_img, hash_size=hash_size),
-                    'dhash': imagehash.dhash(pil_img, hash_size=hash_size),
-                    'whash': imagehash.whash(pil_img, hash_size=hash_size)
-                }
-            except Exception as e:
-                logging.error(f"Skipping hash generation for {path}: {e}")
+    items = [
+        (path, processed_images[i]) for i, path in enumerate(image_paths)
+        if i < len(processed_images) and processed_images[i] is not None
+    ]
+    for start in range(0, len(items), HASH_BATCH_SIZE):
+        batch = items[start:start + HASH_BATCH_SIZE]
+        try:
+            hashes = compute_hashes_batch([image for _, image in batch], hash_size=hash_size, as_hex=False)
+            hash_db.update((path, image_hashes) for (path, _), image_hashes in zip(batch, hashes))
+        except Exception:
+            for path, image in batch:
+                try:
+                    hash_db[path] = compute_hashes(image, hash_size=hash_size, as_hex=False)
+                except Exception as e:
+                    logging.error(f"Skipping hash generation for {path}: {e}")
     return hash_db
 
 
@@ -229,24 +229,7 @@ def check_duplicates_processed(new_image_paths, processed_new_images, hash_db, t
 
         if i < len(processed_new_images) and processed_new_images[i] is not None:
             try:
-                # Convert OpenCV image to PIL format
-                img_array = processed_new_images[i]
-                if len(img_array.shape) == 3:
-                    if img_array.shape[2] == 4:  # BGRA
-                        img_rgb = cv2.cvtColor(img_array, cv2.COLOR_BGRA2RGBA)
-                    else:  # BGR
-                        img_rgb = cv2.cvtColor(img_array, cv2.COLOR_BGR2RGB)
-                else:  # Grayscale
-                    img_rgb = img_array
-
-                pil_img = Image.fromarray(img_rgb)
-
-                new_hashes = {
-                    'phash': imagehash.phash(pil_img, hash_size=hash_size),
-                    'ahash': imagehash.average_hash(pil_img, hash_size=hash_size),
-                    'dhash': imagehash.dhash(pil_img, hash_size=hash_size),
-                    'whash': imagehash.whash(pil_img, hash_size=hash_size)
-                }
+                new_hashes = compute_hashes(processed_new_images[i], hash_size=hash_size, as_hex=False)
 
                 for existing_path, existing_hashes in hash_db.items():
                     matches = 0
@@ -512,33 +495,7 @@ async def _create_design_with_comprehensive_workflow(db: Session, user_id: UUID,
             progress_callback(1, f"Processed {result.processed_images} images, skipped {result.skipped_duplicates} duplicates")
 
         # Convert workflow results back to the expected format
-        design_results = []
-
-        # Query database for all recently created designs by this workflow
-        # Since the comprehensive workflow creates designs directly in the database during processing,
-        # we need to find them by querying for recent designs created in the last few minutes
-
-        from datetime import timedelta
-        recent_time = datetime.now(timezone.utc) - timedelta(minutes=5)
-
-        try:
-            # Get all designs created recently by this user
-            recent_designs_query = db.query(DesignImages).filter(
-                DesignImages.user_id == user_id,
-                DesignImages.created_at >= recent_time,
-                DesignImages.is_active == True
-            ).order_by(DesignImages.created_at.desc())
-
-            recent_designs = recent_designs_query.limit(result.processed_images + 5).all()
-
-            # Take the most recent designs up to the number processed
-            design_results = recent_designs[:result.processed_images] if result.processed_images > 0 else []
-
-            logging.info(f"Found {len(design_results)} recently created designs for comprehensive workflow result")
-
-        except Exception as e:
-            logging.error(f"Error querying recent designs: {e}")
-            design_results = []
+        design_results = _get_workflow_designs(db, user_id, result.processed_images)
 
         # If no designs were found in DB (fallback), create them using original method
         if not design_results:
@@ -562,6 +519,65 @@ async def _create_design_with_comprehensive_workflow(db: Session, user_id: UUID,
         return await _create_design_original(db, user_id, design_data, files, progress_callback)
 
 
+def _get_workflow_designs(db: Session, user_id: UUID, processed_images: int) -> List[DesignImages]:
+    """
+    Designs created by a comprehensive workflow run
+
+    The workflow creates designs directly in the database during processing,
+    so they are found by querying for recent designs created in the last few minutes
+    """
+    from datetime import datetime, timedelta, timezone
+    recent_time = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+    try:
+        # Get all designs created recently by this user
+        recent_designs_query = db.query(DesignImages).filter(
+            DesignImages.user_id == user_id,
+            DesignImages.created_at >= recent_time,
+            DesignImages.is_active == True
+        ).order_by(DesignImages.created_at.desc())
+
+        recent_designs = recent_designs_query.limit(processed_images + 5).all()
+
+        # Take the most recent designs up to the number processed
+        design_results = recent_designs[:processed_images] if processed_images > 0 else []
+
+        logging.info(f"Found {len(design_results)} recently created designs for comprehensive workflow result")
+        return design_results
+
+    except Exception as e:
+        logging.error(f"Error querying recent designs: {e}")
+        return []
+
+
+def create_design_from_stream(db: Session, user_id: UUID, design_data: model.DesignImageCreate, spool, progress_callback=None) -> model.DesignImageListResponse:
+    """
+    Create designs from a streaming upload while it is still being received
+
+    Files are taken from the UploadSpool as they arrive and processed by the
+    comprehensive workflow. Unlike create_design there is no fallback to the
+    original workflow: spooled files are deleted once processed.
+    """
+    from server.src.services.image_upload_workflow import create_workflow
+
+    if design_data.platform == 'etsy' and design_data.product_template_id:
+        design_data.platform = _detect_platform_from_template(db, design_data.product_template_id)
+
+    max_threads = int(os.getenv('COMPREHENSIVE_WORKFLOW_MAX_THREADS', '4'))
+    workflow = create_workflow(user_id=str(user_id), db_session=db, max_threads=max_threads, progress_callback=progress_callback)
+    result = workflow.process_upload_stream(spool, design_data)
+
+    design_results = _get_workflow_designs(db, user_id, result.processed_images)
+    if progress_callback:
+        progress_callback(2, f"Successfully created {len(design_results)} designs")
+
+    logging.info(f"Streaming workflow completed: {len(design_results)} designs created for user: {user_id}")
+    return model.DesignImageListResponse(
+        designs=[model.DesignImageResponse.model_validate(design) for design in design_results],
+        total=len(design_results)
+    )
+
+
 async def _create_design_original(db: Session, user_id: UUID, design_data: model.DesignImageCreate, files: List[UploadFile], progress_callback=None) -> model.DesignImageListResponse:
     """
     Original design creation workflow (preserved for backward compatibility and single files)
@@ -597,6 +613,9 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
         else:
             designs_path = f"{local_root_path}{platform_shop_name}/{template.name}/"
         os.makedirs(designs_path, exist_ok=True)
+
+        # Sizing configs for every file in this upload, resolved once
+        sizing_configs = sizing_registry.get(db, design_data.canvas_config_id, design_data.product_template_id)
         
         async def resize_and_hash_physical(file):
             """Resize image and calculate hashes (before duplicate check) - no upload yet"""
@@ -629,9 +648,7 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                 resized_image = resize_image_by_inches(
                     image=cropped_image,
                     image_type=template.name,
-                    db=db,
-                    canvas_id=design_data.canvas_config_id,
-                    product_template_id=design_data.product_template_id
+                    configs=sizing_configs
                 )
                 logging.info(f"📐 Resized in {time.time() - resize_start:.2f}s")
 
@@ -648,10 +665,8 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                 pil_img_normalized = pil_img.resize((256, 256), Image.Resampling.LANCZOS)
 
                 # Calculate all 4 hash types
-                phash = str(imagehash.phash(pil_img_normalized, hash_size=16))
-                ahash = str(imagehash.average_hash(pil_img_normalized, hash_size=16))
-                dhash = str(imagehash.dhash(pil_img_normalized, hash_size=16))
-                whash = str(imagehash.whash(pil_img_normalized, hash_size=16))
+                hashes = compute_hashes(pil_img_normalized, hash_size=16)
+                phash, ahash, dhash, whash = hashes['phash'], hashes['ahash'], hashes['dhash'], hashes['whash']
 
                 logging.info(f"🔐 Generated hashes in {time.time() - hash_start:.2f}s: phash={phash[:8]}...")
 
@@ -705,11 +720,8 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                     # Grayscale
                     pil_image = Image.fromarray(resized_image)
 
-                # Save with DPI metadata
-                from io import BytesIO
-                buffer = BytesIO()
-                pil_image.save(buffer, format='PNG', optimize=True, compress_level=3, dpi=(400, 400))
-                image_bytes = buffer.getvalue()
+                # Save with DPI metadata using the ingestion profile
+                image_bytes = encode_png(pil_image, DESIGN_PNG_PROFILE, dpi=(400, 400))
                 logging.info(f"💾 Encoded in {time.time() - encode_start:.2f}s ({len(image_bytes) / 1024 / 1024:.2f}MB) with DPI: 400x400")
 
                 # Upload to NAS
@@ -722,6 +734,7 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                 )
                 if success:
                     logging.info(f"✅ Uploaded to NAS in {time.time() - nas_start:.2f}s: {relative_path}")
+                    png_recompressor.submit(platform_shop_name, relative_path, image_bytes)
                 else:
                     logging.warning(f"⚠️ Failed to upload to NAS: {relative_path}")
                     return None, None, None
@@ -851,13 +864,13 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                 logging.info(f"✂️ Cropped in {time.time() - crop_start:.2f}s")
 
                 # Get DPI and handle 16-bit images
-                target_dpi = get_dpi_from_image(image)
+                target_dpi = get_dpi_from_image(contents)
                 if cropped_image.dtype == np.uint16:
                     cropped_image = (cropped_image / 256).astype(np.uint8)
 
                 # Calculate dimensions and resize
                 resize_start = time.time()
-                current_width_inches, current_height_inches = get_width_and_height(cropped_image, target_dpi[0])
+                current_width_inches, current_height_inches = get_width_and_height(cropped_image, contents, target_dpi[0])
                 resized_image = cv2.resize(
                     cropped_image,
                     (
@@ -881,10 +894,8 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                 pil_img_normalized = pil_img.resize((256, 256), Image.Resampling.LANCZOS)
 
                 # Calculate all 4 hash types
-                phash = str(imagehash.phash(pil_img_normalized, hash_size=16))
-                ahash = str(imagehash.average_hash(pil_img_normalized, hash_size=16))
-                dhash = str(imagehash.dhash(pil_img_normalized, hash_size=16))
-                whash = str(imagehash.whash(pil_img_normalized, hash_size=16))
+                hashes = compute_hashes(pil_img_normalized, hash_size=16)
+                phash, ahash, dhash, whash = hashes['phash'], hashes['ahash'], hashes['dhash'], hashes['whash']
 
                 logging.info(f"🔐 Generated hashes in {time.time() - hash_start:.2f}s: phash={phash[:8]}...")
 
@@ -936,11 +947,8 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                     # Grayscale
                     pil_image = Image.fromarray(resized_image)
 
-                # Save with DPI metadata
-                from io import BytesIO
-                buffer = BytesIO()
-                pil_image.save(buffer, format='PNG', optimize=True, compress_level=3, dpi=(400, 400))
-                image_bytes = buffer.getvalue()
+                # Save with DPI metadata using the ingestion profile
+                image_bytes = encode_png(pil_image, DESIGN_PNG_PROFILE, dpi=(400, 400))
                 logging.info(f"💾 Encoded in {time.time() - encode_start:.2f}s ({len(image_bytes) / 1024 / 1024:.2f}MB) with DPI: 400x400")
 
                 # Upload to NAS
@@ -953,6 +961,7 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                 )
                 if success:
                     logging.info(f"✅ Uploaded to NAS in {time.time() - nas_start:.2f}s: {relative_path}")
+                    png_recompressor.submit(platform_shop_name, relative_path, image_bytes)
                 else:
                     logging.warning(f"⚠️ Failed to upload to NAS: {relative_path}")
                     return None, None, None
@@ -1065,6 +1074,7 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                 logging.info(f"⚠️ {file.filename} is duplicate of {duplicate_source} (checked in {check_time:.3f}s)")
 
         design_results = []
+        tagging_content = []
 
         # Step 3: Upload only non-duplicate images and save to database
         if progress_callback:
@@ -1101,20 +1111,6 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
 
             logging.info(f"🔐 Using hashes: phash={phash[:8]}..., ahash={ahash[:8]}..., dhash={dhash[:8]}..., whash={whash[:8]}...")
 
-            # Generate AI tags if enabled (non-blocking)
-            tags = []
-            tags_metadata = None
-            if os.getenv('ENABLE_AI_TAGGING', 'true').lower() == 'true':
-                try:
-                    from server.src.services.ai_tagging_service import ai_tagging_service
-                    tags_result = ai_tagging_service.generate_tags(image_bytes, filename)
-                    tags = tags_result.get('tags', [])
-                    tags_metadata = tags_result.get('metadata')
-                    logging.info(f"🏷️ Generated {len(tags)} tags for {filename}")
-                except Exception as e:
-                    logging.warning(f"AI tagging failed (non-blocking): {e}")
-                    tags_metadata = {'error': str(e)}
-
             # Build NAS file path for storage (matching nas_storage.upload_file_content format)
             # nas_storage.base_path = "/share/Graphics"
             # upload_file_content builds: {base_path}/{shop_name}/{relative_path}
@@ -1122,6 +1118,9 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
             platform_shop_name = get_platform_shop_name(db, user_id, platform=design_data.platform)
             nas_file_path = f"/share/Graphics/{platform_shop_name}/{nas_relative_path}"
 
+            # Geometry of the stored PNG (encoded at 400 DPI), so planners don't have to decode it
+            geometry = measure_array(data['resized_image'], (400, 400))
+
             design = DesignImages(
                 user_id=user_id,
                 filename=filename,
@@ -1134,15 +1133,31 @@ async def _create_design_original(db: Session, user_id: UUID, design_data: model
                 canvas_config_id=design_data.canvas_config_id,
                 platform=design_data.platform,  # Set platform (etsy or shopify)
                 is_active=design_data.is_active,
-                tags=tags,  # AI-generated tags
-                tags_metadata=tags_metadata  # Tag generation metadata
+                tags=[],  # Filled in by the tagging pipeline after commit
+                tags_metadata=None,
+                **geometry.to_columns()
             )
             design_results.append(design)
+            tagging_content.append(image_bytes)
             db.add(design)
             logging.info(f"✅ Added design to database: {filename}")
         
         db.commit()
 
+        # AI tags are generated in the background and backfilled onto the designs
+        try:
+            for design, image_bytes in zip(design_results, tagging_content):
+                design_tagging_pipeline.submit(TagRequest(
+                    design_id=design.id,
+                    user_id=user_id,
+                    phash=design.phash,
+                    filename=design.filename,
+                    file_path=design.file_path,
+                    content=image_bytes
+                ))
+        except Exception as e:
+            logging.warning(f"Failed to queue AI tagging (non-blocking): {e}")
+
         if duplicate_count > 0:
             logging.info(f"⚠️ Skipped {duplicate_count} duplicate designs out of {len(files)} total files")
 
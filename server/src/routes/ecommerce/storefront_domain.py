@@ -465,9 +465,12 @@ async def verify_domain(
 
     # Import DNS verification service
     try:
-        from server.src.services.dns_verification_service import verify_domain_ownership
+        from server.src.services.dns_verification_service import (
+            record_verification_result,
+            verify_domain_ownership_async
+        )
 
-        result = verify_domain_ownership(
+        result = await verify_domain_ownership_async(
             domain=settings.custom_domain,
             expected_token=settings.domain_verification_token
         )
@@ -478,16 +481,7 @@ async def verify_domain(
             DomainVerification.domain == settings.custom_domain
         ).order_by(DomainVerification.created_at.desc()).first()
 
-        if verification:
-            verification.attempts += 1
-            verification.last_checked_at = datetime.utcnow()
-
-        if result['verified']:
-            settings.domain_verified = True
-            if verification:
-                verification.status = "verified"
-                verification.verified_at = datetime.utcnow()
-
+        if record_verification_result(db, settings, verification, result):
             db.commit()
 
             # Schedule SSL provisioning in background
@@ -499,10 +493,6 @@ async def verify_domain(
                 "domain": settings.custom_domain
             }
         else:
-            if verification:
-                verification.status = "failed"
-                verification.error_message = result.get('error', 'Verification failed')
-
             db.commit()
 
             return {
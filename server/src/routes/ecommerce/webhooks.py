@@ -1,13 +1,10 @@
 """Webhook handlers for ecommerce integrations."""
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 import logging
 
-from server.src.database.core import get_db
-from server.src.entities.ecommerce.email_log import EmailLog
-from server.src.entities.ecommerce.email_subscriber import EmailSubscriber
+from server.src.services.sendgrid_event_processor import sendgrid_event_queue
 
 logger = logging.getLogger(__name__)
 
@@ -18,10 +15,7 @@ router = APIRouter(
 
 
 @router.post('/sendgrid')
-async def sendgrid_webhook(
-    request: Request,
-    db: Session = Depends(get_db)
-):
+async def sendgrid_webhook(request: Request):
     """
     Handle SendGrid webhook events for email tracking.
 
@@ -34,8 +28,9 @@ async def sendgrid_webhook(
     - deferred: Temporary delivery failure
     - processed: SendGrid received and will attempt to deliver
 
-    This endpoint updates email logs with delivery status and updates
-    subscriber analytics (open/click counts).
+    The batch is acknowledged as soon as it is queued; the SendGrid event
+    processor then updates email logs with delivery status and subscriber
+    analytics (open/click counts) with a few set-based statements per batch.
     """
     try:
         # SendGrid sends events as JSON array
@@ -46,114 +41,9 @@ async def sendgrid_webhook(
 
         logger.info(f"Received {len(events)} SendGrid webhook events")
 
-        for event in events:
-            try:
-                # Extract event data
-                sendgrid_message_id = event.get('sg_message_id')
-                event_type = event.get('event')  # delivered, open, click, bounce, etc.
-                timestamp = event.get('timestamp')
-                email = event.get('email')
+        await run_in_threadpool(sendgrid_event_queue.enqueue, events)
 
-                if not sendgrid_message_id or not event_type:
-                    logger.warning(f"Incomplete event data: {event}")
-                    continue
-
-                # Convert timestamp to datetime
-                event_time = datetime.fromtimestamp(timestamp) if timestamp else datetime.utcnow()
-
-                # Find email log by SendGrid message ID
-                email_log = db.query(EmailLog).filter(
-                    EmailLog.sendgrid_message_id == sendgrid_message_id
-                ).first()
-
-                if not email_log:
-                    logger.warning(f"No email log found for message ID: {sendgrid_message_id}")
-                    continue
-
-                # Update email log status
-                email_log.sendgrid_status = event_type
-
-                if event_type == "delivered":
-                    email_log.delivered_at = event_time
-                    logger.info(f"Email delivered: {sendgrid_message_id} to {email}")
-
-                elif event_type == "open":
-                    if not email_log.opened_at:
-                        email_log.opened_at = event_time
-                        logger.info(f"Email opened: {sendgrid_message_id} by {email}")
-
-                        # Update subscriber stats
-                        if email_log.customer_id:
-                            subscriber = db.query(EmailSubscriber).filter(
-                                EmailSubscriber.user_id == email_log.user_id,
-                                EmailSubscriber.customer_id == email_log.customer_id
-                            ).first()
-                            if subscriber:
-                                subscriber.total_opened += 1
-
-                        elif email:
-                            subscriber = db.query(EmailSubscriber).filter(
-                                EmailSubscriber.user_id == email_log.user_id,
-                                EmailSubscriber.email == email
-                            ).first()
-                            if subscriber:
-                                subscriber.total_opened += 1
-
-                elif event_type == "click":
-                    if not email_log.clicked_at:
-                        email_log.clicked_at = event_time
-                        logger.info(f"Email clicked: {sendgrid_message_id} by {email}")
-
-                        # Update subscriber stats
-                        if email_log.customer_id:
-                            subscriber = db.query(EmailSubscriber).filter(
-                                EmailSubscriber.user_id == email_log.user_id,
-                                EmailSubscriber.customer_id == email_log.customer_id
-                            ).first()
-                            if subscriber:
-                                subscriber.total_clicked += 1
-
-                        elif email:
-                            subscriber = db.query(EmailSubscriber).filter(
-                                EmailSubscriber.user_id == email_log.user_id,
-                                EmailSubscriber.email == email
-                            ).first()
-                            if subscriber:
-                                subscriber.total_clicked += 1
-
-                elif event_type == "bounce":
-                    bounce_reason = event.get('reason', '')
-                    email_log.error_message = f"Bounced: {bounce_reason}"
-                    logger.warning(f"Email bounced: {sendgrid_message_id} - {bounce_reason}")
-
-                elif event_type == "dropped":
-                    drop_reason = event.get('reason', '')
-                    email_log.error_message = f"Dropped: {drop_reason}"
-                    email_log.sendgrid_status = "failed"
-                    logger.warning(f"Email dropped: {sendgrid_message_id} - {drop_reason}")
-
-                elif event_type == "spamreport":
-                    # User marked email as spam - unsubscribe them
-                    if email:
-                        subscriber = db.query(EmailSubscriber).filter(
-                            EmailSubscriber.user_id == email_log.user_id,
-                            EmailSubscriber.email == email
-                        ).first()
-                        if subscriber and subscriber.is_subscribed:
-                            subscriber.is_subscribed = False
-                            subscriber.unsubscribed_at = datetime.utcnow()
-                            logger.info(f"Auto-unsubscribed {email} due to spam report")
-
-                # Commit after each event
-                db.commit()
-
-            except Exception as e:
-                logger.error(f"Error processing individual webhook event: {e}")
-                db.rollback()
-                # Continue processing other events
-                continue
-
-        return {"status": "success", "processed": len(events)}
+        return {"status": "success", "queued": len(events)}
 
     except Exception as e:
         logger.error(f"SendGrid webhook error: {e}")
@@ -2,13 +2,15 @@
 Event/Audit API routes
 """
 
+import json
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from server.src.database.core import get_db
+from server.src.database.core import get_db, SessionLocal
 from server.src.auth.dependencies import get_current_user
 from server.src.entities.user import User
 from server.src.routes.organizations.service import OrganizationService
@@ -230,28 +232,45 @@ def export_audit_trail(
     if (end_date - start_date).days > 365:
         raise HTTPException(status_code=400, detail="Date range cannot exceed 365 days")
     
-    events = EventService.export_audit_trail(
-        db=db,
-        org_id=org_id,
-        start_date=start_date,
-        end_date=end_date,
-        entity_type=entity_type,
-        entity_id=entity_id
-    )
-    
-    # Return as JSON for now - in production you might want CSV/Excel export
-    return {
-        "export_info": {
-            "org_id": org_id,
-            "start_date": start_date,
-            "end_date": end_date,
-            "entity_type": entity_type,
-            "entity_id": entity_id,
-            "total_events": len(events)
-        },
-        "events": [model.EventResponse.model_validate(event) for event in events]
+    export_info = {
+        "org_id": str(org_id),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "entity_type": entity_type,
+        "entity_id": str(entity_id) if entity_id else None
     }
 
+    def generate():
+        # The request session is closed once the response starts, so the
+        # export cursor gets its own session
+        export_db = SessionLocal()
+        try:
+            events = EventService.export_audit_trail(
+                db=export_db,
+                org_id=org_id,
+                start_date=start_date,
+                end_date=end_date,
+                entity_type=entity_type,
+                entity_id=entity_id
+            )
+            total = 0
+            yield '{"events": ['
+            for event in events:
+                if total:
+                    yield ','
+                yield model.EventResponse.model_validate(event).model_dump_json()
+                total += 1
+            # total_events is only known at the end, so export_info follows the events
+            yield '], "export_info": ' + json.dumps({**export_info, "total_events": total}) + '}'
+        finally:
+            export_db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/json",
+        headers={"Content-Disposition": f"attachment; filename=audit_trail_{org_id}.json"}
+    )
+
 # System-wide routes (admin only)
 @router.get("/system/activity", response_model=model.EventListResponse)
 def get_recent_system_activity(
@@ -3,17 +3,22 @@ Event/Audit service layer for system monitoring and audit trails
 """
 
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from uuid import UUID
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_, desc
 
 from server.src.entities.event import Event, EventTypes
+from server.src.services.event_writer import audit_event_writer
+from server.src.services import event_partitions
+from server.src.utils.stats_cache import stats_cache
 from . import model
 
 logger = logging.getLogger(__name__)
 
+EXPORT_BATCH_SIZE = 1000
+
 class EventService:
     
     @staticmethod
@@ -23,27 +28,27 @@ class EventService:
         user_id: Optional[UUID],
         event_data: model.EventCreate
     ) -> Event:
-        """Create a new event"""
-        try:
-            event = Event.create_event(
-                event_type=event_data.event_type,
-                org_id=org_id,
-                user_id=user_id,
-                entity_type=event_data.entity_type,
-                entity_id=event_data.entity_id,
-                payload=event_data.payload
-            )
-            db.add(event)
-            db.commit()
-            db.refresh(event)
-            
-            logger.debug(f"Created event: {event.id} - {event.event_type}")
-            return event
-            
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error creating event: {e}")
-            raise
+        """
+        Create a new event.
+
+        By default the event is handed to the buffered audit writer and
+        inserted in a batch shortly after, outside the caller's transaction.
+        With EVENT_WRITER_MODE=session it is committed through the caller's
+        session instead; the returned Event already carries its id and
+        created_at either way.
+        """
+        event = audit_event_writer.submit(
+            db=db,
+            event_type=event_data.event_type,
+            org_id=org_id,
+            user_id=user_id,
+            entity_type=event_data.entity_type,
+            entity_id=event_data.entity_id,
+            payload=event_data.payload
+        )
+
+        logger.debug(f"Queued event: {event.id} - {event.event_type}")
+        return event
 
     @staticmethod
     def get_event_by_id(db: Session, event_id: UUID) -> Optional[Event]:
@@ -146,46 +151,51 @@ class EventService:
 
     @staticmethod
     def get_event_stats(db: Session, org_id: UUID, days: int = 30) -> Dict[str, Any]:
-        """Get event statistics for organization"""
+        """
+        Get event statistics for organization.
+
+        One query grouped by (event_type, entity_type) yields all counts,
+        including the last-24h count as a FILTER aggregate, and results are
+        cached briefly per (org, days).
+        """
+        return stats_cache.get_or_compute(
+            "event_stats", org_id, days,
+            lambda: EventService._compute_event_stats(db, org_id, days)
+        )
+
+    @staticmethod
+    def _compute_event_stats(db: Session, org_id: UUID, days: int) -> Dict[str, Any]:
         try:
-            # Date range for stats
-            start_date = datetime.utcnow() - timedelta(days=days)
-            
-            # Total events
-            total_events = db.query(func.count(Event.id)).filter(
-                Event.org_id == org_id,
-                Event.created_at >= start_date
-            ).scalar() or 0
+            # Date range for stats; both bounds are set so only the
+            # partitions covering the window are scanned. The window is at
+            # least a day, so it always contains the last-24h activity
+            now = datetime.utcnow()
+            start_date = now - timedelta(days=days)
             
-            # Events by type
-            type_stats = db.query(
+            rows = db.query(
                 Event.event_type,
-                func.count(Event.id).label('count')
-            ).filter(
-                Event.org_id == org_id,
-                Event.created_at >= start_date
-            ).group_by(Event.event_type).all()
-            
-            # Events by entity type
-            entity_stats = db.query(
                 Event.entity_type,
-                func.count(Event.id).label('count')
+                func.count(Event.id),
+                func.count(Event.id).filter(Event.created_at >= now - timedelta(hours=24))
             ).filter(
                 Event.org_id == org_id,
                 Event.created_at >= start_date,
-                Event.entity_type.isnot(None)
-            ).group_by(Event.entity_type).all()
+                Event.created_at <= now
+            ).group_by(Event.event_type, Event.entity_type).all()
             
-            # Recent activity (last 24 hours)
-            recent_activity = db.query(func.count(Event.id)).filter(
-                Event.org_id == org_id,
-                Event.created_at >= datetime.utcnow() - timedelta(hours=24)
-            ).scalar() or 0
+            by_type: Dict[str, int] = {}
+            by_entity_type: Dict[str, int] = {}
+            recent_activity = 0
+            for event_type, entity_type, count, recent in rows:
+                by_type[event_type] = by_type.get(event_type, 0) + count
+                if entity_type:
+                    by_entity_type[entity_type] = by_entity_type.get(entity_type, 0) + count
+                recent_activity += recent or 0
             
             return {
-                "total_events": total_events,
-                "by_type": {event_type: count for event_type, count in type_stats},
-                "by_entity_type": {entity_type: count for entity_type, count in entity_stats if entity_type},
+                "total_events": sum(by_type.values()),
+                "by_type": by_type,
+                "by_entity_type": by_entity_type,
                 "recent_activity_count": recent_activity
             }
             
@@ -195,8 +205,18 @@ class EventService:
 
     @staticmethod
     def cleanup_old_events(db: Session, days_to_keep: int = 90) -> int:
-        """Clean up old events (run as maintenance task)"""
+        """
+        Clean up old events (run as maintenance task).
+
+        On the partitioned PostgreSQL table this drops whole expired months
+        and creates upcoming ones; elsewhere it falls back to a DELETE.
+        """
         try:
+            if event_partitions.is_partitioned(db):
+                deleted_count = event_partitions.maintain_partitions(db, days_to_keep)
+                logger.info(f"Cleaned up {deleted_count} old events")
+                return deleted_count
+
             cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
             
             # Delete old events except for important ones
@@ -232,9 +252,15 @@ class EventService:
         start_date: datetime,
         end_date: datetime,
         entity_type: Optional[str] = None,
-        entity_id: Optional[UUID] = None
-    ) -> List[Event]:
-        """Export audit trail for compliance purposes"""
+        entity_id: Optional[UUID] = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[Event]:
+        """
+        Export audit trail for compliance purposes.
+
+        Streams events through a server-side cursor in batches of batch_size,
+        so memory stays flat however large the date range is.
+        """
         query = db.query(Event).filter(
             Event.org_id == org_id,
             Event.created_at >= start_date,
@@ -247,4 +273,5 @@ class EventService:
         if entity_id:
             query = query.filter(Event.entity_id == entity_id)
         
-        return query.order_by(Event.created_at.asc()).all()
\ No newline at end of file
+        query = query.order_by(Event.created_at.asc()).execution_options(stream_results=True)
+        yield from query.yield_per(batch_size)
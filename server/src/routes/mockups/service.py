@@ -33,6 +33,7 @@ from server.src.utils.railway_cache import railway_cached, invalidate_user_cache
 from server.src.utils.mockups_util import create_mockup_images, create_mockups_for_etsy
 from server.src.utils.etsy_api_engine import EtsyAPI
 from server.src.utils.nas_storage import nas_storage
+from server.src.utils.image_geometry import load_geometry_by_path, measure_image
 from fastapi import UploadFile, HTTPException
 from PIL import Image
 import imagehash
@@ -423,7 +424,8 @@ def create_mockup(db: Session, user_id: UUID, mockup_data: model.MockupFullCreat
                 root_path=root_path,
                 starting_name=starting_name,
                 mask_data=mask_data,
-                watermark_path=mockup_data.watermark_path
+                watermark_path=mockup_data.watermark_path,
+                design_geometries=load_geometry_by_path(db, DesignImages, design_file_paths)
             )
         except Exception as e:
             logging.error(f"Failed to generate mockup images: {e}")
@@ -431,12 +433,14 @@ def create_mockup(db: Session, user_id: UUID, mockup_data: model.MockupFullCreat
         # 8. Save mockup images to database and upload to NAS
         mockup_images = []
         for mockup_img in generated_mockups:
+            geometry = measure_image(mockup_img['file_path'])
             mockup_image = MockupImage(
                 mockups_id=mockup.id,
                 filename=mockup_img['filename'],
                 file_path=mockup_img['file_path'],
                 watermark_path=mockup_img['watermark_path'],
-                image_type=mockup_img['image_type']
+                image_type=mockup_img['image_type'],
+                **(geometry.to_columns() if geometry else {})
             )
             db.add(mockup_image)
             mockup_images.append(mockup_image)
@@ -701,13 +705,15 @@ def create_mockup_image(db: Session, mockup_id: UUID, user_id: UUID, image_data:
         # 7. Get default watermark if not provided
         default_watermark_path = f"{root_path}Mockups/BaseMockups/Watermarks/Rectangle Watermark.png"
 
-        # 8. Create the MockupImage DB entry
+        # 8. Create the MockupImage DB entry, with the geometry planners read instead of decoding
+        geometry = measure_image(dest_path)
         mockup_image = MockupImage(
             mockups_id=mockup_id,
             filename=os.path.basename(dest_path),
             file_path=dest_path,
             watermark_path=default_watermark_path if os.path.exists(default_watermark_path) else None,
-            image_type=template_name
+            image_type=template_name,
+            **(geometry.to_columns() if geometry else {})
         )
         db.add(mockup_image)
         db.commit()
@@ -1221,13 +1227,15 @@ async def upload_mockup_files(db: Session, user_id: UUID, files: List[UploadFile
                     logging.error(f"Failed to save mockup file to NAS: {relative_path}")
                     continue  # Skip this file but continue with others
 
-            # Create mockup image record
+            # Create mockup image record, with the geometry planners read instead of decoding
+            geometry = measure_image(file_content)
             mockup_image = MockupImage(
                 mockups_id=mockup_id,
                 filename=unique_filename,
                 file_path=file_path,
                 image_type=template_name,
-                watermark_path=watermark_path
+                watermark_path=watermark_path,
+                **(geometry.to_columns() if geometry else {})
             )
             db.add(mockup_image)
             db.flush()  # Get the ID
@@ -171,11 +171,11 @@ async def list_print_files(
 
             try:
                 files = sftp.listdir(full_path)
-                # Filter for print files (PNG, SVG, PSD) and get file info
+                # Filter for print files (PNG, SVG, PSD/PSB) and get file info
                 print_files = []
                 for filename in files:
                     file_ext = filename.lower().split('.')[-1]
-                    if file_ext in ('png', 'svg', 'psd', 'jpg', 'jpeg', 'pdf'):
+                    if file_ext in ('png', 'svg', 'psd', 'psb', 'jpg', 'jpeg', 'pdf'):
                         file_path = f"{full_path}/{filename}"
                         stat_info = sftp.stat(file_path)
                         print_files.append({
@@ -224,7 +224,7 @@ async def download_print_file(
 
     # Check file extension
     file_ext = filename.lower().split('.')[-1]
-    if file_ext not in ('png', 'svg', 'psd', 'jpg', 'jpeg', 'pdf'):
+    if file_ext not in ('png', 'svg', 'psd', 'psb', 'jpg', 'jpeg', 'pdf'):
         raise HTTPException(status_code=400, detail="Unsupported file format")
 
     try:
@@ -245,6 +245,7 @@ async def download_print_file(
             'jpeg': 'image/jpeg',
             'svg': 'image/svg+xml',
             'psd': 'image/vnd.adobe.photoshop',
+            'psb': 'image/vnd.adobe.photoshop',
             'pdf': 'application/pdf'
         }
         media_type = media_types.get(file_ext, 'application/octet-stream')
@@ -5,8 +5,13 @@ from fastapi import HTTPException
 from dotenv import load_dotenv
 
 from server.src.entities.user import User
+from server.src.entities.designs import DesignImages
 from . import model
-from server.src.utils.gangsheet_engine import create_gang_sheets_from_db, create_gang_sheets
+from server.src.utils.gangsheet_engine import (
+    create_gang_sheets_from_db, create_gang_sheets, PRINT_RASTER_ROTATION, STD_DPI
+)
+from server.src.utils.image_geometry import load_geometry_by_path
+from server.src.services.print_raster_cache import print_raster_cache, raster_key
 from server.src.utils.etsy_api_engine import EtsyAPI
 from server.src.utils.nas_storage import nas_storage
 from server.src.entities.template import EtsyProductTemplate
@@ -16,6 +21,22 @@ API_CONFIG = {
     'base_url': 'https://openapi.etsy.com/v3',
 }
 
+def _stored_design_geometry(db, titles):
+    """Geometry stored for each design path; its content hash and DPI make the print raster cache key"""
+    geometries = load_geometry_by_path(db, DesignImages, [title for title in titles if title and "MISSING_" not in title])
+    return {path: geometry for path, geometry in geometries.items() if geometry.content_hash}
+
+def _nas_design_fetcher(shop_name, temp_designs_dir):
+    """Downloads a design on demand when its cached print raster was evicted after the download was skipped"""
+    def fetch(design_file_path):
+        local_file_path = os.path.join(temp_designs_dir, os.path.basename(design_file_path))
+        if nas_storage.download_file(shop_name=shop_name, relative_path=design_file_path, local_file_path=local_file_path):
+            logging.info(f"Downloaded evicted design from NAS: {design_file_path}")
+            return local_file_path
+        logging.error(f"Failed to download design file from NAS: {design_file_path}")
+        return None
+    return fetch
+
 def get_oauth_variables():
     return {
         'clientID': os.getenv('CLIENT_ID'),
@@ -141,7 +162,7 @@ def create_gang_sheets_from_mockups(template_name: str, current_user, db, printe
             if os.path.exists(output_dir):
                 for filename in os.listdir(output_dir):
                     file_ext = filename.lower().split('.')[-1]
-                    if file_ext in ('png', 'jpg', 'jpeg', 'pdf', 'svg', 'psd'):
+                    if file_ext in ('png', 'jpg', 'jpeg', 'pdf', 'svg', 'psd', 'psb'):
                         file_path = os.path.join(output_dir, filename)
                         relative_path = f"Printfiles/{filename}"
                         success = nas_storage.upload_file(
@@ -232,6 +253,8 @@ def create_print_files(current_user, db, printer_id=None, canvas_config_id=None,
 
                 # Download design files from NAS if using NAS storage
                 processed_item_data = item_summary[template_name] if template_name in item_summary else item_summary.get("UVDTF 16oz", {})
+                content_hashes = {}
+                source_dpis = {}
 
                 if nas_storage.enabled and processed_item_data.get('Title'):
                     # Download design files from NAS to temp directory and update paths
@@ -241,6 +264,8 @@ def create_print_files(current_user, db, printer_id=None, canvas_config_id=None,
 
                     updated_titles = []
                     download_count = 0
+                    cached_count = 0
+                    stored_geometry = _stored_design_geometry(db, processed_item_data['Title'])
                     for design_file_path in processed_item_data['Title']:
                         if design_file_path:  # Skip empty paths
                             # Skip placeholder files that don't actually exist
@@ -249,6 +274,16 @@ def create_print_files(current_user, db, printer_id=None, canvas_config_id=None,
                                 updated_titles.append(design_file_path)  # Keep placeholder path
                                 continue
 
+                            # Print-ready raster already cached for this design: no download needed
+                            geometry = stored_geometry.get(design_file_path)
+                            source_dpi = (geometry.dpi_x, geometry.dpi_y) if geometry else None
+                            if geometry and print_raster_cache.contains(raster_key(geometry.content_hash, source_dpi), STD_DPI, PRINT_RASTER_ROTATION):
+                                updated_titles.append(design_file_path)
+                                content_hashes[design_file_path] = geometry.content_hash
+                                source_dpis[design_file_path] = source_dpi
+                                cached_count += 1
+                                continue
+
                             # Design file path is relative to shop (e.g., "UVDTF 16oz/design.png")
                             local_filename = os.path.basename(design_file_path)
                             local_file_path = os.path.join(temp_designs_dir, local_filename)
@@ -263,6 +298,9 @@ def create_print_files(current_user, db, printer_id=None, canvas_config_id=None,
                             if success:
                                 updated_titles.append(local_file_path)
                                 download_count += 1
+                                if geometry:
+                                    content_hashes[local_file_path] = geometry.content_hash
+                                    source_dpis[local_file_path] = source_dpi
                                 logging.debug(f"Downloaded design file from NAS: {design_file_path} -> {local_file_path}")
                             else:
                                 logging.error(f"Failed to download design file from NAS: {design_file_path}")
@@ -272,7 +310,7 @@ def create_print_files(current_user, db, printer_id=None, canvas_config_id=None,
                             updated_titles.append(design_file_path)
 
                     download_duration = time.time() - download_start
-                    logging.info(f"Downloaded {download_count} design files from NAS in {download_duration:.2f}s")
+                    logging.info(f"Downloaded {download_count} design files from NAS in {download_duration:.2f}s ({cached_count} served from the print raster cache)")
 
                     # Update the processed data with local file paths
                     processed_item_data = processed_item_data.copy()
@@ -284,7 +322,10 @@ def create_print_files(current_user, db, printer_id=None, canvas_config_id=None,
                     template_name,
                     temp_printfiles_dir + "/",
                     item_summary["Total QTY"] if "Total QTY" in item_summary else 0,
-                    file_format=format
+                    file_format=format,
+                    content_hashes=content_hashes,
+                    source_dpis=source_dpis,
+                    fetch_design=_nas_design_fetcher(shop_name, temp_designs_dir) if nas_storage.enabled else None
                 )
 
                 if result is None:
@@ -299,7 +340,7 @@ def create_print_files(current_user, db, printer_id=None, canvas_config_id=None,
                         if os.path.exists(temp_printfiles_dir):
                             for filename in os.listdir(temp_printfiles_dir):
                                 file_ext = filename.lower().split('.')[-1]
-                                if file_ext in ('png', 'jpg', 'jpeg', 'pdf', 'svg', 'psd'):
+                                if file_ext in ('png', 'jpg', 'jpeg', 'pdf', 'svg', 'psd', 'psb'):
                                     file_path = os.path.join(temp_printfiles_dir, filename)
                                     relative_path = f"Printfiles/{filename}"
 
@@ -543,12 +584,16 @@ def create_print_files_from_selected_orders(order_ids, template_name, current_us
             os.makedirs(temp_designs_dir, exist_ok=True)
 
             # Download design files from NAS to temp directory
+            content_hashes = {}
+            source_dpis = {}
             if nas_storage.enabled and order_items_data.get('Title'):
                 download_start = time.time()
                 logging.info(f"Starting download of {len(order_items_data['Title'])} design files from NAS")
 
                 updated_titles = []
                 download_count = 0
+                cached_count = 0
+                stored_geometry = _stored_design_geometry(db, order_items_data['Title'])
                 for design_file_path in order_items_data['Title']:
                     if design_file_path:  # Skip empty paths
                         # Skip placeholder files that don't actually exist
@@ -557,6 +602,16 @@ def create_print_files_from_selected_orders(order_ids, template_name, current_us
                             updated_titles.append(design_file_path)  # Keep placeholder path
                             continue
 
+                        # Print-ready raster already cached for this design: no download needed
+                        geometry = stored_geometry.get(design_file_path)
+                        source_dpi = (geometry.dpi_x, geometry.dpi_y) if geometry else None
+                        if geometry and print_raster_cache.contains(raster_key(geometry.content_hash, source_dpi), STD_DPI, PRINT_RASTER_ROTATION):
+                            updated_titles.append(design_file_path)
+                            content_hashes[design_file_path] = geometry.content_hash
+                            source_dpis[design_file_path] = source_dpi
+                            cached_count += 1
+                            continue
+
                         # Design file path is relative to shop (e.g., "UVDTF 16oz/UV840.png")
                         local_filename = os.path.basename(design_file_path)
                         local_file_path = os.path.join(temp_designs_dir, local_filename)
@@ -571,6 +626,9 @@ def create_print_files_from_selected_orders(order_ids, template_name, current_us
                         if success:
                             updated_titles.append(local_file_path)
                             download_count += 1
+                            if geometry:
+                                content_hashes[local_file_path] = geometry.content_hash
+                                source_dpis[local_file_path] = source_dpi
                             logging.debug(f"Downloaded design file from NAS: {design_file_path} -> {local_file_path}")
                         else:
                             logging.error(f"Failed to download design file from NAS: {design_file_path}")
@@ -580,7 +638,7 @@ def create_print_files_from_selected_orders(order_ids, template_name, current_us
                         updated_titles.append(design_file_path)
 
                 download_duration = time.time() - download_start
-                logging.info(f"Downloaded {download_count} design files from NAS in {download_duration:.2f}s")
+                logging.info(f"Downloaded {download_count} design files from NAS in {download_duration:.2f}s ({cached_count} served from the print raster cache)")
 
                 # Update the data with local file paths
                 order_items_data = order_items_data.copy()
@@ -594,7 +652,10 @@ def create_print_files_from_selected_orders(order_ids, template_name, current_us
                 total_images=len(order_items_data.get('Title', [])),
                 dpi=400,
                 std_dpi=400,
-                file_format=format
+                file_format=format,
+                content_hashes=content_hashes,
+                source_dpis=source_dpis,
+                fetch_design=_nas_design_fetcher(user.shop_name, temp_designs_dir) if nas_storage.enabled else None
             )
             gangsheet_time = time.time() - gangsheet_start
             logging.info(f"Gangsheet creation completed in {gangsheet_time:.2f}s")
@@ -614,7 +675,7 @@ def create_print_files_from_selected_orders(order_ids, template_name, current_us
                 if os.path.exists(output_dir):
                     for filename in os.listdir(output_dir):
                         file_ext = filename.lower().split('.')[-1]
-                        if file_ext in ('png', 'jpg', 'jpeg', 'pdf', 'svg', 'psd'):
+                        if file_ext in ('png', 'jpg', 'jpeg', 'pdf', 'svg', 'psd', 'psb'):
                             file_path = os.path.join(output_dir, filename)
                             relative_path = f"Printfiles/{filename}"
                             success = nas_storage.upload_file(
@@ -4,7 +4,8 @@ Packing Slip API Routes
 Endpoints for generating packing slips from order data.
 """
 import logging
-from typing import Dict, Any, List
+import threading
+from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
@@ -12,8 +13,10 @@ from sqlalchemy.orm import Session
 from server.src.database.core import get_db
 from server.src.routes.auth.service import get_current_user
 from server.src.services.packing_slip_generator import PackingSlipGenerator
-from PyPDF2 import PdfMerger
+from server.src.services.packing_slip_pipeline import PackingSlipPipeline, NoPackingSlipsGenerated
+from starlette.concurrency import run_in_threadpool
 import io
+import requests
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +45,7 @@ class OrderItem(BaseModel):
     """Order item model."""
     name: str
     mockup_url: str | None = None
+    mockup_image_id: int | None = None
     quantity: int = Field(ge=1)
     price: float = Field(ge=0)
 
@@ -295,82 +299,42 @@ async def generate_selected_orders_packing_slips(
 
         shop_name_str = user.shop_name if user.shop_name else "Shop"
 
-        # Fetch selected orders from Etsy
+        # Fetch selected orders from Etsy; workers never use the request's EtsyAPI or DB session
+        worker_api = _WorkerEtsyClient(etsy_api)
         headers = {
-            'x-api-key': etsy_api.client_id,
-            'Authorization': f'Bearer {etsy_api.oauth_token}',
+            'x-api-key': worker_api.client_id,
+            'Authorization': f'Bearer {worker_api.oauth_token}',
         }
 
-        # Generate packing slip for each selected order
-        generator = PackingSlipGenerator()
-        pdf_merger = PdfMerger()
-        successful_count = 0
-        failed_orders = []
-
-        for order_id in request.order_ids:
-            try:
-                # Fetch individual receipt with full details
-                receipt_url = f"{etsy_api.base_url}/application/shops/{etsy_api.shop_id}/receipts/{order_id}"
-                params = {
-                    'includes': 'Transactions,Transactions/Listing,Transactions/Listing/Images'
-                }
-
-                response = etsy_api.session.get(receipt_url, headers=headers, params=params)
-
-                if not response.ok:
-                    logger.error(f"Failed to fetch order {order_id}: {response.status_code} {response.text}")
-                    failed_orders.append(order_id)
-                    continue
+        from server.src.services.etsy_bulk_update import get_rate_budget
+        rate_budget = get_rate_budget(etsy_api.shop_id)
 
-                receipt = response.json()
-
-                # Convert Etsy receipt to packing slip format
-                order_data = _convert_etsy_receipt_to_packing_slip(
-                    receipt,
-                    shop_name_str,
-                    etsy_api,
-                    shop_logo_url
-                )
-
-                # Generate packing slip
-                pdf_bytes = generator.generate_packing_slip(order_data)
+        def load_order(order_id: int):
+            # Fetch individual receipt with full details
+            receipt_url = f"{worker_api.base_url}/application/shops/{worker_api.shop_id}/receipts/{order_id}"
+            params = {
+                'includes': 'Transactions,Transactions/Listing,Transactions/Listing/Images'
+            }
 
-                # Add to merger
-                pdf_buffer = io.BytesIO(pdf_bytes)
-                pdf_merger.append(pdf_buffer)
-                successful_count += 1
+            rate_budget.acquire()
+            response = worker_api.session.get(receipt_url, headers=headers, params=params)
 
-            except Exception as e:
-                logger.error(f"Error generating packing slip for order {order_id}: {e}", exc_info=True)
-                failed_orders.append(order_id)
-                continue
+            if not response.ok:
+                logger.error(f"Failed to fetch order {order_id}: {response.status_code} {response.text}")
+                return None
 
-        # Check if any PDFs were successfully generated
-        if successful_count == 0:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to generate any packing slips. Check server logs for details."
+            # Convert Etsy receipt to packing slip format
+            return _convert_etsy_receipt_to_packing_slip(
+                response.json(),
+                shop_name_str,
+                worker_api,
+                shop_logo_url
             )
 
-        # Merge all PDFs
-        output_buffer = io.BytesIO()
-        pdf_merger.write(output_buffer)
-        pdf_merger.close()
-        output_buffer.seek(0)
-
+        # Fetch, render and merge concurrently, streaming the merged PDF as it is written
+        pipeline = PackingSlipPipeline(load_order)
         filename = f"packing_slips_selected_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-
-        logger.info(f"Successfully generated {successful_count} packing slips out of {len(request.order_ids)} orders")
-        if failed_orders:
-            logger.warning(f"Failed to generate packing slips for orders: {failed_orders}")
-
-        return StreamingResponse(
-            output_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
-        )
+        return await _stream_packing_slips(pipeline, request.order_ids, filename)
 
     except HTTPException:
         raise
@@ -464,59 +428,21 @@ async def generate_bulk_etsy_packing_slips(
             logger.info(f"Found shop logo: {shop_logo_url}")
 
         shop_name_str = user.shop_name if user.shop_name else "Shop"
-
-        # Generate packing slip for each order
-        generator = PackingSlipGenerator()
-        pdf_merger = PdfMerger()
-        successful_count = 0
-
-        for receipt in receipts:
-            try:
-                # Convert Etsy receipt to packing slip format
-                order_data = _convert_etsy_receipt_to_packing_slip(
-                    receipt,
-                    shop_name_str,
-                    etsy_api,
-                    shop_logo_url
-                )
-
-                # Generate packing slip
-                pdf_bytes = generator.generate_packing_slip(order_data)
-
-                # Add to merger
-                pdf_buffer = io.BytesIO(pdf_bytes)
-                pdf_merger.append(pdf_buffer)
-                successful_count += 1
-
-            except Exception as e:
-                logger.error(f"Error generating packing slip for receipt {receipt.get('receipt_id')}: {e}", exc_info=True)
-                # Continue with other orders
-                continue
-
-        # Check if any PDFs were successfully generated
-        if successful_count == 0:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to generate any packing slips. Check server logs for details."
+        worker_api = _WorkerEtsyClient(etsy_api)
+
+        def load_order(receipt: Dict[str, Any]):
+            # Convert Etsy receipt to packing slip format
+            return _convert_etsy_receipt_to_packing_slip(
+                receipt,
+                shop_name_str,
+                worker_api,
+                shop_logo_url
             )
 
-        # Merge all PDFs
-        output_buffer = io.BytesIO()
-        pdf_merger.write(output_buffer)
-        pdf_merger.close()
-        output_buffer.seek(0)
-
+        # Fetch, render and merge concurrently, streaming the merged PDF as it is written
+        pipeline = PackingSlipPipeline(load_order)
         filename = f"packing_slips_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-
-        logger.info(f"Successfully generated {successful_count} packing slips out of {len(receipts)} orders")
-
-        return StreamingResponse(
-            output_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
-        )
+        return await _stream_packing_slips(pipeline, receipts, filename)
 
     except HTTPException:
         raise
@@ -528,6 +454,83 @@ async def generate_bulk_etsy_packing_slips(
         )
 
 
+async def _stream_packing_slips(pipeline: PackingSlipPipeline, items: List[Any], filename: str) -> StreamingResponse:
+    """
+    Start a packing slip pipeline and stream the merged PDF.
+
+    The first chunk is pulled before responding so a batch where every order
+    fails still returns a 500 instead of an empty download.
+    """
+    chunks = pipeline.stream(items)
+    try:
+        first_chunk = await run_in_threadpool(next, chunks)
+    except NoPackingSlipsGenerated:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate any packing slips. Check server logs for details."
+        )
+
+    def body():
+        yield first_chunk
+        yield from chunks
+        logger.info(f"Successfully generated {pipeline.successful_count} packing slips out of {len(items)} orders")
+        if pipeline.failed_items:
+            logger.warning(f"Failed to generate packing slips for {len(pipeline.failed_items)} orders")
+
+    return StreamingResponse(
+        body(),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+
+class _WorkerEtsyClient:
+    """
+    Read-only Etsy access for packing slip pipeline workers.
+
+    The request's EtsyAPI holds the request's DB session and may refresh its
+    token through it, so it must not be shared with worker threads. This
+    client copies the already-refreshed credentials and gives each worker
+    thread its own HTTP session.
+    """
+
+    def __init__(self, etsy_api):
+        etsy_api.ensure_valid_token()
+        self.client_id = etsy_api.client_id
+        self.oauth_token = etsy_api.oauth_token
+        self.base_url = etsy_api.base_url
+        self.shop_id = etsy_api.shop_id
+        self._verify = etsy_api.session.verify
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.verify = self._verify
+            self._local.session = session
+        return session
+
+    def get_receipt_shipment(self, receipt_id: int) -> Optional[dict]:
+        """First shipment of a receipt, or None"""
+        headers = {
+            'x-api-key': self.client_id,
+            'Authorization': f'Bearer {self.oauth_token}',
+        }
+        url = f"{self.base_url}/application/shops/{self.shop_id}/receipts/{receipt_id}/shipments"
+        try:
+            response = self.session.get(url, headers=headers)
+            response.raise_for_status()
+            shipments = response.json().get('results', [])
+            return shipments[0] if shipments else None
+        except Exception as e:
+            logger.error(f"Failed to fetch shipment for receipt {receipt_id}: {e}")
+            return None
+
+
 def _convert_etsy_receipt_to_packing_slip(receipt: Dict[str, Any], shop_name: str, etsy_api=None, shop_logo_url: str = None) -> Dict[str, Any]:
     """
     Convert an Etsy receipt to packing slip format.
@@ -535,7 +538,7 @@ def _convert_etsy_receipt_to_packing_slip(receipt: Dict[str, Any], shop_name: st
     Args:
         receipt: Etsy receipt data
         shop_name: Shop name from Etsy store
-        etsy_api: EtsyAPI instance for fetching listing images and shipment data
+        etsy_api: EtsyAPI (or _WorkerEtsyClient) for fetching listing images and shipment data
         shop_logo_url: URL to shop logo image
 
     Returns:
@@ -634,6 +637,7 @@ def _convert_etsy_receipt_to_packing_slip(receipt: Dict[str, Any], shop_name: st
 
         # Try to get mockup image from listing
         mockup_url = None
+        mockup_image_id = None
 
         # First try to get from transaction listing data (if included)
         listing = transaction.get('listing', {})
@@ -641,6 +645,7 @@ def _convert_etsy_receipt_to_packing_slip(receipt: Dict[str, Any], shop_name: st
 
         if images and len(images) > 0:
             mockup_url = images[0].get('url_570xN') or images[0].get('url_fullxfull')
+            mockup_image_id = images[0].get('listing_image_id')
             logger.info(f"Found image from transaction data: {mockup_url}")
         elif listing_id and etsy_api:
             # Fetch listing images directly from Etsy API
@@ -665,6 +670,7 @@ def _convert_etsy_receipt_to_packing_slip(receipt: Dict[str, Any], shop_name: st
 
                     if images and len(images) > 0:
                         mockup_url = images[0].get('url_570xN') or images[0].get('url_fullxfull')
+                        mockup_image_id = images[0].get('listing_image_id')
                         logger.info(f"Found image from API call: {mockup_url}")
                     else:
                         logger.warning(f"No images in listing data for listing {listing_id}")
@@ -678,6 +684,7 @@ def _convert_etsy_receipt_to_packing_slip(receipt: Dict[str, Any], shop_name: st
         items.append({
             "name": transaction.get('title', 'Product'),
             "mockup_url": mockup_url,
+            "mockup_image_id": mockup_image_id,
             "quantity": transaction.get('quantity', 1),
             "price": float(transaction.get('price', {}).get('amount', 0) / transaction.get('price', {}).get('divisor', 100))
         })
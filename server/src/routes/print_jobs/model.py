@@ -26,6 +26,7 @@ class PrintJobStatus(str, Enum):
 class PrintJobCreate(BaseModel):
     job_type: PrintJobType
     template_name: Optional[str] = None
+    printer_id: Optional[UUID] = None
     config: Dict[str, Any] = Field(default_factory=dict)
     input_data: Dict[str, Any] = Field(default_factory=dict)
 
@@ -51,6 +52,7 @@ class PrintJobResponse(BaseModel):
     job_type: PrintJobType
     status: PrintJobStatus
     template_name: Optional[str] = None
+    printer_id: Optional[UUID] = None
     config: Dict[str, Any] = Field(default_factory=dict)
     input_data: Dict[str, Any] = Field(default_factory=dict)
     output_files: List[UUID] = Field(default_factory=list)
@@ -78,4 +80,8 @@ class PrintJobStatsResponse(BaseModel):
 class JobQueueResponse(BaseModel):
     queued_jobs: int
     processing_jobs: int
-    estimated_wait_time: Optional[int] = None  # in seconds
\ No newline at end of file
+    estimated_wait_time: Optional[int] = None  # in seconds
+    completed_last_hour: int = 0
+    failed_last_hour: int = 0
+    throughput_per_minute: float = 0.0  # completed jobs per minute over the last hour
+    oldest_queued_seconds: Optional[int] = None  # age of the job at the head of the queue
\ No newline at end of file
@@ -200,36 +200,57 @@ def get_queue_info(
     return model.JobQueueResponse(
         queued_jobs=queue_info.get("queued_jobs", 0),
         processing_jobs=queue_info.get("processing_jobs", 0),
-        estimated_wait_time=queue_info.get("estimated_wait_time")
+        estimated_wait_time=queue_info.get("estimated_wait_time"),
+        completed_last_hour=queue_info.get("completed_last_hour", 0),
+        failed_last_hour=queue_info.get("failed_last_hour", 0),
+        throughput_per_minute=queue_info.get("throughput_per_minute", 0.0),
+        oldest_queued_seconds=queue_info.get("oldest_queued_seconds")
     )
 
 # Worker endpoint for internal use
 @router.get("/internal/next-job", response_model=Optional[model.PrintJobResponse])
 def get_next_job_for_worker(
+    worker_id: str,
     job_type: Optional[model.PrintJobType] = None,
     db: Session = Depends(get_db)
 ):
-    """Get next queued job for worker processing (internal endpoint)"""
+    """
+    Get next queued job for worker processing (internal endpoint).
+
+    The worker must send heartbeats for the job (see heartbeat_job_for_worker)
+    until it reports the final status, or the job is requeued once
+    PRINT_JOB_HEARTBEAT_TIMEOUT passes.
+    """
     # TODO: Add worker authentication/authorization
     
-    from server.src.entities.print_job import PrintJobType, PrintJobStatus
+    from server.src.entities.print_job import PrintJobType
     
+    # Claimed and marked processing atomically
     job = PrintJobService.get_next_queued_job(
         db=db,
-        job_type=PrintJobType(job_type.value) if job_type else None
+        job_type=PrintJobType(job_type.value) if job_type else None,
+        worker_id=worker_id
     )
     
     if job:
-        # Mark as processing
-        PrintJobService.update_job_status(
-            db=db,
-            job_id=job.id,
-            status=PrintJobStatus.PROCESSING
-        )
         return model.PrintJobResponse.model_validate(job)
     
     return None
 
+@router.post("/internal/{job_id}/heartbeat")
+def heartbeat_job_for_worker(
+    job_id: UUID,
+    worker_id: str,
+    db: Session = Depends(get_db)
+):
+    """Keep a claimed job alive (internal endpoint); 409 once the worker no longer holds it"""
+    # TODO: Add worker authentication/authorization
+    
+    if not PrintJobService.heartbeat_jobs(db=db, job_ids=[job_id], worker_id=worker_id):
+        raise HTTPException(status_code=409, detail="Print job is not held by this worker")
+    
+    return {"message": "Heartbeat recorded"}
+
 @router.put("/internal/{job_id}/status")
 def update_job_status_internal(
     job_id: UUID,
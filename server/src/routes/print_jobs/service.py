@@ -6,15 +6,22 @@ import logging
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, and_, or_, select, cast, Integer, String
 
 from server.src.entities.print_job import PrintJob, PrintJobType, PrintJobStatus
 from server.src.entities.event import Event, EventTypes
+from server.src.utils.stats_cache import stats_cache
 from . import model
 
 logger = logging.getLogger(__name__)
 
+
+def _printer_lock_key(printer_id: UUID) -> int:
+    """Signed 64-bit advisory lock key for a printer"""
+    return int.from_bytes(UUID(str(printer_id)).bytes[:8], 'big', signed=True)
+
+
 class PrintJobService:
     
     @staticmethod
@@ -32,6 +39,7 @@ class PrintJobService:
                 job_type=PrintJobType(job_data.job_type.value),
                 status=PrintJobStatus.QUEUED,
                 template_name=job_data.template_name,
+                printer_id=job_data.printer_id or job_data.config.get('printer_id'),
                 config=job_data.config,
                 input_data=job_data.input_data,
                 retry_count=0
@@ -237,64 +245,212 @@ class PrintJobService:
             raise
 
     @staticmethod
-    def get_next_queued_job(db: Session, job_type: Optional[PrintJobType] = None) -> Optional[PrintJob]:
-        """Get next queued job for processing"""
-        query = db.query(PrintJob).filter(PrintJob.status == PrintJobStatus.QUEUED)
-        
-        if job_type:
-            query = query.filter(PrintJob.job_type == job_type)
-        
-        return query.order_by(PrintJob.created_at.asc()).first()
+    def get_next_queued_job(
+        db: Session,
+        job_type: Optional[PrintJobType] = None,
+        worker_id: Optional[str] = None,
+        job_types: Optional[List[PrintJobType]] = None,
+        per_printer_limit: Optional[int] = None
+    ) -> Optional[PrintJob]:
+        """
+        Claim the next queued job for processing.
+
+        The oldest queued job is locked with FOR UPDATE SKIP LOCKED and marked
+        processing in the same transaction, so concurrent workers never claim
+        the same job. Jobs for printers already running per_printer_limit jobs
+        are skipped; on PostgreSQL claims for one printer are serialized with
+        a transaction-level advisory lock and the running count is re-checked
+        under it, so two workers cannot both take the printer's last slot.
+        """
+        try:
+            full_printers = set()
+            while True:
+                query = db.query(PrintJob).filter(PrintJob.status == PrintJobStatus.QUEUED)
+
+                if job_type:
+                    query = query.filter(PrintJob.job_type == job_type)
+
+                if job_types:
+                    query = query.filter(PrintJob.job_type.in_(job_types))
+
+                if per_printer_limit:
+                    running = aliased(PrintJob)
+                    running_on_printer = select(func.count(running.id)).where(
+                        running.printer_id == PrintJob.printer_id,
+                        running.status == PrintJobStatus.PROCESSING
+                    ).scalar_subquery()
+                    query = query.filter(or_(
+                        PrintJob.printer_id.is_(None),
+                        running_on_printer < per_printer_limit
+                    ))
+                    if full_printers:
+                        query = query.filter(or_(
+                            PrintJob.printer_id.is_(None),
+                            PrintJob.printer_id.notin_(full_printers)
+                        ))
+
+                job = query.order_by(PrintJob.created_at.asc()).with_for_update(skip_locked=True).first()
+                if not job:
+                    db.commit()
+                    return None
+
+                printer_id = job.printer_id
+                if not (per_printer_limit and printer_id and db.bind.dialect.name == 'postgresql'):
+                    break
+
+                db.execute(select(func.pg_advisory_xact_lock(_printer_lock_key(printer_id))))
+                running_now = db.execute(
+                    select(func.count(PrintJob.id)).where(
+                        PrintJob.printer_id == printer_id,
+                        PrintJob.status == PrintJobStatus.PROCESSING
+                    )
+                ).scalar()
+                if running_now < per_printer_limit:
+                    break
+
+                # Another worker filled the printer while we waited; release the job and look again
+                db.rollback()
+                full_printers.add(printer_id)
+
+            now = datetime.utcnow()
+            job.status = PrintJobStatus.PROCESSING
+            job.started_at = now
+            job.locked_by = worker_id
+            job.heartbeat_at = now
+            
+            # Log event
+            event = Event.create_event(
+                event_type=EventTypes.SYSTEM_INFO,
+                org_id=job.org_id,
+                user_id=job.created_by,
+                entity_type="PrintJob",
+                entity_id=job.id,
+                payload={
+                    "action": "job_claimed",
+                    "worker_id": worker_id
+                }
+            )
+            db.add(event)
+            
+            db.commit()
+            db.refresh(job)
+            
+            logger.info(f"Claimed print job {job.id} ({job.job_type.value}) for worker {worker_id}")
+            return job
+            
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error claiming next queued job: {e}")
+            raise
+
+    @staticmethod
+    def heartbeat_jobs(db: Session, job_ids: List[UUID], worker_id: str) -> int:
+        """Refresh the heartbeat of jobs this worker is running; returns jobs still held"""
+        if not job_ids:
+            return 0
+        try:
+            updated = db.query(PrintJob).filter(
+                PrintJob.id.in_(job_ids),
+                PrintJob.locked_by == worker_id,
+                PrintJob.status == PrintJobStatus.PROCESSING
+            ).update({PrintJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            return updated
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error updating print job heartbeats: {e}")
+            return 0
+
+    @staticmethod
+    def requeue_expired_jobs(db: Session, heartbeat_timeout: int, max_attempts: int) -> Dict[str, int]:
+        """
+        Requeue processing jobs whose worker stopped sending heartbeats.
+
+        Jobs that already used max_attempts are failed instead.
+        """
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=heartbeat_timeout)
+            expired = and_(
+                PrintJob.status == PrintJobStatus.PROCESSING,
+                or_(PrintJob.heartbeat_at < cutoff, and_(PrintJob.heartbeat_at.is_(None), PrintJob.started_at < cutoff))
+            )
+            attempts = cast(func.coalesce(func.nullif(PrintJob.retry_count, ''), '0'), Integer)
+            
+            failed = db.query(PrintJob).filter(expired, attempts + 1 >= max_attempts).update({
+                PrintJob.status: PrintJobStatus.FAILED,
+                PrintJob.completed_at: datetime.utcnow(),
+                PrintJob.error_message: "Worker stopped responding",
+                PrintJob.locked_by: None
+            }, synchronize_session=False)
+            
+            requeued = db.query(PrintJob).filter(expired).update({
+                PrintJob.status: PrintJobStatus.QUEUED,
+                PrintJob.retry_count: cast(attempts + 1, String),
+                PrintJob.started_at: None,
+                PrintJob.heartbeat_at: None,
+                PrintJob.locked_by: None
+            }, synchronize_session=False)
+            
+            db.commit()
+            if requeued or failed:
+                logger.warning(f"Requeued {requeued} and failed {failed} print jobs with expired heartbeats")
+            return {"requeued": requeued, "failed": failed}
+            
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error requeueing expired print jobs: {e}")
+            return {"requeued": 0, "failed": 0}
 
     @staticmethod
     def get_job_stats(db: Session, org_id: UUID, days: int = 30) -> Dict[str, Any]:
-        """Get print job statistics for organization"""
+        """
+        Get print job statistics for organization.
+
+        One query grouped by (status, job_type) yields every count plus the
+        processing-time sum, and results are cached briefly per (org, days).
+        """
+        return stats_cache.get_or_compute(
+            "print_job_stats", org_id, days,
+            lambda: PrintJobService._compute_job_stats(db, org_id, days)
+        )
+
+    @staticmethod
+    def _compute_job_stats(db: Session, org_id: UUID, days: int) -> Dict[str, Any]:
         try:
             # Date range for stats
             start_date = datetime.utcnow() - timedelta(days=days)
+            timed = and_(
+                PrintJob.status == PrintJobStatus.COMPLETED,
+                PrintJob.started_at.isnot(None),
+                PrintJob.completed_at.isnot(None)
+            )
             
-            # Total jobs
-            total_jobs = db.query(func.count(PrintJob.id)).filter(
-                PrintJob.org_id == org_id,
-                PrintJob.created_at >= start_date
-            ).scalar() or 0
-            
-            # Jobs by status
-            status_stats = db.query(
+            rows = db.query(
                 PrintJob.status,
-                func.count(PrintJob.id).label('count')
-            ).filter(
-                PrintJob.org_id == org_id,
-                PrintJob.created_at >= start_date
-            ).group_by(PrintJob.status).all()
-            
-            # Jobs by type
-            type_stats = db.query(
                 PrintJob.job_type,
-                func.count(PrintJob.id).label('count')
+                func.count(PrintJob.id),
+                func.sum(func.extract('epoch', PrintJob.completed_at - PrintJob.started_at)).filter(timed),
+                func.count(PrintJob.id).filter(timed)
             ).filter(
                 PrintJob.org_id == org_id,
                 PrintJob.created_at >= start_date
-            ).group_by(PrintJob.job_type).all()
-            
-            # Average processing time
-            avg_time = db.query(
-                func.avg(
-                    func.extract('epoch', PrintJob.completed_at - PrintJob.started_at)
-                )
-            ).filter(
-                PrintJob.org_id == org_id,
-                PrintJob.status == PrintJobStatus.COMPLETED,
-                PrintJob.started_at.isnot(None),
-                PrintJob.completed_at.isnot(None),
-                PrintJob.created_at >= start_date
-            ).scalar()
+            ).group_by(PrintJob.status, PrintJob.job_type).all()
+            
+            by_status: Dict[str, int] = {}
+            by_type: Dict[str, int] = {}
+            total_seconds = 0.0
+            timed_jobs = 0
+            for status, job_type, count, seconds, timed_count in rows:
+                by_status[status.value] = by_status.get(status.value, 0) + count
+                by_type[job_type.value] = by_type.get(job_type.value, 0) + count
+                total_seconds += float(seconds or 0)
+                timed_jobs += timed_count or 0
             
             return {
-                "total_jobs": total_jobs,
-                "by_status": {status.value: count for status, count in status_stats},
-                "by_type": {job_type.value: count for job_type, count in type_stats},
-                "avg_processing_time": float(avg_time) if avg_time else None
+                "total_jobs": sum(by_status.values()),
+                "by_status": by_status,
+                "by_type": by_type,
+                "avg_processing_time": total_seconds / timed_jobs if timed_jobs else None
             }
             
         except Exception as e:
@@ -303,41 +459,61 @@ class PrintJobService:
 
     @staticmethod
     def get_queue_info(db: Session, job_type: Optional[PrintJobType] = None) -> Dict[str, Any]:
-        """Get queue information"""
+        """
+        Get queue information.
+
+        Depth, age of the oldest queued job and last-hour throughput come from
+        one aggregate query; the wait estimate is depth over recent throughput.
+        """
         try:
-            query = db.query(PrintJob)
+            now = datetime.utcnow()
+            hour_ago = now - timedelta(hours=1)
+            finished_last_hour = PrintJob.completed_at >= hour_ago
+            
+            query = db.query(
+                func.count(PrintJob.id).filter(PrintJob.status == PrintJobStatus.QUEUED),
+                func.count(PrintJob.id).filter(PrintJob.status == PrintJobStatus.PROCESSING),
+                func.count(PrintJob.id).filter(PrintJob.status == PrintJobStatus.COMPLETED, finished_last_hour),
+                func.count(PrintJob.id).filter(PrintJob.status == PrintJobStatus.FAILED, finished_last_hour),
+                func.min(PrintJob.created_at).filter(PrintJob.status == PrintJobStatus.QUEUED),
+                func.avg(
+                    func.extract('epoch', PrintJob.completed_at - PrintJob.started_at)
+                ).filter(
+                    PrintJob.status == PrintJobStatus.COMPLETED,
+                    PrintJob.started_at.isnot(None),
+                    PrintJob.completed_at >= now - timedelta(days=7)
+                )
+            ).filter(or_(
+                PrintJob.status.in_([PrintJobStatus.QUEUED, PrintJobStatus.PROCESSING]),
+                PrintJob.completed_at >= now - timedelta(days=7)
+            ))
             
             if job_type:
                 query = query.filter(PrintJob.job_type == job_type)
             
-            # Count jobs by status
-            queued = query.filter(PrintJob.status == PrintJobStatus.QUEUED).count()
-            processing = query.filter(PrintJob.status == PrintJobStatus.PROCESSING).count()
+            queued, processing, completed, failed, oldest_queued, avg_time = query.one()
+            throughput = completed / 60.0
             
-            # Estimate wait time based on average processing time
-            # This is a simple estimation - in practice you'd want more sophisticated logic
-            if queued > 0:
-                avg_time = db.query(
-                    func.avg(
-                        func.extract('epoch', PrintJob.completed_at - PrintJob.started_at)
-                    )
-                ).filter(
-                    PrintJob.status == PrintJobStatus.COMPLETED,
-                    PrintJob.started_at.isnot(None),
-                    PrintJob.completed_at.isnot(None),
-                    PrintJob.created_at >= datetime.utcnow() - timedelta(days=7)
-                ).scalar()
-                
-                estimated_wait = int(avg_time * queued) if avg_time else None
-            else:
+            if queued == 0:
                 estimated_wait = 0
+            elif throughput > 0:
+                estimated_wait = int(queued / throughput * 60)
+            elif avg_time:
+                # Nothing finished recently; fall back to average processing time
+                estimated_wait = int(float(avg_time) * queued / max(processing, 1))
+            else:
+                estimated_wait = None
             
             return {
                 "queued_jobs": queued,
                 "processing_jobs": processing,
-                "estimated_wait_time": estimated_wait
+                "estimated_wait_time": estimated_wait,
+                "completed_last_hour": completed,
+                "failed_last_hour": failed,
+                "throughput_per_minute": round(throughput, 2),
+                "oldest_queued_seconds": int((now - oldest_queued.replace(tzinfo=None)).total_seconds()) if oldest_queued else None
             }
             
         except Exception as e:
             logger.error(f"Error getting queue info: {e}")
-            return {"queued_jobs": 0, "processing_jobs": 0, "estimated_wait_time": None}
\ No newline at end of file
+            return {"queued_jobs": 0, "processing_jobs": 0, "estimated_wait_time": None}
@@ -11,6 +11,7 @@ from sqlalchemy import func, and_
 from server.src.entities.printer import Printer, PrinterType
 from server.src.entities.event import Event, EventTypes
 from server.src.entities.template import EtsyProductTemplate
+from server.src.utils.stats_cache import stats_cache
 from . import model
 
 logger = logging.getLogger(__name__)
@@ -79,6 +80,7 @@ class PrinterService:
                 logger.warning(f"Failed to create event for printer creation: {e}")
             
             db.commit()
+            stats_cache.invalidate("printer_stats", user_id)
             db.refresh(printer)
             
             logger.info(f"Created printer: {printer.id} - {printer.name}")
@@ -161,6 +163,7 @@ class PrinterService:
             db.add(event)
             
             db.commit()
+            stats_cache.invalidate("printer_stats", printer.user_id)
             db.refresh(printer)
             
             logger.info(f"Updated printer: {printer_id}")
@@ -202,6 +205,7 @@ class PrinterService:
             # Delete printer
             db.delete(printer)
             db.commit()
+            stats_cache.invalidate("printer_stats", printer.user_id)
             
             logger.warning(f"Deleted printer: {printer_id} - {printer.name}")
             return True
@@ -344,6 +348,7 @@ class PrinterService:
             db.add(event)
             
             db.commit()
+            stats_cache.invalidate("printer_stats", printer.user_id)
             db.refresh(printer)
             
             logger.info(f"Set default printer: {printer_id} for user {user_id}")
@@ -356,87 +361,73 @@ class PrinterService:
 
     @staticmethod
     def get_printer_stats(db: Session, user_id: UUID, org_id: Optional[UUID]) -> model.PrinterStatsResponse:
-        """Get printer statistics for user"""
-        try:
-            # Build base query for user
-            base_query = db.query(func.count(Printer.id)).filter(Printer.user_id == user_id)
-
-            # Only filter by org_id if it exists (for backward compatibility)
-            if org_id is not None:
-                base_query = base_query.filter(Printer.org_id == org_id)
+        """
+        Get printer statistics for user.
+
+        Totals, per-type counts, the default printer and average DPI come from
+        one query grouped by printer type; results are cached briefly per
+        (user, org) and dropped whenever the user's printers change.
+        """
+        return stats_cache.get_or_compute(
+            "printer_stats", user_id, org_id,
+            lambda: PrinterService._compute_printer_stats(db, user_id, org_id),
+            cache_if=lambda stats: stats is not None
+        ) or PrinterService._empty_printer_stats()
 
-            # Total printers
-            total_printers = base_query.scalar() or 0
-
-            # Active printers
-            active_query = db.query(func.count(Printer.id)).filter(
-                Printer.user_id == user_id,
-                Printer.is_active == True
-            )
-
-            # Only filter by org_id if it exists (for backward compatibility)
-            if org_id is not None:
-                active_query = active_query.filter(Printer.org_id == org_id)
+    @staticmethod
+    def _empty_printer_stats() -> model.PrinterStatsResponse:
+        return model.PrinterStatsResponse(
+            total_printers=0,
+            active_printers=0,
+            by_type={},
+            default_printer_id=None,
+            average_dpi=None
+        )
 
-            active_printers = active_query.scalar() or 0
-            
-            # Printers by type
-            type_query = db.query(
+    @staticmethod
+    def _compute_printer_stats(db: Session, user_id: UUID, org_id: Optional[UUID]) -> Optional[model.PrinterStatsResponse]:
+        try:
+            active = Printer.is_active == True
+            query = db.query(
                 Printer.printer_type,
-                func.count(Printer.id).label('count')
-            ).filter(
-                Printer.user_id == user_id,
-                Printer.is_active == True
-            )
+                func.count(Printer.id),
+                func.count(Printer.id).filter(active),
+                func.sum(Printer.dpi).filter(active),
+                func.count(Printer.dpi).filter(active),
+                func.array_agg(Printer.id).filter(active, Printer.is_default == True)
+            ).filter(Printer.user_id == user_id)
 
             # Only filter by org_id if it exists (for backward compatibility)
             if org_id is not None:
-                type_query = type_query.filter(Printer.org_id == org_id)
+                query = query.filter(Printer.org_id == org_id)
+
+            rows = query.group_by(Printer.printer_type).all()
+
+            total_printers = 0
+            by_type: Dict[str, int] = {}
+            dpi_sum = 0
+            dpi_count = 0
+            default_printer_id = None
+            for printer_type, total, active_count, type_dpi_sum, type_dpi_count, default_ids in rows:
+                total_printers += total
+                if active_count:
+                    by_type[printer_type] = active_count
+                dpi_sum += type_dpi_sum or 0
+                dpi_count += type_dpi_count or 0
+                if default_ids and default_printer_id is None:
+                    default_printer_id = default_ids[0]
 
-            type_stats = type_query.group_by(Printer.printer_type).all()
-
-            # Default printer
-            default_query = db.query(Printer).filter(
-                Printer.user_id == user_id,
-                Printer.is_default == True,
-                Printer.is_active == True
-            )
-
-            # Only filter by org_id if it exists (for backward compatibility)
-            if org_id is not None:
-                default_query = default_query.filter(Printer.org_id == org_id)
-
-            default_printer = default_query.first()
-            
-            # Average DPI
-            avg_dpi_query = db.query(func.avg(Printer.dpi)).filter(
-                Printer.user_id == user_id,
-                Printer.is_active == True
-            )
-
-            # Only filter by org_id if it exists (for backward compatibility)
-            if org_id is not None:
-                avg_dpi_query = avg_dpi_query.filter(Printer.org_id == org_id)
-
-            avg_dpi = avg_dpi_query.scalar()
-            
             return model.PrinterStatsResponse(
                 total_printers=total_printers,
-                active_printers=active_printers,
-                by_type={printer_type: count for printer_type, count in type_stats},
-                default_printer_id=default_printer.id if default_printer else None,
-                average_dpi=float(avg_dpi) if avg_dpi else None
+                active_printers=sum(by_type.values()),
+                by_type=by_type,
+                default_printer_id=default_printer_id,
+                average_dpi=float(dpi_sum) / dpi_count if dpi_count else None
             )
             
         except Exception as e:
             logger.error(f"Error getting printer stats for user {user_id}: {e}")
-            return model.PrinterStatsResponse(
-                total_printers=0,
-                active_printers=0,
-                by_type={},
-                default_printer_id=None,
-                average_dpi=None
-            )
+            return None
 
     @staticmethod
     def get_suggestions() -> model.PrinterSuggestionsResponse:
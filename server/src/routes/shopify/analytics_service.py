@@ -9,6 +9,7 @@ from fastapi import HTTPException, status
 from server.src.utils.shopify_client import ShopifyClient, ShopifyAPIError, ShopifyAuthError
 from server.src.entities.shopify_store import ShopifyStore
 from server.src.entities.shopify_product import ShopifyProduct
+from server.src.services.shopify_bulk_sync import ShopifyBulkSyncService
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,19 @@ class ShopifyAnalyticsService:
     def __init__(self, db: Session):
         self.db = db
         self.client = ShopifyClient(db)
+        self.sync = ShopifyBulkSyncService(db)
+
+    def _fetch_orders(self, store: ShopifyStore, start_date: datetime) -> List[Dict[str, Any]]:
+        """Orders since start_date, from the bulk-synced table while it is fresh, else the REST API."""
+        if self.sync.has_synced(store.id, 'orders'):
+            return self.sync.get_orders(store.id, since_time=start_date)
+
+        return self.client.get_orders(
+            store_id=str(store.id),
+            since_time=start_date,
+            limit=250,
+            status="any"
+        )
 
     def _handle_shopify_error(self, error: Exception, operation: str = "operation") -> None:
         """Convert Shopify errors to appropriate HTTP exceptions."""
@@ -77,13 +91,8 @@ class ShopifyAnalyticsService:
             start_date = end_date - timedelta(days=30)
 
         try:
-            # Fetch orders from Shopify
-            orders = self.client.get_orders(
-                store_id=str(store.id),
-                since_time=start_date,
-                limit=250,
-                status="any"
-            )
+            # Fetch orders (local sync or Shopify)
+            orders = self._fetch_orders(store, start_date)
 
             # Handle empty store case
             if not orders:
@@ -301,13 +310,8 @@ class ShopifyAnalyticsService:
             start_date = end_date - timedelta(days=30)
 
         try:
-            # Fetch orders from Shopify
-            orders = self.client.get_orders(
-                store_id=str(store.id),
-                since_time=start_date,
-                limit=250,
-                status="any"
-            )
+            # Fetch orders (local sync or Shopify)
+            orders = self._fetch_orders(store, start_date)
 
             # Handle empty store case
             if not orders:
@@ -437,12 +441,7 @@ class ShopifyAnalyticsService:
             # Get orders from Shopify with timeout protection
             logger.info(f"Fetching orders for analytics summary from {start_date} to {end_date}")
 
-            orders = self.client.get_orders(
-                store_id=str(store.id),
-                since_time=start_date,
-                limit=250,  # Limit for better performance
-                status="any"
-            )
+            orders = self._fetch_orders(store, start_date)
 
             # Fast analytics calculations in Python instead of multiple API calls
             total_orders_30d = len(orders)
@@ -72,6 +72,12 @@ class BulkProductCreateRequest(BaseModel):
     inventory_quantity: int = 0
     track_inventory: bool = True
 
+    # Images added to every product (optional)
+    image_urls: Optional[list[str]] = None
+
+    # Progress session from /products/bulk-create/start (optional)
+    session_id: Optional[str] = None
+
     class Config:
         str_strip_whitespace = True
 
@@ -79,4 +85,5 @@ class BulkProductCreateResponse(BaseModel):
     success: bool
     message: str
     products_created: int
-    products: list[dict]
\ No newline at end of file
+    products: list[dict]
+    errors: Optional[list[str]] = None
\ No newline at end of file
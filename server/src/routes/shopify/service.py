@@ -11,6 +11,7 @@ from server.src.utils.shopify_client import (
     ShopifyRateLimitError
 )
 from server.src.entities.shopify_store import ShopifyStore
+from server.src.services.shopify_bulk_create import ShopifyBulkProductCreator, SHOPIFY_MAX_VARIANTS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -738,10 +739,14 @@ class ShopifyService:
 
         return [list(combo) for combo in combinations]
 
-    def bulk_create_products(self, user_id: UUID, bulk_request: Dict[str, Any]) -> Dict[str, Any]:
+    def bulk_create_products(self, user_id: UUID, bulk_request: Dict[str, Any],
+                             progress_callback=None) -> Dict[str, Any]:
         """
         Create multiple products with auto-generated names in user's connected Shopify store.
 
+        Products are created concurrently, paced by the store's REST call limit,
+        and image uploads start as soon as each product exists.
+
         Args:
             user_id: User UUID
             bulk_request: Dictionary containing:
@@ -759,6 +764,8 @@ class ShopifyService:
                 - variants: List of variant configurations (optional)
                 - inventory_quantity: Initial inventory quantity
                 - track_inventory: Whether to track inventory
+                - image_urls: Image URLs added to every product (optional)
+            progress_callback: Optional callable(completed, total, result) per finished product
 
         Returns:
             Dictionary containing created products and summary
@@ -792,9 +799,10 @@ class ShopifyService:
         tags = bulk_request.get('tags', '')
         status_value = bulk_request.get('status', 'draft')
         template_suffix = bulk_request.get('template_suffix')
-        variant_configs = bulk_request.get('variants', [])
+        variant_configs = bulk_request.get('variants') or []
         inventory_quantity = bulk_request.get('inventory_quantity', 0)
         track_inventory = bulk_request.get('track_inventory', True)
+        image_urls = bulk_request.get('image_urls') or []
 
         if not price or price <= 0:
             raise HTTPException(
@@ -802,101 +810,97 @@ class ShopifyService:
                 detail="Price must be greater than 0"
             )
 
-        created_products = []
-        errors = []
+        # Options and variants are identical for every product, so build them once
+        # and send them inline with each create instead of per-variant requests
+        options = None
+        if variant_configs:
+            options = []
+            for config in variant_configs[:3]:  # Shopify supports max 3 options
+                options.append({
+                    "name": config.get('option_name'),
+                    "values": config.get('option_values', [])
+                })
 
-        logger.info(f"🔄 Starting bulk product creation: {quantity} products")
+            variants = []
+            for combo in self._generate_variant_combinations(variant_configs):
+                # Calculate variant price
+                variant_price = price
+                for idx, config in enumerate(variant_configs):
+                    if idx < len(combo):
+                        variant_price += config.get('price_modifier', 0.0)
+
+                variant_data = {
+                    "price": str(variant_price),
+                    "inventory_management": "shopify" if track_inventory else None,
+                    "inventory_quantity": inventory_quantity if track_inventory else None,
+                }
 
-        for i in range(quantity):
-            current_number = starting_number + i
-            product_title = f"{name_prefix}{current_number}{name_postfix}"
+                # Add option values
+                for idx, value in enumerate(combo[:3]):  # Max 3 options
+                    variant_data[f"option{idx + 1}"] = value
 
-            try:
-                # Build base product data
-                product_data = {
-                    "product": {
-                        "title": product_title,
-                        "body_html": description,
-                        "vendor": vendor,
-                        "product_type": product_type,
-                        "tags": tags,
-                        "status": status_value,
-                    }
+                variants.append(variant_data)
+        else:
+            # No variants - single default variant
+            variants = [
+                {
+                    "price": str(price),
+                    "inventory_management": "shopify" if track_inventory else None,
+                    "inventory_quantity": inventory_quantity if track_inventory else None,
                 }
+            ]
 
-                # Add template suffix if provided
-                if template_suffix:
-                    product_data["product"]["template_suffix"] = template_suffix
-
-                # Handle variants
-                if variant_configs and len(variant_configs) > 0:
-                    # Set up variant options
-                    options = []
-                    for idx, config in enumerate(variant_configs[:3]):  # Shopify supports max 3 options
-                        options.append({
-                            "name": config.get('option_name'),
-                            "values": config.get('option_values', [])
-                        })
-
-                    product_data["product"]["options"] = options
-
-                    # Generate variant combinations
-                    variant_combinations = self._generate_variant_combinations(variant_configs)
-
-                    # Build variants array
-                    variants = []
-                    for combo in variant_combinations:
-                        # Calculate variant price
-                        variant_price = price
-                        for idx, config in enumerate(variant_configs):
-                            if idx < len(combo):
-                                modifier = config.get('price_modifier', 0.0)
-                                variant_price += modifier
-
-                        variant_data = {
-                            "price": str(variant_price),
-                            "inventory_management": "shopify" if track_inventory else None,
-                            "inventory_quantity": inventory_quantity if track_inventory else None,
-                        }
-
-                        # Add option values
-                        for idx, value in enumerate(combo[:3]):  # Max 3 options
-                            variant_data[f"option{idx + 1}"] = value
-
-                        variants.append(variant_data)
-
-                    product_data["product"]["variants"] = variants
-                else:
-                    # No variants - single default variant
-                    product_data["product"]["variants"] = [
-                        {
-                            "price": str(price),
-                            "inventory_management": "shopify" if track_inventory else None,
-                            "inventory_quantity": inventory_quantity if track_inventory else None,
-                        }
-                    ]
-
-                # Create product via Shopify API
-                product = self.client.create_product(
-                    store_id=str(store.id),
-                    product_data=product_data
-                )
+        if len(variants) > SHOPIFY_MAX_VARIANTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Variant options produce {len(variants)} combinations; Shopify allows at most {SHOPIFY_MAX_VARIANTS}"
+            )
 
-                created_products.append({
-                    "id": product.get("id"),
-                    "title": product.get("title"),
-                    "status": product.get("status"),
-                    "variants_count": len(product.get("variants", []))
-                })
+        products = []
+        for i in range(quantity):
+            product_data = {
+                "title": f"{name_prefix}{starting_number + i}{name_postfix}",
+                "body_html": description,
+                "vendor": vendor,
+                "product_type": product_type,
+                "tags": tags,
+                "status": status_value,
+                "variants": variants,
+            }
 
-                logger.info(f"✅ Created product {i+1}/{quantity}: {product_title}")
+            # Add template suffix if provided
+            if template_suffix:
+                product_data["template_suffix"] = template_suffix
+            if options:
+                product_data["options"] = options
 
-            except Exception as e:
-                error_msg = f"Failed to create product '{product_title}': {str(e)}"
-                logger.error(f"❌ {error_msg}")
-                errors.append(error_msg)
+            products.append(product_data)
+
+        logger.info(f"🔄 Starting bulk product creation: {quantity} products")
+
+        creator = ShopifyBulkProductCreator(self.client, store)
+        results = creator.run(
+            products,
+            images=[{"src": url} for url in image_urls],
+            progress_callback=progress_callback
+        )
+
+        created_products = []
+        errors = []
+        for result in results:
+            errors.extend(result["errors"])
+            if not result["success"]:
                 continue
 
+            product = result["product"]
+            created_products.append({
+                "id": product.get("id"),
+                "title": product.get("title"),
+                "status": product.get("status"),
+                "variants_count": len(product.get("variants", [])),
+                "images_uploaded": result["images_uploaded"]
+            })
+
         # Return summary
         return {
             "success": len(created_products) > 0,
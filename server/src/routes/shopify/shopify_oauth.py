@@ -807,6 +807,22 @@ async def delete_product(
 
     return {"success": success, "message": "Product deleted successfully"}
 
+@router.post("/products/bulk-create/start")
+async def start_bulk_product_creation(
+    current_user: CurrentUser,
+    quantity: int = 0
+):
+    """
+    Open a progress session for a bulk product creation.
+
+    Pass the returned session_id to /products/bulk-create and subscribe to
+    /api/designs/progress/{session_id} for an event per finished product.
+    """
+    from server.src.utils.progress_manager import progress_manager
+
+    session_id = progress_manager.create_session(0, quantity)
+    return {"session_id": session_id, "quantity": quantity}
+
 @router.post("/products/bulk-create", response_model=model.BulkProductCreateResponse)
 async def bulk_create_products(
     request: model.BulkProductCreateRequest,
@@ -817,15 +833,41 @@ async def bulk_create_products(
     Create multiple products with auto-generated names.
     Names are generated as: {prefix}{number}{postfix}
     where number starts at starting_number and increments for each product.
+    Pass a session_id to receive per-product progress.
     """
+    import asyncio
+    from server.src.utils.progress_manager import progress_manager
+
     service = ShopifyService(db)
+    session_id = request.session_id
+
+    def progress_callback(completed: int, total: int, result: dict):
+        state = "created" if result.get("success") else "failed"
+        progress_manager.update_progress(
+            session_id,
+            completed,
+            total,
+            f"Product '{result.get('title')}' {state}",
+            current_file=result.get("title") or ""
+        )
 
-    result = service.bulk_create_products(
-        user_id=current_user.get_uuid(),
-        bulk_request=request.dict()
-    )
+    def bulk_create():
+        try:
+            result = service.bulk_create_products(
+                user_id=current_user.get_uuid(),
+                bulk_request=request.dict(),
+                progress_callback=progress_callback if session_id else None
+            )
+            if session_id:
+                progress_manager.complete_session(session_id, success=result["success"], final_message=result["message"])
+            return result
+        except Exception as e:
+            if session_id:
+                progress_manager.complete_session(session_id, success=False, final_message=f"Bulk creation failed: {str(e)}")
+            raise
 
-    return result
+    # Creation is paced by Shopify's call limit; keep it off the event loop
+    return await asyncio.get_event_loop().run_in_executor(None, bulk_create)
 
 @router.post("/products/{product_id}/images")
 async def upload_product_image(
@@ -1537,6 +1579,62 @@ async def get_analytics_summary(
 
     return summary
 
+@router.post("/sync")
+async def start_shopify_sync(
+    current_user: CurrentUser,
+    db: Session = Depends(get_db),
+    resource: Optional[str] = None
+):
+    """Start a background GraphQL bulk sync of products and orders for the user's store"""
+    from server.src.services.shopify_bulk_sync import RESOURCES, ShopifyBulkSyncService, start_background_sync
+
+    if resource and resource not in RESOURCES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported sync resource: {resource}"
+        )
+
+    store = db.query(ShopifyStore).filter(
+        ShopifyStore.user_id == current_user.get_uuid(),
+        ShopifyStore.is_active == True
+    ).first()
+    if not store:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No active Shopify store found"
+        )
+
+    start_background_sync(str(store.id), resource)
+    return {
+        "store_id": str(store.id),
+        "started": True,
+        "resources": [resource] if resource else list(RESOURCES),
+        "status": ShopifyBulkSyncService(db).get_sync_status(store.id)
+    }
+
+@router.get("/sync/status")
+async def get_shopify_sync_status(
+    current_user: CurrentUser,
+    db: Session = Depends(get_db)
+):
+    """Get bulk sync state per resource for the user's store"""
+    from server.src.services.shopify_bulk_sync import ShopifyBulkSyncService
+
+    store = db.query(ShopifyStore).filter(
+        ShopifyStore.user_id == current_user.get_uuid(),
+        ShopifyStore.is_active == True
+    ).first()
+    if not store:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No active Shopify store found"
+        )
+
+    return {
+        "store_id": str(store.id),
+        "status": ShopifyBulkSyncService(db).get_sync_status(store.id)
+    }
+
 # Shopify metadata endpoints for template creation
 
 @router.get("/metadata/product-types")
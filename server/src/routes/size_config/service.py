@@ -13,6 +13,7 @@ from server.src.message import(
     SizeConfigUpdateError,
     SizeConfigDeleteError
 )
+from server.src.services.sizing_registry import sizing_registry
 import logging
 
 def create_size_config(
@@ -47,6 +48,7 @@ def create_size_config(
         
         db.add(new_size_config)
         db.commit()
+        sizing_registry.invalidate(product_template_id)
         db.refresh(new_size_config)
         
         return new_size_config
@@ -118,6 +120,7 @@ def update_size_config(
             setattr(db_size_config, field, value)
         
         db.commit()
+        sizing_registry.invalidate(product_template_id)
         db.refresh(db_size_config)
         
         return db_size_config
@@ -177,6 +180,7 @@ def delete_size_config(
         # Soft delete by setting is_active to False
         setattr(db_size_config, 'is_active', False)
         db.commit()
+        sizing_registry.invalidate(product_template_id)
         logging.info(f"Successfully deleted size config with ID: {size_config_id} and product template ID: {product_template_id} for user ID: {canvas_config_id}")
   
     except Exception as e:
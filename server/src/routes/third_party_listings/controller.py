@@ -4,6 +4,7 @@ from typing import Optional
 from server.src.database.core import get_db
 from server.src.routes.auth.service import CurrentUser
 from server.src.entities.user import User
+from server.src.utils.progress_manager import progress_manager
 from . import service, model
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
@@ -23,12 +24,31 @@ def run_in_thread(func):
     return wrapper
 
 
+def _bulk_progress_callback(session_id: Optional[str]):
+    """Build a per-listing progress callback that publishes to a progress session"""
+    if not session_id:
+        return None
+
+    def progress_callback(completed: int, total: int, result: dict):
+        status = "updated" if result.get('success') else f"failed: {result.get('error')}"
+        progress_manager.update_progress(
+            session_id,
+            completed,
+            total,
+            f"Listing {result.get('listing_id')} {status}",
+            current_file=str(result.get('listing_id'))
+        )
+
+    return progress_callback
+
+
 @router.get("/", response_model=model.ListingsResponse)
 async def get_shop_listings(
     current_user: CurrentUser,
     state: str = Query(default="active", description="Filter by listing state (active, draft, expired, etc.)"),
     limit: Optional[int] = Query(default=100, le=100, description="Number of listings to return (max 100)"),
     offset: Optional[int] = Query(default=0, description="Number of listings to skip for pagination"),
+    refresh: bool = Query(default=False, description="Bypass the local listing snapshot and fetch from Etsy"),
     db: Session = Depends(get_db)
 ):
     """
@@ -41,7 +61,8 @@ async def get_shop_listings(
     request = model.GetListingsRequest(
         state=state,
         limit=limit,
-        offset=offset
+        offset=offset,
+        refresh=refresh
     )
 
     @run_in_thread
@@ -55,16 +76,19 @@ async def get_shop_listings(
 async def get_all_shop_listings(
     current_user: CurrentUser,
     state: str = Query(default="active", description="Filter by listing state (active, draft, expired, etc.)"),
+    refresh: bool = Query(default=False, description="Bypass the local listing snapshot and fetch from Etsy"),
     db: Session = Depends(get_db)
 ):
     """
     Get all shop listings (with automatic pagination) (threaded)
+
+    Served from the local listing snapshot when it is still current.
     """
     user_id = current_user.get_uuid()
     if user_id is None:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
-    request = model.GetAllListingsRequest(state=state)
+    request = model.GetAllListingsRequest(state=state, refresh=refresh)
 
     @run_in_thread
     def get_all_shop_listings_threaded():
@@ -130,9 +154,19 @@ async def bulk_update_listings(
     if user_id is None:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
+    progress_callback = _bulk_progress_callback(request.session_id)
+
     @run_in_thread
     def bulk_update_listings_threaded():
-        return service.bulk_update_listings(user_id, db, request)
+        try:
+            result = service.bulk_update_listings(user_id, db, request, progress_callback)
+            if request.session_id:
+                progress_manager.complete_session(request.session_id, success=True, final_message=result.message)
+            return result
+        except Exception as e:
+            if request.session_id:
+                progress_manager.complete_session(request.session_id, success=False, final_message=f"Bulk update failed: {str(e)}")
+            raise
 
     return await bulk_update_listings_threaded()
 
@@ -153,13 +187,64 @@ async def update_selected_listings(
     if user_id is None:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
+    progress_callback = _bulk_progress_callback(request.session_id)
+
     @run_in_thread
     def update_selected_listings_threaded():
-        return service.update_selected_listings(user_id, db, request)
+        try:
+            result = service.update_selected_listings(user_id, db, request, progress_callback)
+            if request.session_id:
+                progress_manager.complete_session(request.session_id, success=True, final_message=result.message)
+            return result
+        except Exception as e:
+            if request.session_id:
+                progress_manager.complete_session(request.session_id, success=False, final_message=f"Selected listings update failed: {str(e)}")
+            raise
 
     return await update_selected_listings_threaded()
 
 
+@router.post("/bulk-update/start")
+async def start_bulk_update(
+    current_user: CurrentUser,
+    listing_count: int = Query(default=0, description="Number of listings that will be updated"),
+):
+    """
+    Start a progress session for a bulk or selected listings update
+
+    Pass the returned session_id in the bulk update request, and subscribe to
+    /designs/progress/{session_id} to receive an event per finished listing.
+    """
+    user_id = current_user.get_uuid()
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="User not authenticated")
+
+    session_id = progress_manager.create_session(0, listing_count)
+    return {"session_id": session_id, "listing_count": listing_count}
+
+
+@router.get("/bulk-update/jobs/{job_id}", response_model=model.BulkUpdateJobResponse)
+async def get_bulk_update_job(
+    job_id: str,
+    current_user: CurrentUser
+):
+    """
+    Get the status of a bulk update job
+
+    A job that stopped partway can be resumed by re-sending the original
+    bulk update request with this job_id; finished listings are skipped.
+    """
+    user_id = current_user.get_uuid()
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="User not authenticated")
+
+    @run_in_thread
+    def get_bulk_update_job_threaded():
+        return service.get_bulk_update_job(user_id, job_id)
+
+    return await get_bulk_update_job_threaded()
+
+
 @router.get("/options/taxonomies", response_model=model.TaxonomiesResponse)
 async def get_taxonomies(
     current_user: CurrentUser,
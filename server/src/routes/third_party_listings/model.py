@@ -96,11 +96,15 @@ class BulkListingUpdateRequest(BaseModel):
     """Request model for bulk updating listings"""
     listing_ids: List[int] = Field(..., description="List of listing IDs to update")
     updates: ListingUpdateRequest = Field(..., description="Updates to apply to all selected listings")
+    job_id: Optional[str] = Field(default=None, description="ID of a previous bulk update job to resume")
+    session_id: Optional[str] = Field(default=None, description="Progress session ID for per-listing progress events")
 
 
 class SelectedListingsUpdateRequest(BaseModel):
     """Request model for updating specific listings with individual data"""
     listing_updates: List[Dict[str, Any]] = Field(..., description="List of listing updates, each must contain 'listing_id' and update fields")
+    job_id: Optional[str] = Field(default=None, description="ID of a previous bulk update job to resume")
+    session_id: Optional[str] = Field(default=None, description="Progress session ID for per-listing progress events")
 
 
 class ListingUpdateResult(BaseModel):
@@ -118,20 +122,35 @@ class BulkUpdateResponse(BaseModel):
     total: int
     success_count: int
     failure_count: int
+    job_id: Optional[str] = None
     success_code: int = 200
     message: Optional[str] = "Bulk update completed"
 
 
+class BulkUpdateJobResponse(BaseModel):
+    """Response model for bulk update job status"""
+    job_id: str
+    status: str
+    total: int
+    processed: int
+    success_count: int
+    failure_count: int
+    success_code: int = 200
+    message: Optional[str] = "Bulk update job retrieved"
+
+
 class GetListingsRequest(BaseModel):
     """Request model for getting listings with filters"""
     state: str = Field(default="active", description="Filter by listing state (active, draft, expired, etc.)")
     limit: Optional[int] = Field(default=100, le=100, description="Number of listings to return (max 100)")
     offset: Optional[int] = Field(default=0, description="Number of listings to skip for pagination")
+    refresh: bool = Field(default=False, description="Bypass the local listing snapshot and fetch from Etsy")
 
 
 class GetAllListingsRequest(BaseModel):
     """Request model for getting all listings"""
     state: str = Field(default="active", description="Filter by listing state (active, draft, expired, etc.)")
+    refresh: bool = Field(default=False, description="Bypass the local listing snapshot and fetch from Etsy")
 
 
 class DropdownOption(BaseModel):
@@ -1,11 +1,13 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Callable
 from uuid import UUID
 import logging
 from server.src.utils.etsy_api_engine import EtsyAPI
+from server.src.services.etsy_bulk_update import BulkUpdateJobNotFoundError
 from server.src.message import (
     ThirdPartyListingError,
     ThirdPartyListingNotFoundError,
-    ThirdPartyListingUpdateError
+    ThirdPartyListingUpdateError,
+    ThirdPartyListingBulkJobNotFoundError
 )
 from . import model
 
@@ -109,7 +111,8 @@ def get_shop_listings(user_id: UUID, db, request: model.GetListingsRequest) -> m
         response = etsy_api.get_shop_listings(
             state=request.state,
             limit=request.limit or 100,
-            offset=request.offset or 0
+            offset=request.offset or 0,
+            use_cache=not request.refresh
         )
         
         listings = [_parse_etsy_listing(listing) for listing in response.get('results', [])]
@@ -134,7 +137,7 @@ def get_all_shop_listings(user_id: UUID, db, request: model.GetAllListingsReques
     try:
         etsy_api = EtsyAPI(user_id, db)
         
-        response = etsy_api.get_all_shop_listings(state=request.state)
+        response = etsy_api.get_all_shop_listings(state=request.state, use_cache=not request.refresh)
         
         listings = [_parse_etsy_listing(listing) for listing in response.get('results', [])]
         
@@ -192,7 +195,8 @@ def update_listing(user_id: UUID, db, listing_id: int, update_request: model.Lis
         raise ThirdPartyListingUpdateError(listing_id, str(e))
 
 
-def bulk_update_listings(user_id: UUID, db, request: model.BulkListingUpdateRequest) -> model.BulkUpdateResponse:
+def bulk_update_listings(user_id: UUID, db, request: model.BulkListingUpdateRequest,
+                         progress_callback: Optional[Callable] = None) -> model.BulkUpdateResponse:
     """
     Update multiple listings with the same data
     """
@@ -211,7 +215,11 @@ def bulk_update_listings(user_id: UUID, db, request: model.BulkListingUpdateRequ
             update_with_id['listing_id'] = listing_id
             listing_updates.append(update_with_id)
         
-        results = etsy_api.bulk_update_listings(listing_updates)
+        results = etsy_api.bulk_update_listings(
+            listing_updates,
+            job_id=request.job_id,
+            progress_callback=progress_callback
+        )
         
         # Transform results to our response format
         successful = [
@@ -238,16 +246,20 @@ def bulk_update_listings(user_id: UUID, db, request: model.BulkListingUpdateRequ
             total=results['total'],
             success_count=len(successful),
             failure_count=len(failed),
+            job_id=results.get('job_id'),
             success_code=200,
             message=f"Bulk update completed: {len(successful)} successful, {len(failed)} failed"
         )
         
+    except BulkUpdateJobNotFoundError as e:
+        raise ThirdPartyListingBulkJobNotFoundError(e.job_id)
     except Exception as e:
         logging.error(f"Error bulk updating listings for user {user_id}: {e}")
         raise ThirdPartyListingError(f"Failed to bulk update listings: {str(e)}")
 
 
-def update_selected_listings(user_id: UUID, db, request: model.SelectedListingsUpdateRequest) -> model.BulkUpdateResponse:
+def update_selected_listings(user_id: UUID, db, request: model.SelectedListingsUpdateRequest,
+                             progress_callback: Optional[Callable] = None) -> model.BulkUpdateResponse:
     """
     Update specific listings with individual update data
     """
@@ -262,7 +274,11 @@ def update_selected_listings(user_id: UUID, db, request: model.SelectedListingsU
             if 'listing_id' not in update:
                 raise ThirdPartyListingError("Each listing update must contain 'listing_id'")
         
-        results = etsy_api.bulk_update_listings(request.listing_updates)
+        results = etsy_api.bulk_update_listings(
+            request.listing_updates,
+            job_id=request.job_id,
+            progress_callback=progress_callback
+        )
         
         # Transform results to our response format
         successful = [
@@ -289,15 +305,40 @@ def update_selected_listings(user_id: UUID, db, request: model.SelectedListingsU
             total=results['total'],
             success_count=len(successful),
             failure_count=len(failed),
+            job_id=results.get('job_id'),
             success_code=200,
             message=f"Selected listings update completed: {len(successful)} successful, {len(failed)} failed"
         )
         
+    except BulkUpdateJobNotFoundError as e:
+        raise ThirdPartyListingBulkJobNotFoundError(e.job_id)
     except Exception as e:
         logging.error(f"Error updating selected listings for user {user_id}: {e}")
         raise ThirdPartyListingError(f"Failed to update selected listings: {str(e)}")
 
 
+def get_bulk_update_job(user_id: UUID, job_id: str) -> model.BulkUpdateJobResponse:
+    """
+    Get the progress of a bulk update job
+    """
+    from server.src.services.etsy_bulk_update import get_bulk_update_job as fetch_bulk_update_job
+
+    job = fetch_bulk_update_job(job_id)
+    if not job or job.get('user_id') != str(user_id):
+        raise ThirdPartyListingBulkJobNotFoundError(job_id)
+
+    return model.BulkUpdateJobResponse(
+        job_id=job['job_id'],
+        status=job['status'],
+        total=job['total'],
+        processed=job['processed'],
+        success_count=job['success_count'],
+        failure_count=job['failure_count'],
+        success_code=200,
+        message=f"Bulk update job {job['status']}: {job['processed']}/{job['total']} processed"
+    )
+
+
 def get_taxonomies(user_id: UUID, db) -> model.TaxonomiesResponse:
     """
     Get all available taxonomies (categories) for listings
@@ -10,6 +10,7 @@ Usage:
 import os
 import sys
 import argparse
+import time
 import logging
 from datetime import datetime
 from sqlalchemy import text
@@ -19,8 +20,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from server.src.database.core import get_db
 from server.src.entities.designs import DesignImages
-from server.src.services.ai_tagging_service import ai_tagging_service
-from server.src.utils.nas_storage import nas_storage
+from server.src.services.design_tagging_pipeline import TagRequest, design_tagging_pipeline
 
 logging.basicConfig(
     level=logging.INFO,
@@ -31,17 +31,24 @@ def backfill_tags(user_id=None, limit=None, batch_size=10, dry_run=False):
     """
     Generate tags for existing designs without tags
 
+    Designs go through the same pipeline as new uploads: tags are reused by
+    phash where possible, the rest are tagged batch_size images per call and
+    written back with one UPDATE per batch.
+
     Args:
         user_id: Optional - process only this user's designs
         limit: Optional - max number to process
-        batch_size: Process N images before pausing (rate limiting)
+        batch_size: Designs per tagging batch
         dry_run: If True, don't actually save tags
     """
     db = next(get_db())
 
     try:
         # Build query for designs without tags
-        query = db.query(DesignImages).filter(
+        query = db.query(
+            DesignImages.id, DesignImages.user_id, DesignImages.phash,
+            DesignImages.filename, DesignImages.file_path
+        ).filter(
             DesignImages.is_active == True
         ).filter(
             (DesignImages.tags == None) | (DesignImages.tags == [])
@@ -55,65 +62,48 @@ def backfill_tags(user_id=None, limit=None, batch_size=10, dry_run=False):
 
         designs = query.all()
         logging.info(f"Found {len(designs)} designs to process")
+    finally:
+        db.close()
 
-        if dry_run:
-            logging.info("DRY RUN MODE - no changes will be saved")
-
-        success_count = 0
-        error_count = 0
-
-        for i, design in enumerate(designs):
-            try:
-                logging.info(f"[{i+1}/{len(designs)}] Processing: {design.filename}")
-
-                # Download image from NAS
-                # Parse file_path: "/share/Graphics/{shop}/{template}/{file}"
-                parts = design.file_path.split('/')
-                if len(parts) < 5:
-                    logging.error(f"Invalid file_path format: {design.file_path}")
-                    error_count += 1
-                    continue
-
-                shop_name = parts[3]
-                relative_path = '/'.join(parts[4:])
-
-                image_bytes = nas_storage.download_file_to_memory(shop_name, relative_path)
-                if not image_bytes:
-                    logging.error(f"Failed to download: {design.file_path}")
-                    error_count += 1
-                    continue
-
-                # Generate tags
-                result = ai_tagging_service.generate_tags(image_bytes, design.filename)
-
-                if not dry_run:
-                    # Update design
-                    design.tags = result['tags']
-                    design.tags_metadata = result.get('metadata')
-                    db.commit()
-
+    if dry_run:
+        logging.info("DRY RUN MODE - no changes will be saved")
+
+    success_count = 0
+    error_count = 0
+
+    for start in range(0, len(designs), batch_size):
+        batch = designs[start:start + batch_size]
+        logging.info(f"[{start + 1}-{start + len(batch)}/{len(designs)}] Tagging {len(batch)} designs")
+
+        requests = [
+            TagRequest(design_id=design.id, user_id=design.user_id, phash=design.phash,
+                       filename=design.filename, file_path=design.file_path)
+            for design in batch
+        ]
+        try:
+            results = design_tagging_pipeline.process(requests, dry_run=dry_run)
+        except Exception as e:
+            logging.error(f"Failed to tag batch starting at {batch[0].filename}: {e}")
+            error_count += len(batch)
+            continue
+
+        for design, result in zip(batch, results):
+            if result.get('tags'):
                 success_count += 1
-                logging.info(f"✓ Generated {len(result['tags'])} tags: {result['tags'][:5]}...")
-
-                # Rate limiting: pause after each batch
-                if (i + 1) % batch_size == 0:
-                    import time
-                    logging.info(f"Batch complete. Pausing 2s for rate limiting...")
-                    time.sleep(2)
-
-            except Exception as e:
-                logging.error(f"Failed to process {design.filename}: {e}")
+                logging.info(f"✓ {design.filename}: {len(result['tags'])} tags: {result['tags'][:5]}...")
+            else:
                 error_count += 1
-                if not dry_run:
-                    db.rollback()
+                logging.error(f"✗ {design.filename}: {result.get('metadata', {}).get('error', 'no tags generated')}")
 
-        logging.info(f"\nBackfill complete!")
-        logging.info(f"  Success: {success_count}")
-        logging.info(f"  Errors: {error_count}")
-        logging.info(f"  Total: {len(designs)}")
+        # Rate limiting: pause between batches
+        if start + batch_size < len(designs):
+            time.sleep(2)
 
-    finally:
-        db.close()
+    logging.info(f"\nBackfill complete!")
+    logging.info(f"  Success: {success_count}")
+    logging.info(f"  Errors: {error_count}")
+    logging.info(f"  Reused by phash: {design_tagging_pipeline.cache_hits}")
+    logging.info(f"  Total: {len(designs)}")
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
@@ -134,7 +124,7 @@ Examples:
     parser.add_argument('--user-id', help='Process only this user ID (UUID)')
     parser.add_argument('--limit', type=int, help='Max number of designs to process')
     parser.add_argument('--batch-size', type=int, default=10,
-                       help='Batch size for rate limiting (default: 10)')
+                       help='Designs per tagging batch (default: 10)')
     parser.add_argument('--dry-run', action='store_true',
                        help='Preview changes without saving')
     parser.add_argument('--all', action='store_true',
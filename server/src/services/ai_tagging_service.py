@@ -18,7 +18,7 @@ import os
 import logging
 import json
 import re
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Tuple
 import base64
 import time
 from functools import wraps
@@ -151,11 +151,99 @@ class AITaggingService:
                 }
             }
 
+    def generate_tags_batch(self, items: List[Tuple[bytes, str]]) -> List[Dict[str, Any]]:
+        """
+        Generate tags for several images, in the same order
+
+        AI mode sends all images in one vision request. If the response can't
+        be matched back to the images, each image is tagged on its own.
+        Basic mode tags each image separately.
+
+        Args:
+            items: (image_bytes, filename) pairs
+
+        Returns:
+            One generate_tags() style result per image
+        """
+        if not self.enabled or not self.use_ai_mode or len(items) < 2:
+            return [self.generate_tags(image_bytes, filename) for image_bytes, filename in items]
+
+        start_time = time.time()
+        try:
+            results = self._generate_tags_ai_batch(items, start_time)
+            logging.info(
+                f"✓ Generated tags for {len(items)} images in one request "
+                f"in {time.time() - start_time:.2f}s (mode: ai)"
+            )
+            return results
+        except Exception as e:
+            logging.warning(f"Batched tagging failed, tagging {len(items)} images individually: {e}")
+            return [self.generate_tags(image_bytes, filename) for image_bytes, filename in items]
+
+    def _prepare_ai_image(self, image_bytes: bytes) -> str:
+        """
+        Base64 PNG for the vision API, downscaled to AI_IMAGE_MAX_SIDE
+
+        Requests use detail=low, which the API downsamples to 512px anyway,
+        so sending full-resolution designs only adds upload time.
+        """
+        max_side = int(os.getenv('AI_IMAGE_MAX_SIDE', '512'))
+        try:
+            image = Image.open(BytesIO(image_bytes))
+            if max(image.size) > max_side:
+                image.thumbnail((max_side, max_side))
+                buffer = BytesIO()
+                image.save(buffer, format='PNG')
+                image_bytes = buffer.getvalue()
+        except Exception as e:
+            logging.warning(f"Could not downscale image for tagging, sending original: {e}")
+        return base64.b64encode(image_bytes).decode('utf-8')
+
+    @retry_on_error(max_retries=3, delay=1.0)
+    def _generate_tags_ai_batch(self, items: List[Tuple[bytes, str]], start_time: float) -> List[Dict[str, Any]]:
+        """One OpenAI Vision request tagging several images"""
+        content = [{"type": "text", "text": self._build_ai_batch_prompt([filename for _, filename in items])}]
+        for image_bytes, _ in items:
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/png;base64,{self._prepare_ai_image(image_bytes)}",
+                    "detail": "low"  # Cost optimization
+                }
+            })
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": content}],
+            max_tokens=self.max_tokens * len(items),
+            timeout=self.timeout * 2
+        )
+
+        processing_time = time.time() - start_time
+        data = json.loads(self._strip_code_fences(response.choices[0].message.content))
+        images = data.get('images') if isinstance(data, dict) else data
+        if not isinstance(images, list) or len(images) != len(items):
+            raise ValueError(f"Expected tags for {len(items)} images, got {len(images) if isinstance(images, list) else 0}")
+
+        results = []
+        for image_data in images:
+            result = self._structure_ai_tags(image_data if isinstance(image_data, dict) else {}, processing_time)
+            result['metadata']['mode'] = 'ai'
+            result['metadata']['batch_size'] = len(items)
+            results.append(result)
+
+        estimated_cost = 0.01 * len(items)
+        logging.info(
+            f"API Usage: batch of {len(items)} | {processing_time:.2f}s | "
+            f"{sum(len(r['tags']) for r in results)} tags | ~${estimated_cost:.4f}"
+        )
+        return results
+
     @retry_on_error(max_retries=3, delay=1.0)
     def _generate_tags_ai(self, image_bytes: bytes, filename: str, start_time: float) -> Dict[str, Any]:
         """AI-powered tagging using OpenAI Vision API"""
         # Encode image to base64
-        base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        base64_image = self._prepare_ai_image(image_bytes)
 
         # Build comprehensive tagging prompt
         prompt = self._build_ai_tagging_prompt(filename)
@@ -433,40 +521,66 @@ Context: {filename}
 
 Be specific, descriptive, and thorough."""
 
+    def _build_ai_batch_prompt(self, filenames: List[str]) -> str:
+        """Prompt asking for one tag object per attached image, in order"""
+        single = self._build_ai_tagging_prompt("")
+        instructions = single.split("Return this exact JSON structure:")[0].replace(
+            "Analyze this design image", f"Analyze each of the {len(filenames)} design images below"
+        )
+        context = "\n".join(f"Image {i + 1}: {filename}" for i, filename in enumerate(filenames))
+        return f"""{instructions}Return this exact JSON structure, with one entry per image in the order given:
+{{
+  "images": [
+    {{"text": [], "objects": [], "relationships": [], "style": [], "colors": [], "themes": []}}
+  ]
+}}
+
+Context:
+{context}
+
+Be specific, descriptive, and thorough."""
+
+    @staticmethod
+    def _strip_code_fences(content: str) -> str:
+        """Clean markdown artifacts if present"""
+        content = content.strip()
+        if content.startswith('```'):
+            lines = content.split('\n')
+            content = '\n'.join(line for line in lines if not line.startswith('```'))
+        return content
+
+    def _structure_ai_tags(self, data: Dict[str, Any], processing_time: float) -> Dict[str, Any]:
+        """Flatten one image's categories into a single tag list + preserve categories"""
+        all_tags = []
+        categories = {}
+
+        for category in ['text', 'objects', 'relationships', 'style', 'colors', 'themes']:
+            category_tags = data.get(category, [])
+            if isinstance(category_tags, list):
+                all_tags.extend(category_tags)
+                categories[category] = category_tags
+
+        # Normalize: lowercase, deduplicate, trim
+        all_tags = list(set([tag.lower().strip() for tag in all_tags if tag]))
+
+        return {
+            'tags': all_tags,
+            'metadata': {
+                'model': self.model,
+                'processing_time': round(processing_time, 2),
+                'categories': categories,
+                'total_tags': len(all_tags)
+            }
+        }
+
     def _parse_ai_vision_response(self, content: str, processing_time: float) -> Dict[str, Any]:
         """Parse OpenAI Vision response into structured tags"""
         try:
-            # Clean markdown artifacts if present
-            content = content.strip()
-            if content.startswith('```'):
-                lines = content.split('\n')
-                content = '\n'.join(line for line in lines if not line.startswith('```'))
+            content = self._strip_code_fences(content)
 
             # Parse JSON
             data = json.loads(content)
-
-            # Flatten all categories into single tag list + preserve categories
-            all_tags = []
-            categories = {}
-
-            for category in ['text', 'objects', 'relationships', 'style', 'colors', 'themes']:
-                category_tags = data.get(category, [])
-                if isinstance(category_tags, list):
-                    all_tags.extend(category_tags)
-                    categories[category] = category_tags
-
-            # Normalize: lowercase, deduplicate, trim
-            all_tags = list(set([tag.lower().strip() for tag in all_tags if tag]))
-
-            return {
-                'tags': all_tags,
-                'metadata': {
-                    'model': self.model,
-                    'processing_time': round(processing_time, 2),
-                    'categories': categories,
-                    'total_tags': len(all_tags)
-                }
-            }
+            return self._structure_ai_tags(data, processing_time)
 
         except json.JSONDecodeError as e:
             logging.error(f"JSON parse failed: {e}")
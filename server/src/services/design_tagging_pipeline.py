@@ -0,0 +1,353 @@
+"""
+Design Tagging Pipeline
+
+Tags designs in the background instead of on the upload's critical path.
+Uploads insert their designs with empty tags and submit them here. A
+background thread collects up to TAGGING_BATCH_SIZE designs, or whatever
+arrived within TAGGING_BATCH_WAIT seconds, and then:
+
+1. Reuses tags by perceptual hash. It checks an in-memory cache first,
+   which also matches near-duplicates within TAGGING_CACHE_HAMMING bits,
+   and then the user's already tagged designs with the same phash.
+2. Tags the remaining images with one AITaggingService.generate_tags_batch
+   call. In AI mode that is one vision request.
+3. Backfills DesignImages.tags / tags_metadata with one executemany UPDATE.
+   Only designs whose tags are still empty are written, so tags edited in
+   the meantime are kept.
+
+Queued designs carry the PNG bytes the upload already has, up to
+TAGGING_MAX_PENDING_MB in total. Beyond that they carry only their NAS path
+and are downloaded when their batch runs. Designs still queued at shutdown
+keep empty tags, and backfill_design_tags picks them up later.
+
+process() runs the same stages synchronously; the backfill script uses it.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, cast, or_, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+
+from server.src.database.core import SessionLocal
+from server.src.entities.designs import DesignImages
+
+logger = logging.getLogger(__name__)
+
+TAGGING_BATCH_SIZE = int(os.getenv('TAGGING_BATCH_SIZE', '8'))
+TAGGING_BATCH_WAIT = float(os.getenv('TAGGING_BATCH_WAIT', '2.0'))
+TAGGING_CACHE_MAX_ENTRIES = int(os.getenv('TAGGING_CACHE_MAX_ENTRIES', '5000'))
+TAGGING_CACHE_HAMMING = int(os.getenv('TAGGING_CACHE_HAMMING', '4'))
+TAGGING_MAX_PENDING_MB = int(os.getenv('TAGGING_MAX_PENDING_MB', '256'))
+
+
+@dataclass
+class TagRequest:
+    """A design waiting for tags"""
+    design_id: Any
+    user_id: Any
+    phash: Optional[str]
+    filename: str
+    file_path: Optional[str] = None
+    content: Optional[bytes] = None
+
+
+def hamming_distance(hash_a: str, hash_b: str) -> int:
+    """Bit difference between two equal-length hex hashes"""
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+def split_nas_path(file_path: str) -> Tuple[str, str]:
+    """(shop_name, relative_path) from "/share/Graphics/{shop}/{template}/{file}\""""
+    parts = file_path.split('/')
+    if len(parts) < 5:
+        raise ValueError(f"Invalid file_path format: {file_path}")
+    return parts[3], '/'.join(parts[4:])
+
+
+class TagCache:
+    """LRU of tag results keyed by (user, phash), with near-duplicate lookup"""
+
+    def __init__(self, max_entries: int = TAGGING_CACHE_MAX_ENTRIES, max_distance: int = TAGGING_CACHE_HAMMING):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, phash: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not phash:
+            return None
+        key = (str(user_id), phash)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            if self.max_distance <= 0:
+                return None
+            # Near-duplicates: the closest cached hash from the same user
+            best, best_distance = None, self.max_distance + 1
+            for (entry_user, entry_phash), result in self._entries.items():
+                if entry_user != key[0] or len(entry_phash) != len(phash):
+                    continue
+                distance = hamming_distance(entry_phash, phash)
+                if distance < best_distance:
+                    best, best_distance = result, distance
+            return best
+
+    def set(self, user_id, phash: Optional[str], result: Dict[str, Any]):
+        if not phash or not result.get('tags'):
+            return
+        with self._lock:
+            self._entries[(str(user_id), phash)] = result
+            self._entries.move_to_end((str(user_id), phash))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DesignTaggingPipeline:
+    """Queues designs for tagging and backfills their tags in batches"""
+
+    def __init__(self, tagger=None, session_factory: Callable = SessionLocal, storage=None,
+                 batch_size: int = TAGGING_BATCH_SIZE, batch_wait: float = TAGGING_BATCH_WAIT,
+                 max_pending_bytes: int = TAGGING_MAX_PENDING_MB * 1024 * 1024,
+                 cache: Optional[TagCache] = None):
+        self._tagger = tagger
+        self._storage = storage
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.max_pending_bytes = max_pending_bytes
+        self.cache = cache or TagCache()
+
+        self._queue: "queue.Queue[TagRequest]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # Requests queued or being tagged, and the content bytes they hold
+        self._pending = 0
+        self._pending_bytes = 0
+
+        self.tagged_count = 0
+        self.cache_hits = 0
+        self.failed_count = 0
+
+    @property
+    def tagger(self):
+        if self._tagger is None:
+            from server.src.services.ai_tagging_service import ai_tagging_service
+            self._tagger = ai_tagging_service
+        return self._tagger
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from server.src.utils.nas_storage import nas_storage
+            self._storage = nas_storage
+        return self._storage
+
+    @property
+    def enabled(self) -> bool:
+        return self.tagger.enabled
+
+    def submit(self, request: TagRequest) -> bool:
+        """Queue a design for tagging; returns False if tagging is disabled"""
+        if not self.enabled:
+            return False
+
+        with self._idle:
+            if request.content is not None and self._pending_bytes + len(request.content) > self.max_pending_bytes:
+                # Keep memory bounded: the worker downloads it from the NAS instead
+                request.content = None
+            self._pending += 1
+            self._pending_bytes += len(request.content or b'')
+
+        self._ensure_started()
+        self._queue.put(request)
+        return True
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="design-tagging", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+            try:
+                self.process(batch)
+            except Exception as e:
+                self.failed_count += len(batch)
+                logger.error(f"❌ Tagging batch of {len(batch)} designs failed: {e}")
+            finally:
+                with self._idle:
+                    self._pending -= len(batch)
+                    self._pending_bytes -= sum(len(request.content or b'') for request in batch)
+                    self._idle.notify_all()
+
+    def _collect_batch(self) -> List[TagRequest]:
+        """Block briefly for the first request, then fill the batch until it's full or the wait elapses"""
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def process(self, requests: List[TagRequest], dry_run: bool = False) -> List[Dict[str, Any]]:
+        """
+        Tag designs now: cache, then one batched tagging call, then one UPDATE.
+
+        Returns:
+            One tag result per request, in order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+
+        # 1. Tags already known for these hashes
+        for index, request in enumerate(requests):
+            cached = self.cache.get(request.user_id, request.phash)
+            if cached is not None:
+                results[index] = self._from_cache(cached, request.phash)
+        self._fill_from_database(requests, results)
+        self.cache_hits += sum(1 for result in results if result is not None)
+
+        # 2. Tag the rest together
+        missing = [index for index, result in enumerate(results) if result is None]
+        items, item_indexes = [], []
+        for index in missing:
+            content = self._load_content(requests[index])
+            if content is None:
+                results[index] = {'tags': [], 'metadata': {'error': 'Image not available for tagging'}}
+                continue
+            items.append((content, requests[index].filename))
+            item_indexes.append(index)
+
+        if items:
+            for index, result in zip(item_indexes, self.tagger.generate_tags_batch(items)):
+                results[index] = result
+                if not result.get('metadata', {}).get('error'):
+                    self.cache.set(requests[index].user_id, requests[index].phash, result)
+
+        # 3. Backfill the designs
+        if not dry_run:
+            self._write_tags(requests, results)
+        self.tagged_count += sum(1 for result in results if result.get('tags'))
+        return results
+
+    @staticmethod
+    def _from_cache(result: Dict[str, Any], phash: Optional[str]) -> Dict[str, Any]:
+        metadata = dict(result.get('metadata') or {})
+        metadata['cached_from_phash'] = phash
+        return {'tags': list(result.get('tags', [])), 'metadata': metadata}
+
+    def _fill_from_database(self, requests: List[TagRequest], results: List[Optional[Dict[str, Any]]]):
+        """Reuse tags from the user's tagged designs with the same phash"""
+        lookups = {(str(request.user_id), request.phash) for request, result in zip(requests, results)
+                   if result is None and request.phash}
+        if not lookups:
+            return
+
+        table = DesignImages.__table__
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(table.c.user_id, table.c.phash, table.c.tags, table.c.tags_metadata)
+                .where(table.c.phash.in_({phash for _, phash in lookups}))
+                .where(table.c.user_id.in_({user_id for user_id, _ in lookups}))
+                .where(table.c.tags.isnot(None), table.c.tags != cast([], JSONB))
+            ).all()
+        except Exception as e:
+            logger.warning(f"Tag lookup by phash failed, tagging instead: {e}")
+            return
+        finally:
+            db.close()
+
+        known = {}
+        for row in rows:
+            known.setdefault((str(row.user_id), row.phash), {'tags': row.tags, 'metadata': row.tags_metadata})
+        for index, request in enumerate(requests):
+            found = known.get((str(request.user_id), request.phash))
+            if results[index] is None and found:
+                self.cache.set(request.user_id, request.phash, found)
+                results[index] = self._from_cache(found, request.phash)
+
+    def _load_content(self, request: TagRequest) -> Optional[bytes]:
+        if request.content is not None:
+            return request.content
+        if not request.file_path:
+            return None
+        try:
+            shop_name, relative_path = split_nas_path(request.file_path)
+            return self.storage.download_file_to_memory(shop_name, relative_path) or None
+        except Exception as e:
+            logger.error(f"Failed to download {request.file_path} for tagging: {e}")
+            return None
+
+    def _write_tags(self, requests: List[TagRequest], results: List[Dict[str, Any]]):
+        rows = [
+            {'design_id': request.design_id, 'new_tags': result['tags'], 'new_metadata': result.get('metadata')}
+            for request, result in zip(requests, results)
+            if request.design_id is not None and result.get('tags')
+        ]
+        if not rows:
+            return
+
+        table = DesignImages.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam('design_id'))
+            .where(or_(table.c.tags.is_(None), table.c.tags == cast([], JSONB)))
+            .values(tags=bindparam('new_tags'), tags_metadata=bindparam('new_metadata'))
+        )
+        db = self.session_factory()
+        try:
+            db.execute(statement, rows)
+            db.commit()
+            logger.info(f"🏷️ Backfilled tags for {len(rows)} designs")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued design has been tagged; returns False on timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def stop(self, timeout: float = 10.0):
+        """Give queued designs up to timeout seconds, then stop the background thread"""
+        self.flush(timeout)
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Global pipeline for the process
+design_tagging_pipeline = DesignTaggingPipeline()
@@ -3,12 +3,36 @@ DNS Verification Service
 
 Handles domain ownership verification via DNS TXT records.
 Supports both TXT record verification and CNAME verification methods.
+
+Lookups go through an async resolver layer:
+- All record types and public servers are queried concurrently, so a check
+  takes as long as the slowest single lookup rather than the sum of them
+- Answers are cached by their DNS TTL (clamped to DNS_CACHE_MIN_TTL ..
+  DNS_CACHE_MAX_TTL); NXDOMAIN / no-answer results for DNS_NEGATIVE_TTL.
+  Timeouts and server failures are never cached
+- Pending domains are verified in batches by a background sweep
+  (run_domain_verification_sweep, started by the worker) instead of only
+  when a user asks
 """
 
-import dns.resolver
+import os
+import time
+import asyncio
 import logging
-from typing import Dict, Optional
-from dataclasses import dataclass
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from server.src.database.core import SessionLocal
+from server.src.entities.ecommerce.domain_verification import DomainVerification
+from server.src.entities.ecommerce.storefront_settings import StorefrontSettings
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +40,26 @@ logger = logging.getLogger(__name__)
 VERIFICATION_RECORD_PREFIX = "_craftflow-verify"
 CNAME_TARGET = "stores.craftflow.store"
 DNS_TIMEOUT = 10  # seconds
-MAX_ATTEMPTS = 3
+PROPAGATION_TIMEOUT = 5  # seconds per public server lookup
+MAX_ATTEMPTS = 3  # Automatic sweep attempts per verification record
+
+# CraftFlow server IPs for A record verification (root domains)
+CRAFTFLOW_IPS: List[str] = []  # Add actual IPs when known
+
+# Popular public DNS servers to check propagation against
+PUBLIC_DNS_SERVERS = [
+    ("8.8.8.8", "Google"),
+    ("1.1.1.1", "Cloudflare"),
+    ("208.67.222.222", "OpenDNS"),
+    ("9.9.9.9", "Quad9"),
+]
+
+DNS_CACHE_MIN_TTL = int(os.getenv('DNS_CACHE_MIN_TTL', '5'))
+DNS_CACHE_MAX_TTL = int(os.getenv('DNS_CACHE_MAX_TTL', '300'))
+DNS_NEGATIVE_TTL = int(os.getenv('DNS_NEGATIVE_TTL', '30'))
+DNS_VERIFICATION_SWEEP_SECONDS = int(os.getenv('DNS_VERIFICATION_SWEEP_SECONDS', '300'))
+DNS_VERIFICATION_SWEEP_LIMIT = int(os.getenv('DNS_VERIFICATION_SWEEP_LIMIT', '200'))
+DNS_VERIFICATION_CONCURRENCY = int(os.getenv('DNS_VERIFICATION_CONCURRENCY', '20'))
 
 
 @dataclass
@@ -28,11 +71,114 @@ class VerificationResult:
     details: Optional[Dict] = None
 
 
-def verify_domain_ownership(domain: str, expected_token: str) -> Dict:
+@dataclass
+class DNSAnswer:
+    """Outcome of one lookup"""
+    status: str  # "ok", "nxdomain", "no_answer", "no_nameservers", "timeout", "error"
+    records: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+# ============================================================================
+# Async resolver layer
+# ============================================================================
+
+class DNSCache:
+    """TTL cache of lookup results keyed by (name, record type, nameserver)"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, Optional[str]], Tuple[float, DNSAnswer]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, rdtype: str, nameserver: Optional[str]) -> Optional[DNSAnswer]:
+        key = (name.lower(), rdtype, nameserver)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, name: str, rdtype: str, nameserver: Optional[str], answer: DNSAnswer, ttl: float):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[(name.lower(), rdtype, nameserver)] = (time.monotonic() + ttl, answer)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+dns_cache = DNSCache()
+_resolvers: Dict[Optional[str], dns.asyncresolver.Resolver] = {}
+
+
+def _get_resolver(nameserver: Optional[str]) -> dns.asyncresolver.Resolver:
+    """System resolver, or one pinned to a single public server"""
+    resolver = _resolvers.get(nameserver)
+    if resolver is None:
+        if nameserver is None:
+            resolver = dns.asyncresolver.Resolver()
+        else:
+            resolver = dns.asyncresolver.Resolver(configure=False)
+            resolver.nameservers = [nameserver]
+        _resolvers[nameserver] = resolver
+    return resolver
+
+
+def _record_text(rdtype: str, rdata) -> str:
+    if rdtype == 'TXT':
+        return str(rdata).strip('"')
+    if rdtype == 'CNAME':
+        return str(rdata.target).rstrip('.')
+    return str(rdata)
+
+
+async def resolve(name: str, rdtype: str, nameserver: Optional[str] = None,
+                  timeout: float = DNS_TIMEOUT) -> DNSAnswer:
+    """Resolve one record type, answering from the TTL cache when possible"""
+    cached = dns_cache.get(name, rdtype, nameserver)
+    if cached is not None:
+        return cached
+
+    try:
+        answer = await _get_resolver(nameserver).resolve(name, rdtype, lifetime=timeout)
+        result = DNSAnswer("ok", [_record_text(rdtype, rdata) for rdata in answer])
+        ttl = answer.rrset.ttl if answer.rrset is not None else DNS_CACHE_MIN_TTL
+        dns_cache.set(name, rdtype, nameserver, result, min(max(ttl, DNS_CACHE_MIN_TTL), DNS_CACHE_MAX_TTL))
+        return result
+    except dns.resolver.NXDOMAIN:
+        result = DNSAnswer("nxdomain")
+    except dns.resolver.NoAnswer:
+        result = DNSAnswer("no_answer")
+    except dns.resolver.NoNameservers as e:
+        return DNSAnswer("no_nameservers", error=str(e))
+    except dns.exception.Timeout:
+        return DNSAnswer("timeout", error="DNS query timed out")
+    except Exception as e:
+        return DNSAnswer("error", error=str(e))
+
+    dns_cache.set(name, rdtype, nameserver, result, DNS_NEGATIVE_TTL)
+    return result
+
+
+# ============================================================================
+# Verification
+# ============================================================================
+
+async def verify_domain_ownership_async(domain: str, expected_token: str) -> Dict:
     """
     Verify domain ownership by checking DNS records.
 
-    Attempts TXT record verification first, then CNAME verification as fallback.
+    TXT record verification is required; the CNAME (or A) check runs at the
+    same time so a missing TXT record can be reported precisely.
 
     Args:
         domain: The domain to verify (e.g., "shop.example.com")
@@ -62,8 +208,11 @@ def verify_domain_ownership(domain: str, expected_token: str) -> Dict:
         }
     }
 
-    # Try TXT record verification first
-    txt_result = verify_txt_record(domain, expected_token)
+    txt_result, cname_result = await asyncio.gather(
+        verify_txt_record(domain, expected_token),
+        verify_cname_record(domain)
+    )
+
     if txt_result.verified:
         result["verified"] = True
         result["method"] = "dns_txt"
@@ -72,12 +221,9 @@ def verify_domain_ownership(domain: str, expected_token: str) -> Dict:
         logger.info(f"Domain {domain} verified via TXT record")
         return result
 
-    result["details"]["txt_found"] = False
     if txt_result.details:
         result["details"]["records_found"] = txt_result.details.get("records", [])
 
-    # Try CNAME verification as fallback
-    cname_result = verify_cname_record(domain)
     if cname_result.verified:
         # CNAME alone is not enough, need TXT too
         result["details"]["cname_found"] = True
@@ -91,11 +237,34 @@ def verify_domain_ownership(domain: str, expected_token: str) -> Dict:
     return result
 
 
-def verify_txt_record(domain: str, expected_token: str) -> VerificationResult:
+def _run_sync(coro):
+    """
+    Run a coroutine to completion from synchronous code.
+
+    The blocking wrappers below are for scripts and worker threads only;
+    called from a running event loop they would have to nest loops, so they
+    refuse and the caller should await the _async variant instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    raise RuntimeError("Blocking DNS verification called from a running event loop; await the _async variant")
+
+
+def verify_domain_ownership(domain: str, expected_token: str) -> Dict:
+    """Blocking wrapper around verify_domain_ownership_async; sync callers only"""
+    return _run_sync(verify_domain_ownership_async(domain, expected_token))
+
+
+async def verify_txt_record(domain: str, expected_token: str) -> VerificationResult:
     """
     Verify domain via TXT record.
 
-    Looks for: _craftflow-verify.{domain} TXT record containing the expected token.
+    Looks for: _craftflow-verify.{domain} TXT record containing the expected
+    token, and for subdomains also _craftflow-verify.{root domain}; both
+    names are queried concurrently.
 
     Args:
         domain: The domain to verify
@@ -104,92 +273,68 @@ def verify_txt_record(domain: str, expected_token: str) -> VerificationResult:
     Returns:
         VerificationResult with verification status
     """
-    # Parse domain to get subdomain and root
-    domain_parts = domain.split('.')
-
-    # Construct the verification record name
     # For shop.example.com -> _craftflow-verify.shop.example.com
     # For example.com -> _craftflow-verify.example.com
     txt_record_name = f"{VERIFICATION_RECORD_PREFIX}.{domain}"
+    record_names = [txt_record_name]
 
-    try:
-        resolver = dns.resolver.Resolver()
-        resolver.timeout = DNS_TIMEOUT
-        resolver.lifetime = DNS_TIMEOUT
-
-        records = []
-
-        # Try the full verification record name
-        try:
-            answers = resolver.resolve(txt_record_name, 'TXT')
-            for rdata in answers:
-                txt_value = str(rdata).strip('"')
-                records.append(txt_value)
-                if expected_token in txt_value:
-                    return VerificationResult(
-                        verified=True,
-                        method="dns_txt",
-                        details={"records": records, "record_name": txt_record_name}
-                    )
-        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.NoNameservers):
-            pass
-
-        # Try just _craftflow-verify on the root domain if subdomain
-        if len(domain_parts) > 2:
-            root_domain = '.'.join(domain_parts[-2:])
-            root_txt_name = f"{VERIFICATION_RECORD_PREFIX}.{root_domain}"
-            try:
-                answers = resolver.resolve(root_txt_name, 'TXT')
-                for rdata in answers:
-                    txt_value = str(rdata).strip('"')
-                    records.append(txt_value)
-                    if expected_token in txt_value:
-                        return VerificationResult(
-                            verified=True,
-                            method="dns_txt",
-                            details={"records": records, "record_name": root_txt_name}
-                        )
-            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.NoNameservers):
-                pass
-
-        # Records found but token not matching
-        if records:
+    # Try just _craftflow-verify on the root domain if subdomain
+    domain_parts = domain.split('.')
+    if len(domain_parts) > 2:
+        record_names.append(f"{VERIFICATION_RECORD_PREFIX}.{'.'.join(domain_parts[-2:])}")
+
+    answers = await asyncio.gather(*(resolve(name, 'TXT') for name in record_names))
+
+    records = []
+    for record_name, answer in zip(record_names, answers):
+        records.extend(answer.records)
+        if any(expected_token in txt_value for txt_value in answer.records):
             return VerificationResult(
-                verified=False,
+                verified=True,
                 method="dns_txt",
-                error=f"TXT records found but verification token not matching",
-                details={"records": records}
+                details={"records": records, "record_name": record_name}
             )
 
+    # Records found but token not matching
+    if records:
         return VerificationResult(
             verified=False,
             method="dns_txt",
-            error=f"No TXT record found at {txt_record_name}",
-            details={"records": []}
+            error=f"TXT records found but verification token not matching",
+            details={"records": records}
         )
 
-    except dns.resolver.Timeout:
+    failed = next((answer for answer in answers if answer.status in ("timeout", "error")), None)
+    if failed is not None and failed.status == "timeout":
         return VerificationResult(
             verified=False,
             method="dns_txt",
             error="DNS query timed out. DNS servers may be slow or unreachable.",
             details={"records": []}
         )
-    except Exception as e:
-        logger.error(f"DNS TXT verification error for {domain}: {e}")
+    if failed is not None:
+        logger.error(f"DNS TXT verification error for {domain}: {failed.error}")
         return VerificationResult(
             verified=False,
             method="dns_txt",
-            error=f"DNS query failed: {str(e)}",
+            error=f"DNS query failed: {failed.error}",
             details={"records": []}
         )
 
+    return VerificationResult(
+        verified=False,
+        method="dns_txt",
+        error=f"No TXT record found at {txt_record_name}",
+        details={"records": []}
+    )
 
-def verify_cname_record(domain: str) -> VerificationResult:
+
+async def verify_cname_record(domain: str) -> VerificationResult:
     """
     Verify that domain has CNAME pointing to CraftFlow servers.
 
-    Looks for: {domain} CNAME -> stores.craftflow.store
+    Looks for: {domain} CNAME -> stores.craftflow.store. The A record
+    fallback is looked up concurrently rather than after a missing CNAME.
 
     Args:
         domain: The domain to verify
@@ -197,24 +342,15 @@ def verify_cname_record(domain: str) -> VerificationResult:
     Returns:
         VerificationResult with verification status
     """
-    try:
-        resolver = dns.resolver.Resolver()
-        resolver.timeout = DNS_TIMEOUT
-        resolver.lifetime = DNS_TIMEOUT
-
-        answers = resolver.resolve(domain, 'CNAME')
-
-        for rdata in answers:
-            cname_target = str(rdata.target).rstrip('.')
-            if CNAME_TARGET in cname_target or cname_target == CNAME_TARGET:
-                return VerificationResult(
-                    verified=True,
-                    method="dns_cname",
-                    details={"cname_target": cname_target}
-                )
-
-            # Also accept if pointing to any craftflow.store subdomain
-            if 'craftflow.store' in cname_target:
+    if CRAFTFLOW_IPS:
+        cname_answer, a_result = await asyncio.gather(resolve(domain, 'CNAME'), verify_a_record(domain))
+    else:
+        cname_answer, a_result = await resolve(domain, 'CNAME'), None
+
+    if cname_answer.ok:
+        for cname_target in cname_answer.records:
+            # Accept the store target or any craftflow.store subdomain
+            if CNAME_TARGET in cname_target or 'craftflow.store' in cname_target:
                 return VerificationResult(
                     verified=True,
                     method="dns_cname",
@@ -225,37 +361,37 @@ def verify_cname_record(domain: str) -> VerificationResult:
             verified=False,
             method="dns_cname",
             error=f"CNAME record does not point to {CNAME_TARGET}",
-            details={"found_target": str(answers[0].target) if answers else None}
+            details={"found_target": cname_answer.records[0] if cname_answer.records else None}
         )
 
-    except dns.resolver.NoAnswer:
+    if cname_answer.status == "no_answer":
         # No CNAME record - might have A record instead, which is also valid
-        return verify_a_record(domain)
-    except dns.resolver.NXDOMAIN:
+        return a_result or await verify_a_record(domain)
+    if cname_answer.status == "nxdomain":
         return VerificationResult(
             verified=False,
             method="dns_cname",
             error="Domain does not exist in DNS",
             details={}
         )
-    except dns.resolver.Timeout:
+    if cname_answer.status == "timeout":
         return VerificationResult(
             verified=False,
             method="dns_cname",
             error="DNS query timed out",
             details={}
         )
-    except Exception as e:
-        logger.error(f"DNS CNAME verification error for {domain}: {e}")
-        return VerificationResult(
-            verified=False,
-            method="dns_cname",
-            error=f"DNS query failed: {str(e)}",
-            details={}
-        )
+
+    logger.error(f"DNS CNAME verification error for {domain}: {cname_answer.error}")
+    return VerificationResult(
+        verified=False,
+        method="dns_cname",
+        error=f"DNS query failed: {cname_answer.error}",
+        details={}
+    )
 
 
-def verify_a_record(domain: str) -> VerificationResult:
+async def verify_a_record(domain: str) -> VerificationResult:
     """
     Verify that domain has A record pointing to CraftFlow servers.
 
@@ -267,9 +403,6 @@ def verify_a_record(domain: str) -> VerificationResult:
     Returns:
         VerificationResult with verification status
     """
-    # Define CraftFlow server IPs (these should be configured)
-    CRAFTFLOW_IPS = []  # Add actual IPs when known
-
     if not CRAFTFLOW_IPS:
         # If we don't have IPs configured, we can't verify A records
         return VerificationResult(
@@ -279,43 +412,52 @@ def verify_a_record(domain: str) -> VerificationResult:
             details={}
         )
 
-    try:
-        resolver = dns.resolver.Resolver()
-        resolver.timeout = DNS_TIMEOUT
-        resolver.lifetime = DNS_TIMEOUT
-
-        answers = resolver.resolve(domain, 'A')
-
-        for rdata in answers:
-            ip = str(rdata)
-            if ip in CRAFTFLOW_IPS:
-                return VerificationResult(
-                    verified=True,
-                    method="dns_a",
-                    details={"ip": ip}
-                )
-
+    answer = await resolve(domain, 'A')
+    if not answer.ok:
         return VerificationResult(
             verified=False,
             method="dns_a",
-            error="A record does not point to CraftFlow servers",
-            details={"found_ips": [str(r) for r in answers]}
-        )
-
-    except Exception as e:
-        return VerificationResult(
-            verified=False,
-            method="dns_a",
-            error=f"A record verification failed: {str(e)}",
+            error=f"A record verification failed: {answer.error or answer.status}",
             details={}
         )
 
+    for ip in answer.records:
+        if ip in CRAFTFLOW_IPS:
+            return VerificationResult(
+                verified=True,
+                method="dns_a",
+                details={"ip": ip}
+            )
 
-def check_domain_propagation(domain: str) -> Dict:
+    return VerificationResult(
+        verified=False,
+        method="dns_a",
+        error="A record does not point to CraftFlow servers",
+        details={"found_ips": answer.records}
+    )
+
+
+async def _check_server_propagation(domain: str, ip: str) -> Dict:
+    """A and CNAME lookups against one public server, run together"""
+    a_answer, cname_answer = await asyncio.gather(
+        resolve(domain, 'A', nameserver=ip, timeout=PROPAGATION_TIMEOUT),
+        resolve(domain, 'CNAME', nameserver=ip, timeout=PROPAGATION_TIMEOUT)
+    )
+    if a_answer.ok or cname_answer.ok:
+        return {"status": "propagated", "ip": ip}
+    if a_answer.status == "nxdomain":
+        return {"status": "not_found", "ip": ip}
+    if a_answer.status == "no_answer":
+        return {"status": "no_records", "ip": ip}
+    return {"status": "error", "ip": ip, "error": a_answer.error or a_answer.status}
+
+
+async def check_domain_propagation_async(domain: str) -> Dict:
     """
     Check DNS propagation status for a domain.
 
-    Queries multiple DNS servers to check if records have propagated.
+    Queries every public DNS server concurrently to check if records have
+    propagated.
 
     Args:
         domain: The domain to check
@@ -323,42 +465,146 @@ def check_domain_propagation(domain: str) -> Dict:
     Returns:
         Dict with propagation status from different DNS servers
     """
-    # Popular public DNS servers to check
-    dns_servers = [
-        ("8.8.8.8", "Google"),
-        ("1.1.1.1", "Cloudflare"),
-        ("208.67.222.222", "OpenDNS"),
-        ("9.9.9.9", "Quad9"),
-    ]
-
-    results = {}
-
-    for ip, name in dns_servers:
-        try:
-            resolver = dns.resolver.Resolver()
-            resolver.nameservers = [ip]
-            resolver.timeout = 5
-            resolver.lifetime = 5
-
-            # Check for any record type
-            try:
-                resolver.resolve(domain, 'A')
-                results[name] = {"status": "propagated", "ip": ip}
-            except dns.resolver.NoAnswer:
-                try:
-                    resolver.resolve(domain, 'CNAME')
-                    results[name] = {"status": "propagated", "ip": ip}
-                except:
-                    results[name] = {"status": "no_records", "ip": ip}
-            except dns.resolver.NXDOMAIN:
-                results[name] = {"status": "not_found", "ip": ip}
-
-        except Exception as e:
-            results[name] = {"status": "error", "ip": ip, "error": str(e)}
+    statuses = await asyncio.gather(*(_check_server_propagation(domain, ip) for ip, _ in PUBLIC_DNS_SERVERS))
+    results = {name: status for (_, name), status in zip(PUBLIC_DNS_SERVERS, statuses)}
 
     return {
         "domain": domain,
-        "servers_checked": len(dns_servers),
+        "servers_checked": len(PUBLIC_DNS_SERVERS),
         "results": results,
         "fully_propagated": all(r.get("status") == "propagated" for r in results.values())
     }
+
+
+def check_domain_propagation(domain: str) -> Dict:
+    """Blocking wrapper around check_domain_propagation_async; sync callers only"""
+    return _run_sync(check_domain_propagation_async(domain))
+
+
+# ============================================================================
+# Verification records and background sweep
+# ============================================================================
+
+def record_verification_result(
+    db: Session,
+    settings: StorefrontSettings,
+    verification: Optional[DomainVerification],
+    result: Dict
+) -> bool:
+    """Apply a verification result to the storefront and its verification record (no commit)"""
+    now = datetime.now(timezone.utc)
+    if verification:
+        verification.attempts = (verification.attempts or 0) + 1
+        verification.last_checked_at = now
+
+    if result['verified']:
+        settings.domain_verified = True
+        if verification:
+            verification.status = "verified"
+            verification.verified_at = now
+            verification.error_message = None
+        return True
+
+    if verification:
+        verification.status = "failed"
+        verification.error_message = result.get('error', 'Verification failed')
+    return False
+
+
+async def verify_pending_domains(db: Session, limit: int = DNS_VERIFICATION_SWEEP_LIMIT) -> List[int]:
+    """
+    Verify a batch of pending custom domains concurrently.
+
+    Verification records not checked within the sweep interval and with
+    fewer than MAX_ATTEMPTS attempts are locked with SKIP LOCKED so
+    concurrent sweeps split the work. Returns the IDs of
+    storefronts that became verified.
+    """
+    now = datetime.now(timezone.utc)
+    rows = db.query(DomainVerification, StorefrontSettings).join(
+        StorefrontSettings,
+        and_(
+            StorefrontSettings.id == DomainVerification.storefront_id,
+            StorefrontSettings.custom_domain == DomainVerification.domain
+        )
+    ).filter(
+        or_(StorefrontSettings.domain_verified == False, StorefrontSettings.domain_verified.is_(None)),
+        DomainVerification.status.in_(["pending", "failed"]),
+        or_(DomainVerification.attempts.is_(None), DomainVerification.attempts < MAX_ATTEMPTS),
+        or_(DomainVerification.expires_at.is_(None), DomainVerification.expires_at > now),
+        or_(
+            DomainVerification.last_checked_at.is_(None),
+            DomainVerification.last_checked_at < now - timedelta(seconds=DNS_VERIFICATION_SWEEP_SECONDS)
+        )
+    ).order_by(
+        DomainVerification.created_at.desc()
+    ).limit(limit).with_for_update(skip_locked=True, of=DomainVerification).all()
+
+    # Only the latest verification record per storefront is checked
+    pending: Dict[int, Tuple[DomainVerification, StorefrontSettings]] = {}
+    for verification, settings in rows:
+        pending.setdefault(settings.id, (verification, settings))
+
+    if not pending:
+        db.commit()
+        return []
+
+    semaphore = asyncio.Semaphore(DNS_VERIFICATION_CONCURRENCY)
+
+    async def check(settings: StorefrontSettings) -> Dict:
+        async with semaphore:
+            return await verify_domain_ownership_async(settings.custom_domain, settings.domain_verification_token)
+
+    results = await asyncio.gather(*(check(settings) for _, settings in pending.values()))
+
+    verified_ids = []
+    for (verification, settings), result in zip(pending.values(), results):
+        if record_verification_result(db, settings, verification, result):
+            settings.ssl_status = "pending"
+            verified_ids.append(settings.id)
+
+    db.commit()
+    logger.info(f"🌐 Checked {len(pending)} pending domain(s), {len(verified_ids)} verified")
+    return verified_ids
+
+
+async def _sweep_once():
+    db = SessionLocal()
+    try:
+        verified_ids = await verify_pending_domains(db)
+        if verified_ids:
+            from server.src.routes.ecommerce.storefront_domain import provision_ssl_certificate
+            for storefront_id in verified_ids:
+                await provision_ssl_certificate(storefront_id, db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error in domain verification sweep: {e}")
+    finally:
+        db.close()
+
+
+_sweep_running = False
+
+
+def run_domain_verification_sweep():
+    """Blocking sweep loop for the worker process."""
+    global _sweep_running
+    _sweep_running = True
+
+    logger.info("Domain verification sweep starting...")
+
+    while _sweep_running:
+        asyncio.run(_sweep_once())
+
+        # Sleep in short steps so shutdown isn't delayed by a full interval
+        deadline = time.monotonic() + DNS_VERIFICATION_SWEEP_SECONDS
+        while _sweep_running and time.monotonic() < deadline:
+            time.sleep(1)
+
+    logger.info("Domain verification sweep stopped")
+
+
+def stop_domain_verification_sweep():
+    """Stop the domain verification sweep."""
+    global _sweep_running
+    _sweep_running = False
@@ -3,41 +3,131 @@ Email Campaign Scheduler Service.
 
 Background service that polls the database for scheduled email campaigns
 and executes them at the scheduled time.
+
+Runs in the worker process (see server/worker/main.py) and is safe to run
+in several processes at once:
+- Due campaigns are claimed with SELECT ... FOR UPDATE SKIP LOCKED and
+  leased to one worker; the lease is renewed by a heartbeat while sending
+- Recipients are split into chunks sent in parallel, each chunk in its own
+  session, with SendGrid requests throttled per sender
+- Every sent batch writes EmailLog rows tagged with the campaign ID; they
+  are the checkpoint. When a worker dies its lease expires, another worker
+  claims the campaign and only sends to recipients without a log yet
 """
 
+import os
+import socket
 import asyncio
 import logging
-from datetime import datetime
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import case, func, or_, and_, select, update
 from sqlalchemy.orm import Session
-from typing import List
 
 from server.src.database import SessionLocal
+from server.src.entities.ecommerce.email_log import EmailLog
 from server.src.entities.ecommerce.scheduled_email import ScheduledEmail
 from server.src.entities.ecommerce.email_subscriber import EmailSubscriber
 from server.src.services.email_service import EmailService
 
 logger = logging.getLogger(__name__)
 
+EMAIL_CAMPAIGN_POLL_SECONDS = int(os.getenv('EMAIL_CAMPAIGN_POLL_SECONDS', '60'))
+EMAIL_CAMPAIGN_LEASE_SECONDS = int(os.getenv('EMAIL_CAMPAIGN_LEASE_SECONDS', '300'))
+EMAIL_CAMPAIGN_CLAIM_LIMIT = int(os.getenv('EMAIL_CAMPAIGN_CLAIM_LIMIT', '5'))
+EMAIL_CAMPAIGN_CHUNK_SIZE = int(os.getenv('EMAIL_CAMPAIGN_CHUNK_SIZE', '5000'))
+EMAIL_CAMPAIGN_CHUNK_WORKERS = int(os.getenv('EMAIL_CAMPAIGN_CHUNK_WORKERS', '2'))
+# Emails per second per sending store, shared by all chunks of its campaigns in this process
+EMAIL_CAMPAIGN_SENDER_RATE = float(os.getenv('EMAIL_CAMPAIGN_SENDER_RATE', '100'))
+
 # Global flag for graceful shutdown
 _scheduler_running = False
+_worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class SenderThrottle:
+    """Token bucket limiting emails per second for one sender"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1000)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, count: int):
+        """Block until count emails may be sent"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # A batch larger than the bucket waits for a full bucket, then goes
+                needed = min(count, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= needed
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_sender_throttles: Dict[UUID, SenderThrottle] = {}
+_sender_throttles_lock = threading.Lock()
+
+
+def get_sender_throttle(user_id: UUID) -> SenderThrottle:
+    """Shared throttle for a sending store"""
+    with _sender_throttles_lock:
+        throttle = _sender_throttles.get(user_id)
+        if throttle is None:
+            throttle = SenderThrottle(EMAIL_CAMPAIGN_SENDER_RATE)
+            _sender_throttles[user_id] = throttle
+        return throttle
 
 
 async def start_email_campaign_scheduler():
-    """Start the email campaign scheduler background task."""
+    """Run the scheduler loop inside an asyncio application without blocking the event loop."""
     global _scheduler_running
     _scheduler_running = True
 
     logger.info("Email campaign scheduler starting...")
 
-    # Run continuously, checking every 60 seconds
+    while _scheduler_running:
+        try:
+            await asyncio.to_thread(process_scheduled_campaigns)
+        except Exception as e:
+            logger.error(f"Error in scheduler loop: {e}")
+
+        await asyncio.sleep(EMAIL_CAMPAIGN_POLL_SECONDS)
+
+    logger.info("Email campaign scheduler stopped")
+
+
+def run_email_campaign_scheduler():
+    """Blocking scheduler loop for the worker process."""
+    global _scheduler_running
+    _scheduler_running = True
+
+    logger.info(f"Email campaign scheduler starting as {_worker_id}...")
+
     while _scheduler_running:
         try:
             process_scheduled_campaigns()
         except Exception as e:
             logger.error(f"Error in scheduler loop: {e}")
 
-        # Wait 60 seconds before next check
-        await asyncio.sleep(60)
+        # Sleep in short steps so shutdown isn't delayed by a full poll interval
+        deadline = time.monotonic() + EMAIL_CAMPAIGN_POLL_SECONDS
+        while _scheduler_running and time.monotonic() < deadline:
+            time.sleep(1)
 
     logger.info("Email campaign scheduler stopped")
 
@@ -49,34 +139,76 @@ def stop_email_campaign_scheduler():
     _scheduler_running = False
 
 
-def process_scheduled_campaigns():
-    """Poll database for pending campaigns and execute them."""
-    db = SessionLocal()
+def claim_due_campaigns(db: Session, worker_id: str, limit: int = EMAIL_CAMPAIGN_CLAIM_LIMIT) -> List[UUID]:
+    """
+    Claim due campaigns for this worker.
 
-    try:
-        # Find campaigns ready to send
-        now = datetime.utcnow()
-        campaigns = db.query(ScheduledEmail).filter(
-            ScheduledEmail.status == 'pending',
-            ScheduledEmail.scheduled_for <= now
-        ).all()
+    Pending campaigns past their scheduled time and processing campaigns
+    whose lease expired (or was never set) are locked with SKIP LOCKED, so
+    concurrent workers never claim the same campaign.
+    """
+    now = datetime.utcnow()
+    campaign_ids = db.execute(
+        select(ScheduledEmail.id)
+        .where(or_(
+            and_(ScheduledEmail.status == 'pending', ScheduledEmail.scheduled_for <= now),
+            and_(ScheduledEmail.status == 'processing',
+                 or_(ScheduledEmail.locked_until.is_(None), ScheduledEmail.locked_until < now))
+        ))
+        .order_by(ScheduledEmail.scheduled_for)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    if campaign_ids:
+        db.execute(
+            update(ScheduledEmail)
+            .where(ScheduledEmail.id.in_(campaign_ids))
+            .values(
+                status='processing',
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=EMAIL_CAMPAIGN_LEASE_SECONDS),
+                started_at=func.coalesce(ScheduledEmail.started_at, now)
+            )
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    return list(campaign_ids)
+
+
+def renew_lease(db: Session, campaign_id: UUID, worker_id: str) -> bool:
+    """Extend this worker's lease on a campaign; False if the lease was lost."""
+    result = db.execute(
+        update(ScheduledEmail)
+        .where(
+            ScheduledEmail.id == campaign_id,
+            ScheduledEmail.locked_by == worker_id,
+            ScheduledEmail.status == 'processing'
+        )
+        .values(locked_until=datetime.utcnow() + timedelta(seconds=EMAIL_CAMPAIGN_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
 
-        if campaigns:
-            logger.info(f"Found {len(campaigns)} scheduled campaigns ready to execute")
 
-        for campaign in campaigns:
+def process_scheduled_campaigns(worker_id: str = _worker_id):
+    """Claim due campaigns and execute them."""
+    db = SessionLocal()
+
+    try:
+        campaign_ids = claim_due_campaigns(db, worker_id)
+        if campaign_ids:
+            logger.info(f"Claimed {len(campaign_ids)} scheduled campaigns ready to execute")
+
+        for campaign_id in campaign_ids:
+            campaign = db.query(ScheduledEmail).filter(ScheduledEmail.id == campaign_id).first()
+            if not campaign:
+                continue
             try:
-                execute_campaign(campaign, db)
+                execute_campaign(campaign, db, worker_id)
             except Exception as e:
-                logger.error(f"Error executing campaign {campaign.id}: {e}")
-                # Mark campaign as failed
-                campaign.status = 'failed'
-                campaign.completed_at = datetime.utcnow()
-                try:
-                    db.commit()
-                except Exception as commit_error:
-                    logger.error(f"Failed to commit campaign failure: {commit_error}")
-                    db.rollback()
+                logger.error(f"Error executing campaign {campaign_id}: {e}")
 
     except Exception as e:
         logger.error(f"Error in process_scheduled_campaigns: {e}")
@@ -85,61 +217,128 @@ def process_scheduled_campaigns():
         db.close()
 
 
-def execute_campaign(campaign: ScheduledEmail, db: Session):
+def _send_chunk(campaign_id: UUID, user_id: UUID, template_id: UUID, recipients: List[str]):
+    """Send one recipient chunk in its own session; runs in a chunk worker thread."""
+    db = SessionLocal()
+    try:
+        EmailService(db=db).send_marketing_email(
+            user_id=user_id,
+            template_id=template_id,
+            recipients=recipients,
+            scheduled_email_id=campaign_id,
+            throttle=get_sender_throttle(user_id).acquire
+        )
+    finally:
+        db.close()
+
+
+def _update_counts(campaign: ScheduledEmail, db: Session):
+    """
+    Set sent/failed counts from the campaign's email logs.
+
+    Counts are per recipient: a failed send that was retried on resume
+    counts once, as sent if any attempt succeeded.
+    """
+    all_failed = func.min(case((EmailLog.sendgrid_status == 'failed', 1), else_=0))
+    per_recipient = db.query(all_failed.label('all_failed')).filter(
+        EmailLog.scheduled_email_id == campaign.id
+    ).group_by(EmailLog.recipient_email).subquery()
+    failed = func.count().filter(per_recipient.c.all_failed == 1)
+    sent, failed = db.query(func.count() - failed, failed).select_from(per_recipient).one()
+    campaign.sent_count = sent or 0
+    campaign.failed_count = failed or 0
+
+
+def execute_campaign(campaign: ScheduledEmail, db: Session, worker_id: str = _worker_id):
     """
-    Execute a single email campaign.
+    Execute (or resume) a claimed email campaign.
 
     Args:
-        campaign: ScheduledEmail instance to execute
+        campaign: ScheduledEmail instance claimed by this worker
         db: Database session
+        worker_id: Lease holder ID
     """
     logger.info(f"Executing campaign {campaign.id} scheduled for {campaign.scheduled_for}")
 
-    # Update status to processing
-    campaign.status = 'processing'
-    campaign.started_at = datetime.utcnow()
-    db.commit()
+    stop_heartbeat = threading.Event()
+    lease_lost = threading.Event()
 
-    try:
-        # Resolve recipients from filter
-        recipients = resolve_recipients(campaign, db)
-
-        if not recipients:
-            logger.warning(f"Campaign {campaign.id} has no recipients")
-            campaign.status = 'completed'
-            campaign.sent_count = 0
-            campaign.failed_count = 0
-            campaign.completed_at = datetime.utcnow()
-            db.commit()
-            return
+    def heartbeat():
+        heartbeat_db = SessionLocal()
+        try:
+            while not stop_heartbeat.wait(EMAIL_CAMPAIGN_LEASE_SECONDS / 3):
+                if not renew_lease(heartbeat_db, campaign.id, worker_id):
+                    logger.warning(f"Lost lease on campaign {campaign.id}")
+                    lease_lost.set()
+                    return
+        except Exception as e:
+            logger.error(f"Campaign {campaign.id} heartbeat failed: {e}")
+        finally:
+            heartbeat_db.close()
 
-        logger.info(f"Sending campaign {campaign.id} to {len(recipients)} recipients")
+    heartbeat_thread = threading.Thread(target=heartbeat, name=f"campaign-heartbeat-{campaign.id}", daemon=True)
+    heartbeat_thread.start()
 
-        # Send emails via EmailService
-        email_service = EmailService(db=db)
-        logs = email_service.send_marketing_email(
-            user_id=campaign.user_id,
-            template_id=campaign.template_id,
-            recipients=recipients,
-            scheduled_email_id=campaign.id
-        )
+    try:
+        # Recipients with a non-failed log were sent by an earlier, interrupted run; failed sends are retried
+        already_sent = {
+            email for (email,) in db.query(EmailLog.recipient_email).filter(
+                EmailLog.scheduled_email_id == campaign.id,
+                or_(EmailLog.sendgrid_status.is_(None), EmailLog.sendgrid_status != 'failed')
+            )
+        }
+        recipients = [email for email in resolve_recipients(campaign, db) if email not in already_sent]
+
+        if already_sent:
+            logger.info(f"Resuming campaign {campaign.id}: {len(already_sent)} already sent, {len(recipients)} remaining")
+
+        if recipients:
+            logger.info(f"Sending campaign {campaign.id} to {len(recipients)} recipients")
+            chunks = [
+                recipients[i:i + EMAIL_CAMPAIGN_CHUNK_SIZE]
+                for i in range(0, len(recipients), EMAIL_CAMPAIGN_CHUNK_SIZE)
+            ]
+
+            def send(chunk: List[str]):
+                # Chunks still queued when the lease is lost are left for the new owner
+                if not lease_lost.is_set():
+                    _send_chunk(campaign.id, campaign.user_id, campaign.template_id, chunk)
+
+            with ThreadPoolExecutor(max_workers=EMAIL_CAMPAIGN_CHUNK_WORKERS) as executor:
+                for future in [executor.submit(send, chunk) for chunk in chunks]:
+                    future.result()
+
+            if lease_lost.is_set():
+                # Another worker owns the campaign now and will finish it
+                db.rollback()
+                return
+        else:
+            logger.warning(f"Campaign {campaign.id} has no recipients left to send")
 
         # Update campaign with results
-        campaign.sent_count = len([log for log in logs if log.sendgrid_status != 'failed'])
-        campaign.failed_count = len([log for log in logs if log.sendgrid_status == 'failed'])
+        _update_counts(campaign, db)
         campaign.status = 'completed'
         campaign.completed_at = datetime.utcnow()
+        campaign.locked_by = None
+        campaign.locked_until = None
 
         db.commit()
         logger.info(f"Campaign {campaign.id} completed: {campaign.sent_count} sent, {campaign.failed_count} failed")
 
     except Exception as e:
         logger.error(f"Failed to execute campaign {campaign.id}: {e}")
+        db.rollback()
         campaign.status = 'failed'
         campaign.completed_at = datetime.utcnow()
+        campaign.locked_by = None
+        campaign.locked_until = None
         db.commit()
         raise
 
+    finally:
+        stop_heartbeat.set()
+        heartbeat_thread.join(timeout=5)
+
 
 def resolve_recipients(campaign: ScheduledEmail, db: Session) -> List[str]:
     """
@@ -150,13 +349,13 @@ def resolve_recipients(campaign: ScheduledEmail, db: Session) -> List[str]:
         db: Database session
 
     Returns:
-        List of recipient email addresses
+        List of recipient email addresses, in a stable order
     """
     recipients = []
 
     if campaign.recipient_filter:
         # Query subscribers based on filter
-        query = db.query(EmailSubscriber).filter(
+        query = db.query(EmailSubscriber.email).filter(
             EmailSubscriber.user_id == campaign.user_id,
             EmailSubscriber.is_subscribed == True
         )
@@ -170,8 +369,7 @@ def resolve_recipients(campaign: ScheduledEmail, db: Session) -> List[str]:
                     query = query.filter(EmailSubscriber.tags.contains([tag]))
 
         # Get all matching subscribers
-        subscribers = query.all()
-        recipients = [sub.email for sub in subscribers]
+        recipients = [email for (email,) in query.order_by(EmailSubscriber.email)]
 
         logger.info(f"Resolved {len(recipients)} recipients from filter: {campaign.recipient_filter}")
 
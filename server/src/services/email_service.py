@@ -12,14 +12,16 @@ This service handles:
 
 import os
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime
-from uuid import UUID
+from uuid import UUID, uuid4
+from concurrent.futures import ThreadPoolExecutor
 import json
 
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content, Substitution
+from sendgrid.helpers.mail import Mail, Email, To, Content, Substitution, Personalization, CustomArg
 from jinja2 import Template
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
 from server.src.entities.ecommerce.email_template import EmailTemplate
@@ -29,6 +31,12 @@ from server.src.entities.ecommerce.order import Order
 
 logger = logging.getLogger(__name__)
 
+# SendGrid accepts at most 1000 personalizations per request
+CAMPAIGN_BATCH_SIZE = min(int(os.getenv("SENDGRID_CAMPAIGN_BATCH_SIZE", "1000")), 1000)
+CAMPAIGN_SEND_CONCURRENCY = int(os.getenv("SENDGRID_CAMPAIGN_CONCURRENCY", "4"))
+# Placeholder rendered into campaign HTML and replaced per recipient by SendGrid
+UNSUBSCRIBE_URL_TAG = "-unsubscribe_url-"
+
 
 class EmailService:
     """Service for sending emails via SendGrid with template rendering."""
@@ -386,21 +394,64 @@ class EmailService:
                     pass
             return None
 
+    def _build_campaign_message(
+        self,
+        subject: str,
+        html_content: str,
+        recipients: List[Dict[str, Any]]
+    ) -> Mail:
+        """
+        Build one SendGrid message addressed to a batch of recipients.
+
+        Each recipient gets its own personalization (so addresses are not
+        exposed to each other) carrying substitutions for per-recipient
+        values and the EmailLog ID as a custom arg for webhook matching.
+        """
+        message = Mail(
+            from_email=Email(self.from_email, self.from_name),
+            subject=subject,
+            html_content=Content("text/html", html_content)
+        )
+        for recipient in recipients:
+            personalization = Personalization()
+            personalization.add_to(To(recipient['email']))
+            for tag, value in recipient['substitutions'].items():
+                personalization.add_substitution(Substitution(tag, value))
+            personalization.add_custom_arg(CustomArg('email_log_id', str(recipient['log_id'])))
+            message.add_personalization(personalization)
+        return message
+
+    def _send_campaign_batch(self, message: Mail) -> Dict[str, Any]:
+        """Send one batch message, returning the SendGrid message ID or the error."""
+        try:
+            response = self.sg.send(message)
+            return {'message_id': response.headers.get('X-Message-Id'), 'error': None}
+        except Exception as e:
+            return {'message_id': None, 'error': str(e)}
+
     def send_marketing_email(
         self,
         user_id: UUID,
         template_id: UUID,
         recipients: List[str],
-        scheduled_email_id: Optional[UUID] = None
+        scheduled_email_id: Optional[UUID] = None,
+        throttle: Optional[Callable[[int], None]] = None
     ) -> List[EmailLog]:
         """
         Send marketing email to multiple recipients.
 
+        The template is rendered once with placeholder tags for per-recipient
+        values, then sent in batches of up to CAMPAIGN_BATCH_SIZE recipients per
+        SendGrid call (one personalization each), several batches at a time.
+        Logs are bulk-inserted and subscriber counters bulk-updated per batch.
+
         Args:
             user_id: Store owner user ID
             template_id: Marketing email template ID
             recipients: List of recipient email addresses
-            scheduled_email_id: Optional scheduled email ID for tracking
+            scheduled_email_id: Optional scheduled email ID, recorded on each log
+            throttle: Optional callable taking a batch size, called from the
+                sending thread before each SendGrid request (per-sender rate limit)
 
         Returns:
             List of EmailLog instances
@@ -422,70 +473,87 @@ class EmailService:
                 logger.error(f"Template {template_id} not found")
                 return []
 
-            for recipient in recipients:
-                try:
-                    # Build basic context for marketing emails
-                    context = {
-                        'logo_url': template.logo_url or '',
-                        'primary_color': template.primary_color,
-                        'secondary_color': template.secondary_color,
-                        'support_email': self.from_email,
-                        'unsubscribe_url': f"https://yourdomain.com/api/ecommerce/emails/unsubscribe/{user_id}/{recipient}"
+            # Render once; per-recipient values become SendGrid substitution tags
+            context = {
+                'logo_url': template.logo_url or '',
+                'primary_color': template.primary_color,
+                'secondary_color': template.secondary_color,
+                'support_email': self.from_email,
+                'unsubscribe_url': UNSUBSCRIBE_URL_TAG
+            }
+            html_content = self._render_template(template, context)
+            subject = self._substitute_vars(template.subject, context)
+
+            # Drop duplicate addresses so nobody receives the campaign twice
+            unique_recipients = list(dict.fromkeys(recipients))
+            batches = []
+            for i in range(0, len(unique_recipients), CAMPAIGN_BATCH_SIZE):
+                batch = [
+                    {
+                        'email': email,
+                        'log_id': uuid4(),
+                        'substitutions': {
+                            UNSUBSCRIBE_URL_TAG: f"https://yourdomain.com/api/ecommerce/emails/unsubscribe/{user_id}/{email}"
+                        }
                     }
+                    for email in unique_recipients[i:i + CAMPAIGN_BATCH_SIZE]
+                ]
+                batches.append(batch)
+
+            def send(message: Mail, size: int) -> Dict[str, Any]:
+                if throttle:
+                    throttle(size)
+                return self._send_campaign_batch(message)
+
+            with ThreadPoolExecutor(max_workers=CAMPAIGN_SEND_CONCURRENCY) as executor:
+                futures = [
+                    executor.submit(send, self._build_campaign_message(subject, html_content, batch), len(batch))
+                    for batch in batches
+                ]
+
+                # Database writes stay on this thread; results are consumed in batch order
+                for batch, future in zip(batches, futures):
+                    result = future.result()
+                    now = datetime.utcnow()
+                    if result['error']:
+                        logger.error(f"Failed to send marketing batch of {len(batch)} emails: {result['error']}")
+
+                    rows = [
+                        {
+                            'id': recipient['log_id'],
+                            'user_id': user_id,
+                            'template_id': template.id,
+                            'scheduled_email_id': scheduled_email_id,
+                            'email_type': "marketing",
+                            'recipient_email': recipient['email'],
+                            'subject': subject,
+                            'sendgrid_message_id': result['message_id'],
+                            'sendgrid_status': "failed" if result['error'] else "sent",
+                            'error_message': result['error'],
+                            'sent_at': now,
+                            'created_at': now
+                        }
+                        for recipient in batch
+                    ]
+                    self.db.execute(insert(EmailLog), rows)
+
+                    if not result['error']:
+                        # Update subscriber stats
+                        self.db.execute(
+                            update(EmailSubscriber)
+                            .where(
+                                EmailSubscriber.user_id == user_id,
+                                EmailSubscriber.email.in_([recipient['email'] for recipient in batch])
+                            )
+                            .values(total_sent=EmailSubscriber.total_sent + 1, last_sent_at=now)
+                            .execution_options(synchronize_session=False)
+                        )
 
-                    # Render template
-                    html_content = self._render_template(template, context)
-                    subject = self._substitute_vars(template.subject, context)
-
-                    # Send via SendGrid
-                    message = Mail(
-                        from_email=Email(self.from_email, self.from_name),
-                        to_emails=To(recipient),
-                        subject=subject,
-                        html_content=Content("text/html", html_content)
-                    )
-
-                    response = self.sg.send(message)
-
-                    # Log email
-                    email_log = EmailLog(
-                        user_id=user_id,
-                        template_id=template.id,
-                        email_type="marketing",
-                        recipient_email=recipient,
-                        subject=subject,
-                        sendgrid_message_id=response.headers.get('X-Message-Id'),
-                        sendgrid_status="sent"
-                    )
-                    self.db.add(email_log)
-                    logs.append(email_log)
-
-                    # Update subscriber stats
-                    subscriber = self.db.query(EmailSubscriber).filter(
-                        EmailSubscriber.user_id == user_id,
-                        EmailSubscriber.email == recipient
-                    ).first()
-                    if subscriber:
-                        subscriber.total_sent += 1
-                        subscriber.last_sent_at = datetime.utcnow()
-
-                except Exception as e:
-                    logger.error(f"Failed to send marketing email to {recipient}: {e}")
-                    # Log individual failure
-                    email_log = EmailLog(
-                        user_id=user_id,
-                        template_id=template.id,
-                        email_type="marketing",
-                        recipient_email=recipient,
-                        subject=template.subject,
-                        sendgrid_status="failed",
-                        error_message=str(e)
-                    )
-                    self.db.add(email_log)
-                    logs.append(email_log)
+                    self.db.commit()
+                    # Detached log objects for callers counting sent/failed
+                    logs.extend(EmailLog(**row) for row in rows)
 
-            self.db.commit()
-            logger.info(f"Sent {len(logs)} marketing emails for template {template_id}")
+            logger.info(f"Sent {len(logs)} marketing emails in {len(batches)} batches for template {template_id}")
             return logs
 
         except Exception as e:
@@ -0,0 +1,355 @@
+"""
+Concurrent Etsy Bulk Listing Updates
+
+Runs listing updates in parallel while staying inside the shop's Etsy
+request budget, instead of patching listings one after another.
+
+Features:
+- Token-bucket rate limiting shared by every job targeting the same shop
+- Retry with exponential backoff + jitter for 429/5xx/network failures
+- Per-listing progress callbacks as each update finishes
+- Resumable jobs: per-listing results are checkpointed (Redis when available,
+  in-memory otherwise) so a re-run with the same job_id skips finished listings
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+import uuid
+from typing import List, Dict, Any, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+# Try to import Redis for job checkpointing
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Etsy Open API v3 default per-app limit is 10 requests/second
+ETSY_RATE_LIMIT_QPS = float(os.getenv('ETSY_RATE_LIMIT_QPS', '8'))
+ETSY_BULK_UPDATE_WORKERS = int(os.getenv('ETSY_BULK_UPDATE_WORKERS', '8'))
+ETSY_BULK_UPDATE_MAX_RETRIES = int(os.getenv('ETSY_BULK_UPDATE_MAX_RETRIES', '4'))
+JOB_TTL_SECONDS = 86400  # Keep checkpoints for 24 hours
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TransientEtsyError(Exception):
+    """Raised for Etsy failures that are worth retrying"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BulkUpdateJobNotFoundError(Exception):
+    """Raised when a job_id to resume does not exist for the requesting user"""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Bulk update job {job_id} not found")
+        self.job_id = job_id
+
+
+class RateBudget:
+    """Thread-safe token bucket limiting request rate against one shop"""
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None):
+        self.rate = max(rate_per_second, 0.1)
+        self.capacity = burst if burst is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while (used when Etsy returns 429)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+_budgets: Dict[str, RateBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_rate_budget(shop_id) -> RateBudget:
+    """Get the shared rate budget for a shop"""
+    key = str(shop_id)
+    with _budgets_lock:
+        if key not in _budgets:
+            _budgets[key] = RateBudget(ETSY_RATE_LIMIT_QPS)
+        return _budgets[key]
+
+
+class BulkUpdateJobStore:
+    """
+    Checkpoints per-listing results of a bulk update job
+
+    Uses Redis if REDIS_URL is configured, falls back to in-memory storage
+    """
+
+    def __init__(self):
+        self.redis_client = None
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        redis_url = os.getenv('REDIS_URL')
+        if REDIS_AVAILABLE and redis_url:
+            try:
+                self.redis_client = redis.from_url(redis_url, socket_connect_timeout=5, socket_timeout=5)
+                self.redis_client.ping()
+            except Exception as e:
+                logger.warning(f"⚠️  Bulk update checkpoints falling back to memory: {e}")
+                self.redis_client = None
+
+    def _meta_key(self, job_id: str) -> str:
+        return f"etsy_bulk_update:{job_id}"
+
+    def _results_key(self, job_id: str) -> str:
+        return f"etsy_bulk_update:{job_id}:results"
+
+    def create_job(self, job_id: str, user_id: Optional[str], total: int):
+        meta = {
+            'job_id': job_id,
+            'user_id': str(user_id) if user_id else '',
+            'total': total,
+            'status': 'running',
+            'created_at': time.time()
+        }
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline()
+                pipe.hset(self._meta_key(job_id), mapping={k: str(v) for k, v in meta.items()})
+                pipe.expire(self._meta_key(job_id), JOB_TTL_SECONDS)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.error(f"❌ Failed to store bulk update job {job_id}: {e}")
+        with self._lock:
+            self._memory.setdefault(job_id, {'meta': {}, 'results': {}})['meta'].update(meta)
+
+    def get_meta(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if self.redis_client:
+            try:
+                raw = self.redis_client.hgetall(self._meta_key(job_id))
+                if raw:
+                    return {k.decode(): v.decode() for k, v in raw.items()}
+                return None
+            except Exception as e:
+                logger.error(f"❌ Failed to read bulk update job {job_id}: {e}")
+        with self._lock:
+            job = self._memory.get(job_id)
+            return dict(job['meta']) if job else None
+
+    def set_status(self, job_id: str, status: str):
+        if self.redis_client:
+            try:
+                self.redis_client.hset(self._meta_key(job_id), 'status', status)
+                return
+            except Exception as e:
+                logger.error(f"❌ Failed to update bulk update job {job_id}: {e}")
+        with self._lock:
+            if job_id in self._memory:
+                self._memory[job_id]['meta']['status'] = status
+
+    def record_result(self, job_id: str, listing_id: int, result: Dict[str, Any]):
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline()
+                pipe.hset(self._results_key(job_id), str(listing_id), json.dumps(result, default=str))
+                pipe.expire(self._results_key(job_id), JOB_TTL_SECONDS)
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.error(f"❌ Failed to checkpoint listing {listing_id} for job {job_id}: {e}")
+        with self._lock:
+            self._memory.setdefault(job_id, {'meta': {}, 'results': {}})['results'][str(listing_id)] = result
+
+    def get_results(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        if self.redis_client:
+            try:
+                raw = self.redis_client.hgetall(self._results_key(job_id))
+                return {k.decode(): json.loads(v) for k, v in raw.items()}
+            except Exception as e:
+                logger.error(f"❌ Failed to read checkpoints for job {job_id}: {e}")
+        with self._lock:
+            job = self._memory.get(job_id)
+            return dict(job['results']) if job else {}
+
+
+class EtsyBulkUpdater:
+    """Runs Etsy listing updates concurrently under the shop's rate budget"""
+
+    def __init__(self, etsy_api, job_store: Optional[BulkUpdateJobStore] = None,
+                 max_workers: Optional[int] = None, max_retries: Optional[int] = None):
+        self.etsy_api = etsy_api
+        self.job_store = job_store or bulk_update_job_store
+        self.max_workers = max_workers or ETSY_BULK_UPDATE_WORKERS
+        self.max_retries = ETSY_BULK_UPDATE_MAX_RETRIES if max_retries is None else max_retries
+        self.budget = get_rate_budget(etsy_api.shop_id)
+        self._token_lock = threading.Lock()
+
+    def _ensure_token(self):
+        # Only one thread should refresh the OAuth token at a time
+        with self._token_lock:
+            self.etsy_api.ensure_valid_token()
+
+    def _update_once(self, listing_id: int, update_data: dict) -> dict:
+        self.budget.acquire()
+        self._ensure_token()
+        try:
+            response = self.etsy_api.send_listing_update(listing_id, update_data)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise TransientEtsyError(f"Network error updating listing {listing_id}: {e}")
+
+        if response.status_code in TRANSIENT_STATUS_CODES:
+            retry_after = response.headers.get('retry-after')
+            retry_after = float(retry_after) if retry_after and retry_after.replace('.', '', 1).isdigit() else None
+            if response.status_code == 429:
+                self.budget.pause(retry_after or 1.0)
+            raise TransientEtsyError(
+                f"Etsy returned {response.status_code} for listing {listing_id}: {response.text[:200]}",
+                retry_after=retry_after
+            )
+
+        if response.status_code >= 400:
+            raise Exception(f"Failed to update listing {listing_id}: {response.status_code} - {response.text[:500]}")
+
+        return response.json()
+
+    def _update_with_retry(self, listing_id: int, update_data: dict) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            try:
+                data = self._update_once(listing_id, update_data)
+                return {'listing_id': listing_id, 'success': True, 'data': data}
+            except TransientEtsyError as e:
+                if attempt >= self.max_retries:
+                    logger.error(f"Giving up on listing {listing_id} after {attempt + 1} attempts: {e}")
+                    return {'listing_id': listing_id, 'success': False, 'error': str(e)}
+                delay = e.retry_after or min(30.0, (2 ** attempt) + random.uniform(0, 1))
+                attempt += 1
+                logger.warning(f"Transient error on listing {listing_id}, retry {attempt}/{self.max_retries} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+            except Exception as e:
+                logger.error(f"Failed to update listing {listing_id}: {e}")
+                return {'listing_id': listing_id, 'success': False, 'error': str(e)}
+
+    def run(self, listing_updates: List[dict], job_id: Optional[str] = None,
+            progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]] = None) -> dict:
+        """
+        Apply listing updates concurrently
+
+        Args:
+            listing_updates: Updates, each containing 'listing_id' and the fields to change
+            job_id: Existing job to resume; listings already checkpointed are skipped
+            progress_callback: Called as (completed, total, result) after each listing finishes
+
+        Returns:
+            dict: {'job_id', 'successful', 'failed', 'total'} in the EtsyAPI.bulk_update_listings format
+        """
+        self.etsy_api.require_authentication()
+
+        total = len(listing_updates)
+        meta = self.job_store.get_meta(job_id) if job_id else None
+        # Only the user who started a job may resume it
+        if meta is not None and meta.get('user_id') != str(self.etsy_api.user_id):
+            raise BulkUpdateJobNotFoundError(job_id)
+        resuming = meta is not None
+        job_id = job_id or str(uuid.uuid4())
+
+        if resuming:
+            done = self.job_store.get_results(job_id)
+            self.job_store.set_status(job_id, 'running')
+            logger.info(f"Resuming bulk update job {job_id}: {len(done)}/{total} listings already processed")
+        else:
+            done = {}
+            self.job_store.create_job(job_id, self.etsy_api.user_id, total)
+
+        # Failed listings are retried on resume; only successes are skipped
+        finished = {lid: r for lid, r in done.items() if r.get('success')}
+        pending = [u for u in listing_updates if str(u['listing_id']) not in finished]
+
+        completed = len(finished)
+        results = list(finished.values())
+        results_lock = threading.Lock()
+
+        # Refresh the token once up front instead of racing inside every worker
+        self._ensure_token()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="etsy-bulk-update-") as executor:
+            futures = {}
+            for update in pending:
+                update_data = {k: v for k, v in update.items() if k != 'listing_id'}
+                futures[executor.submit(self._update_with_retry, update['listing_id'], update_data)] = update['listing_id']
+
+            for future in as_completed(futures):
+                result = future.result()
+                self.job_store.record_result(job_id, result['listing_id'], result)
+                with results_lock:
+                    results.append(result)
+                    completed += 1
+                    current = completed
+                if progress_callback:
+                    try:
+                        progress_callback(current, total, result)
+                    except Exception as e:
+                        logger.warning(f"Bulk update progress callback failed: {e}")
+
+        successful = [{'listing_id': r['listing_id'], 'data': r['data']} for r in results if r.get('success')]
+        failed = [{'listing_id': r['listing_id'], 'error': r.get('error')} for r in results if not r.get('success')]
+
+        self.job_store.set_status(job_id, 'completed' if not failed else 'completed_with_errors')
+        logger.info(f"Bulk update job {job_id} finished: {len(successful)} successful, {len(failed)} failed")
+
+        return {
+            'job_id': job_id,
+            'successful': successful,
+            'failed': failed,
+            'total': total
+        }
+
+
+def get_bulk_update_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get the status and per-listing results of a bulk update job"""
+    meta = bulk_update_job_store.get_meta(job_id)
+    if not meta:
+        return None
+    results = bulk_update_job_store.get_results(job_id)
+    return {
+        'job_id': job_id,
+        'user_id': meta.get('user_id'),
+        'status': meta.get('status'),
+        'total': int(meta.get('total', 0)),
+        'processed': len(results),
+        'success_count': sum(1 for r in results.values() if r.get('success')),
+        'failure_count': sum(1 for r in results.values() if not r.get('success')),
+    }
+
+
+# Global checkpoint store
+bulk_update_job_store = BulkUpdateJobStore()
@@ -0,0 +1,96 @@
+"""
+Etsy Token Store
+
+An Etsy grant is stored in two places: ThirdPartyOAuthToken, which EtsyAPI
+reads, and the user's Etsy PlatformConnection, which the background OAuth
+refresh service reads. Etsy refresh tokens are single use, so whichever
+path rotates the grant writes the new token to both records, and both paths
+re-read the freshest of the two once they hold the connection's refresh
+lock (see token_refresh_lock).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from server.src.entities.platform_connection import PlatformConnection, PlatformType
+from server.src.entities.third_party_oauth import ThirdPartyOAuthToken
+
+
+@dataclass
+class StoredEtsyToken:
+    access_token: str
+    refresh_token: Optional[str]
+    expires_at: Optional[datetime]
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _token_record(db: Session, user_id) -> Optional[ThirdPartyOAuthToken]:
+    return db.query(ThirdPartyOAuthToken).filter(
+        ThirdPartyOAuthToken.user_id == user_id
+    ).populate_existing().first()
+
+
+def _connection_record(db: Session, user_id) -> Optional[PlatformConnection]:
+    return db.query(PlatformConnection).filter(
+        PlatformConnection.user_id == user_id,
+        PlatformConnection.platform == PlatformType.ETSY,
+        PlatformConnection.is_active == True
+    ).populate_existing().first()
+
+
+def load_etsy_token(db: Session, user_id) -> Optional[StoredEtsyToken]:
+    """The user's Etsy token from whichever record expires last, re-read from the database"""
+    candidates = []
+    token_obj = _token_record(db, user_id)
+    if token_obj and token_obj.access_token:
+        candidates.append(StoredEtsyToken(token_obj.access_token, token_obj.refresh_token,
+                                          _aware(token_obj.expires_at)))
+    connection = _connection_record(db, user_id)
+    if connection and connection.access_token:
+        candidates.append(StoredEtsyToken(connection.access_token, connection.refresh_token,
+                                          _aware(connection.token_expires_at)))
+    if not candidates:
+        return None
+    return max(candidates, key=lambda token: token.expires_at or datetime.min.replace(tzinfo=timezone.utc))
+
+
+def save_etsy_token(db: Session, user_id, access_token: str, refresh_token: Optional[str],
+                    expires_at: datetime, connection: Optional[PlatformConnection] = None):
+    """
+    Write a rotated token to both records; the caller commits.
+
+    The ThirdPartyOAuthToken row is created if missing. Without an explicit
+    connection, the user's active Etsy connection is updated if there is one.
+    """
+    now = datetime.now(timezone.utc)
+
+    token_obj = _token_record(db, user_id)
+    if token_obj:
+        token_obj.access_token = access_token
+        if refresh_token:
+            token_obj.refresh_token = refresh_token
+        token_obj.expires_at = expires_at
+    else:
+        db.add(ThirdPartyOAuthToken(
+            user_id=user_id,
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_at=expires_at,
+            created_at=now
+        ))
+
+    connection = connection or _connection_record(db, user_id)
+    if connection:
+        connection.access_token = access_token
+        if refresh_token:
+            connection.refresh_token = refresh_token
+        connection.token_expires_at = expires_at
+        connection.last_verified_at = now
@@ -0,0 +1,279 @@
+"""
+Event Partition Maintenance
+
+The events table is range-partitioned by created_at into one partition per
+calendar month (events_yYYYYmMM) plus an events_default catch-all. This
+module keeps partitions created ahead of time and implements retention by
+detaching and dropping whole months instead of deleting rows, so cleanup
+neither bloats the table nor blocks concurrent inserts.
+
+System errors and warnings are kept beyond retention: before a month is
+dropped they are copied into events_archive. Rows that ended up in
+events_default because their month had no partition yet are moved into
+that month's partition when it is created, and expire like the rest.
+
+The worker runs run_event_partition_maintenance on a background thread.
+Every step takes a transaction-level advisory lock, so several workers can
+run it at once.
+"""
+
+import os
+import re
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from server.src.database.core import SessionLocal
+from server.src.entities.event import EventTypes
+
+logger = logging.getLogger(__name__)
+
+EVENT_PARTITION_MONTHS_AHEAD = int(os.getenv('EVENT_PARTITION_MONTHS_AHEAD', '3'))
+EVENT_PARTITION_MAINTENANCE_SECONDS = int(os.getenv('EVENT_PARTITION_MAINTENANCE_SECONDS', '3600'))
+EVENT_RETENTION_DAYS = int(os.getenv('EVENT_RETENTION_DAYS', '90'))
+# Advisory lock serializing partition DDL across workers
+EVENT_PARTITION_LOCK_KEY = 0x6576656e74
+
+PARTITION_NAME_PATTERN = re.compile(r'^events_y(\d{4})m(\d{2})$')
+RETAINED_EVENT_TYPES = (EventTypes.SYSTEM_ERROR, EventTypes.SYSTEM_WARNING)
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant of value's month (naive UTC)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Shift a month start by a number of months"""
+    index = value.year * 12 + (value.month - 1) + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"events_y{start.year:04d}m{start.month:02d}"
+
+
+def parse_partition_name(name: str) -> Optional[datetime]:
+    """Month start covered by a partition, or None for non-monthly partitions"""
+    match = PARTITION_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+
+def is_partitioned(db: Session) -> bool:
+    """Whether the events table is a partitioned table (PostgreSQL only)"""
+    if db.get_bind().dialect.name != 'postgresql':
+        return False
+    return db.execute(text("""
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'events'
+    """)).first() is not None
+
+
+def list_partitions(db: Session) -> List[Tuple[str, datetime]]:
+    """Monthly partitions of events as (name, month start), oldest first"""
+    rows = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = 'events'
+    """)).scalars().all()
+    partitions = [(name, parse_partition_name(name)) for name in rows]
+    return sorted([(name, start) for name, start in partitions if start], key=lambda p: p[1])
+
+
+def _lock(db: Session):
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': EVENT_PARTITION_LOCK_KEY})
+
+
+def _is_attached(db: Session, name: str) -> bool:
+    return db.execute(text("""
+        SELECT 1
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = 'events' AND child.relname = :name
+    """), {'name': name}).first() is not None
+
+
+def _create_partition(db: Session, name: str, start: datetime):
+    """
+    Create one monthly partition. Rows for the month already in
+    events_default are moved into it first: Postgres refuses to create or
+    attach a partition while the default partition holds rows for its range.
+    """
+    end = add_months(start, 1)
+    bounds = {'start': start, 'end': end}
+    in_default = db.execute(text(
+        "SELECT 1 FROM events_default WHERE created_at >= :start AND created_at < :end LIMIT 1"
+    ), bounds).first() is not None
+
+    if not in_default:
+        db.execute(text(
+            f"CREATE TABLE {name} PARTITION OF events "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+        return
+
+    # Inserts for this month keep landing in events_default until the attach: hold them off
+    db.execute(text("LOCK TABLE events_default IN ACCESS EXCLUSIVE MODE"))
+    db.execute(text(f"CREATE TABLE {name} (LIKE events INCLUDING DEFAULTS)"))
+    moved = db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM events_default WHERE created_at >= :start AND created_at < :end RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), bounds).rowcount
+    db.execute(text(
+        f"ALTER TABLE events ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    ))
+    logger.info(f"📦 Moved {moved} events from events_default into {name}")
+
+
+def ensure_partitions(db: Session, months_ahead: int = EVENT_PARTITION_MONTHS_AHEAD,
+                      now: Optional[datetime] = None) -> List[str]:
+    """
+    Create monthly partitions from the current month through months_ahead,
+    and for earlier months that have rows in events_default.
+
+    Returns:
+        Names of partitions created
+    """
+    created = []
+    current = month_start(now or datetime.utcnow())
+    existing = {name for name, _ in list_partitions(db)}
+
+    month = current
+    oldest_default = db.execute(text("SELECT MIN(created_at) FROM events_default")).scalar()
+    if oldest_default is not None:
+        month = min(month, month_start(oldest_default))
+
+    while month <= add_months(current, months_ahead):
+        name = partition_name(month)
+        if name not in existing:
+            try:
+                _lock(db)
+                if not _is_attached(db, name):
+                    _create_partition(db, name, month)
+                    created.append(name)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        month = add_months(month, 1)
+
+    if created:
+        logger.info(f"📅 Created event partitions: {', '.join(created)}")
+    return created
+
+
+def drop_expired_partitions(db: Session, days_to_keep: int, now: Optional[datetime] = None) -> int:
+    """
+    Drop monthly partitions that lie entirely before the retention cutoff,
+    and delete expired rows from events_default.
+
+    Each partition is detached first so the drop doesn't lock the parent
+    table; retained event types are copied to events_archive before the drop.
+
+    Returns:
+        Number of events removed
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days_to_keep)
+    types = {'types': list(RETAINED_EVENT_TYPES)}
+    removed = 0
+
+    for name, start in list_partitions(db):
+        if add_months(start, 1) > cutoff:
+            break
+
+        try:
+            _lock(db)
+            if not _is_attached(db, name):
+                db.commit()
+                continue
+            db.execute(text(f"ALTER TABLE events DETACH PARTITION {name}"))
+            count = db.execute(text(f"SELECT count(*) FROM {name}")).scalar() or 0
+            db.execute(text(f"INSERT INTO events_archive SELECT * FROM {name} WHERE event_type = ANY(:types)"), types)
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        removed += count
+        logger.info(f"🗑️  Dropped event partition {name} ({count} events)")
+
+    try:
+        _lock(db)
+        params = {'cutoff': cutoff, **types}
+        db.execute(text(
+            "INSERT INTO events_archive SELECT * FROM events_default "
+            "WHERE created_at < :cutoff AND event_type = ANY(:types)"
+        ), params)
+        count = db.execute(text("DELETE FROM events_default WHERE created_at < :cutoff"), params).rowcount or 0
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if count:
+        removed += count
+        logger.info(f"🗑️  Deleted {count} expired events from events_default")
+
+    return removed
+
+
+def maintain_partitions(db: Session, days_to_keep: int = EVENT_RETENTION_DAYS,
+                        now: Optional[datetime] = None) -> int:
+    """Apply retention, then create upcoming months; returns the number of events removed"""
+    removed = drop_expired_partitions(db, days_to_keep, now=now)
+    ensure_partitions(db, now=now)
+    return removed
+
+
+def _maintain_once():
+    db = SessionLocal()
+    try:
+        if is_partitioned(db):
+            maintain_partitions(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error in event partition maintenance: {e}")
+    finally:
+        db.close()
+
+
+_maintenance_running = False
+
+
+def run_event_partition_maintenance():
+    """Blocking maintenance loop for the worker process."""
+    global _maintenance_running
+    _maintenance_running = True
+
+    logger.info("Event partition maintenance starting...")
+
+    while _maintenance_running:
+        _maintain_once()
+
+        # Sleep in short steps so shutdown isn't delayed by a full interval
+        deadline = time.monotonic() + EVENT_PARTITION_MAINTENANCE_SECONDS
+        while _maintenance_running and time.monotonic() < deadline:
+            time.sleep(1)
+
+    logger.info("Event partition maintenance stopped")
+
+
+def stop_event_partition_maintenance():
+    """Stop the event partition maintenance loop."""
+    global _maintenance_running
+    _maintenance_running = False
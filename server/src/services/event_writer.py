@@ -0,0 +1,324 @@
+"""
+Buffered Audit Event Writer
+
+EVENT_WRITER_MODE selects how events are written:
+- async (default): buffered and written by a background flusher (below)
+- sync: inserted immediately in a separate session
+- session: inserted and committed through the caller's session, exactly
+  like a plain db.add()/commit() (used by tests, which bind the caller's
+  session to the test database)
+
+In async mode, audit events are collected in a bounded buffer (in memory, or a Redis list
+when EVENT_WRITER_BACKEND=redis) and written by a background flusher with
+one multi-row INSERT per batch. A batch is flushed when it reaches
+EVENT_WRITER_BATCH_SIZE events or EVENT_WRITER_FLUSH_INTERVAL seconds after
+its first event, whichever comes first.
+
+Callers get the Event back immediately with its id and created_at already
+assigned, so a request pays neither the round-trip nor the commit for each
+event it emits.
+
+Backpressure: when the buffer is full, enqueueing waits up to
+EVENT_WRITER_ENQUEUE_TIMEOUT seconds and then writes the event directly in
+the caller's thread, so events are slowed down rather than dropped.
+
+Transactional gap: async and sync modes write through their own sessions,
+outside the caller's transaction. An event can therefore be persisted for a
+change the caller later rolls back, and in async mode buffered events are
+lost if the process dies before they are flushed (the Redis backend narrows
+this to events not yet pushed). Audit events are informational, so the
+default accepts that trade-off; the app flushes the buffer on shutdown.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from server.src.database.core import SessionLocal
+from server.src.entities.event import Event, MULTI_TENANT_ENABLED
+
+# Try to import Redis for a shared event buffer
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EVENT_WRITER_MODE = os.getenv('EVENT_WRITER_MODE', 'async').lower()
+EVENT_WRITER_BACKEND = os.getenv('EVENT_WRITER_BACKEND', 'memory').lower()
+EVENT_WRITER_BATCH_SIZE = int(os.getenv('EVENT_WRITER_BATCH_SIZE', '500'))
+EVENT_WRITER_FLUSH_INTERVAL = float(os.getenv('EVENT_WRITER_FLUSH_INTERVAL', '1.0'))
+EVENT_WRITER_MAX_PENDING = int(os.getenv('EVENT_WRITER_MAX_PENDING', '10000'))
+EVENT_WRITER_ENQUEUE_TIMEOUT = float(os.getenv('EVENT_WRITER_ENQUEUE_TIMEOUT', '0.05'))
+EVENT_WRITER_MAX_RETRIES = int(os.getenv('EVENT_WRITER_MAX_RETRIES', '3'))
+
+REDIS_EVENT_BUFFER_KEY = 'audit_events:pending'
+
+_UUID_COLUMNS = ('id', 'user_id', 'org_id', 'entity_id')
+
+
+def _to_json_row(row: Dict[str, Any]) -> str:
+    data = dict(row)
+    for column in _UUID_COLUMNS:
+        if data.get(column) is not None:
+            data[column] = str(data[column])
+    data['created_at'] = data['created_at'].isoformat()
+    return json.dumps(data, default=str)
+
+
+def _from_json_row(raw) -> Dict[str, Any]:
+    data = json.loads(raw)
+    for column in _UUID_COLUMNS:
+        if data.get(column) is not None:
+            data[column] = uuid.UUID(data[column])
+    data['created_at'] = datetime.fromisoformat(data['created_at'])
+    return data
+
+
+class _MemoryBuffer:
+    """Bounded in-process buffer"""
+
+    def __init__(self, max_pending: int):
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_pending)
+
+    def put(self, row: Dict[str, Any], timeout: float) -> bool:
+        try:
+            self._queue.put(row, timeout=timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def take(self, max_items: int, timeout: float) -> List[Dict[str, Any]]:
+        """Wait up to timeout for the first row, then drain what's immediately available"""
+        try:
+            rows = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(rows) < max_items:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+
+class _RedisBuffer:
+    """Redis list buffer; survives a process restart and is shared by workers"""
+
+    def __init__(self, client, max_pending: int):
+        self.client = client
+        self.max_pending = max_pending
+
+    def put(self, row: Dict[str, Any], timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.client.llen(REDIS_EVENT_BUFFER_KEY) >= self.max_pending:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        self.client.rpush(REDIS_EVENT_BUFFER_KEY, _to_json_row(row))
+        return True
+
+    def take(self, max_items: int, timeout: float) -> List[Dict[str, Any]]:
+        first = self.client.blpop(REDIS_EVENT_BUFFER_KEY, timeout=max(1, int(timeout)))
+        if not first:
+            return []
+        raw_rows = [first[1]]
+        more = self.client.lpop(REDIS_EVENT_BUFFER_KEY, max_items - 1) if max_items > 1 else None
+        raw_rows.extend(more or [])
+        return [_from_json_row(raw) for raw in raw_rows]
+
+    def pending(self) -> int:
+        return self.client.llen(REDIS_EVENT_BUFFER_KEY)
+
+
+class AuditEventWriter:
+    """Batches audit events into multi-row inserts on a background thread"""
+
+    def __init__(self, mode: str = EVENT_WRITER_MODE, backend: str = EVENT_WRITER_BACKEND,
+                 batch_size: int = EVENT_WRITER_BATCH_SIZE,
+                 flush_interval: float = EVENT_WRITER_FLUSH_INTERVAL,
+                 max_pending: int = EVENT_WRITER_MAX_PENDING,
+                 session_factory=SessionLocal):
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+
+        self._buffer = self._create_buffer(backend, max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        # Rows taken from the buffer but not yet committed
+        self._in_flight = 0
+        self._idle = threading.Condition(self._lock)
+
+        self.written_count = 0
+        self.dropped_count = 0
+
+    def _create_buffer(self, backend: str, max_pending: int):
+        redis_url = os.getenv('REDIS_URL')
+        if backend == 'redis' and REDIS_AVAILABLE and redis_url:
+            try:
+                client = redis.from_url(redis_url, socket_connect_timeout=5, socket_timeout=10)
+                client.ping()
+                return _RedisBuffer(client, max_pending)
+            except Exception as e:
+                logger.warning(f"⚠️  Audit event buffer falling back to memory: {e}")
+        return _MemoryBuffer(max_pending)
+
+    @staticmethod
+    def build_row(event_type: str, org_id=None, user_id=None, entity_type: Optional[str] = None,
+                  entity_id=None, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Column values for one event, with id and created_at assigned up front"""
+        row = {
+            'id': uuid.uuid4(),
+            'event_type': event_type,
+            'user_id': user_id,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'payload': payload or {},
+            'created_at': datetime.now(timezone.utc),
+        }
+        if MULTI_TENANT_ENABLED and org_id is not None:
+            row['org_id'] = org_id
+        return row
+
+    def submit(self, db: Optional[Session] = None, **fields) -> Event:
+        """
+        Write or queue an audit event, depending on the mode.
+
+        Args:
+            db: Caller's session; used in session mode, where the event is
+                committed with it. Without one, session mode writes like sync.
+
+        Returns:
+            A transient Event carrying the values that will be inserted
+        """
+        row = self.build_row(**fields)
+
+        if self.mode == 'session' and db is not None:
+            try:
+                db.execute(insert(Event), [row])
+                db.commit()
+                self.written_count += 1
+            except Exception:
+                db.rollback()
+                raise
+        elif self.mode in ('session', 'sync'):
+            self._write_batch([row])
+        else:
+            self._ensure_started()
+            if not self._buffer.put(row, timeout=EVENT_WRITER_ENQUEUE_TIMEOUT):
+                # Buffer full: the caller absorbs the write instead of losing the event
+                logger.warning("Audit event buffer full, writing event synchronously")
+                self._write_batch([row])
+
+        return Event(**row)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-event-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set() or self._buffer.pending():
+            batch = self._collect_batch()
+            if batch:
+                self._write_with_retry(batch)
+                with self._idle:
+                    self._in_flight -= len(batch)
+                    self._idle.notify_all()
+
+    def _collect_batch(self) -> List[Dict[str, Any]]:
+        """Block for the first event, then fill the batch until it's full or the interval elapses"""
+        batch = self._buffer.take(self.batch_size, timeout=self.flush_interval)
+        if not batch:
+            return []
+        with self._idle:
+            self._in_flight += len(batch)
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stopping.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more = self._buffer.take(self.batch_size - len(batch), timeout=remaining)
+            if not more:
+                break
+            with self._idle:
+                self._in_flight += len(more)
+            batch.extend(more)
+        return batch
+
+    def _write_batch(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            # One statement; SQLAlchemy renders executemany as multi-row VALUES
+            db.execute(insert(Event), rows)
+            db.commit()
+            self.written_count += len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write_with_retry(self, rows: List[Dict[str, Any]]):
+        for attempt in range(1, EVENT_WRITER_MAX_RETRIES + 1):
+            try:
+                self._write_batch(rows)
+                logger.debug(f"Wrote {len(rows)} audit events")
+                return
+            except Exception as e:
+                if attempt == EVENT_WRITER_MAX_RETRIES:
+                    self.dropped_count += len(rows)
+                    logger.error(f"❌ Dropping {len(rows)} audit events after {attempt} attempts: {e}")
+                    return
+                logger.warning(f"Audit event batch write failed (attempt {attempt}), retrying: {e}")
+                time.sleep(min(2 ** attempt * 0.1, 2))
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued event has been written; returns False on timeout"""
+        if self.mode != 'async':
+            return True
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._buffer.pending() or self._in_flight:
+                if self._thread is None or not self._thread.is_alive():
+                    return False
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(min(remaining, 0.1))
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Flush remaining events and stop the background thread"""
+        self.flush(timeout)
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Global writer for the process
+audit_event_writer = AuditEventWriter()
@@ -0,0 +1,238 @@
+"""
+Image Process Pool
+
+CPU-bound part of the image upload workflow, run in worker processes:
+decode -> crop transparent -> resize -> PNG encode -> perceptual hashes
+(fused, see utils/perceptual_hash.py) and image geometry.
+
+- render_image() is a pure function of the image bytes and plain-data
+  sizing configs (resolved by the parent from the database beforehand), so
+  it needs no SQLAlchemy session and runs the same in a thread or a process
+- ImageProcessPool.render() copies a batch of uploads into one shared
+  memory segment and hands workers (name, offset, size) references instead
+  of pickling every upload through the pool's pipe
+- Encoded PNGs and hashes come back to the parent, which keeps the DB
+  writes and NAS uploads
+
+Pool size defaults to the CPU count (IMAGE_PROCESS_POOL_WORKERS). Workers
+are spawned rather than forked because the API process runs threads, and
+recycled after IMAGE_PROCESS_POOL_MAX_TASKS images to bound memory growth.
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from server.src.utils.png_encoding import DESIGN_PNG_PROFILE, encode_png
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PROCESS_POOL_WORKERS = int(os.getenv('IMAGE_PROCESS_POOL_WORKERS', str(os.cpu_count() or 2)))
+IMAGE_PROCESS_POOL_START_METHOD = os.getenv('IMAGE_PROCESS_POOL_START_METHOD', 'spawn')
+IMAGE_PROCESS_POOL_MAX_TASKS = int(os.getenv('IMAGE_PROCESS_POOL_MAX_TASKS', '200'))
+
+DESIGN_DPI = 400
+
+
+@dataclass
+class RenderSpec:
+    """Everything a worker needs besides the image bytes"""
+    image_type: str
+    sizing: Optional[Dict[str, Any]]
+    canvas: Optional[Dict[str, Any]]
+    target_dpi: int = DESIGN_DPI
+    hash_size: int = 16
+    filename: str = ""
+    png_profile: str = DESIGN_PNG_PROFILE
+
+
+@dataclass
+class RenderResult:
+    """Encoded PNG and hashes for one image, or the error that stopped it"""
+    content: Optional[bytes] = None
+    phash: Optional[str] = None
+    ahash: Optional[str] = None
+    dhash: Optional[str] = None
+    whash: Optional[str] = None
+    source_shape: Optional[Tuple[int, ...]] = None
+    output_shape: Optional[Tuple[int, ...]] = None
+    # Geometry of the encoded image (ImageGeometry.to_columns())
+    geometry: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class _SharedImageJob:
+    shm_name: str
+    offset: int
+    size: int
+    spec: RenderSpec
+
+
+def render_image(content, spec: RenderSpec) -> RenderResult:
+    """
+    Decode, crop, resize, encode and hash one image.
+
+    content may be bytes or any buffer (e.g. a shared memory view).
+    """
+    from server.src.utils.cropping import crop_transparent
+    from server.src.utils.image_geometry import measure_array
+    from server.src.utils.perceptual_hash import compute_hashes
+    from server.src.utils.resizing import resize_image_with_configs
+
+    raw_image = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_UNCHANGED)
+    if raw_image is None:
+        raise ValueError("Could not decode image from content")
+
+    # Step 1: Crop transparent areas
+    cropped_image = crop_transparent(image=raw_image)
+    if cropped_image is None:
+        # If cropping fails, use original image
+        cropped_image = raw_image
+        logger.warning(f"Failed to crop transparent areas for {spec.filename}, using original image")
+
+    # Step 2: Resize the cropped image with the pre-resolved configs
+    if spec.sizing is not None:
+        resized_image = resize_image_with_configs(
+            cropped_image, spec.image_type, spec.sizing, spec.canvas or {}, spec.target_dpi
+        )
+    else:
+        resized_image = cropped_image
+
+    # Convert to PIL Image for encoding and hash calculation
+    if len(resized_image.shape) == 3 and resized_image.shape[2] == 4:
+        pil_image = Image.fromarray(cv2.cvtColor(resized_image, cv2.COLOR_BGRA2RGBA))
+    elif len(resized_image.shape) == 3 and resized_image.shape[2] == 3:
+        pil_image = Image.fromarray(cv2.cvtColor(resized_image, cv2.COLOR_BGR2RGB))
+    else:
+        pil_image = Image.fromarray(resized_image)
+
+    # Encoded with the ingestion profile (fast by default; the PNG
+    # recompressor shrinks stored files later). DPI is fixed so all design
+    # files share one resolution
+    content = encode_png(pil_image, spec.png_profile, dpi=(spec.target_dpi, spec.target_dpi))
+
+    hashes = compute_hashes(pil_image, hash_size=spec.hash_size)
+    geometry = measure_array(resized_image, (spec.target_dpi, spec.target_dpi))
+    return RenderResult(
+        content=content,
+        phash=hashes['phash'],
+        ahash=hashes['ahash'],
+        dhash=hashes['dhash'],
+        whash=hashes['whash'],
+        source_shape=tuple(raw_image.shape),
+        output_shape=tuple(resized_image.shape),
+        geometry=geometry.to_columns()
+    )
+
+
+def _render_shared_job(job: _SharedImageJob) -> RenderResult:
+    """Worker entry point: render an image read from shared memory"""
+    # Workers share the parent's resource tracker, which unlinks the
+    # segment if the parent dies before render() cleans up
+    shm = SharedMemory(name=job.shm_name)
+    view = shm.buf[job.offset:job.offset + job.size]
+    try:
+        return render_image(view, job.spec)
+    except Exception as e:
+        return RenderResult(error=str(e))
+    finally:
+        view.release()
+        shm.close()
+
+
+class ImageProcessPool:
+    """Process pool rendering uploads from a shared memory segment"""
+
+    def __init__(self, workers: int = IMAGE_PROCESS_POOL_WORKERS,
+                 start_method: str = IMAGE_PROCESS_POOL_START_METHOD,
+                 max_tasks_per_child: int = IMAGE_PROCESS_POOL_MAX_TASKS):
+        self.workers = max(1, workers)
+        self.start_method = start_method
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                context = multiprocessing.get_context(self.start_method)
+                kwargs = {}
+                # Recycling workers is not supported with fork
+                if self.max_tasks_per_child > 0 and self.start_method != 'fork':
+                    kwargs['max_tasks_per_child'] = self.max_tasks_per_child
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, **kwargs)
+                logger.info(f"🧵 Started image process pool with {self.workers} workers ({self.start_method})")
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, items: Sequence[Tuple[Union[bytes, str], RenderSpec]]) -> List[RenderResult]:
+        """
+        Render images in worker processes; results are in input order.
+
+        Each item's content is the image bytes or the path of a file holding
+        them (a spooled upload), which is read directly into shared memory.
+        """
+        if not items:
+            return []
+
+        sizes = [os.path.getsize(content) if isinstance(content, str) else len(content) for content, _ in items]
+        shm = SharedMemory(create=True, size=max(sum(sizes), 1))
+        try:
+            jobs = []
+            offset = 0
+            for (content, spec), size in zip(items, sizes):
+                if isinstance(content, str):
+                    with open(content, 'rb') as f, shm.buf[offset:offset + size] as view:
+                        f.readinto(view)
+                else:
+                    shm.buf[offset:offset + size] = content
+                jobs.append(_SharedImageJob(shm.name, offset, size, spec))
+                offset += size
+
+            executor = self._get_executor()
+            futures = [executor.submit(_render_shared_job, job) for job in jobs]
+
+            results = []
+            broken = False
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except BrokenProcessPool as e:
+                    broken = True
+                    results.append(RenderResult(error=f"Image worker process died: {e}"))
+                except Exception as e:
+                    results.append(RenderResult(error=str(e)))
+
+            if broken:
+                logger.error("❌ Image process pool broke; it will be restarted on next use")
+                self._discard_executor(executor)
+            return results
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# Global pool instance; worker processes start on first use
+image_process_pool = ImageProcessPool()
@@ -14,9 +14,15 @@ Note: Mockup generation and Etsy uploads are handled separately by the /mockups/
 
 Architecture:
 - Multi-threaded batch processing for performance
+- CPU-bound decode/resize/encode/hash work runs in a process pool
+  (IMAGE_WORKFLOW_BACKEND=process, the default) on pre-resolved sizing
+  configs; DB writes and NAS uploads stay in this process
+- AI tags are filled in afterwards by the background tagging pipeline
 - Thread-safe operations with proper synchronization
 - Comprehensive error handling and rollback capabilities
 - Progress tracking and detailed logging
+- Streaming uploads (process_upload_stream) are rendered from disk spool
+  files as they arrive, see services/upload_spool.py
 """
 
 import os
@@ -27,20 +33,19 @@ import logging
 import threading
 import tempfile
 import json
-import cv2
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
-from io import BytesIO
 from typing import List, Dict, Optional, Set, Any
 from dataclasses import dataclass, field
 
 try:
-    import imagehash
-    import numpy as np
     from PIL import Image
     from sqlalchemy import text
     from sqlalchemy.orm import Session
+    from server.src.services.image_process_pool import RenderResult, RenderSpec, image_process_pool, render_image
+    from server.src.services.png_recompressor import png_recompressor
+    from server.src.services.sizing_registry import sizing_registry
     DEPENDENCIES_AVAILABLE = True
 except ImportError as e:
     logging.warning(f"Missing dependencies for image processing: {e}")
@@ -53,8 +58,6 @@ except ImportError as e:
         class Image:
             pass
 
-    import numpy as np
-
 # Import existing services
 current_dir = os.path.dirname(os.path.abspath(__file__))
 server_dir = os.path.dirname(current_dir)
@@ -62,7 +65,7 @@ sys.path.insert(0, server_dir)
 
 try:
     from utils.nas_storage import nas_storage
-    from utils.resizing import get_resizing_configs_from_db, resize_image_by_inches
+    from utils.resizing import get_resizing_configs_from_db, get_default_configs, resize_image_by_inches
     from database.core import get_db
     NAS_AVAILABLE = True
     RESIZING_AVAILABLE = True
@@ -70,10 +73,19 @@ except ImportError as e:
     logging.warning(f"NAS storage not available: {e}")
     nas_storage = None
     get_resizing_configs_from_db = None
+    get_default_configs = None
     resize_image_by_inches = None
     NAS_AVAILABLE = False
     RESIZING_AVAILABLE = False
 
+# "process" renders images in the shared process pool, "thread" in the batch threads
+IMAGE_WORKFLOW_BACKEND = os.getenv('IMAGE_WORKFLOW_BACKEND', 'process').lower()
+# Geometry columns written with each design (see utils/image_geometry.py)
+GEOMETRY_COLUMNS = ("width_px", "height_px", "dpi_x", "dpi_y", "channels", "alpha_bbox", "content_hash")
+
+# Streaming uploads: most files that have already arrived to group into one batch
+UPLOAD_STREAM_BATCH_MAX_IMAGES = int(os.getenv('UPLOAD_STREAM_BATCH_MAX_IMAGES', '8'))
+
 try:
     from routes.mockups import service as mockup_service
     MOCKUP_SERVICE_AVAILABLE = True
@@ -92,6 +104,15 @@ class UploadedImage:
     user_id: str
     template_id: Optional[str] = None
     temp_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    # Streaming uploads leave content empty and are read from here when rendered
+    spool_path: Optional[str] = None
+
+    def read_content(self) -> bytes:
+        """The upload's bytes, from memory or from its spool file"""
+        if self.content or not self.spool_path:
+            return self.content
+        with open(self.spool_path, 'rb') as f:
+            return f.read()
 
 
 @dataclass
@@ -113,7 +134,8 @@ class ProcessedImage:
     nas_uploaded: bool = False
     db_updated: bool = False
     mockup_generated: bool = False
-    tags_result: Optional[Dict[str, Any]] = None  # AI-generated tags result
+    design_id: Optional[str] = None
+    geometry: Optional[Dict[str, Any]] = None
 
 
 @dataclass
@@ -153,7 +175,7 @@ class ImageUploadWorkflow:
 
     def __init__(self, user_id: str, db_session: Session, max_threads: int = 16, progress_callback=None):
         if not DEPENDENCIES_AVAILABLE:
-            raise RuntimeError("Required dependencies not available (PIL, imagehash, sqlalchemy)")
+            raise RuntimeError("Required dependencies not available (PIL, sqlalchemy)")
 
         self.user_id = user_id
         self.db_session = db_session
@@ -181,6 +203,9 @@ class ImageUploadWorkflow:
         self._template_name_cache: Dict[str, str] = {}
         self._cache_lock = threading.Lock()
 
+        # Sizing configs resolved up front: (canvas_id, template_id) -> (CANVAS, SIZING)
+        self._sizing_configs: Dict[tuple, tuple] = {}
+
         # Configuration
         self.target_width = 3000
         self.target_height = 3000
@@ -191,6 +216,8 @@ class ImageUploadWorkflow:
         self._total_files = 0
         self._processed_files = 0
         self._current_file = ""
+        # Streaming uploads report every file, not just the first batch's
+        self._per_file_progress = False
 
     def _send_progress(self, step: int, message: str, current_file: str = "", file_progress: float = 0):
         """Send progress update to callback if available"""
@@ -237,6 +264,9 @@ class ImageUploadWorkflow:
             self._send_progress(1, "Loading existing image hashes for duplicate detection")
             self._load_existing_phashes()
 
+            # Resolve sizing configs once so image processing needs no DB session
+            self._preload_sizing_configs(uploaded_images, design_data)
+
             # Create batches for processing
             self._send_progress(1, "Organizing images into processing batches")
             batches = self._create_batches(uploaded_images)
@@ -274,6 +304,109 @@ class ImageUploadWorkflow:
             logging.error(f"💥 Workflow failed: {e}")
             raise
 
+    def process_upload_stream(self, spool, design_data=None,
+                              max_batch_images: int = UPLOAD_STREAM_BATCH_MAX_IMAGES) -> WorkflowResult:
+        """
+        Process a streaming upload, starting on each file as it arrives
+
+        Whenever a batch thread is free, the files received so far (up to
+        max_batch_images) become its batch, so files are grouped only while
+        every thread is busy. Spool files are read from disk when rendered
+        and released once their batch is done, which frees upload capacity.
+
+        Args:
+            spool: UploadSpool the request is being received into
+            design_data: Design configuration data
+
+        Returns:
+            WorkflowResult with complete processing statistics
+        """
+        start_time = time.time()
+        self._processed_files = 0
+        self._per_file_progress = True
+        self._design_starting_name = design_data.starting_name if design_data and hasattr(design_data, 'starting_name') else 100
+        template_id = getattr(design_data, 'product_template_id', None)
+        template_id = str(template_id) if template_id else None
+
+        logging.info("🚀 Starting streaming image upload workflow")
+        self._send_progress(1, "Loading existing image hashes for duplicate detection")
+        self._load_existing_phashes()
+
+        received: List[UploadedImage] = []
+        batch_results: List[BatchResult] = []
+        free_threads = threading.Semaphore(self.max_threads)
+
+        def run_batch(images, spooled_files, batch_id):
+            try:
+                return self._process_batch(images, batch_id, design_data)
+            finally:
+                for spooled in spooled_files:
+                    spool.release(spooled)
+                free_threads.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+            futures = {}
+            while True:
+                free_threads.acquire()
+                spooled = spool.get()
+                if spooled is None:
+                    free_threads.release()
+                    break
+
+                spooled_files = [spooled]
+                while len(spooled_files) < max_batch_images:
+                    spooled = spool.get_nowait()
+                    if spooled is None:
+                        break
+                    spooled_files.append(spooled)
+
+                images = [
+                    UploadedImage(
+                        original_filename=spooled.filename,
+                        content=b"",
+                        size=spooled.size,
+                        upload_time=datetime.now(timezone.utc),
+                        user_id=self.user_id,
+                        template_id=template_id,
+                        spool_path=spooled.path
+                    )
+                    for spooled in spooled_files
+                ]
+                received.extend(images)
+                batch_id = len(futures) + 1
+                logging.info(f"📦 Stream batch {batch_id}: {len(images)} images ({len(received)} received so far)")
+                futures[executor.submit(run_batch, images, spooled_files, batch_id)] = (batch_id, images)
+
+            for future, (batch_id, images) in futures.items():
+                try:
+                    batch_results.append(future.result())
+                except Exception as e:
+                    logging.error(f"❌ Stream batch {batch_id} failed: {e}")
+                    batch_results.append(BatchResult(
+                        batch_id=batch_id,
+                        processed=0,
+                        skipped_local_duplicates=0,
+                        skipped_db_duplicates=0,
+                        errors=len(images),
+                        processing_time=0,
+                        nas_uploads=0,
+                        db_updates=0,
+                        mockups_created=0,
+                        error_details=[str(e)]
+                    ))
+
+        workflow_result = self._compile_workflow_result(received, batch_results, time.time() - start_time)
+        self._send_progress(
+            3,
+            f"Images ready for mockup generation: {workflow_result.processed_images} processed, {workflow_result.skipped_duplicates} duplicates skipped",
+            "",
+            1.0
+        )
+        logging.info(f"🎉 Streaming workflow completed in {workflow_result.processing_time:.1f}s: "
+                     f"{workflow_result.processed_images}/{workflow_result.total_images} processed, "
+                     f"{workflow_result.skipped_duplicates} duplicates, {workflow_result.errors} errors")
+        return workflow_result
+
     def _load_existing_phashes(self):
         """
         Initialize duplicate detection system
@@ -432,11 +565,12 @@ class ImageUploadWorkflow:
             # Step 1: Resize images and generate phashes
             processed_images = []
             local_phashes = set()
+            rendered_images = self._render_batch(images, design_data)
 
             for i, image in enumerate(images):
                 try:
                     # Send progress update for current file
-                    if batch_id == 1:  # Only send detailed updates for first batch
+                    if batch_id == 1 or self._per_file_progress:  # Only send detailed updates for first batch
                         self._send_progress(
                             2,
                             f"Processing image: {image.original_filename}",
@@ -444,7 +578,7 @@ class ImageUploadWorkflow:
                             i / len(images) if images else 0
                         )
 
-                    processed_image = self._process_single_image(image, design_data, i)
+                    processed_image = rendered_images[i]
 
                     # Only check for duplicates if processing was successful
                     if processed_image.phash and not processed_image.error:
@@ -583,9 +717,71 @@ class ImageUploadWorkflow:
         logging.info(f"🔍 DEBUG: Batch {batch_id} FINAL RESULT: processed={processed}, local_dups={skipped_local}, db_dups={skipped_db}, errors={errors}, nas_uploads={nas_uploads}, db_updates={db_updates}")
         return result
 
+    def _preload_sizing_configs(self, uploaded_images: List[UploadedImage], design_data=None):
+        """Resolve sizing configs for every template in the upload before processing starts"""
+        canvas_id = getattr(design_data, 'canvas_config_id', None)
+        for template_id in {image.template_id for image in uploaded_images}:
+            self._get_sizing_configs(canvas_id, template_id)
+
+    def _get_sizing_configs(self, canvas_id, template_id) -> tuple:
+        """
+        (CANVAS, SIZING) for a canvas/template pair
+
+        Taken from the process-wide sizing registry once per upload, so every
+        image in the upload is resized with the same configs.
+        """
+        key = (canvas_id, template_id)
+        with self._cache_lock:
+            if key in self._sizing_configs:
+                return self._sizing_configs[key]
+
+        if not RESIZING_AVAILABLE:
+            configs = (None, None)
+        else:
+            with self.db_lock:
+                configs = sizing_registry.get(self.db_session, canvas_id, template_id)
+
+        with self._cache_lock:
+            self._sizing_configs[key] = configs
+        return configs
+
+    def _render_spec(self, image: UploadedImage, design_data=None) -> RenderSpec:
+        canvas, sizing = self._get_sizing_configs(getattr(design_data, 'canvas_config_id', None), image.template_id)
+        return RenderSpec(
+            image_type="UVDTF 16oz",  # Default type, should be determined from template
+            sizing=sizing,
+            canvas=canvas,
+            target_dpi=400,
+            hash_size=self.phash_size,
+            filename=image.original_filename
+        )
+
+    def _render_batch(self, images: List[UploadedImage], design_data=None) -> List[ProcessedImage]:
+        """
+        Process a batch of images, in the process pool or inline.
+
+        Returns one ProcessedImage per input, in order.
+        """
+        if IMAGE_WORKFLOW_BACKEND != 'process':
+            return [self._process_single_image(image, design_data, i) for i, image in enumerate(images)]
+
+        start_time = time.time()
+        # Spooled uploads are read from disk straight into the shared segment
+        renderable = [(i, image) for i, image in enumerate(images) if image.content or image.size]
+        results = image_process_pool.render(
+            [(image.content or image.spool_path, self._render_spec(image, design_data)) for _, image in renderable]
+        )
+        by_index = {i: result for (i, _), result in zip(renderable, results)}
+
+        processed_images = []
+        for i, image in enumerate(images):
+            result = by_index.get(i) or RenderResult(error="Empty image content")
+            processed_images.append(self._finish_processed_image(image, result, i, start_time))
+        return processed_images
+
     def _process_single_image(self, image: UploadedImage, design_data=None, file_index: int = 0) -> ProcessedImage:
         """
-        Process a single image: resize and generate phash
+        Process a single image in the calling thread: resize and generate phash
 
         Args:
             image: Uploaded image data
@@ -595,129 +791,55 @@ class ImageUploadWorkflow:
         """
         start_time = time.time()
 
-        processed = ProcessedImage(upload_info=image)
-
         try:
             # Validate content
-            if not image.content or len(image.content) == 0:
+            content = image.read_content()
+            if not content or len(content) == 0:
                 raise ValueError("Empty image content")
 
-            # Load and validate image
-            nparr = np.frombuffer(image.content, np.uint8)
-            raw_image = cv2.imdecode(nparr, cv2.IMREAD_UNCHANGED)
-
-            if raw_image is None:
-                raise ValueError("Could not decode image from content")
-
-            # Step 1: Crop transparent areas
-            from server.src.utils.cropping import crop_transparent
-            cropped_image = crop_transparent(image=raw_image)
-
-            if cropped_image is None:
-                # If cropping fails, use original image
-                cropped_image = raw_image
-                logging.warning(f"Failed to crop transparent areas for {image.original_filename}, using original image")
-
-            # Step 2: Resize the cropped image
-            # Use lower DPI (300) for bulk uploads to reduce file size and transfer time
-            # 300 DPI is still high quality but significantly reduces file size (~40% smaller)
-            if RESIZING_AVAILABLE and resize_image_by_inches:
-                resized_image = resize_image_by_inches(
-                    image=cropped_image,
-                    image_type="UVDTF 16oz",  # Default type, should be determined from template
-                    db=self.db_session,
-                    canvas_id=getattr(design_data, 'canvas_config_id', None),
-                    product_template_id=image.template_id,
-                    target_dpi=400  # Reduced from 400 for faster uploads
-                )
-            else:
-                # Fallback: use the cropped image without further resizing
-                resized_image = cropped_image
-
-            # Convert to PIL Image for hash calculation
-            if len(resized_image.shape) == 3 and resized_image.shape[2] == 4:
-                # BGRA to RGBA
-                pil_image = Image.fromarray(cv2.cvtColor(resized_image, cv2.COLOR_BGRA2RGBA))
-            elif len(resized_image.shape) == 3 and resized_image.shape[2] == 3:
-                # BGR to RGB
-                pil_image = Image.fromarray(cv2.cvtColor(resized_image, cv2.COLOR_BGR2RGB))
-            else:
-                # Grayscale
-                pil_image = Image.fromarray(resized_image)
-
-            # Convert processed image to bytes for storage
-            # Use maximum PNG compression (9) for large batch uploads to reduce transfer size
-            # IMPORTANT: Set DPI to 400 to ensure consistent resolution across all design files
-            buffer = BytesIO()
-            pil_image.save(buffer, format='PNG', optimize=True, compress_level=9, dpi=(400, 400))
-            resized_content = buffer.getvalue()
-
-            logging.info(f"Saved {image.original_filename} with DPI: 400x400")
-
-            # Generate multiple hashes for enhanced duplicate detection
-            logging.info(f"🔍 DEBUG: Generating hashes for {image.original_filename}")
-            hashes = {
-                'phash': str(imagehash.phash(pil_image, hash_size=self.phash_size)),
-                'ahash': str(imagehash.average_hash(pil_image, hash_size=self.phash_size)),
-                'dhash': str(imagehash.dhash(pil_image, hash_size=self.phash_size)),
-                'whash': str(imagehash.whash(pil_image, hash_size=self.phash_size))
-            }
-            logging.info(f"🔍 DEBUG: Generated hashes for {image.original_filename}: phash={hashes['phash']}, ahash={hashes['ahash']}, dhash={hashes['dhash']}, whash={hashes['whash']}")
-
-            # Store all hashes for enhanced duplicate detection
-            processed.phash = hashes['phash']
-            processed.ahash = hashes['ahash']
-            processed.dhash = hashes['dhash']
-            processed.whash = hashes['whash']
-
-            # Generate filename using template name and file index
-            final_filename = self._generate_filename(image.original_filename, image.template_id, file_index)
-
-            # Update processed image
-            processed.resized_content = resized_content
-            processed.resized_size = len(resized_content)
-            processed.final_filename = final_filename
+            result = render_image(content, self._render_spec(image, design_data))
+        except Exception as e:
+            result = RenderResult(error=str(e))
+
+        return self._finish_processed_image(image, result, file_index, start_time)
+
+    def _finish_processed_image(self, image: UploadedImage, result: RenderResult,
+                                file_index: int, start_time: float) -> ProcessedImage:
+        """Turn a render result into a ProcessedImage; naming happens here, in the parent"""
+        processed = ProcessedImage(upload_info=image)
+
+        if result.error:
+            processed.error = result.error
             processed.processing_time = time.time() - start_time
+            logging.error(f"Failed to process {image.original_filename}: {result.error}")
+            return processed
 
-            # Generate AI tags if enabled (non-blocking)
-            tags_result = None
-            if os.getenv('ENABLE_AI_TAGGING', 'true').lower() == 'true':
-                try:
-                    from server.src.services.ai_tagging_service import ai_tagging_service
-                    tags_result = ai_tagging_service.generate_tags(
-                        resized_content,
-                        image.original_filename
-                    )
-                    logging.info(
-                        f"Generated {len(tags_result.get('tags', []))} tags for {image.original_filename}"
-                    )
-                except Exception as e:
-                    # Non-blocking: log error but continue workflow
-                    logging.warning(f"AI tagging failed (non-blocking): {e}")
-                    tags_result = {'tags': [], 'metadata': {'error': str(e)}}
+        logging.info(f"Saved {image.original_filename} with DPI: 400x400")
+        logging.info(f"🔍 DEBUG: Generated hashes for {image.original_filename}: phash={result.phash}, ahash={result.ahash}, dhash={result.dhash}, whash={result.whash}")
 
-            processed.tags_result = tags_result
+        # Store all hashes for enhanced duplicate detection
+        processed.phash = result.phash
+        processed.ahash = result.ahash
+        processed.dhash = result.dhash
+        processed.whash = result.whash
 
-            logging.info(f"Processed {image.original_filename}: {raw_image.shape} → {resized_image.shape}, phash: {processed.phash[:12]}...")
+        # Update processed image
+        processed.resized_content = result.content
+        processed.resized_size = len(result.content)
+        processed.geometry = result.geometry
+        processed.final_filename = self._generate_filename(image.original_filename, image.template_id, file_index)
+        processed.processing_time = time.time() - start_time
 
-            return processed
+        logging.info(f"Processed {image.original_filename}: {result.source_shape} → {result.output_shape}, phash: {processed.phash[:12]}...")
 
-        except Exception as e:
-            processed.error = str(e)
-            processed.processing_time = time.time() - start_time
-            logging.error(f"Failed to process {image.original_filename}: {e}")
-            return processed
+        return processed
 
     def _get_canvas_config(self, template_id: Optional[str]) -> Dict[str, Any]:
         """Get canvas configuration for image processing"""
         try:
-            if template_id and hasattr(self, 'db_session') and get_resizing_configs_from_db:
-                # Try to get from database if available
-                config, _ = get_resizing_configs_from_db(
-                    self.db_session,
-                    canvas_id=None,
-                    product_template_id=template_id
-                )
+            if template_id and hasattr(self, 'db_session') and RESIZING_AVAILABLE:
+                # Try to get from the sizing registry if available
+                config, _ = self._get_sizing_configs(None, template_id)
                 return config
         except Exception as e:
             logging.info(f"Could not get canvas config from DB: {e}")
@@ -1030,14 +1152,17 @@ class ImageUploadWorkflow:
                 template_name = self._get_template_name(image.upload_info.template_id)
 
                 # Upload to NAS using the correct method
+                relative_path = f"{template_name}/{image.final_filename}"
                 success = nas_storage.upload_file_content(
                     image.resized_content,
                     shop_name,
-                    f"{template_name}/{image.final_filename}"
+                    relative_path
                 )
 
                 if success:
                     image.nas_uploaded = True
+                    # Rewrite the fast-encoded PNG at archival size once the upload has returned
+                    png_recompressor.submit(shop_name, relative_path, image.resized_content)
                     logging.info(f"   ✅ Uploaded: {image.final_filename}")
                     return (image, True)
                 else:
@@ -1143,14 +1268,21 @@ class ImageUploadWorkflow:
                         "is_digital": False,
                         "created_at": now,
                         "updated_at": now,
-                        "tags": json.dumps(image.tags_result['tags']) if image.tags_result else json.dumps([]),
-                        "tags_metadata": json.dumps(image.tags_result.get('metadata')) if image.tags_result else None
+                        # Filled in by the tagging pipeline after the upload
+                        "tags": json.dumps([]),
+                        "tags_metadata": None
                     }
+                    # Geometry of the stored PNG, so planners don't have to decode it
+                    geometry = image.geometry or {}
+                    for column in GEOMETRY_COLUMNS:
+                        row_data[column] = geometry.get(column)
+                    row_data["alpha_bbox"] = json.dumps(row_data["alpha_bbox"]) if row_data["alpha_bbox"] else None
 
                     if multi_tenant:
                         row_data["org_id"] = org_id
 
                     insert_values.append(row_data)
+                    image.design_id = design_id
                     successful_updates.append(image)
 
                 except Exception as e:
@@ -1167,6 +1299,8 @@ class ImageUploadWorkflow:
                     else:
                         columns = "id, user_id, filename, file_path, phash, ahash, dhash, whash, is_active, is_digital, created_at, updated_at, tags, tags_metadata"
                         placeholders = ":id, :user_id, :filename, :file_path, :phash, :ahash, :dhash, :whash, :is_active, :is_digital, :created_at, :updated_at, :tags::jsonb, :tags_metadata::jsonb"
+                    columns += ", width_px, height_px, dpi_x, dpi_y, channels, alpha_bbox, content_hash"
+                    placeholders += ", :width_px, :height_px, :dpi_x, :dpi_y, :channels, :alpha_bbox::jsonb, :content_hash"
 
                     # Use executemany for bulk insert (much faster than individual inserts)
                     self.db_session.execute(text(f"""
@@ -1182,6 +1316,8 @@ class ImageUploadWorkflow:
                     self.db_session.commit()
                     logging.info(f"🗄️  Batch {batch_id}: Successfully bulk inserted {len(insert_values)} records to database")
 
+                    self._queue_tagging(successful_updates, insert_values)
+
                 except Exception as e:
                     logging.error(f"   ❌ Failed to bulk insert database changes: {e}")
                     try:
@@ -1195,6 +1331,22 @@ class ImageUploadWorkflow:
 
         return successful_updates
 
+    def _queue_tagging(self, images: List[ProcessedImage], rows: List[Dict[str, Any]]):
+        """Hand inserted designs to the background tagging pipeline (non-blocking)"""
+        try:
+            from server.src.services.design_tagging_pipeline import TagRequest, design_tagging_pipeline
+            for image, row in zip(images, rows):
+                design_tagging_pipeline.submit(TagRequest(
+                    design_id=image.design_id,
+                    user_id=self.user_id,
+                    phash=image.phash,
+                    filename=image.upload_info.original_filename,
+                    file_path=row["file_path"],
+                    content=image.resized_content
+                ))
+        except Exception as e:
+            logging.warning(f"Failed to queue AI tagging (non-blocking): {e}")
+
     def _generate_mockups_batch(self, images: List[ProcessedImage], batch_id: int) -> List[ProcessedImage]:
         """
         Generate mockups for uploaded images
@@ -1460,7 +1612,7 @@ def create_workflow(user_id: str, db_session=None, max_threads: int = 8, progres
         RuntimeError: If required dependencies are not available
     """
     if not DEPENDENCIES_AVAILABLE:
-        raise RuntimeError("Required dependencies not available. Install PIL, imagehash, and sqlalchemy.")
+        raise RuntimeError("Required dependencies not available. Install PIL and sqlalchemy.")
 
     if db_session is None:
         try:
@@ -2,13 +2,25 @@
 OAuth Token Refresh Service
 
 Handles automatic token refresh for all OAuth 2.0 platform connections.
-Monitors token expiry and refreshes tokens before they expire.
+Monitors token expiry and refreshes tokens before they expire:
+- Each pass only loads connections expiring within the threshold (indexed
+  on token_expires_at)
+- Refreshes run concurrently on an async HTTP client, bounded by
+  OAUTH_REFRESH_CONCURRENCY, so the API event loop never blocks on them
+- Each refresh holds the connection's distributed lock (see
+  token_refresh_lock), shared with EtsyAPI.refresh_access_token, and is
+  skipped if another holder refreshed the token in the meantime
 """
 
+import os
 import logging
 import asyncio
+import base64
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from uuid import UUID
+
+import httpx
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
@@ -16,18 +28,33 @@ from server.src.database.core import SessionLocal
 from server.src.entities.platform_connection import PlatformConnection, PlatformType, ConnectionType
 from server.src.entities.shopify_store import ShopifyStore
 from server.src.entities.etsy_store import EtsyStore
+from server.src.services.etsy_token_store import load_etsy_token, save_etsy_token
+from server.src.services.token_refresh_lock import TokenRefreshLock, connection_lock_key, token_refresh_lock
 
 logger = logging.getLogger(__name__)
 
+OAUTH_REFRESH_CONCURRENCY = int(os.getenv('OAUTH_REFRESH_CONCURRENCY', '10'))
+OAUTH_REFRESH_HTTP_TIMEOUT = float(os.getenv('OAUTH_REFRESH_HTTP_TIMEOUT', '10'))
+
 
 class OAuthTokenRefreshService:
     """Service to manage OAuth token refresh across all platforms"""
 
-    def __init__(self):
+    def __init__(self, lock: TokenRefreshLock = token_refresh_lock,
+                 concurrency: int = OAUTH_REFRESH_CONCURRENCY):
         self.refresh_interval = 60  # Check every 60 seconds
         self.refresh_threshold = 300  # Refresh tokens expiring within 5 minutes
         self.is_running = False
         self._task: Optional[asyncio.Task] = None
+        self.lock = lock
+        self.concurrency = concurrency
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        """Shared async HTTP client, created on first use"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(timeout=OAUTH_REFRESH_HTTP_TIMEOUT)
+        return self._http
 
     async def start(self):
         """Start the token refresh service"""
@@ -58,6 +85,10 @@ class OAuthTokenRefreshService:
             except asyncio.CancelledError:
                 pass
 
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
         logger.info("✅ OAuth token refresh service stopped")
 
     async def _run_refresh_loop(self):
@@ -74,70 +105,120 @@ class OAuthTokenRefreshService:
             await asyncio.sleep(self.refresh_interval)
 
     async def _check_and_refresh_tokens(self):
-        """Check all OAuth connections and refresh tokens that are expiring soon"""
+        """Refresh every OAuth connection whose token expires within the threshold"""
         db = SessionLocal()
         try:
-            # Get all active OAuth2 connections
-            connections = db.query(PlatformConnection).filter(
-                and_(
-                    PlatformConnection.is_active == True,
-                    PlatformConnection.connection_type == ConnectionType.OAUTH2,
-                    PlatformConnection.token_expires_at.isnot(None)
-                )
-            ).all()
-
-            if not connections:
-                logger.debug("No OAuth connections found to check")
-                return
-
-            logger.debug(f"🔍 Checking {len(connections)} OAuth connections for token refresh")
-
-            refresh_count = 0
-            for connection in connections:
-                if connection.needs_token_refresh(self.refresh_threshold):
-                    logger.info(
-                        f"🔄 Token needs refresh for {connection.platform.value} "
-                        f"(user_id: {connection.user_id}, expires at: {connection.token_expires_at})"
-                    )
-
-                    try:
-                        await self._refresh_connection_token(connection, db)
-                        refresh_count += 1
-                    except Exception as e:
-                        logger.error(
-                            f"❌ Failed to refresh token for {connection.platform.value} "
-                            f"(user_id: {connection.user_id}): {e}",
-                            exc_info=True
-                        )
-
-            if refresh_count > 0:
-                logger.info(f"✅ Successfully refreshed {refresh_count} token(s)")
-
+            connection_ids = self._expiring_connection_ids(db)
         except Exception as e:
             logger.error(f"❌ Error checking tokens: {e}", exc_info=True)
+            return
         finally:
             db.close()
 
-    async def _refresh_connection_token(self, connection: PlatformConnection, db: Session):
-        """Refresh token for a specific platform connection"""
-        if connection.platform == PlatformType.ETSY:
-            await self._refresh_etsy_token(connection, db)
-        elif connection.platform == PlatformType.SHOPIFY:
-            await self._refresh_shopify_token(connection, db)
-        else:
-            logger.warning(f"Token refresh not implemented for platform: {connection.platform.value}")
+        if not connection_ids:
+            logger.debug("No OAuth connections need a token refresh")
+            return
 
-    async def _refresh_etsy_token(self, connection: PlatformConnection, db: Session):
-        """Refresh Etsy OAuth token"""
-        import os
-        import requests
-        import base64
+        logger.debug(f"🔍 Refreshing {len(connection_ids)} expiring OAuth connection(s)")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(connection_id: UUID) -> bool:
+            async with semaphore:
+                return await self._refresh_connection_by_id(connection_id)
+
+        results = await asyncio.gather(*(refresh(connection_id) for connection_id in connection_ids))
+        refresh_count = sum(1 for refreshed in results if refreshed)
+
+        if refresh_count > 0:
+            logger.info(f"✅ Successfully refreshed {refresh_count} token(s)")
+
+    def _expiring_connection_ids(self, db: Session) -> List[UUID]:
+        """IDs of active OAuth connections expiring within the threshold, soonest first"""
+        threshold_time = datetime.now(timezone.utc) + timedelta(seconds=self.refresh_threshold)
+        rows = db.query(PlatformConnection.id).filter(
+            and_(
+                PlatformConnection.is_active == True,
+                PlatformConnection.connection_type == ConnectionType.OAUTH2,
+                PlatformConnection.token_expires_at <= threshold_time
+            )
+        ).order_by(PlatformConnection.token_expires_at).all()
+        return [row[0] for row in rows]
+
+    async def _refresh_connection_by_id(self, connection_id: UUID) -> bool:
+        """Refresh one connection in its own session; errors are logged, not raised"""
+        db = SessionLocal()
+        try:
+            connection = db.query(PlatformConnection).filter(PlatformConnection.id == connection_id).first()
+            if not connection or not connection.is_active:
+                return False
+
+            logger.info(
+                f"🔄 Token needs refresh for {connection.platform.value} "
+                f"(user_id: {connection.user_id}, expires at: {connection.token_expires_at})"
+            )
+            return await self._refresh_connection_token(connection, db)
 
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Failed to refresh token for connection {connection_id}: {e}", exc_info=True)
+            return False
+        finally:
+            db.close()
+
+    async def _refresh_connection_token(self, connection: PlatformConnection, db: Session,
+                                        force: bool = False) -> bool:
+        """
+        Refresh token for a specific platform connection under its lock.
+
+        Returns False without calling the platform when the lock is busy or
+        another holder already refreshed the token while we waited.
+        """
+        key = connection_lock_key(connection.platform, connection.user_id)
+        seen_token = connection.access_token
+
+        lock_token = await asyncio.to_thread(self.lock.acquire, key)
+        if lock_token is None:
+            logger.info(f"⏭️  Token refresh for {key} is in progress elsewhere, skipping")
+            return False
+
+        try:
+            db.refresh(connection)
+            if connection.platform == PlatformType.ETSY:
+                self._adopt_stored_etsy_token(connection, db)
+            if connection.access_token != seen_token or (
+                not force and not connection.needs_token_refresh(self.refresh_threshold)
+            ):
+                logger.info(f"⏭️  Token for {key} was already refreshed")
+                return False
+
+            if connection.platform == PlatformType.ETSY:
+                return await self._refresh_etsy_token(connection, db)
+            elif connection.platform == PlatformType.SHOPIFY:
+                return await self._refresh_shopify_token(connection, db)
+            else:
+                logger.warning(f"Token refresh not implemented for platform: {connection.platform.value}")
+                return False
+        finally:
+            await asyncio.to_thread(self.lock.release, key, lock_token)
+
+    def _adopt_stored_etsy_token(self, connection: PlatformConnection, db: Session):
+        """Copy a token EtsyAPI rotated into ThirdPartyOAuthToken onto the connection"""
+        stored = load_etsy_token(db, connection.user_id)
+        if not stored or stored.access_token == connection.access_token:
+            return
+        connection.access_token = stored.access_token
+        connection.refresh_token = stored.refresh_token or connection.refresh_token
+        connection.token_expires_at = stored.expires_at
+        db.commit()
+
+    async def _refresh_etsy_token(self, connection: PlatformConnection, db: Session) -> bool:
+        """Refresh Etsy OAuth token"""
         if not connection.refresh_token:
             logger.error(f"No refresh token available for Etsy connection {connection.id}")
             connection.is_active = False
             db.commit()
-            return
+            return False
 
         try:
             # Etsy OAuth2 token refresh
@@ -146,7 +227,7 @@ class OAuthTokenRefreshService:
 
             if not client_id or not client_secret:
                 logger.error("Etsy API credentials not configured")
-                return
+                return False
 
             # Create Basic Auth header
             credentials = f"{client_id}:{client_secret}"
@@ -163,18 +244,20 @@ class OAuthTokenRefreshService:
             }
 
             logger.info(f"🔄 Refreshing Etsy token for user {connection.user_id}")
-            response = requests.post(token_url, headers=headers, data=data, timeout=10)
+            response = await self._client().post(token_url, headers=headers, data=data)
 
             if response.status_code == 200:
                 token_data = response.json()
 
-                # Update connection with new tokens
-                connection.access_token = token_data['access_token']
-                connection.refresh_token = token_data.get('refresh_token', connection.refresh_token)
-                connection.token_expires_at = datetime.now(timezone.utc) + timedelta(
-                    seconds=token_data['expires_in']
+                # Update the connection and EtsyAPI's token record with the rotated grant
+                save_etsy_token(
+                    db,
+                    connection.user_id,
+                    token_data['access_token'],
+                    token_data.get('refresh_token'),
+                    datetime.now(timezone.utc) + timedelta(seconds=token_data['expires_in']),
+                    connection=connection
                 )
-                connection.last_verified_at = datetime.now(timezone.utc)
 
                 db.commit()
 
@@ -182,6 +265,7 @@ class OAuthTokenRefreshService:
                     f"✅ Successfully refreshed Etsy token for user {connection.user_id}, "
                     f"expires at {connection.token_expires_at}"
                 )
+                return True
             else:
                 logger.error(
                     f"❌ Failed to refresh Etsy token: {response.status_code} - {response.text}"
@@ -191,12 +275,13 @@ class OAuthTokenRefreshService:
                     connection.is_active = False
                     db.commit()
                     logger.warning(f"⚠️  Marked Etsy connection {connection.id} as inactive due to invalid token")
+                return False
 
         except Exception as e:
             logger.error(f"❌ Error refreshing Etsy token: {e}", exc_info=True)
             raise
 
-    async def _refresh_shopify_token(self, connection: PlatformConnection, db: Session):
+    async def _refresh_shopify_token(self, connection: PlatformConnection, db: Session) -> bool:
         """
         Shopify OAuth tokens don't expire by default, but can be revoked.
         This checks if the token is still valid.
@@ -209,19 +294,17 @@ class OAuthTokenRefreshService:
 
             if not store:
                 logger.warning(f"No Shopify store found for connection {connection.id}")
-                return
+                return False
 
             # Shopify tokens are long-lived and don't typically need refresh
             # Just verify the token is still valid
-            import requests
-
             shop_url = f"https://{store.shop_domain}/admin/api/2024-01/shop.json"
             headers = {
                 "X-Shopify-Access-Token": connection.access_token,
             }
 
             logger.info(f"🔍 Verifying Shopify token for store {store.shop_name}")
-            response = requests.get(shop_url, headers=headers, timeout=10)
+            response = await self._client().get(shop_url, headers=headers)
 
             if response.status_code == 200:
                 # Token is still valid
@@ -230,6 +313,7 @@ class OAuthTokenRefreshService:
                 connection.token_expires_at = datetime.now(timezone.utc) + timedelta(days=365)
                 db.commit()
                 logger.info(f"✅ Shopify token verified for store {store.shop_name}")
+                return True
             elif response.status_code in [401, 403]:
                 # Token is invalid
                 logger.error(f"❌ Shopify token is invalid for store {store.shop_name}")
@@ -239,6 +323,7 @@ class OAuthTokenRefreshService:
                 logger.warning(f"⚠️  Marked Shopify connection {connection.id} as inactive")
             else:
                 logger.warning(f"⚠️  Unexpected response verifying Shopify token: {response.status_code}")
+            return False
 
         except Exception as e:
             logger.error(f"❌ Error verifying Shopify token: {e}", exc_info=True)
@@ -267,7 +352,7 @@ class OAuthTokenRefreshService:
                 logger.warning(f"No active connection found for user {user_id} on {platform.value}")
                 return None
 
-            await self._refresh_connection_token(connection, db)
+            await self._refresh_connection_token(connection, db, force=True)
 
             return {
                 "access_token": connection.access_token,
@@ -20,10 +20,16 @@ from reportlab.platypus import (
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 from reportlab.pdfgen import canvas as pdf_canvas
+import math
+import os
 import requests
+from server.src.utils.thumbnail_cache import image_cache_key, packing_slip_thumbnail_cache
 
 logger = logging.getLogger(__name__)
 
+# Resolution images are downscaled to for the size they are drawn at
+PACKING_SLIP_IMAGE_DPI = int(os.getenv('PACKING_SLIP_IMAGE_DPI', '200'))
+
 
 class PackingSlipGenerator:
     """Generate packing slips for orders."""
@@ -34,8 +40,13 @@ class PackingSlipGenerator:
         self.content_width = self.page_width - (2 * self.margin)
         self.content_height = self.page_height - (2 * self.margin)
         self.thumbnail_spacing = 0.3 * inch  # Reduced spacing to make images bigger
+        # 3 thumbnails per row with spacing between them
+        self.thumbnail_size = (self.content_width - (self.thumbnail_spacing * 2)) / 3
+        self.logo_size = 2 * inch
         self.styles = getSampleStyleSheet()
         self._create_custom_styles()
+        # Thumbnail bytes fetched ahead of rendering, keyed by URL
+        self._prefetched_images: Dict[str, bytes] = {}
 
     def _create_custom_styles(self):
         """Create custom paragraph styles."""
@@ -77,7 +88,8 @@ class PackingSlipGenerator:
             textColor=colors.white
         ))
 
-    def generate_packing_slip(self, order_data: Dict[str, Any]) -> bytes:
+    def generate_packing_slip(self, order_data: Dict[str, Any],
+                              images: Optional[Dict[str, bytes]] = None) -> bytes:
         """
         Generate a packing slip PDF for an order.
 
@@ -91,10 +103,13 @@ class PackingSlipGenerator:
                 - total: float
                 - order_number: str (optional)
                 - order_date: str (optional)
+            images: Optional thumbnail bytes keyed by URL, used instead of the
+                thumbnail cache (see get_order_images / load_thumbnail)
 
         Returns:
             bytes: PDF file content
         """
+        self._prefetched_images = images or {}
         try:
             buffer = io.BytesIO()
             doc = SimpleDocTemplate(
@@ -153,7 +168,7 @@ class PackingSlipGenerator:
         if shop_logo_url:
             # Try to load shop logo
             try:
-                logo_img = self._get_image_from_url(shop_logo_url, 2*inch, 2*inch)
+                logo_img = self._get_image_from_url(shop_logo_url, self.logo_size, self.logo_size)
                 if logo_img:
                     elements.append(logo_img)
                     elements.append(Spacer(1, 0.2*inch))
@@ -270,7 +285,7 @@ class PackingSlipGenerator:
         # 7.5" = (size * 3) + (1" * 2)
         # 7.5" - 2" = size * 3
         # 5.5" / 3 = size
-        thumbnail_size = (self.content_width - (self.thumbnail_spacing * 2)) / 3
+        thumbnail_size = self.thumbnail_size
         cell_width = thumbnail_size + (self.thumbnail_spacing * 2 / 3)
 
         # Organize items into grid rows
@@ -287,7 +302,8 @@ class PackingSlipGenerator:
                 item.get('mockup_url'),
                 item.get('quantity', 1),
                 item.get('name', 'Product'),
-                thumbnail_size
+                thumbnail_size,
+                item.get('mockup_image_id')
             )
             current_row.append(cell_content)
 
@@ -314,7 +330,7 @@ class PackingSlipGenerator:
         return elements
 
     def _create_product_cell(self, mockup_url: Optional[str], quantity: int,
-                            product_name: str, size: float):
+                            product_name: str, size: float, image_id=None):
         """Create a cell with product image and quantity."""
 
         # Create a nested table with image/placeholder and quantity
@@ -323,7 +339,7 @@ class PackingSlipGenerator:
         # Add product image or placeholder box
         if mockup_url:
             try:
-                img = self._get_image_from_url(mockup_url, size, size)
+                img = self._get_image_from_url(mockup_url, size, size, image_id)
                 if img:
                     inner_elements.append([img])
                 else:
@@ -369,8 +385,36 @@ class PackingSlipGenerator:
         ]))
         return placeholder_table
 
-    def _get_image_from_url(self, url: str, width: float, height: float) -> Optional[Image]:
-        """Download and create an Image object from URL."""
+    def _thumbnail_px(self, size: float) -> int:
+        """Pixel size for an image drawn at `size` points."""
+        return math.ceil(size / inch * PACKING_SLIP_IMAGE_DPI)
+
+    def get_order_images(self, order_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Images (URL, cache key, pixel size) a packing slip will render."""
+        images = []
+        seen = set()
+        logo_url = order_data.get('shop_logo_url')
+        if logo_url:
+            images.append({'url': logo_url, 'key': image_cache_key(logo_url), 'px': self._thumbnail_px(self.logo_size)})
+            seen.add(logo_url)
+        for item in order_data.get('items', []):
+            url = item.get('mockup_url')
+            if url and url not in seen:
+                images.append({
+                    'url': url,
+                    'key': image_cache_key(url, item.get('mockup_image_id')),
+                    'px': self._thumbnail_px(self.thumbnail_size)
+                })
+                seen.add(url)
+        return images
+
+    def load_thumbnail(self, url: str, key: str, px: int) -> Optional[bytes]:
+        """Thumbnail bytes from the shared cache, downloading and downscaling on a miss."""
+        return packing_slip_thumbnail_cache.get_or_create(key, px, lambda: self.fetch_image_bytes(url))
+
+    @staticmethod
+    def fetch_image_bytes(url: str) -> Optional[bytes]:
+        """Download image bytes from a URL, or None if the URL or response is not a usable image."""
         try:
             # Validate URL
             if not url or not url.startswith(('http://', 'https://')):
@@ -391,15 +435,27 @@ class PackingSlipGenerator:
                 logger.warning(f"Invalid content type {content_type} from {url}")
                 return None
 
-            img_buffer = io.BytesIO(response.content)
-            img = Image(img_buffer, width=width, height=height, kind='proportional')
-            return img
+            return response.content
         except requests.exceptions.Timeout:
             logger.error(f"Timeout loading image from {url}")
             return None
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error loading image from {url}: {e}")
             return None
+
+    def _get_image_from_url(self, url: str, width: float, height: float, image_id=None) -> Optional[Image]:
+        """Create an Image object from a cached thumbnail sized for the slip."""
+        try:
+            if url in self._prefetched_images:
+                content = self._prefetched_images[url]
+            else:
+                content = self.load_thumbnail(url, image_cache_key(url, image_id), self._thumbnail_px(max(width, height)))
+            if not content:
+                return None
+
+            img_buffer = io.BytesIO(content)
+            img = Image(img_buffer, width=width, height=height, kind='proportional')
+            return img
         except Exception as e:
             logger.error(f"Error loading image from {url}: {e}")
             return None
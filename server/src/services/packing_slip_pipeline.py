@@ -0,0 +1,213 @@
+"""
+Bulk Packing Slip Pipeline
+
+Generates one merged PDF for many orders in three overlapping stages:
+
+1. Fetch (threads): load each order (Etsy receipt, shipment, listing images)
+   and resolve its logo/mockup thumbnails through the shared thumbnail cache
+2. Render (processes): ReportLab builds each slip in a process pool, so a
+   large batch uses every core instead of one GIL-bound request thread
+3. Write: finished slips are appended to an IncrementalPdfWriter in order
+   and their bytes are streamed out immediately
+
+At most twice fetch_workers orders are in flight past the write position,
+which bounds memory regardless of batch size.
+"""
+
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from server.src.services.packing_slip_generator import PackingSlipGenerator
+from server.src.utils.pdf_stream_writer import IncrementalPdfWriter
+
+logger = logging.getLogger(__name__)
+
+PACKING_SLIP_FETCH_WORKERS = int(os.getenv('PACKING_SLIP_FETCH_WORKERS', '8'))
+# 0 renders in the fetch threads instead of a process pool
+PACKING_SLIP_RENDER_WORKERS = int(os.getenv('PACKING_SLIP_RENDER_WORKERS', str(os.cpu_count() or 2)))
+
+
+class NoPackingSlipsGenerated(Exception):
+    """Raised when every order in a batch failed to produce a packing slip"""
+
+
+class _PipelineCancelled(Exception):
+    """Internal signal that a stream consumer stopped reading"""
+
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+_worker_generator: Optional[PackingSlipGenerator] = None
+
+
+def _get_render_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared process pool for rendering, created on first use"""
+    global _render_pool
+    if PACKING_SLIP_RENDER_WORKERS <= 0:
+        return None
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn avoids forking a multi-threaded server process
+            _render_pool = ProcessPoolExecutor(
+                max_workers=PACKING_SLIP_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _render_pool
+
+
+def _reset_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+def render_packing_slip(order_data: Dict[str, Any], images: Dict[str, bytes]) -> bytes:
+    """Render one packing slip; runs inside render worker processes"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = PackingSlipGenerator()
+    return _worker_generator.generate_packing_slip(order_data, images=images)
+
+
+class PackingSlipPipeline:
+    """Fetch, render and merge packing slips for a batch of orders"""
+
+    def __init__(self, load_order: Callable[[Any], Optional[Dict[str, Any]]],
+                 fetch_workers: Optional[int] = None, use_processes: bool = True):
+        """
+        Args:
+            load_order: Turns one batch item (receipt ID, receipt dict, ...) into
+                packing slip order data; called from worker threads
+            fetch_workers: Concurrent fetches, which is also the in-flight window
+            use_processes: Render in the shared process pool when available
+        """
+        self.load_order = load_order
+        self.fetch_workers = fetch_workers or PACKING_SLIP_FETCH_WORKERS
+        self.use_processes = use_processes
+        self.generator = PackingSlipGenerator()
+        self.successful_count = 0
+        self.failed_items: List[Any] = []
+
+    def _render(self, order_data: Dict[str, Any], images: Dict[str, bytes]) -> bytes:
+        pool = _get_render_pool() if self.use_processes else None
+        if pool is None:
+            return render_packing_slip(order_data, images)
+        try:
+            return pool.submit(render_packing_slip, order_data, images).result()
+        except BrokenProcessPool:
+            logger.warning("Packing slip render pool broke, rendering in-thread")
+            _reset_render_pool()
+            return render_packing_slip(order_data, images)
+
+    def _process(self, item: Any) -> Optional[bytes]:
+        """Fetch stage and render stage for one item; returns PDF bytes or None on failure"""
+        try:
+            order_data = self.load_order(item)
+            if not order_data:
+                return None
+            # Thumbnails come from the shared cache, so render workers get small, pre-sized images
+            images = {
+                image['url']: self.generator.load_thumbnail(image['url'], image['key'], image['px'])
+                for image in self.generator.get_order_images(order_data)
+            }
+            return self._render(order_data, images)
+        except Exception as e:
+            logger.error(f"Error generating packing slip for {item}: {e}", exc_info=True)
+            return None
+
+    def _iter_slips(self, items: Iterable[Any]) -> Iterator[Tuple[Any, Future]]:
+        """Yield (item, future of PDF bytes or None) in input order"""
+        window = deque()
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as pool:
+            for item in items:
+                window.append((item, pool.submit(self._process, item)))
+                if len(window) >= self.fetch_workers * 2:
+                    yield window.popleft()
+            while window:
+                yield window.popleft()
+
+    def write(self, items: Iterable[Any], sink: Callable[[bytes], None]) -> int:
+        """
+        Run the pipeline, sending merged PDF bytes to sink as slips finish.
+
+        Returns:
+            Number of packing slips written
+
+        Raises:
+            NoPackingSlipsGenerated: If no order produced a slip
+        """
+        writer = None
+        for item, future in self._iter_slips(items):
+            pdf_bytes = future.result()
+            if not pdf_bytes:
+                self.failed_items.append(item)
+                continue
+            if writer is None:
+                writer = IncrementalPdfWriter(sink)
+            writer.append(pdf_bytes)
+            self.successful_count += 1
+
+        if writer is None:
+            raise NoPackingSlipsGenerated("Failed to generate any packing slips")
+        writer.close()
+        return self.successful_count
+
+    def write_to_file(self, items: Iterable[Any], fileobj: BinaryIO) -> int:
+        """Run the pipeline into a file object"""
+        return self.write(items, fileobj.write)
+
+    def stream(self, items: Iterable[Any], max_buffered_chunks: int = 64) -> Iterator[bytes]:
+        """
+        Run the pipeline on a background thread and yield merged PDF bytes.
+
+        The first chunk is only produced once the first slip is written, so a
+        caller can pull it before committing to a response. Raises
+        NoPackingSlipsGenerated from the iterator if nothing was generated.
+        """
+        chunks: "queue.Queue" = queue.Queue(maxsize=max_buffered_chunks)
+        cancelled = threading.Event()
+        done = object()
+
+        def put(chunk):
+            # Give up if the consumer went away (e.g. the client disconnected)
+            while not cancelled.is_set():
+                try:
+                    chunks.put(chunk, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+            raise _PipelineCancelled()
+
+        def run():
+            try:
+                self.write(items, put)
+                put(done)
+            except _PipelineCancelled:
+                logger.info("Packing slip stream cancelled by consumer")
+            except BaseException as e:
+                try:
+                    put(e)
+                except _PipelineCancelled:
+                    pass
+
+        threading.Thread(target=run, name="packing-slip-pipeline", daemon=True).start()
+
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is done:
+                    return
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                yield chunk
+        finally:
+            cancelled.set()
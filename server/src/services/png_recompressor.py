@@ -0,0 +1,155 @@
+"""
+Background PNG Recompression
+
+Design PNGs are encoded at ingestion with DESIGN_PNG_PROFILE (fast by
+default, see utils/png_encoding.py) so uploads return sooner. After a file
+is on the NAS, this writer re-encodes it with PNG_RECOMPRESS_PROFILE
+(archival) on a background thread and atomically replaces the stored copy
+when that saves at least PNG_RECOMPRESS_MIN_SAVING of its size.
+
+Jobs carry the bytes the upload already holds, so nothing is downloaded
+again. The queue is bounded by PNG_RECOMPRESS_MAX_PENDING_MB of content;
+when it is full, new files are skipped and keep their ingestion encoding.
+A file that was deleted or replaced in the meantime is left alone.
+
+PNG_RECOMPRESS_ENABLED=false turns recompression off.
+"""
+
+import os
+import queue
+import logging
+import threading
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+
+from server.src.utils.png_encoding import DESIGN_PNG_PROFILE, encode_png
+
+logger = logging.getLogger(__name__)
+
+PNG_RECOMPRESS_ENABLED = os.getenv('PNG_RECOMPRESS_ENABLED', 'true').lower() == 'true'
+PNG_RECOMPRESS_PROFILE = os.getenv('PNG_RECOMPRESS_PROFILE', 'archival')
+PNG_RECOMPRESS_MAX_PENDING_MB = int(os.getenv('PNG_RECOMPRESS_MAX_PENDING_MB', '512'))
+PNG_RECOMPRESS_MIN_SAVING = float(os.getenv('PNG_RECOMPRESS_MIN_SAVING', '0.02'))
+
+
+@dataclass
+class RecompressJob:
+    shop_name: str
+    relative_path: str
+    content: bytes
+
+
+class PNGRecompressor:
+    """Re-encodes stored design PNGs with the archival profile in the background"""
+
+    def __init__(self, enabled: bool = PNG_RECOMPRESS_ENABLED, profile: str = PNG_RECOMPRESS_PROFILE,
+                 max_pending_bytes: int = PNG_RECOMPRESS_MAX_PENDING_MB * 1024 * 1024,
+                 min_saving: float = PNG_RECOMPRESS_MIN_SAVING, storage=None):
+        # Nothing to gain when ingestion already uses the target profile
+        self.enabled = enabled and profile != DESIGN_PNG_PROFILE
+        self.profile = profile
+        self.max_pending_bytes = max_pending_bytes
+        self.min_saving = min_saving
+        self._storage = storage
+
+        self._queue: "queue.Queue[RecompressJob]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # Bytes queued or being recompressed
+        self._pending_bytes = 0
+
+        self.replaced_count = 0
+        self.skipped_count = 0
+        self.bytes_saved = 0
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from server.src.utils.nas_storage import nas_storage
+            self._storage = nas_storage
+        return self._storage
+
+    def submit(self, shop_name: str, relative_path: str, content: bytes) -> bool:
+        """Queue a stored PNG for recompression; returns False if it was not queued"""
+        if not self.enabled or not content:
+            return False
+
+        with self._idle:
+            if self._pending_bytes + len(content) > self.max_pending_bytes:
+                self.skipped_count += 1
+                logger.debug(f"PNG recompression queue full, keeping {relative_path} as uploaded")
+                return False
+            self._pending_bytes += len(content)
+
+        self._ensure_started()
+        self._queue.put(RecompressJob(shop_name, relative_path, content))
+        return True
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="png-recompressor", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.recompress(job)
+            except Exception as e:
+                logger.error(f"❌ PNG recompression failed for {job.relative_path}: {e}")
+            finally:
+                with self._idle:
+                    self._pending_bytes -= len(job.content)
+                    self._idle.notify_all()
+
+    def recompress(self, job: RecompressJob) -> bool:
+        """Re-encode one file and replace the stored copy if it got smaller"""
+        with Image.open(BytesIO(job.content)) as image:
+            dpi = image.info.get('dpi')
+            image.load()
+            content = encode_png(image, self.profile, dpi=dpi)
+
+        saved = len(job.content) - len(content)
+        if saved < len(job.content) * self.min_saving:
+            logger.debug(f"Keeping {job.relative_path}: {self.profile} encoding saves {saved} bytes")
+            return False
+
+        # Only replace the file this upload wrote, not one written since
+        if not self.storage.replace_file_content(content, job.shop_name, job.relative_path,
+                                                 expected_size=len(job.content)):
+            return False
+
+        self.replaced_count += 1
+        self.bytes_saved += saved
+        logger.info(f"🗜️ Recompressed {job.relative_path}: {len(job.content) / 1024 / 1024:.2f}MB -> "
+                    f"{len(content) / 1024 / 1024:.2f}MB")
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued file has been processed; returns False on timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending_bytes == 0, timeout)
+
+    def stop(self, timeout: float = 10.0):
+        """Give queued files up to timeout seconds, then stop the background thread"""
+        self.flush(timeout)
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Global recompressor for the process
+png_recompressor = PNGRecompressor()
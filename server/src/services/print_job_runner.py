@@ -0,0 +1,192 @@
+"""
+Print Job Runner
+
+Drains the print_jobs queue in the worker process:
+- Jobs are claimed one at a time with FOR UPDATE SKIP LOCKED (see
+  PrintJobService.get_next_queued_job), so any number of runners can share
+  the queue without double-processing
+- Up to PRINT_JOB_RUNNER_CONCURRENCY jobs run in parallel, and at most
+  PRINT_JOB_PER_PRINTER_LIMIT of them per printer
+- A heartbeat marks running jobs alive; jobs whose heartbeat is older than
+  PRINT_JOB_HEARTBEAT_TIMEOUT (the worker died) are put back in the queue,
+  or failed once they used PRINT_JOB_MAX_ATTEMPTS
+"""
+
+import os
+import socket
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from server.src.database.core import SessionLocal
+from server.src.entities.print_job import PrintJob, PrintJobStatus, PrintJobType
+from server.src.routes.print_jobs.service import PrintJobService
+
+logger = logging.getLogger(__name__)
+
+PRINT_JOB_RUNNER_CONCURRENCY = int(os.getenv('PRINT_JOB_RUNNER_CONCURRENCY', '4'))
+PRINT_JOB_PER_PRINTER_LIMIT = int(os.getenv('PRINT_JOB_PER_PRINTER_LIMIT', '1'))
+PRINT_JOB_POLL_SECONDS = float(os.getenv('PRINT_JOB_POLL_SECONDS', '2'))
+PRINT_JOB_HEARTBEAT_SECONDS = int(os.getenv('PRINT_JOB_HEARTBEAT_SECONDS', '15'))
+PRINT_JOB_HEARTBEAT_TIMEOUT = int(os.getenv('PRINT_JOB_HEARTBEAT_TIMEOUT', '120'))
+PRINT_JOB_MAX_ATTEMPTS = int(os.getenv('PRINT_JOB_MAX_ATTEMPTS', '3'))
+
+# A handler runs one job and returns generated file IDs (or None)
+PrintJobHandler = Callable[[Session, PrintJob], Optional[List[UUID]]]
+
+
+def _job_user(job: PrintJob):
+    from server.src.routes.auth.model import TokenData
+    return TokenData(user_id=str(job.created_by)) if job.created_by else None
+
+
+def _check_result(result):
+    """The order services report failure in their result instead of raising"""
+    if not (isinstance(result, dict) and result.get('success')):
+        error = result.get('error') if isinstance(result, dict) else None
+        raise RuntimeError(error or "Print job handler returned no result")
+
+
+def _run_gang_sheets(db: Session, job: PrintJob) -> Optional[List[UUID]]:
+    from server.src.routes.orders.service import create_gang_sheets_from_mockups
+    config = job.config or {}
+    result = create_gang_sheets_from_mockups(
+        job.template_name,
+        _job_user(job),
+        db,
+        printer_id=job.printer_id,
+        canvas_config_id=config.get('canvas_config_id')
+    )
+    _check_result(result)
+    return None
+
+
+def _run_print_files(db: Session, job: PrintJob) -> Optional[List[UUID]]:
+    from server.src.routes.orders.service import create_print_files
+    config = job.config or {}
+    result = create_print_files(
+        _job_user(job),
+        db,
+        printer_id=job.printer_id,
+        canvas_config_id=config.get('canvas_config_id'),
+        format=config.get('format', 'PNG')
+    )
+    _check_result(result)
+    return None
+
+
+def default_print_job_handlers() -> Dict[PrintJobType, PrintJobHandler]:
+    """Handlers for job types the runner knows how to execute"""
+    return {
+        PrintJobType.GANG_SHEETS: _run_gang_sheets,
+        PrintJobType.PRINT_FILES: _run_print_files,
+    }
+
+
+class PrintJobRunner:
+    """Claims and runs print jobs concurrently with per-printer limits"""
+
+    def __init__(self, handlers: Optional[Dict[PrintJobType, PrintJobHandler]] = None,
+                 concurrency: int = PRINT_JOB_RUNNER_CONCURRENCY,
+                 per_printer_limit: int = PRINT_JOB_PER_PRINTER_LIMIT,
+                 session_factory=SessionLocal, worker_id: Optional[str] = None):
+        self.handlers = handlers if handlers is not None else default_print_job_handlers()
+        self.concurrency = concurrency
+        self.per_printer_limit = per_printer_limit
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="print-job")
+        self._running: Dict[UUID, Future] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._last_heartbeat = 0.0
+
+    def running_job_ids(self) -> List[UUID]:
+        with self._lock:
+            return list(self._running)
+
+    def claim_and_start(self) -> int:
+        """Fill free slots with claimed jobs; returns the number started"""
+        started = 0
+        while len(self.running_job_ids()) < self.concurrency and not self._stopping.is_set():
+            db = self.session_factory()
+            try:
+                job = PrintJobService.get_next_queued_job(
+                    db,
+                    worker_id=self.worker_id,
+                    job_types=list(self.handlers),
+                    per_printer_limit=self.per_printer_limit
+                )
+                if job is None:
+                    break
+                job_id = job.id
+            finally:
+                db.close()
+
+            with self._lock:
+                self._running[job_id] = self._executor.submit(self._execute, job_id)
+            started += 1
+        return started
+
+    def _execute(self, job_id: UUID):
+        db = self.session_factory()
+        try:
+            job = PrintJobService.get_job_by_id(db, job_id)
+            if job is None or job.locked_by != self.worker_id:
+                return
+            handler = self.handlers[job.job_type]
+            logger.info(f"▶️  Running print job {job_id} ({job.job_type.value})")
+            try:
+                output_files = handler(db, job)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"❌ Print job {job_id} failed: {e}")
+                PrintJobService.update_job_status(db, job_id, PrintJobStatus.FAILED, error_message=str(e))
+                return
+            PrintJobService.update_job_status(db, job_id, PrintJobStatus.COMPLETED, output_files=output_files)
+            logger.info(f"✅ Print job {job_id} completed")
+        except Exception as e:
+            logger.error(f"Error running print job {job_id}: {e}")
+        finally:
+            db.close()
+            with self._lock:
+                self._running.pop(job_id, None)
+
+    def maintain(self, force: bool = False):
+        """Send heartbeats for running jobs and requeue jobs of dead workers"""
+        now = time.monotonic()
+        if not force and now - self._last_heartbeat < PRINT_JOB_HEARTBEAT_SECONDS:
+            return
+        self._last_heartbeat = now
+
+        db = self.session_factory()
+        try:
+            PrintJobService.heartbeat_jobs(db, self.running_job_ids(), self.worker_id)
+            PrintJobService.requeue_expired_jobs(db, PRINT_JOB_HEARTBEAT_TIMEOUT, PRINT_JOB_MAX_ATTEMPTS)
+        finally:
+            db.close()
+
+    def run_forever(self):
+        """Main loop for the worker thread"""
+        logger.info(f"Print job runner {self.worker_id} starting with {self.concurrency} slots")
+        while not self._stopping.is_set():
+            try:
+                self.maintain()
+                self.claim_and_start()
+            except Exception as e:
+                logger.error(f"Error in print job runner loop: {e}")
+            self._stopping.wait(PRINT_JOB_POLL_SECONDS)
+
+        # Let running jobs finish; their heartbeats stop with the process otherwise
+        self._executor.shutdown(wait=True)
+        logger.info("Print job runner stopped")
+
+    def stop(self):
+        self._stopping.set()
@@ -0,0 +1,188 @@
+"""
+Print Raster Cache
+
+On-disk cache of print-ready design rasters: decoded, converted to BGRA,
+normalized to the print DPI and rotated, i.e. what gang sheet creation
+places on the sheet. Entries are keyed by (raster_key, DPI, rotation),
+where raster_key combines the design's content hash with its source DPI,
+and stored as uncompressed .npy files, which are opened with mmap so a
+repeat print run gets its best sellers without a NAS download or a PNG
+decode, and without copying the pixels into process memory.
+
+The cache is bounded by PRINT_RASTER_CACHE_MB. Reads bump the file's
+mtime, and eviction removes the least recently used files first, so the
+recency survives restarts and is shared by all API processes using the
+same PRINT_RASTER_CACHE_DIR. Setting PRINT_RASTER_CACHE_MB to 0 disables
+the cache.
+"""
+
+import os
+import logging
+import tempfile
+import threading
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PRINT_RASTER_CACHE_DIR = os.getenv('PRINT_RASTER_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'print-raster-cache')
+PRINT_RASTER_CACHE_MB = int(os.getenv('PRINT_RASTER_CACHE_MB', '8192'))
+
+
+def raster_key(content_hash: Optional[str], source_dpi) -> Optional[str]:
+    """
+    Cache key of a design's raster. The raster is resampled from the source
+    DPI, so designs with the same pixels but a different DPI need separate
+    entries; None (never cached) when either is unknown.
+    """
+    if not content_hash or source_dpi is None:
+        return None
+    if isinstance(source_dpi, (int, float)):
+        source_dpi = (source_dpi, source_dpi)
+    dpi_x, dpi_y = (round(float(value), 2) for value in source_dpi)
+    return f"{content_hash}-{dpi_x:g}x{dpi_y:g}"
+
+
+class PrintRasterCache:
+    """Size-bounded LRU cache of normalized rasters on disk"""
+
+    def __init__(self, directory: str = PRINT_RASTER_CACHE_DIR,
+                 max_bytes: int = PRINT_RASTER_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Estimate of the bytes on disk, recounted by every eviction pass
+        self._total_bytes: Optional[int] = None
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def path_for(self, content_hash: str, dpi: int, rotation: int) -> str:
+        return os.path.join(self.directory, f"{content_hash}-{int(dpi)}-{int(rotation)}.npy")
+
+    def contains(self, content_hash: Optional[str], dpi: int, rotation: int) -> bool:
+        """
+        Whether the raster is cached. The entry is touched, so a caller that
+        skips work because of it has it evicted last; callers must still
+        handle a miss on the later get().
+        """
+        if not (self.enabled and content_hash):
+            return False
+        try:
+            os.utime(self.path_for(content_hash, dpi, rotation))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def get(self, content_hash: Optional[str], dpi: int, rotation: int) -> Optional[np.ndarray]:
+        """The cached raster as a read-only memory map, or None on a miss"""
+        if not (self.enabled and content_hash):
+            return None
+
+        path = self.path_for(content_hash, dpi, rotation)
+        try:
+            image = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # Truncated or otherwise unreadable entry: drop it and rebuild
+            logger.warning(f"⚠️ Discarding unreadable print raster {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return image
+
+    def put(self, content_hash: Optional[str], dpi: int, rotation: int, image: np.ndarray) -> bool:
+        """Store a raster; returns False when it was not cached"""
+        if not (self.enabled and content_hash) or image is None:
+            return False
+        if image.nbytes > self.max_bytes:
+            return False
+
+        path = self.path_for(content_hash, dpi, rotation)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(image))
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache print raster {path}: {e}")
+            self._remove(temp_path)
+            return False
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._disk_usage()
+            else:
+                self._total_bytes += size
+            over = self._total_bytes > self.max_bytes
+        if over:
+            self.evict()
+        return True
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits its size limit"""
+        with self._lock:
+            entries = []
+            for entry in self._scan():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                removed += 1
+            self._total_bytes = total
+
+        if removed:
+            logger.info(f"🧹 Evicted {removed} print raster(s), cache now {total / (1024 * 1024):.0f}MB")
+
+    def clear(self):
+        with self._lock:
+            for entry in self._scan():
+                self._remove(entry.path)
+            self._total_bytes = 0
+
+    def _scan(self):
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith('.npy')]
+        except FileNotFoundError:
+            return []
+
+    def _disk_usage(self) -> int:
+        total = 0
+        for entry in self._scan():
+            try:
+                total += entry.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+# Global cache for the process
+print_raster_cache = PrintRasterCache()
@@ -0,0 +1,424 @@
+"""
+SendGrid Event Processor
+
+The SendGrid webhook acknowledges each POST as soon as the body is parsed
+and hands the batch to this module. A background thread drains queued
+batches and applies each one with a fixed number of statements, however
+many events it holds:
+
+1. Deduplicate events (SendGrid retries deliver the same sg_event_id again)
+2. Resolve every referenced email log in one query
+3. Reduce events per log to a final status, first open/click and error
+4. Apply log updates, subscriber open/click counters and spam-report
+   unsubscribes as set-based UPDATE ... FROM (VALUES ...) statements
+
+Batches are queued in a Redis list when REDIS_URL is set, so acknowledged
+events survive a restart, and in memory otherwise (or with
+SENDGRID_EVENT_QUEUE_BACKEND=memory). A batch that fails to apply is queued
+again with its attempt count; after SENDGRID_EVENT_MAX_ATTEMPTS it is moved
+to a dead-letter list instead. SENDGRID_WEBHOOK_MODE=sync processes batches
+inline (used by tests).
+"""
+
+import os
+import json
+import uuid
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Integer, String, and_, cast, func, or_, select, update, values, column
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from server.src.database.core import SessionLocal
+from server.src.entities.ecommerce.email_log import EmailLog
+from server.src.entities.ecommerce.email_subscriber import EmailSubscriber
+
+# Try to import Redis for a durable event queue
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SENDGRID_WEBHOOK_MODE = os.getenv('SENDGRID_WEBHOOK_MODE', 'async').lower()
+SENDGRID_EVENT_QUEUE_BACKEND = os.getenv('SENDGRID_EVENT_QUEUE_BACKEND', 'redis').lower()
+SENDGRID_EVENT_QUEUE_MAX_BATCHES = int(os.getenv('SENDGRID_EVENT_QUEUE_MAX_BATCHES', '1000'))
+# Worker backoff after queue or database errors: doubles from the base up to the cap
+SENDGRID_EVENT_BACKOFF_BASE = float(os.getenv('SENDGRID_EVENT_BACKOFF_BASE', '0.5'))
+SENDGRID_EVENT_BACKOFF_MAX = float(os.getenv('SENDGRID_EVENT_BACKOFF_MAX', '30'))
+# Attempts per batch before it is moved to the dead-letter list
+SENDGRID_EVENT_MAX_ATTEMPTS = int(os.getenv('SENDGRID_EVENT_MAX_ATTEMPTS', '5'))
+
+REDIS_SENDGRID_QUEUE_KEY = 'sendgrid_events:pending'
+REDIS_SENDGRID_DEAD_LETTER_KEY = 'sendgrid_events:dead'
+
+
+@dataclass
+class LogUpdate:
+    """Net effect of a batch of events on one email log"""
+    log_id: uuid.UUID
+    status: Optional[str] = None
+    status_time: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
+    opened_at: Optional[datetime] = None
+    clicked_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+
+
+@dataclass
+class ReducedBatch:
+    """Set-based changes for one webhook batch"""
+    log_updates: Dict[uuid.UUID, LogUpdate] = field(default_factory=dict)
+    # (user_id, customer_id, email) -> [opens, clicks]; email is None when matched by customer
+    subscriber_counts: Dict[Tuple, List[int]] = field(default_factory=dict)
+    # (user_id, email) of spam reports
+    spam_reports: set = field(default_factory=set)
+    unmatched: int = 0
+
+
+def _event_time(event: Dict[str, Any]) -> datetime:
+    timestamp = event.get('timestamp')
+    return datetime.fromtimestamp(timestamp) if timestamp else datetime.utcnow()
+
+
+def _message_ids(sendgrid_message_id: str) -> List[str]:
+    # Events carry "<X-Message-Id>.filter..."; logs store the X-Message-Id
+    return list({sendgrid_message_id, sendgrid_message_id.split('.')[0]})
+
+
+def _parse_uuid(value) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def dedupe_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop incomplete events and repeats of the same event"""
+    seen = set()
+    unique = []
+    for event in events:
+        if not isinstance(event, dict) or not event.get('sg_message_id') or not event.get('event'):
+            logger.warning(f"Incomplete event data: {event}")
+            continue
+        key = event.get('sg_event_id') or (
+            event['sg_message_id'], event['event'], event.get('email'), event.get('timestamp'), event.get('url')
+        )
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(event)
+    return unique
+
+
+def load_email_logs(db: Session, events: List[Dict[str, Any]]) -> List[Any]:
+    """Load every email log referenced by a batch in one query, locking the rows"""
+    log_ids = {_parse_uuid(e['email_log_id']) for e in events if e.get('email_log_id')}
+    log_ids.discard(None)
+    message_ids = {mid for e in events for mid in _message_ids(e['sg_message_id'])}
+
+    return db.execute(
+        select(
+            EmailLog.id, EmailLog.user_id, EmailLog.customer_id, EmailLog.recipient_email,
+            EmailLog.sendgrid_message_id, EmailLog.opened_at, EmailLog.clicked_at
+        ).where(or_(
+            EmailLog.id.in_(log_ids),
+            EmailLog.sendgrid_message_id.in_(message_ids)
+        )).with_for_update()
+    ).all()
+
+
+def reduce_events(events: List[Dict[str, Any]], logs: List[Any]) -> ReducedBatch:
+    """Fold a deduplicated batch into per-log updates and subscriber deltas"""
+    by_id = {log.id: log for log in logs}
+    by_message_email: Dict[Tuple[str, str], Any] = {}
+    by_message: Dict[str, Any] = {}
+    for log in logs:
+        if log.sendgrid_message_id:
+            by_message_email.setdefault((log.sendgrid_message_id, (log.recipient_email or '').lower()), log)
+            by_message.setdefault(log.sendgrid_message_id, log)
+
+    batch = ReducedBatch()
+    # Opens/clicks already counted, including earlier events in this batch
+    opened = {log.id for log in logs if log.opened_at}
+    clicked = {log.id for log in logs if log.clicked_at}
+
+    def bump(log, email, index):
+        if log.customer_id:
+            key = (log.user_id, log.customer_id, None)
+        elif email:
+            key = (log.user_id, None, email)
+        else:
+            return
+        batch.subscriber_counts.setdefault(key, [0, 0])[index] += 1
+
+    for event in sorted(events, key=lambda e: e.get('timestamp') or 0):
+        event_type = event['event']
+        email = event.get('email')
+
+        # Find email log by the email_log_id custom arg (batched campaign sends),
+        # falling back to the SendGrid message ID and recipient
+        log = by_id.get(_parse_uuid(event.get('email_log_id')))
+        if log is None:
+            for message_id in _message_ids(event['sg_message_id']):
+                log = by_message_email.get((message_id, (email or '').lower())) if email else by_message.get(message_id)
+                if log is not None:
+                    break
+        if log is None:
+            batch.unmatched += 1
+            continue
+
+        event_time = _event_time(event)
+        entry = batch.log_updates.setdefault(log.id, LogUpdate(log_id=log.id))
+        entry.status = event_type
+        entry.status_time = event_time
+
+        if event_type == "delivered":
+            entry.delivered_at = event_time
+
+        elif event_type == "open":
+            if log.id not in opened:
+                opened.add(log.id)
+                entry.opened_at = event_time
+                bump(log, email, 0)
+
+        elif event_type == "click":
+            if log.id not in clicked:
+                clicked.add(log.id)
+                entry.clicked_at = event_time
+                bump(log, email, 1)
+
+        elif event_type == "bounce":
+            entry.error_message = f"Bounced: {event.get('reason', '')}"
+
+        elif event_type == "dropped":
+            entry.error_message = f"Dropped: {event.get('reason', '')}"
+            entry.status = "failed"
+
+        elif event_type == "spamreport":
+            # User marked email as spam - unsubscribe them
+            if email:
+                batch.spam_reports.add((log.user_id, email))
+
+    return batch
+
+
+def apply_batch(db: Session, batch: ReducedBatch):
+    """Apply a reduced batch with one UPDATE ... FROM (VALUES ...) per table and change type"""
+    if batch.log_updates:
+        # Casts keep all-NULL columns typed inside VALUES
+        v = values(
+            column('id', String), column('status', String), column('delivered_at', String),
+            column('opened_at', String), column('clicked_at', String), column('error_message', String),
+            name='v'
+        ).data([
+            (str(u.log_id), u.status,
+             u.delivered_at.isoformat() if u.delivered_at else None,
+             u.opened_at.isoformat() if u.opened_at else None,
+             u.clicked_at.isoformat() if u.clicked_at else None,
+             u.error_message)
+            for u in batch.log_updates.values()
+        ])
+        db.execute(
+            update(EmailLog)
+            .where(EmailLog.id == cast(v.c.id, UUID(as_uuid=True)))
+            .values(
+                sendgrid_status=v.c.status,
+                delivered_at=func.coalesce(cast(v.c.delivered_at, DateTime), EmailLog.delivered_at),
+                opened_at=func.coalesce(EmailLog.opened_at, cast(v.c.opened_at, DateTime)),
+                clicked_at=func.coalesce(EmailLog.clicked_at, cast(v.c.clicked_at, DateTime)),
+                error_message=func.coalesce(v.c.error_message, EmailLog.error_message)
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    if batch.subscriber_counts:
+        v = values(
+            column('user_id', String), column('customer_id', String), column('email', String),
+            column('opens', Integer), column('clicks', Integer),
+            name='v'
+        ).data([
+            (str(user_id), str(customer_id) if customer_id else None, email, opens, clicks)
+            for (user_id, customer_id, email), (opens, clicks) in batch.subscriber_counts.items()
+        ])
+        db.execute(
+            update(EmailSubscriber)
+            .where(
+                EmailSubscriber.user_id == cast(v.c.user_id, UUID(as_uuid=True)),
+                or_(
+                    EmailSubscriber.customer_id == cast(v.c.customer_id, UUID(as_uuid=True)),
+                    and_(v.c.customer_id.is_(None), EmailSubscriber.email == v.c.email)
+                )
+            )
+            .values(
+                total_opened=func.coalesce(EmailSubscriber.total_opened, 0) + v.c.opens,
+                total_clicked=func.coalesce(EmailSubscriber.total_clicked, 0) + v.c.clicks
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    if batch.spam_reports:
+        v = values(column('user_id', String), column('email', String), name='v').data([
+            (str(user_id), email) for user_id, email in batch.spam_reports
+        ])
+        db.execute(
+            update(EmailSubscriber)
+            .where(
+                EmailSubscriber.user_id == cast(v.c.user_id, UUID(as_uuid=True)),
+                EmailSubscriber.email == v.c.email,
+                EmailSubscriber.is_subscribed.is_(True)
+            )
+            .values(is_subscribed=False, unsubscribed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        logger.info(f"Auto-unsubscribed {len(batch.spam_reports)} subscribers due to spam reports")
+
+
+def process_events(db: Session, events: List[Dict[str, Any]]) -> ReducedBatch:
+    """Apply one SendGrid webhook batch in a single transaction"""
+    events = dedupe_events(events)
+    if not events:
+        return ReducedBatch()
+
+    try:
+        batch = reduce_events(events, load_email_logs(db, events))
+        apply_batch(db, batch)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if batch.unmatched:
+        logger.warning(f"No email log found for {batch.unmatched} SendGrid events")
+    logger.info(f"Applied {len(events)} SendGrid events to {len(batch.log_updates)} email logs")
+    return batch
+
+
+class SendGridEventQueue:
+    """Queue of acknowledged webhook batches drained by a background thread"""
+
+    def __init__(self, mode: str = SENDGRID_WEBHOOK_MODE, backend: str = SENDGRID_EVENT_QUEUE_BACKEND,
+                 session_factory=SessionLocal):
+        self.mode = mode
+        self.session_factory = session_factory
+        self.redis_client = None
+        self._memory: "queue.Queue[Tuple[List[Dict[str, Any]], int]]" = queue.Queue(maxsize=SENDGRID_EVENT_QUEUE_MAX_BATCHES)
+        # Batches that used up their attempts, kept for inspection when Redis isn't used
+        self.dead_letters: "deque[Dict[str, Any]]" = deque(maxlen=SENDGRID_EVENT_QUEUE_MAX_BATCHES)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        redis_url = os.getenv('REDIS_URL')
+        if backend == 'redis' and REDIS_AVAILABLE and redis_url:
+            try:
+                self.redis_client = redis.from_url(redis_url, socket_connect_timeout=5, socket_timeout=10)
+                self.redis_client.ping()
+            except Exception as e:
+                logger.warning(f"⚠️  SendGrid event queue falling back to memory: {e}")
+                self.redis_client = None
+
+    def enqueue(self, events: List[Dict[str, Any]]):
+        """Queue a webhook batch for processing"""
+        if self.mode == 'sync':
+            self._process(events)
+            return
+
+        if self.redis_client is not None:
+            self.redis_client.rpush(REDIS_SENDGRID_QUEUE_KEY, json.dumps({'events': events, 'attempts': 0}))
+        else:
+            # Blocks briefly when the processor is far behind, which slows SendGrid's retries down
+            self._memory.put((events, 0), timeout=10)
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sendgrid-event-processor", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """The next batch and how often it was attempted, or None if the queue stayed empty"""
+        if self.redis_client is not None:
+            item = self.redis_client.blpop(REDIS_SENDGRID_QUEUE_KEY, timeout=5)
+            if not item:
+                return None
+            batch = json.loads(item[1])
+            # Entries queued before attempts were tracked are bare event lists
+            if isinstance(batch, list):
+                return batch, 0
+            return batch['events'], batch.get('attempts', 0)
+        try:
+            return self._memory.get(timeout=5)
+        except queue.Empty:
+            return None
+
+    def _retry(self, events: List[Dict[str, Any]], attempts: int):
+        """Put a failed batch back at the front of the queue, or dead-letter it after the last attempt"""
+        if attempts >= SENDGRID_EVENT_MAX_ATTEMPTS:
+            logger.error(f"❌ Dead-lettering SendGrid webhook batch of {len(events)} events after {attempts} attempts")
+            if self.redis_client is not None:
+                self.redis_client.rpush(REDIS_SENDGRID_DEAD_LETTER_KEY, json.dumps({'events': events, 'attempts': attempts}))
+            else:
+                self.dead_letters.append({'events': events, 'attempts': attempts})
+            return
+
+        if self.redis_client is not None:
+            self.redis_client.lpush(REDIS_SENDGRID_QUEUE_KEY, json.dumps({'events': events, 'attempts': attempts}))
+            return
+        try:
+            self._memory.put((events, attempts), timeout=10)
+        except queue.Full:
+            logger.error(f"❌ SendGrid event queue full, dead-lettering batch of {len(events)} events")
+            self.dead_letters.append({'events': events, 'attempts': attempts})
+
+    def _run(self):
+        failures = 0
+        while True:
+            try:
+                batch = self._next_batch()
+                ok = True
+                if batch:
+                    events, attempts = batch
+                    ok = self._process(events)
+                    if not ok:
+                        self._retry(events, attempts + 1)
+            except Exception as e:
+                logger.error(f"Error reading SendGrid event queue: {e}")
+                ok = False
+
+            if ok:
+                failures = 0
+                continue
+            # Redis or the database is down: back off instead of spinning on errors
+            delay = min(SENDGRID_EVENT_BACKOFF_BASE * 2 ** failures, SENDGRID_EVENT_BACKOFF_MAX)
+            failures += 1
+            logger.warning(f"SendGrid event processor backing off for {delay:.1f}s after {failures} failure(s)")
+            time.sleep(delay)
+
+    def _process(self, events: List[Dict[str, Any]]) -> bool:
+        """Apply one batch; returns False if it failed"""
+        db = self.session_factory()
+        try:
+            process_events(db, events)
+            return True
+        except Exception as e:
+            logger.error(f"Error processing SendGrid webhook batch of {len(events)} events: {e}")
+            return False
+        finally:
+            db.close()
+
+
+# Global queue for the process
+sendgrid_event_queue = SendGridEventQueue()
@@ -0,0 +1,133 @@
+"""
+Concurrent Shopify Bulk Product Creation
+
+Creates many products in one store through a thread pool. Every request
+passes through the shop's leaky bucket in ShopifyClient, so workers block
+on the bucket rather than on each other and a run drains at the rate Shopify
+allows. Image uploads for a product are queued on the same pool as soon as
+the product exists, overlapping with the remaining creates.
+
+Store credentials are resolved once up front so worker threads never touch
+the database session.
+"""
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Optional, Callable
+
+from server.src.entities.shopify_store import ShopifyStore
+from server.src.utils.shopify_client import ShopifyClient
+
+logger = logging.getLogger(__name__)
+
+SHOPIFY_BULK_CREATE_WORKERS = int(os.getenv('SHOPIFY_BULK_CREATE_WORKERS', '8'))
+# Shopify REST accepts at most 100 variants per product
+SHOPIFY_MAX_VARIANTS = 100
+
+ProgressCallback = Callable[[int, int, Dict[str, Any]], None]
+
+
+class ShopifyBulkProductCreator:
+    """Create products and upload their images concurrently under the shop's call limit"""
+
+    def __init__(self, client: ShopifyClient, store: ShopifyStore, max_workers: Optional[int] = None):
+        self.client = client
+        self.base_url = f"https://{store.shop_domain}/admin/api/{client.API_VERSION}"
+        self.headers = client._get_headers(store.access_token)
+        self.shop_name = store.shop_name
+        self.max_workers = max_workers or SHOPIFY_BULK_CREATE_WORKERS
+
+    def _create_product(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.client._make_request_with_retry(
+            'POST', f"{self.base_url}/products.json", self.headers, json={"product": product_data}
+        )
+        return response.json().get('product', {})
+
+    def _upload_image(self, product_id, image_data: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.client._make_request_with_retry(
+            'POST', f"{self.base_url}/products/{product_id}/images.json", self.headers, json={"image": image_data}
+        )
+        return response.json().get('image', {})
+
+    def run(self, products: List[Dict[str, Any]], images: Optional[List[Dict[str, Any]]] = None,
+            progress_callback: Optional[ProgressCallback] = None) -> List[Dict[str, Any]]:
+        """
+        Create products concurrently.
+
+        Args:
+            products: Shopify product payloads (without the outer "product" key)
+            images: Image payloads ({"src": ...} or {"attachment": ..., "filename": ...})
+                uploaded to every created product
+            progress_callback: Called as (completed, total, result) when a product
+                and all of its images are finished
+
+        Returns:
+            Per-product results in input order, each with 'success', 'title',
+            'product' (when created), 'images_uploaded' and 'errors'
+        """
+        images = images or []
+        total = len(products)
+        results: List[Dict[str, Any]] = [
+            {"index": i, "title": p.get("title"), "success": False, "product": None, "images_uploaded": 0, "errors": []}
+            for i, p in enumerate(products)
+        ]
+        remaining_images = [0] * total
+        completed = 0
+
+        def finish(index: int):
+            nonlocal completed
+            completed += 1
+            if progress_callback:
+                try:
+                    progress_callback(completed, total, results[index])
+                except Exception as e:
+                    logger.warning(f"Bulk create progress callback failed: {e}")
+
+        logger.info(f"🔄 Creating {total} products in {self.shop_name} with {self.max_workers} workers")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {
+                pool.submit(self._create_product, product_data): ('product', index)
+                for index, product_data in enumerate(products)
+            }
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, index = pending.pop(future)
+                    result = results[index]
+
+                    if kind == 'product':
+                        try:
+                            product = future.result()
+                        except Exception as e:
+                            result["errors"].append(f"Failed to create product '{result['title']}': {e}")
+                            logger.error(f"❌ {result['errors'][-1]}")
+                            finish(index)
+                            continue
+
+                        result["product"] = product
+                        result["success"] = True
+                        logger.info(f"✅ Created product {product.get('id')}: {result['title']}")
+
+                        remaining_images[index] = len(images)
+                        for position, image_data in enumerate(images, start=1):
+                            payload = {"position": position, **image_data}
+                            image_future = pool.submit(self._upload_image, product.get('id'), payload)
+                            pending[image_future] = ('image', index)
+                        if not images:
+                            finish(index)
+                    else:
+                        try:
+                            future.result()
+                            result["images_uploaded"] += 1
+                        except Exception as e:
+                            result["errors"].append(f"Failed to upload image to '{result['title']}': {e}")
+                            logger.error(f"❌ {result['errors'][-1]}")
+
+                        remaining_images[index] -= 1
+                        if remaining_images[index] == 0:
+                            finish(index)
+
+        return results
@@ -0,0 +1,643 @@
+"""
+Shopify GraphQL Bulk Sync
+
+Exports a store's products and orders with Shopify's GraphQL bulk operation
+API and upserts them into local tables, so facets (product types, vendors,
+tags) and order analytics are answered by local queries instead of paging
+the REST API on every request.
+
+Flow per resource:
+- bulkOperationRunQuery starts an export on Shopify's side
+- currentBulkOperation is polled until the export completes
+- the JSONL result is streamed line by line, children (variants, line items)
+  are regrouped under their parent, and rows are upserted in batches
+
+The worker re-syncs every active store's resources once their last sync is
+older than SHOPIFY_SYNC_INTERVAL_SECONDS (run_shopify_sync_scheduler).
+Reads only use the local tables while the last sync is younger than
+SHOPIFY_SYNC_MAX_AGE_SECONDS, and fall back to the live API otherwise.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from datetime import datetime, timedelta, timezone
+
+import requests
+from sqlalchemy import delete, distinct, or_, select, update
+from sqlalchemy.orm import Session
+
+from server.src.entities.shopify_store import ShopifyStore
+from server.src.entities.shopify_product import ShopifyProduct
+from server.src.entities.shopify_order import ShopifyOrder
+from server.src.entities.shopify_sync_state import ShopifySyncState
+from server.src.utils.shopify_client import ShopifyClient, ShopifyAPIError
+
+logger = logging.getLogger(__name__)
+
+SHOPIFY_SYNC_BATCH_SIZE = int(os.getenv('SHOPIFY_SYNC_BATCH_SIZE', '500'))
+SHOPIFY_SYNC_POLL_INTERVAL = float(os.getenv('SHOPIFY_SYNC_POLL_INTERVAL', '2'))
+SHOPIFY_SYNC_TIMEOUT = int(os.getenv('SHOPIFY_SYNC_TIMEOUT', '3600'))
+# Re-read orders updated this long before the last sync to cover clock skew
+ORDER_SYNC_OVERLAP = timedelta(hours=1)
+# Scheduled re-sync interval per resource, and how often the scheduler checks for due ones
+SHOPIFY_SYNC_INTERVAL_SECONDS = int(os.getenv('SHOPIFY_SYNC_INTERVAL_SECONDS', '900'))
+SHOPIFY_SYNC_SCHEDULER_SECONDS = int(os.getenv('SHOPIFY_SYNC_SCHEDULER_SECONDS', '60'))
+# Local data older than this is not served; reads go to the live API instead
+SHOPIFY_SYNC_MAX_AGE_SECONDS = int(os.getenv('SHOPIFY_SYNC_MAX_AGE_SECONDS', '3600'))
+
+RESOURCES = ('products', 'orders')
+
+BULK_RUN_MUTATION = """
+mutation bulkOperationRunQuery($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+CURRENT_BULK_OPERATION_QUERY = """
+{
+  currentBulkOperation {
+    id
+    status
+    errorCode
+    objectCount
+    url
+    partialDataUrl
+  }
+}
+"""
+
+PRODUCTS_BULK_QUERY = """
+{
+  products {
+    edges {
+      node {
+        id
+        title
+        handle
+        descriptionHtml
+        vendor
+        productType
+        tags
+        status
+        publishedAt
+        updatedAt
+        variants {
+          edges {
+            node {
+              id
+              title
+              sku
+              price
+              inventoryQuantity
+              selectedOptions { name value }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+ORDERS_BULK_QUERY = """
+{
+  orders%s {
+    edges {
+      node {
+        id
+        name
+        email
+        createdAt
+        updatedAt
+        cancelledAt
+        displayFinancialStatus
+        displayFulfillmentStatus
+        totalPriceSet { shopMoney { amount currencyCode } }
+        lineItems {
+          edges {
+            node {
+              id
+              title
+              quantity
+              sku
+              originalUnitPriceSet { shopMoney { amount } }
+              product { id }
+              variant { id }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def _legacy_id(gid: Optional[str]) -> Optional[str]:
+    """Convert 'gid://shopify/Product/123' to the REST id '123'"""
+    if not gid:
+        return None
+    return str(gid).rsplit('/', 1)[-1]
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _money(money_set: Optional[dict]) -> Dict[str, Any]:
+    return ((money_set or {}).get('shopMoney') or {})
+
+
+def iter_bulk_objects(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Regroup flattened bulk operation JSONL into top-level objects
+
+    Bulk results emit nested connection nodes as separate lines carrying a
+    __parentId, always after their parent. Children are collected into the
+    parent's '_children' list and each parent is yielded once complete, so
+    only one object is held in memory at a time.
+    """
+    current = None
+    for line in lines:
+        if not line:
+            continue
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        obj = json.loads(line)
+        parent_id = obj.pop('__parentId', None)
+
+        if parent_id is None:
+            if current is not None:
+                yield current
+            current = obj
+            current['_children'] = []
+        elif current is not None and parent_id == current.get('id'):
+            current['_children'].append(obj)
+        else:
+            logger.warning(f"Skipping bulk result line with unknown parent {parent_id}")
+
+    if current is not None:
+        yield current
+
+
+def product_row(obj: Dict[str, Any], store: ShopifyStore) -> Dict[str, Any]:
+    """Map a bulk-exported product onto shopify_products columns"""
+    variants = []
+    for variant in obj.get('_children', []):
+        options = variant.get('selectedOptions') or []
+        row = {
+            'id': _legacy_id(variant.get('id')),
+            'title': variant.get('title'),
+            'sku': variant.get('sku'),
+            'price': variant.get('price'),
+            'inventory_quantity': variant.get('inventoryQuantity'),
+        }
+        for index, option in enumerate(options[:3], start=1):
+            row[f'option{index}'] = option.get('value')
+        variants.append(row)
+
+    return {
+        'id': uuid.uuid4(),
+        'user_id': store.user_id,
+        'store_id': store.id,
+        'shopify_product_id': _legacy_id(obj.get('id')),
+        'title': obj.get('title') or '',
+        'handle': obj.get('handle'),
+        'description': obj.get('descriptionHtml'),
+        'vendor': obj.get('vendor'),
+        'product_type': obj.get('productType'),
+        'tags': ', '.join(obj.get('tags') or []),
+        'variants': variants,
+        'status': (obj.get('status') or 'draft').lower(),
+        'published_at': _parse_datetime(obj.get('publishedAt')),
+    }
+
+
+def order_row(obj: Dict[str, Any], store: ShopifyStore) -> Dict[str, Any]:
+    """Map a bulk-exported order onto shopify_orders columns"""
+    line_items = []
+    for item in obj.get('_children', []):
+        line_items.append({
+            'id': _legacy_id(item.get('id')),
+            'title': item.get('title'),
+            'quantity': item.get('quantity') or 0,
+            'sku': item.get('sku'),
+            'price': _money(item.get('originalUnitPriceSet')).get('amount', '0'),
+            'product_id': _legacy_id((item.get('product') or {}).get('id')),
+            'variant_id': _legacy_id((item.get('variant') or {}).get('id')),
+        })
+
+    total = _money(obj.get('totalPriceSet'))
+    return {
+        'id': uuid.uuid4(),
+        'user_id': store.user_id,
+        'store_id': store.id,
+        'shopify_order_id': _legacy_id(obj.get('id')),
+        'name': obj.get('name'),
+        'email': obj.get('email'),
+        'financial_status': (obj.get('displayFinancialStatus') or '').lower() or None,
+        'fulfillment_status': (obj.get('displayFulfillmentStatus') or '').lower() or None,
+        'total_price': float(total.get('amount') or 0),
+        'currency': total.get('currencyCode'),
+        'line_items': line_items,
+        'item_count': sum(int(item['quantity']) for item in line_items),
+        'order_created_at': _parse_datetime(obj.get('createdAt')),
+        'order_updated_at': _parse_datetime(obj.get('updatedAt')),
+        'cancelled_at': _parse_datetime(obj.get('cancelledAt')),
+    }
+
+
+PRODUCT_UPDATE_COLUMNS = ['title', 'handle', 'description', 'vendor', 'product_type', 'tags',
+                          'variants', 'status', 'published_at']
+ORDER_UPDATE_COLUMNS = ['name', 'email', 'financial_status', 'fulfillment_status', 'total_price', 'currency',
+                        'line_items', 'item_count', 'order_created_at', 'order_updated_at', 'cancelled_at']
+
+
+class ShopifyBulkSyncService:
+    """
+    Syncs Shopify products and orders into local tables and answers
+    facet/analytics queries from them.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.client = ShopifyClient(db)
+
+    # ------------------------------------------------------------------
+    # Sync state
+    # ------------------------------------------------------------------
+
+    def _get_state(self, store_id, resource: str) -> ShopifySyncState:
+        state = self.db.query(ShopifySyncState).filter(
+            ShopifySyncState.store_id == store_id,
+            ShopifySyncState.resource == resource
+        ).first()
+        if not state:
+            state = ShopifySyncState(store_id=store_id, resource=resource, status='idle')
+            self.db.add(state)
+            self.db.commit()
+        return state
+
+    def has_synced(self, store_id, resource: str, max_age_seconds: int = SHOPIFY_SYNC_MAX_AGE_SECONDS) -> bool:
+        """Whether a bulk sync of the resource completed for this store within max_age_seconds"""
+        try:
+            store_uuid = uuid.UUID(str(store_id))
+        except ValueError:
+            return False
+
+        last_synced_at = self.db.query(ShopifySyncState.last_synced_at).filter(
+            ShopifySyncState.store_id == store_uuid,
+            ShopifySyncState.resource == resource
+        ).scalar()
+        if last_synced_at is None:
+            return False
+
+        if last_synced_at.tzinfo is None:
+            last_synced_at = last_synced_at.replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) - last_synced_at > timedelta(seconds=max_age_seconds):
+            logger.info(f"Local Shopify {resource} for store {store_id} are stale (synced {last_synced_at.isoformat()})")
+            return False
+        return True
+
+    def get_sync_status(self, store_id) -> List[Dict[str, Any]]:
+        """Get sync state for every resource of a store"""
+        states = self.db.query(ShopifySyncState).filter(ShopifySyncState.store_id == store_id).all()
+        return [
+            {
+                'resource': state.resource,
+                'status': state.status,
+                'object_count': state.object_count,
+                'error': state.error_message,
+                'started_at': state.started_at.isoformat() if state.started_at else None,
+                'last_synced_at': state.last_synced_at.isoformat() if state.last_synced_at else None,
+            }
+            for state in states
+        ]
+
+    # ------------------------------------------------------------------
+    # Bulk operations
+    # ------------------------------------------------------------------
+
+    def _start_bulk_operation(self, store_id: str, query: str) -> str:
+        data = self.client.graphql(store_id, BULK_RUN_MUTATION, {'query': query})
+        result = data.get('bulkOperationRunQuery') or {}
+        user_errors = result.get('userErrors') or []
+        if user_errors:
+            raise ShopifyAPIError(f"Bulk operation rejected: {user_errors}")
+        return result['bulkOperation']['id']
+
+    def _wait_for_bulk_operation(self, store_id: str, operation_id: str) -> Dict[str, Any]:
+        deadline = time.time() + SHOPIFY_SYNC_TIMEOUT
+        interval = SHOPIFY_SYNC_POLL_INTERVAL
+
+        while time.time() < deadline:
+            operation = self.client.graphql(store_id, CURRENT_BULK_OPERATION_QUERY).get('currentBulkOperation') or {}
+            if operation.get('id') != operation_id:
+                raise ShopifyAPIError(f"Bulk operation {operation_id} is no longer the current operation")
+
+            status = operation.get('status')
+            if status == 'COMPLETED':
+                return operation
+            if status in ('FAILED', 'CANCELED', 'EXPIRED'):
+                raise ShopifyAPIError(f"Bulk operation {operation_id} {status.lower()}: {operation.get('errorCode')}")
+
+            time.sleep(interval)
+            interval = min(interval * 1.5, 30)
+
+        raise ShopifyAPIError(f"Bulk operation {operation_id} did not finish within {SHOPIFY_SYNC_TIMEOUT} seconds")
+
+    def _stream_results(self, url: Optional[str]) -> Iterator[Dict[str, Any]]:
+        # Completed operations with no matching objects have no result file
+        if not url:
+            return iter(())
+
+        return self._iter_result_file(url)
+
+    @staticmethod
+    def _iter_result_file(url: str) -> Iterator[Dict[str, Any]]:
+        # The connection is released when the generator finishes, fails or is closed
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            yield from iter_bulk_objects(response.iter_lines(decode_unicode=True))
+
+    def _upsert(self, entity, rows: List[Dict[str, Any]], conflict_column: str, update_columns: List[str]):
+        if not rows:
+            return
+
+        if self.db.bind.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(entity.__table__).values(rows)
+        update = {column: getattr(stmt.excluded, column) for column in update_columns}
+        if 'updated_at' in entity.__table__.c:
+            update['updated_at'] = datetime.now(timezone.utc)
+        stmt = stmt.on_conflict_do_update(index_elements=[conflict_column], set_=update)
+        self.db.execute(stmt)
+        self.db.commit()
+
+    def _delete_stale_products(self, store_id, seen_ids: set) -> int:
+        """
+        Delete the store's local products that were not in a full export,
+        i.e. products that have since been deleted on Shopify.
+        """
+        table = ShopifyProduct.__table__
+        rows = self.db.execute(
+            select(table.c.id, table.c.shopify_product_id).where(table.c.store_id == store_id)
+        ).all()
+        stale = [row.id for row in rows if row.shopify_product_id not in seen_ids]
+
+        for start in range(0, len(stale), SHOPIFY_SYNC_BATCH_SIZE):
+            self.db.execute(delete(table).where(table.c.id.in_(stale[start:start + SHOPIFY_SYNC_BATCH_SIZE])))
+        if stale:
+            self.db.commit()
+        return len(stale)
+
+    def sync_resource(self, store_id: str, resource: str) -> Dict[str, Any]:
+        """
+        Export one resource with a bulk operation and upsert it locally.
+
+        Products are exported in full and local products missing from the
+        export are deleted; orders are exported incrementally by updated_at
+        since the previous successful sync.
+
+        Args:
+            store_id: UUID of the store
+            resource: 'products' or 'orders'
+
+        Returns:
+            Dictionary with the resource, synced object count and status
+        """
+        if resource not in RESOURCES:
+            raise ValueError(f"Unsupported sync resource: {resource}")
+
+        store = self.client._get_store_info(store_id)
+        state = self._get_state(store.id, resource)
+
+        if resource == 'products':
+            query = PRODUCTS_BULK_QUERY
+            to_row, entity, conflict, columns = product_row, ShopifyProduct, 'shopify_product_id', PRODUCT_UPDATE_COLUMNS
+        else:
+            query_filter = ''
+            if state.last_synced_at:
+                since = (state.last_synced_at - ORDER_SYNC_OVERLAP).strftime('%Y-%m-%dT%H:%M:%SZ')
+                query_filter = f'(query: "updated_at:>=\'{since}\'")'
+            query = ORDERS_BULK_QUERY % query_filter
+            to_row, entity, conflict, columns = order_row, ShopifyOrder, 'shopify_order_id', ORDER_UPDATE_COLUMNS
+
+        started_at = datetime.now(timezone.utc)
+        try:
+            operation_id = self._start_bulk_operation(str(store.id), query)
+            state.bulk_operation_id = operation_id
+            state.status = 'running'
+            state.started_at = started_at
+            state.error_message = None
+            self.db.commit()
+
+            logger.info(f"🔄 Started {resource} bulk export {operation_id} for {store.shop_name}")
+            operation = self._wait_for_bulk_operation(str(store.id), operation_id)
+
+            synced = 0
+            batch = []
+            seen_ids = set()
+            objects = self._stream_results(operation.get('url'))
+            try:
+                for obj in objects:
+                    row = to_row(obj, store)
+                    seen_ids.add(row[conflict])
+                    batch.append(row)
+                    if len(batch) >= SHOPIFY_SYNC_BATCH_SIZE:
+                        self._upsert(entity, batch, conflict, columns)
+                        synced += len(batch)
+                        batch = []
+            finally:
+                if hasattr(objects, 'close'):
+                    objects.close()
+            self._upsert(entity, batch, conflict, columns)
+            synced += len(batch)
+
+            if resource == 'products':
+                deleted = self._delete_stale_products(store.id, seen_ids)
+                if deleted:
+                    logger.info(f"🗑️ Removed {deleted} products no longer in {store.shop_name}")
+
+            state.status = 'completed'
+            state.object_count = synced
+            state.last_synced_at = started_at
+            self.db.commit()
+
+            logger.info(f"✅ Synced {synced} {resource} for {store.shop_name}")
+            return {'resource': resource, 'synced': synced, 'status': state.status}
+
+        except Exception as e:
+            self.db.rollback()
+            state.status = 'failed'
+            state.error_message = str(e)
+            self.db.commit()
+            logger.error(f"❌ {resource} bulk sync failed for {store.shop_name}: {e}")
+            raise
+
+    def sync_store(self, store_id: str) -> List[Dict[str, Any]]:
+        """
+        Sync products then orders for a store.
+
+        Shopify allows one bulk query per shop at a time, so resources run
+        one after another.
+        """
+        results = []
+        for resource in RESOURCES:
+            try:
+                results.append(self.sync_resource(store_id, resource))
+            except Exception as e:
+                results.append({'resource': resource, 'synced': 0, 'status': 'failed', 'error': str(e)})
+        return results
+
+    def _claim(self, state: ShopifySyncState, now: datetime) -> bool:
+        """Mark a resource as running unless another worker's sync of it is in progress"""
+        table = ShopifySyncState.__table__
+        result = self.db.execute(update(table).where(
+            table.c.id == state.id,
+            or_(
+                table.c.status != 'running',
+                table.c.started_at.is_(None),
+                table.c.started_at < now - timedelta(seconds=SHOPIFY_SYNC_TIMEOUT)
+            )
+        ).values(status='running', started_at=now))
+        self.db.commit()
+        return result.rowcount == 1
+
+    def sync_due_resources(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Sync the resources of every active store whose last sync is older
+        than SHOPIFY_SYNC_INTERVAL_SECONDS. Orders sync incrementally.
+        """
+        now = now or datetime.now(timezone.utc)
+        due_before = now - timedelta(seconds=SHOPIFY_SYNC_INTERVAL_SECONDS)
+        store_ids = [row[0] for row in self.db.query(ShopifyStore.id).filter(ShopifyStore.is_active == True).all()]
+
+        results = []
+        for store_id in store_ids:
+            for resource in RESOURCES:
+                state = self._get_state(store_id, resource)
+                last_synced_at = state.last_synced_at
+                if last_synced_at and last_synced_at.tzinfo is None:
+                    last_synced_at = last_synced_at.replace(tzinfo=timezone.utc)
+                if last_synced_at and last_synced_at > due_before:
+                    continue
+                if not self._claim(state, now):
+                    continue
+                try:
+                    results.append(self.sync_resource(str(store_id), resource))
+                except Exception as e:
+                    results.append({'resource': resource, 'synced': 0, 'status': 'failed', 'error': str(e)})
+        return results
+
+    # ------------------------------------------------------------------
+    # Local queries
+    # ------------------------------------------------------------------
+
+    def _distinct_product_values(self, store_id, column) -> List[str]:
+        rows = self.db.query(distinct(column)).filter(
+            ShopifyProduct.store_id == store_id,
+            column.isnot(None),
+            column != ''
+        ).all()
+        return [row[0] for row in rows]
+
+    def get_product_types(self, store_id) -> List[str]:
+        """Unique product types from the local catalogue"""
+        return sorted({value.strip() for value in self._distinct_product_values(store_id, ShopifyProduct.product_type) if value.strip()})
+
+    def get_vendors(self, store_id) -> List[str]:
+        """Unique vendors from the local catalogue"""
+        return sorted({value.strip() for value in self._distinct_product_values(store_id, ShopifyProduct.vendor) if value.strip()})
+
+    def get_tags(self, store_id) -> List[str]:
+        """Unique tags from the local catalogue"""
+        tags = set()
+        for value in self._distinct_product_values(store_id, ShopifyProduct.tags):
+            tags.update(tag.strip() for tag in value.split(',') if tag.strip())
+        return sorted(tags)
+
+    def get_orders(self, store_id, since_time: Optional[datetime] = None,
+                   until_time: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Orders from the local table in the Shopify REST order shape"""
+        query = self.db.query(ShopifyOrder).filter(ShopifyOrder.store_id == store_id)
+        if since_time:
+            query = query.filter(ShopifyOrder.order_created_at >= since_time)
+        if until_time:
+            query = query.filter(ShopifyOrder.order_created_at <= until_time)
+        return [order.to_rest_dict() for order in query.order_by(ShopifyOrder.order_created_at.desc()).all()]
+
+
+def start_background_sync(store_id: str, resource: Optional[str] = None) -> threading.Thread:
+    """Run a store sync on a background thread with its own DB session"""
+    from server.src.database.core import SessionLocal
+
+    def run():
+        db = SessionLocal()
+        try:
+            service = ShopifyBulkSyncService(db)
+            if resource:
+                service.sync_resource(store_id, resource)
+            else:
+                service.sync_store(store_id)
+        except Exception as e:
+            logger.error(f"❌ Background Shopify sync failed for store {store_id}: {e}")
+        finally:
+            db.close()
+
+    thread = threading.Thread(target=run, name=f"shopify-sync-{store_id}", daemon=True)
+    thread.start()
+    return thread
+
+
+_scheduler_running = False
+
+
+def run_shopify_sync_scheduler():
+    """Blocking loop for the worker process that keeps the local Shopify tables fresh."""
+    from server.src.database.core import SessionLocal
+    global _scheduler_running
+    _scheduler_running = True
+
+    logger.info("Shopify sync scheduler starting...")
+
+    while _scheduler_running:
+        db = SessionLocal()
+        try:
+            results = ShopifyBulkSyncService(db).sync_due_resources()
+            if results:
+                logger.info(f"🔄 Scheduled Shopify sync finished {len(results)} resource(s)")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error in Shopify sync scheduler: {e}")
+        finally:
+            db.close()
+
+        # Sleep in short steps so shutdown isn't delayed by a full interval
+        deadline = time.monotonic() + SHOPIFY_SYNC_SCHEDULER_SECONDS
+        while _scheduler_running and time.monotonic() < deadline:
+            time.sleep(1)
+
+    logger.info("Shopify sync scheduler stopped")
+
+
+def stop_shopify_sync_scheduler():
+    """Stop the Shopify sync scheduler."""
+    global _scheduler_running
+    _scheduler_running = False
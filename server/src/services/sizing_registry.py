@@ -0,0 +1,93 @@
+"""
+Sizing Config Registry
+
+In-process cache of the resolved (CANVAS, SIZING) configs that image
+resizing needs, keyed by (canvas_config_id, product_template_id). Configs
+are loaded from the database once and handed to processing as plain dicts,
+so resize code needs no session per image and can run in worker processes.
+
+Writes through routes/canvas_sizes and routes/size_config invalidate the
+template's entries. Entries also expire after SIZING_REGISTRY_TTL seconds,
+which bounds staleness when another API process made the write.
+"""
+
+import os
+import copy
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SIZING_REGISTRY_TTL = int(os.getenv('SIZING_REGISTRY_TTL', '300'))
+
+SizingConfigs = Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]
+
+
+class SizingConfigRegistry:
+    """Resolved (CANVAS, SIZING) configs per canvas/template pair"""
+
+    def __init__(self, loader: Optional[Callable] = None, ttl: float = SIZING_REGISTRY_TTL):
+        self._loader = loader
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Tuple[float, SizingConfigs]] = {}
+        self._lock = threading.Lock()
+        # Bumped by invalidate() so a load that raced a write isn't cached
+        self._generation = 0
+
+        self.loads = 0
+
+    @property
+    def loader(self) -> Callable:
+        if self._loader is None:
+            from server.src.utils.resizing import get_resizing_configs_from_db
+            self._loader = get_resizing_configs_from_db
+        return self._loader
+
+    def get(self, db, canvas_id, product_template_id) -> SizingConfigs:
+        """
+        (CANVAS, SIZING) for a canvas/template pair, loading it on a miss.
+
+        Without a session, canvas or template the defaults are returned, as
+        resize_image_by_inches always did.
+        """
+        if not (db and canvas_id and product_template_id):
+            from server.src.utils.resizing import get_default_configs
+            return get_default_configs()
+
+        key = (str(canvas_id), str(product_template_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                return copy.deepcopy(entry[1])
+            generation = self._generation
+
+        configs = self.loader(db, canvas_id, product_template_id)
+
+        with self._lock:
+            self.loads += 1
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic(), configs)
+        return copy.deepcopy(configs)
+
+    def preload(self, db, pairs: Iterable[Tuple]) -> Dict[Tuple, SizingConfigs]:
+        """Resolve every (canvas_id, product_template_id) pair a request will use up front"""
+        return {(canvas_id, template_id): self.get(db, canvas_id, template_id)
+                for canvas_id, template_id in set(pairs)}
+
+    def invalidate(self, product_template_id=None):
+        """Drop a template's configs, or everything when no template is given"""
+        with self._lock:
+            self._generation += 1
+            if product_template_id is None:
+                self._entries.clear()
+            else:
+                template = str(product_template_id)
+                for key in [key for key in self._entries if key[1] == template]:
+                    del self._entries[key]
+        logger.debug(f"Sizing configs invalidated for template {product_template_id or 'all'}")
+
+
+# Global registry for the process
+sizing_registry = SizingConfigRegistry()
@@ -0,0 +1,119 @@
+"""
+Token Refresh Lock
+
+Distributed lock around OAuth token refreshes. Etsy refresh tokens are
+single use, so two replicas (or the background refresher and an on-demand
+EtsyAPI refresh) refreshing the same grant at once leaves one of them with a
+revoked token. Every refresher takes the lock for the connection first and
+re-reads the stored token once it holds it.
+
+A connection is identified by (platform, user_id): EtsyAPI only knows the
+user, and the refresh service looks connections up the same way.
+
+Uses Redis (SET NX PX with a token-checked release) when REDIS_URL is
+configured and falls back to process-local locks otherwise.
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Lock expiry guards against a holder that died mid-refresh
+OAUTH_REFRESH_LOCK_TTL = int(os.getenv('OAUTH_REFRESH_LOCK_TTL', '30'))
+OAUTH_REFRESH_LOCK_WAIT = float(os.getenv('OAUTH_REFRESH_LOCK_WAIT', '15'))
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def connection_lock_key(platform, user_id) -> str:
+    """Lock key for the OAuth connection of a user on a platform"""
+    platform_name = getattr(platform, 'value', platform)
+    return f"oauth_refresh:{str(platform_name).lower()}:{user_id}"
+
+
+class TokenRefreshLock:
+    """Per-connection refresh lock shared across processes via Redis"""
+
+    def __init__(self, ttl_seconds: int = OAUTH_REFRESH_LOCK_TTL):
+        self.ttl_seconds = ttl_seconds
+        self.redis_client = None
+        self._local_locks: Dict[str, threading.Lock] = {}
+        self._local_guard = threading.Lock()
+
+        redis_url = os.getenv('REDIS_URL')
+        if REDIS_AVAILABLE and redis_url:
+            try:
+                self.redis_client = redis.from_url(redis_url, socket_connect_timeout=5, socket_timeout=5)
+                self.redis_client.ping()
+                logger.info("✅ Token refresh locks using Redis")
+            except Exception as e:
+                logger.warning(f"⚠️  Redis unavailable for token refresh locks, using process-local locks: {e}")
+                self.redis_client = None
+
+    def _local_lock(self, key: str) -> threading.Lock:
+        with self._local_guard:
+            return self._local_locks.setdefault(key, threading.Lock())
+
+    def acquire(self, key: str, wait_seconds: float = OAUTH_REFRESH_LOCK_WAIT) -> Optional[str]:
+        """Block up to wait_seconds for the lock; returns a release token or None"""
+        token = uuid.uuid4().hex
+        if self.redis_client is None:
+            acquired = self._local_lock(key).acquire(timeout=wait_seconds) if wait_seconds > 0 \
+                else self._local_lock(key).acquire(blocking=False)
+            return token if acquired else None
+
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            try:
+                if self.redis_client.set(key, token, nx=True, px=int(self.ttl_seconds * 1000)):
+                    return token
+            except Exception as e:
+                # Refreshing unlocked beats not refreshing at all
+                logger.warning(f"⚠️  Token refresh lock {key} unavailable, continuing without it: {e}")
+                return token
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.1)
+
+    def release(self, key: str, token: str):
+        if self.redis_client is None:
+            lock = self._local_lock(key)
+            if lock.locked():
+                lock.release()
+            return
+        try:
+            self.redis_client.eval(_RELEASE_SCRIPT, 1, key, token)
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to release token refresh lock {key}: {e}")
+
+    @contextmanager
+    def hold(self, key: str, wait_seconds: float = OAUTH_REFRESH_LOCK_WAIT) -> Iterator[bool]:
+        """Context manager yielding whether the lock was acquired"""
+        token = self.acquire(key, wait_seconds)
+        try:
+            yield token is not None
+        finally:
+            if token is not None:
+                self.release(key, token)
+
+
+# Global lock instance
+token_refresh_lock = TokenRefreshLock()
@@ -0,0 +1,268 @@
+"""
+Upload Spool
+
+Streaming ingestion for design uploads. Instead of letting the framework
+parse the whole multipart body and then reading every file into memory,
+the request stream is parsed as it arrives:
+
+- MultipartSpoolParser writes each file part straight to its own spool
+  file under UPLOAD_SPOOL_DIR; small form fields are kept in memory
+- UploadSpool hands each file to the consumer (the upload workflow) as
+  soon as its last byte is on disk, so decoding and hashing overlap with
+  the rest of the upload
+- Bytes received but not yet released by the consumer are capped at
+  UPLOAD_STREAM_MAX_INFLIGHT_MB. The receiving side waits for capacity
+  before reading more of the request, which pushes back on the client
+
+Peak memory is therefore bounded by the in-flight cap plus the workers'
+decoded images, independent of the total upload size.
+"""
+
+import os
+import queue
+import shutil
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_SPOOL_DIR = os.getenv('UPLOAD_SPOOL_DIR') or None
+UPLOAD_STREAM_MAX_INFLIGHT_MB = int(os.getenv('UPLOAD_STREAM_MAX_INFLIGHT_MB', '512'))
+UPLOAD_STREAM_MAX_FIELD_BYTES = int(os.getenv('UPLOAD_STREAM_MAX_FIELD_BYTES', str(1024 * 1024)))
+
+
+class UploadStreamError(Exception):
+    """The multipart body could not be parsed"""
+
+
+@dataclass
+class SpooledFile:
+    """One received upload file, on disk until released"""
+    filename: str
+    path: str
+    size: int
+    index: int
+
+
+class UploadSpool:
+    """Disk spool for one streaming upload with a cap on bytes in flight"""
+
+    def __init__(self, max_inflight_bytes: int = UPLOAD_STREAM_MAX_INFLIGHT_MB * 1024 * 1024,
+                 spool_dir: Optional[str] = UPLOAD_SPOOL_DIR):
+        self.max_inflight_bytes = max_inflight_bytes
+        self.directory = tempfile.mkdtemp(prefix="upload-spool-", dir=spool_dir)
+
+        self._ready: "queue.Queue[Optional[SpooledFile]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._capacity = threading.Condition(self._lock)
+        # Bytes written and not yet released, and completed files not yet released
+        self._inflight_bytes = 0
+        self._unreleased = 0
+        self._closed = False
+        self._aborted = False
+
+        self._current = None
+        self._current_file: Optional[SpooledFile] = None
+        self.file_count = 0
+        self.received_bytes = 0
+
+    # Producer side (request parsing)
+
+    def begin_file(self, filename: str):
+        """Start spooling a new file; its data follows through write()"""
+        if self._current is not None:
+            self.end_file()
+        index = self.file_count
+        path = os.path.join(self.directory, f"{index:05d}.upload")
+        self._current = open(path, 'wb')
+        self._current_file = SpooledFile(filename=filename or "upload.png", path=path, size=0, index=index)
+        self.file_count += 1
+
+    def write(self, data: bytes):
+        if self._current is None or not data:
+            return
+        self._current.write(data)
+        self._current_file.size += len(data)
+        self.received_bytes += len(data)
+        with self._capacity:
+            self._inflight_bytes += len(data)
+
+    def end_file(self) -> Optional[SpooledFile]:
+        """Finish the current file and hand it to the consumer"""
+        if self._current is None:
+            return None
+        self._current.close()
+        spooled, self._current, self._current_file = self._current_file, None, None
+        with self._capacity:
+            self._unreleased += 1
+        self._ready.put(spooled)
+        return spooled
+
+    def close(self):
+        """No more files will arrive"""
+        self.end_file()
+        self._closed = True
+        self._ready.put(None)
+
+    def over_capacity(self) -> bool:
+        with self._capacity:
+            return self._over_capacity()
+
+    def _over_capacity(self) -> bool:
+        # A single file larger than the cap still goes through: only wait
+        # while completed files are pending, since only they free capacity
+        return (self._inflight_bytes > self.max_inflight_bytes and self._unreleased > 0
+                and not self._aborted)
+
+    def wait_for_capacity(self, timeout: Optional[float] = None) -> bool:
+        """Block until in-flight bytes drop under the cap; returns False on timeout"""
+        with self._capacity:
+            return self._capacity.wait_for(lambda: not self._over_capacity(), timeout)
+
+    # Consumer side (upload workflow)
+
+    def __iter__(self) -> Iterator[SpooledFile]:
+        while True:
+            spooled = self.get()
+            if spooled is None:
+                return
+            yield spooled
+
+    def get(self, timeout: Optional[float] = None) -> Optional[SpooledFile]:
+        """Next received file; None once the upload is complete or aborted"""
+        if self._aborted:
+            return None
+        spooled = self._ready.get(timeout=timeout)
+        if spooled is None:
+            # Leave the marker for any other reader
+            self._ready.put(None)
+        return None if self._aborted else spooled
+
+    def get_nowait(self) -> Optional[SpooledFile]:
+        """A file that has already arrived, without waiting"""
+        try:
+            return self.get(timeout=0)
+        except queue.Empty:
+            return None
+
+    def release(self, spooled: SpooledFile):
+        """The consumer is done with a file: delete it and free its capacity"""
+        try:
+            os.unlink(spooled.path)
+        except FileNotFoundError:
+            pass
+        with self._capacity:
+            self._inflight_bytes -= spooled.size
+            self._unreleased -= 1
+            self._capacity.notify_all()
+
+    def abort(self):
+        """Stop both sides, e.g. when the client disconnects or processing fails"""
+        with self._capacity:
+            self._aborted = True
+            self._capacity.notify_all()
+        self._ready.put(None)
+
+    def cleanup(self):
+        """Remove the spool directory and anything still in it"""
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class MultipartSpoolParser:
+    """
+    Incremental multipart/form-data parser feeding an UploadSpool.
+
+    File parts are spooled to disk; other fields are collected in fields
+    (decoded as UTF-8). on_field is called when a field completes and
+    on_file when a file has been spooled.
+    """
+
+    def __init__(self, content_type: str, spool: UploadSpool,
+                 on_field: Optional[Callable[[str, str], None]] = None,
+                 on_file: Optional[Callable[[SpooledFile], None]] = None,
+                 max_field_bytes: int = UPLOAD_STREAM_MAX_FIELD_BYTES):
+        kind, params = parse_options_header(content_type or '')
+        boundary = params.get(b'boundary')
+        if kind != b'multipart/form-data' or not boundary:
+            raise UploadStreamError("Expected a multipart/form-data body with a boundary")
+
+        self.spool = spool
+        self.fields: Dict[str, str] = {}
+        self.on_field = on_field
+        self.on_file = on_file
+        self.max_field_bytes = max_field_bytes
+
+        self._header_field = b''
+        self._header_value = b''
+        self._headers: Dict[bytes, bytes] = {}
+        self._field_name: Optional[str] = None
+        self._field_value = bytearray()
+        self._is_file = False
+
+        self._parser = MultipartParser(boundary, {
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+        })
+
+    def write(self, chunk: bytes):
+        self._parser.write(chunk)
+
+    def finalize(self):
+        self._parser.finalize()
+        self.spool.close()
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._field_name = None
+        self._field_value = bytearray()
+        self._is_file = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b''
+        self._header_value = b''
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        self._field_name = options.get(b'name', b'').decode('utf-8', 'replace')
+        if b'filename' in options:
+            self._is_file = True
+            self.spool.begin_file(options[b'filename'].decode('utf-8', 'replace'))
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._is_file:
+            self.spool.write(data[start:end])
+            return
+        self._field_value += data[start:end]
+        if len(self._field_value) > self.max_field_bytes:
+            raise UploadStreamError(f"Form field '{self._field_name}' is too large")
+
+    def _on_part_end(self):
+        if self._is_file:
+            spooled = self.spool.end_file()
+            if spooled is not None and self.on_file:
+                self.on_file(spooled)
+            return
+        value = self._field_value.decode('utf-8', 'replace')
+        self.fields[self._field_name] = value
+        if self.on_field:
+            self.on_field(self._field_name, value)
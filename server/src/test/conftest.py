@@ -14,6 +14,9 @@ from sqlalchemy.pool import StaticPool
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 sys.path.insert(0, project_root)
 
+# Audit events go through the test's session, never a background writer
+os.environ.setdefault("EVENT_WRITER_MODE", "session")
+
 from server.src.database.core import Base, get_db
 from server.main import app
 
@@ -0,0 +1,97 @@
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from server.src.services.design_tagging_pipeline import (
+    DesignTaggingPipeline, TagCache, TagRequest, split_nas_path
+)
+
+
+class FakeTagger:
+    """Records batches and returns one result per image"""
+
+    enabled = True
+
+    def __init__(self):
+        self.batches = []
+
+    def generate_tags_batch(self, items):
+        self.batches.append([filename for _, filename in items])
+        return [{'tags': [f"tag-{filename}"], 'metadata': {'mode': 'ai'}} for _, filename in items]
+
+
+def _session_factory(rows=()):
+    """A session whose SELECT returns rows; records executed statements"""
+    session = Mock()
+    session.execute.return_value.all.return_value = list(rows)
+    return Mock(return_value=session), session
+
+
+def _request(index, phash, content=b"png"):
+    return TagRequest(design_id=f"design-{index}", user_id="user-1", phash=phash,
+                      filename=f"design-{index}.png", content=content)
+
+
+class TestDesignTaggingPipeline:
+    """Test suite for batched background tagging"""
+
+    def test_tags_batch_with_one_call_and_one_update(self):
+        tagger = FakeTagger()
+        factory, session = _session_factory()
+        pipeline = DesignTaggingPipeline(tagger=tagger, session_factory=factory)
+
+        results = pipeline.process([_request(i, f"{i:016x}" * 4) for i in range(3)])
+
+        assert tagger.batches == [["design-0.png", "design-1.png", "design-2.png"]]
+        assert [result['tags'] for result in results] == [["tag-design-0.png"], ["tag-design-1.png"], ["tag-design-2.png"]]
+
+        statement, rows = session.execute.call_args_list[-1].args
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE design_images SET tags=")
+        assert "design_images.tags IS NULL OR design_images.tags =" in sql
+        assert [row['design_id'] for row in rows] == ["design-0", "design-1", "design-2"]
+        session.commit.assert_called_once()
+
+    def test_reuses_tags_for_same_and_near_phash(self):
+        tagger = FakeTagger()
+        factory, _ = _session_factory()
+        pipeline = DesignTaggingPipeline(tagger=tagger, session_factory=factory)
+        phash = "f0" * 32
+
+        pipeline.process([_request(0, phash)])
+        near = phash[:-1] + "3"  # 2 bits away
+        results = pipeline.process([_request(1, phash), _request(2, near), _request(3, "0f" * 32)])
+
+        assert tagger.batches == [["design-0.png"], ["design-3.png"]]
+        assert results[0]['tags'] == results[1]['tags'] == ["tag-design-0.png"]
+        assert results[1]['metadata']['cached_from_phash'] == near
+        assert pipeline.cache_hits == 2
+
+    def test_reuses_tags_from_database(self):
+        tagger = FakeTagger()
+        phash = "ab" * 32
+        row = Mock(user_id="user-1", phash=phash, tags=["cat"], tags_metadata={'mode': 'ai'})
+        factory, _ = _session_factory([row])
+        pipeline = DesignTaggingPipeline(tagger=tagger, session_factory=factory)
+
+        results = pipeline.process([_request(0, phash)], dry_run=True)
+
+        assert tagger.batches == []
+        assert results[0]['tags'] == ["cat"]
+
+    def test_submit_drops_content_over_byte_cap(self):
+        pipeline = DesignTaggingPipeline(tagger=FakeTagger(), max_pending_bytes=5)
+        pipeline._ensure_started = lambda: None
+        first, second = _request(0, None, b"1234"), _request(1, None, b"1234")
+
+        assert pipeline.submit(first) and pipeline.submit(second)
+        assert first.content == b"1234"
+        assert second.content is None
+
+    def test_cache_is_per_user(self):
+        cache = TagCache(max_entries=2)
+        cache.set("user-1", "aa", {'tags': ["a"]})
+
+        assert cache.get("user-2", "aa") is None
+        assert cache.get("user-1", "ab")['tags'] == ["a"]
+
+    def test_split_nas_path(self):
+        assert split_nas_path("/share/Graphics/shop/UVDTF 16oz/a.png") == ("shop", "UVDTF 16oz/a.png")
@@ -0,0 +1,116 @@
+import asyncio
+import time
+import dns.resolver
+import pytest
+from types import SimpleNamespace
+from server.src.services import dns_verification_service as dns_service
+
+
+class FakeAnswer(list):
+    """Iterable of rdata with an rrset TTL, like dns.resolver.Answer"""
+
+    def __init__(self, rdatas, ttl=60):
+        super().__init__(rdatas)
+        self.rrset = SimpleNamespace(ttl=ttl)
+
+
+class FakeResolver:
+    """Async resolver answering from a table after a fixed delay"""
+
+    def __init__(self, records, delay=0.1):
+        self.records = records
+        self.delay = delay
+        self.queries = []
+
+    async def resolve(self, name, rdtype, lifetime=None):
+        self.queries.append((name, rdtype))
+        await asyncio.sleep(self.delay)
+        values = self.records.get((name, rdtype))
+        if values is None:
+            raise dns.resolver.NXDOMAIN()
+        if not values:
+            raise dns.resolver.NoAnswer()
+        return FakeAnswer([SimpleNamespace(target=f"{v}.") if rdtype == 'CNAME' else f'"{v}"' for v in values])
+
+
+class TestDNSVerificationService:
+    """Test suite for the async DNS verification layer"""
+
+    @pytest.fixture
+    def resolver(self, monkeypatch):
+        resolver = FakeResolver({
+            ("_craftflow-verify.shop.example.com", 'TXT'): [],
+            ("_craftflow-verify.example.com", 'TXT'): ["token-123"],
+            ("shop.example.com", 'CNAME'): ["stores.craftflow.store"],
+            ("shop.example.com", 'A'): ["203.0.113.10"],
+        })
+        dns_service.dns_cache.clear()
+        monkeypatch.setattr(dns_service, "_get_resolver", lambda nameserver: resolver)
+        yield resolver
+        dns_service.dns_cache.clear()
+
+    def test_txt_and_cname_lookups_run_concurrently(self, resolver):
+        """Both TXT names and the CNAME are resolved at the same time"""
+        start = time.monotonic()
+        result = dns_service.verify_domain_ownership("shop.example.com", "token-123")
+
+        assert result["verified"] is True
+        assert result["method"] == "dns_txt"
+        assert time.monotonic() - start < 0.2
+        assert len(resolver.queries) == 3
+
+    def test_answers_are_cached(self, resolver):
+        """Positive and negative answers are reused within their TTL"""
+        dns_service.verify_domain_ownership("shop.example.com", "token-123")
+        dns_service.verify_domain_ownership("shop.example.com", "token-123")
+
+        assert len(resolver.queries) == 3
+
+    def test_propagation_checks_servers_concurrently(self, resolver):
+        """Every public server is queried in parallel"""
+        start = time.monotonic()
+        result = dns_service.check_domain_propagation("shop.example.com")
+
+        assert result["fully_propagated"] is True
+        assert result["servers_checked"] == len(dns_service.PUBLIC_DNS_SERVERS)
+        assert time.monotonic() - start < 0.2
+
+    def test_timeouts_are_not_cached(self, monkeypatch):
+        """A timed out lookup is retried on the next check"""
+        calls = []
+
+        class TimeoutResolver:
+            async def resolve(self, name, rdtype, lifetime=None):
+                calls.append(name)
+                raise dns.exception.Timeout()
+
+        dns_service.dns_cache.clear()
+        monkeypatch.setattr(dns_service, "_get_resolver", lambda nameserver: TimeoutResolver())
+
+        first = asyncio.run(dns_service.resolve("example.com", 'TXT'))
+        asyncio.run(dns_service.resolve("example.com", 'TXT'))
+
+        assert first.status == "timeout"
+        assert len(calls) == 2
+
+    def test_record_verification_result(self):
+        """A successful result marks the storefront and its record verified"""
+        settings = SimpleNamespace(domain_verified=False)
+        verification = SimpleNamespace(attempts=1, last_checked_at=None, status="pending",
+                                       verified_at=None, error_message="old")
+
+        verified = dns_service.record_verification_result(None, settings, verification, {"verified": True})
+
+        assert verified is True
+        assert settings.domain_verified is True
+        assert verification.status == "verified"
+        assert verification.attempts == 2
+
+    def test_sync_wrapper_refuses_running_loop(self, resolver):
+        """The blocking wrapper can't be used from inside an event loop"""
+        async def handler():
+            return dns_service.verify_domain_ownership("shop.example.com", "token-123")
+
+        with pytest.raises(RuntimeError, match="running event loop"):
+            asyncio.run(handler())
+        assert resolver.queries == []
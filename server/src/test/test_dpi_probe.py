@@ -0,0 +1,68 @@
+import math
+import struct
+import zlib
+import pytest
+from io import BytesIO
+from PIL import Image
+from server.src.utils.util import DPI_PROBE_BYTES, get_dpi_from_image, probe_dpi, read_image_with_dpi
+
+
+def _encode(format, **params):
+    buffer = BytesIO()
+    Image.new("RGB", (8, 6), (200, 10, 10)).save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+def _pil_dpi(data):
+    with Image.open(BytesIO(data)) as img:
+        return img.info.get('dpi')
+
+
+def _exif_jpeg(x_resolution, unit):
+    exif = Image.Exif()
+    exif[0x011A] = x_resolution
+    exif[0x011B] = x_resolution
+    exif[0x0128] = unit
+    return _encode("JPEG", exif=exif.tobytes())
+
+
+def _with_text_chunk(png, size):
+    """Insert a large tEXt chunk right after IHDR, ahead of pHYs"""
+    text = b'Comment\x00' + b'x' * size
+    chunk = struct.pack('!I', len(text)) + b'tEXt' + text + struct.pack('!I', zlib.crc32(b'tEXt' + text))
+    return png[:33] + chunk + png[33:]
+
+
+class TestDpiProbe:
+    """Test suite for reading DPI from encoded image headers"""
+
+    @pytest.mark.parametrize("data", [
+        _encode("PNG", dpi=(300, 300)),
+        _encode("PNG", dpi=(72, 150)),
+        _encode("JPEG", dpi=(300, 300)),
+        _exif_jpeg(240, 2),
+        _exif_jpeg(100, 3),
+    ])
+    def test_matches_pil(self, data):
+        assert probe_dpi(data) == pytest.approx(_pil_dpi(data))
+
+    def test_missing_dpi(self):
+        assert probe_dpi(_encode("PNG")) is None
+        assert probe_dpi(b"GIF89a") is None
+        assert get_dpi_from_image(_encode("PNG")) == (400, 400)
+
+    def test_file_with_large_metadata(self, tmp_path):
+        path = tmp_path / "design.png"
+        data = _with_text_chunk(_encode("PNG", dpi=(150, 150)), DPI_PROBE_BYTES)
+        path.write_bytes(data)
+
+        assert get_dpi_from_image(str(path)) == get_dpi_from_image(data) == tuple(math.ceil(dpi) for dpi in _pil_dpi(data))
+
+    def test_read_image_with_dpi(self, tmp_path):
+        path = tmp_path / "design.png"
+        path.write_bytes(_encode("PNG", dpi=(300, 300)))
+
+        image, dpi = read_image_with_dpi(str(path))
+        assert image.shape == (6, 8, 3)
+        assert dpi == pytest.approx((300, 300), rel=1e-3)
+        assert read_image_with_dpi(str(tmp_path / "missing.png")) == (None, None)
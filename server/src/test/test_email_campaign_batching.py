@@ -0,0 +1,88 @@
+import uuid
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.orm import Session
+from server.src.entities.ecommerce.email_template import EmailTemplate
+from server.src.services import email_service as email_service_module
+from server.src.services.email_service import EmailService, UNSUBSCRIBE_URL_TAG
+
+
+class TestMarketingEmailBatching:
+    """Test suite for batched SendGrid campaign sends"""
+
+    @pytest.fixture
+    def template(self):
+        """Marketing template using the unsubscribe URL"""
+        template = Mock(spec=EmailTemplate)
+        template.id = uuid.uuid4()
+        template.subject = "Big sale"
+        template.logo_url = None
+        template.primary_color = "#000000"
+        template.secondary_color = "#ffffff"
+        template.blocks = [
+            {"type": "text", "content": "Hello!"},
+            {"type": "footer", "content": "<a href=\"{{unsubscribe_url}}\">Unsubscribe</a>"}
+        ]
+        return template
+
+    @pytest.fixture
+    def service(self, template, monkeypatch):
+        """Enabled EmailService with mocked SendGrid client and session"""
+        monkeypatch.setenv("ENABLE_EMAIL_SERVICE", "true")
+        db = Mock(spec=Session)
+        db.query.return_value.filter.return_value.first.return_value = template
+        service = EmailService(api_key="test-key", db=db)
+
+        response = Mock()
+        response.headers = {"X-Message-Id": "batch-message"}
+        service.sg = Mock()
+        service.sg.send.return_value = response
+        return service
+
+    def test_sends_in_batches_of_personalizations(self, service, monkeypatch):
+        """Recipients are split into batches with one personalization each"""
+        monkeypatch.setattr(email_service_module, "CAMPAIGN_BATCH_SIZE", 2)
+        recipients = [f"user{i}@example.com" for i in range(5)]
+
+        logs = service.send_marketing_email(uuid.uuid4(), uuid.uuid4(), recipients)
+
+        assert service.sg.send.call_count == 3
+        sent_to = []
+        for call in service.sg.send.call_args_list:
+            body = call.args[0].get()
+            # Rendered once with the tag; each recipient gets its own substitution
+            assert UNSUBSCRIBE_URL_TAG in body["content"][0]["value"]
+            for personalization in body["personalizations"]:
+                sent_to.append(personalization["to"][0]["email"])
+                assert personalization["substitutions"][UNSUBSCRIBE_URL_TAG].endswith(personalization["to"][0]["email"])
+                assert "email_log_id" in personalization["custom_args"]
+        assert sorted(sent_to) == sorted(recipients)
+        assert len(logs) == 5
+        assert all(log.sendgrid_status == "sent" for log in logs)
+
+    def test_bulk_writes_per_batch(self, service, monkeypatch):
+        """Each batch costs one log insert and one subscriber update"""
+        monkeypatch.setattr(email_service_module, "CAMPAIGN_BATCH_SIZE", 3)
+
+        service.send_marketing_email(uuid.uuid4(), uuid.uuid4(), [f"u{i}@example.com" for i in range(6)])
+
+        # 2 batches x (insert + update)
+        assert service.db.execute.call_count == 4
+        service.db.add.assert_not_called()
+
+    def test_failed_batch_is_logged_without_counter_update(self, service):
+        """A SendGrid failure marks every recipient in the batch failed"""
+        service.sg.send.side_effect = Exception("SendGrid down")
+
+        logs = service.send_marketing_email(uuid.uuid4(), uuid.uuid4(), ["a@example.com", "b@example.com"])
+
+        assert [log.sendgrid_status for log in logs] == ["failed", "failed"]
+        assert all(log.error_message == "SendGrid down" for log in logs)
+        # Only the log insert, no subscriber update
+        assert service.db.execute.call_count == 1
+
+    def test_duplicate_recipients_sent_once(self, service):
+        """Duplicate addresses are collapsed before sending"""
+        logs = service.send_marketing_email(uuid.uuid4(), uuid.uuid4(), ["a@example.com", "a@example.com"])
+
+        assert len(logs) == 1
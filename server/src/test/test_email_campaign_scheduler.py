@@ -0,0 +1,105 @@
+import time
+import uuid
+import pytest
+from unittest.mock import MagicMock, Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from server.src.entities.ecommerce.scheduled_email import ScheduledEmail
+from server.src.services import email_campaign_scheduler as scheduler
+from server.src.services.email_campaign_scheduler import SenderThrottle, claim_due_campaigns, execute_campaign
+
+
+class TestEmailCampaignScheduler:
+    """Test suite for the worker email campaign scheduler"""
+
+    @pytest.fixture
+    def campaign(self):
+        """Claimed campaign"""
+        campaign = ScheduledEmail(
+            id=uuid.uuid4(), user_id=uuid.uuid4(), template_id=uuid.uuid4(),
+            recipient_filter={"tags": ["vip"]}, status="processing"
+        )
+        return campaign
+
+    @pytest.fixture
+    def db(self):
+        """Session whose log queries report one already-sent recipient"""
+        db = MagicMock(spec=Session)
+        logs = db.query.return_value.filter.return_value
+        logs.__iter__.return_value = iter([("sent@example.com",)])
+        db.query.return_value.select_from.return_value.one.return_value = (3, 0)
+        return db
+
+    @pytest.fixture(autouse=True)
+    def no_heartbeat(self, monkeypatch):
+        """Heartbeat sessions are not used by these tests"""
+        monkeypatch.setattr(scheduler, "SessionLocal", lambda: Mock(spec=Session))
+
+    def test_claim_uses_skip_locked(self):
+        """Due campaigns are claimed with FOR UPDATE SKIP LOCKED and leased"""
+        db = Mock(spec=Session)
+        campaign_id = uuid.uuid4()
+        db.execute.return_value.scalars.return_value.all.return_value = [campaign_id]
+
+        claimed = claim_due_campaigns(db, "worker-1")
+
+        select_sql = str(db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+        assert "FOR UPDATE SKIP LOCKED" in select_sql
+        assert "locked_until IS NULL" in select_sql
+        assert claimed == [campaign_id]
+        db.commit.assert_called_once()
+
+    def test_resume_skips_recipients_already_sent(self, campaign, db, monkeypatch):
+        """A resumed campaign only sends to recipients without an email log"""
+        sent_chunks = []
+        monkeypatch.setattr(scheduler, "resolve_recipients",
+                            lambda c, s: ["a@example.com", "sent@example.com", "b@example.com"])
+        monkeypatch.setattr(scheduler, "_send_chunk", lambda cid, uid, tid, chunk: sent_chunks.append(chunk))
+
+        execute_campaign(campaign, db, "worker-1")
+
+        assert sent_chunks == [["a@example.com", "b@example.com"]]
+        assert campaign.status == "completed"
+        assert campaign.sent_count == 3
+        assert campaign.locked_by is None
+
+    def test_resume_retries_failed_sends(self, campaign, db, monkeypatch):
+        """Recipients whose only log is a failed send are not treated as sent"""
+        monkeypatch.setattr(scheduler, "resolve_recipients", lambda c, s: [])
+
+        execute_campaign(campaign, db, "worker-1")
+
+        criteria = db.query.return_value.filter.call_args_list[0].args
+        sql = " ".join(str(c.compile(dialect=postgresql.dialect())) for c in criteria)
+        assert "sendgrid_status IS NULL OR" in sql and "sendgrid_status !=" in sql
+
+    def test_recipients_split_into_parallel_chunks(self, campaign, db, monkeypatch):
+        """Recipients are sent in chunks of EMAIL_CAMPAIGN_CHUNK_SIZE"""
+        sent_chunks = []
+        monkeypatch.setattr(scheduler, "EMAIL_CAMPAIGN_CHUNK_SIZE", 2)
+        monkeypatch.setattr(scheduler, "resolve_recipients", lambda c, s: [f"u{i}@example.com" for i in range(5)])
+        monkeypatch.setattr(scheduler, "_send_chunk", lambda cid, uid, tid, chunk: sent_chunks.append(chunk))
+
+        execute_campaign(campaign, db, "worker-1")
+
+        assert sorted(len(chunk) for chunk in sent_chunks) == [1, 2, 2]
+
+    def test_failed_campaign_releases_lease(self, campaign, db, monkeypatch):
+        """An error marks the campaign failed and clears the lease"""
+        monkeypatch.setattr(scheduler, "resolve_recipients", Mock(side_effect=RuntimeError("db gone")))
+
+        with pytest.raises(RuntimeError):
+            execute_campaign(campaign, db, "worker-1")
+
+        assert campaign.status == "failed"
+        assert campaign.locked_until is None
+
+    def test_sender_throttle_limits_rate(self):
+        """The token bucket delays sends beyond the burst"""
+        throttle = SenderThrottle(rate=100, burst=10)
+
+        start = time.monotonic()
+        throttle.acquire(10)
+        throttle.acquire(10)
+
+        assert time.monotonic() - start >= 0.09
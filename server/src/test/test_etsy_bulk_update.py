@@ -0,0 +1,148 @@
+import pytest
+from unittest.mock import Mock
+import requests
+from server.src.services.etsy_bulk_update import (
+    EtsyBulkUpdater,
+    BulkUpdateJobStore,
+    BulkUpdateJobNotFoundError,
+    RateBudget
+)
+
+
+def _response(status_code, payload=None, headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.json.return_value = payload or {}
+    response.headers = headers or {}
+    response.text = ""
+    return response
+
+
+class TestEtsyBulkUpdater:
+    """Test suite for the concurrent Etsy bulk updater"""
+
+    @pytest.fixture
+    def job_store(self, monkeypatch):
+        """In-memory checkpoint store"""
+        monkeypatch.delenv('REDIS_URL', raising=False)
+        return BulkUpdateJobStore()
+
+    @pytest.fixture
+    def etsy_api(self):
+        """Mock authenticated EtsyAPI"""
+        api = Mock()
+        api.shop_id = "test-shop"
+        api.user_id = "test-user"
+        api.send_listing_update.side_effect = lambda listing_id, data: _response(200, {"listing_id": listing_id, **data})
+        return api
+
+    def test_updates_all_listings(self, etsy_api, job_store):
+        """Every listing is updated and reported"""
+        updater = EtsyBulkUpdater(etsy_api, job_store=job_store, max_workers=4)
+        updates = [{"listing_id": i, "title": f"Title {i}"} for i in range(10)]
+
+        result = updater.run(updates)
+
+        assert result["total"] == 10
+        assert len(result["successful"]) == 10
+        assert result["failed"] == []
+        assert etsy_api.send_listing_update.call_count == 10
+        # listing_id is not sent as part of the PATCH body
+        for call in etsy_api.send_listing_update.call_args_list:
+            assert "listing_id" not in call.args[1]
+
+    def test_retries_transient_errors(self, etsy_api, job_store, monkeypatch):
+        """429/5xx responses are retried and eventually succeed"""
+        monkeypatch.setattr('server.src.services.etsy_bulk_update.time.sleep', lambda s: None)
+        responses = iter([_response(503), _response(429, headers={"retry-after": "0"}), _response(200, {"listing_id": 1})])
+        etsy_api.send_listing_update.side_effect = lambda listing_id, data: next(responses)
+
+        updater = EtsyBulkUpdater(etsy_api, job_store=job_store, max_workers=1)
+        result = updater.run([{"listing_id": 1, "title": "x"}])
+
+        assert len(result["successful"]) == 1
+        assert etsy_api.send_listing_update.call_count == 3
+
+    def test_client_errors_are_not_retried(self, etsy_api, job_store):
+        """4xx responses fail immediately"""
+        etsy_api.send_listing_update.side_effect = lambda listing_id, data: _response(400)
+
+        updater = EtsyBulkUpdater(etsy_api, job_store=job_store, max_workers=1)
+        result = updater.run([{"listing_id": 1, "title": "x"}])
+
+        assert len(result["failed"]) == 1
+        assert etsy_api.send_listing_update.call_count == 1
+
+    def test_network_errors_exhaust_retries(self, etsy_api, job_store, monkeypatch):
+        """Network errors are retried up to max_retries"""
+        monkeypatch.setattr('server.src.services.etsy_bulk_update.time.sleep', lambda s: None)
+        etsy_api.send_listing_update.side_effect = requests.ConnectionError("boom")
+
+        updater = EtsyBulkUpdater(etsy_api, job_store=job_store, max_workers=1, max_retries=2)
+        result = updater.run([{"listing_id": 1, "title": "x"}])
+
+        assert len(result["failed"]) == 1
+        assert etsy_api.send_listing_update.call_count == 3
+
+    def test_resume_skips_finished_listings(self, etsy_api, job_store):
+        """Re-running a job only updates listings without a successful checkpoint"""
+        updates = [{"listing_id": i, "title": "x"} for i in range(5)]
+        job_store.create_job("job-1", "test-user", 5)
+        job_store.record_result("job-1", 0, {"listing_id": 0, "success": True, "data": {}})
+        job_store.record_result("job-1", 1, {"listing_id": 1, "success": True, "data": {}})
+        job_store.record_result("job-1", 2, {"listing_id": 2, "success": False, "error": "x"})
+
+        updater = EtsyBulkUpdater(etsy_api, job_store=job_store, max_workers=2)
+        result = updater.run(updates, job_id="job-1")
+
+        assert result["job_id"] == "job-1"
+        assert len(result["successful"]) == 5
+        updated_ids = sorted(call.args[0] for call in etsy_api.send_listing_update.call_args_list)
+        assert updated_ids == [2, 3, 4]
+
+    def test_resume_rejects_other_users_job(self, etsy_api, job_store):
+        """A job_id belonging to another user cannot be resumed"""
+        job_store.create_job("job-2", "other-user", 1)
+        job_store.record_result("job-2", 0, {"listing_id": 0, "success": True, "data": {}})
+
+        updater = EtsyBulkUpdater(etsy_api, job_store=job_store)
+        with pytest.raises(BulkUpdateJobNotFoundError):
+            updater.run([{"listing_id": 0, "title": "x"}], job_id="job-2")
+
+        etsy_api.send_listing_update.assert_not_called()
+        assert job_store.get_meta("job-2")["user_id"] == "other-user"
+
+    def test_progress_callback_per_listing(self, etsy_api, job_store):
+        """Progress is reported once per finished listing"""
+        progress = []
+        updater = EtsyBulkUpdater(etsy_api, job_store=job_store, max_workers=3)
+
+        updater.run(
+            [{"listing_id": i, "title": "x"} for i in range(6)],
+            progress_callback=lambda done, total, result: progress.append((done, total))
+        )
+
+        assert sorted(done for done, _ in progress) == [1, 2, 3, 4, 5, 6]
+        assert all(total == 6 for _, total in progress)
+
+
+class TestRateBudget:
+    """Test suite for the token bucket"""
+
+    def test_burst_then_throttle(self, monkeypatch):
+        """Tokens up to capacity are free, after that callers wait"""
+        sleeps = []
+        clock = [0.0]
+        monkeypatch.setattr('server.src.services.etsy_bulk_update.time.monotonic', lambda: clock[0])
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        monkeypatch.setattr('server.src.services.etsy_bulk_update.time.sleep', fake_sleep)
+
+        budget = RateBudget(rate_per_second=2, burst=2)
+        for _ in range(4):
+            budget.acquire()
+
+        assert sleeps == [0.5, 0.5]
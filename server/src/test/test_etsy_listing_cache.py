@@ -0,0 +1,115 @@
+import pytest
+import requests
+from unittest.mock import Mock
+from server.src.utils.etsy_api_engine import EtsyAPI
+from server.src.utils.etsy_listing_cache import ListingSnapshotStore
+
+
+def _page_response(listings, count, status_code=200, headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.json.return_value = {"results": listings, "count": count}
+    response.headers = headers or {}
+    response.raise_for_status = Mock()
+    return response
+
+
+class TestEtsyListingSnapshots:
+    """Test suite for concurrent listing retrieval and local snapshots"""
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        """Snapshot store in a temp directory"""
+        store = ListingSnapshotStore(cache_dir=str(tmp_path))
+        monkeypatch.setattr('server.src.utils.etsy_listing_cache.listing_snapshot_store', store)
+        return store
+
+    @pytest.fixture
+    def etsy_api(self):
+        """EtsyAPI without running the OAuth/shop bootstrap in __init__"""
+        api = EtsyAPI.__new__(EtsyAPI)
+        api.session = Mock(spec=requests.Session)
+        api.client_id = "client"
+        api.oauth_token = "token"
+        api.token_expiry = float("inf")
+        api.base_url = "https://openapi.etsy.com/v3"
+        api.shop_id = "shop-1"
+        return api
+
+    def _listings(self, start, end):
+        return [
+            {"listing_id": i, "last_modified_timestamp": 1000 + i, "images": [{"listing_image_id": i}]}
+            for i in range(start, end)
+        ]
+
+    def test_full_pull_pages_with_embedded_images(self, etsy_api, store):
+        """All pages are fetched with includes=Images and no per-listing image calls"""
+        pages = {0: self._listings(0, 100), 100: self._listings(100, 200), 200: self._listings(200, 250)}
+        etsy_api.session.get.side_effect = lambda url, headers, params, timeout: _page_response(pages[params["offset"]], 250)
+
+        result = etsy_api.get_all_shop_listings(state="active")
+
+        assert result["count"] == 250
+        assert [l["listing_id"] for l in result["results"]] == list(range(250))
+        assert etsy_api.session.get.call_count == 3
+        for call in etsy_api.session.get.call_args_list:
+            assert call.kwargs["params"]["includes"] == "Images"
+            assert "/images" not in call.args[0]
+
+    def test_repeat_load_served_from_snapshot(self, etsy_api, store):
+        """A fresh snapshot answers repeat loads without calling Etsy"""
+        etsy_api.session.get.return_value = _page_response(self._listings(0, 10), 10)
+        etsy_api.get_all_shop_listings(state="active")
+        etsy_api.session.get.reset_mock()
+
+        result = etsy_api.get_all_shop_listings(state="active")
+        page = etsy_api.get_shop_listings(state="active", limit=5, offset=5)
+
+        assert result["count"] == 10
+        assert [l["listing_id"] for l in page["results"]] == [5, 6, 7, 8, 9]
+        etsy_api.session.get.assert_not_called()
+
+    def test_stale_snapshot_revalidated_with_one_request(self, etsy_api, store, monkeypatch):
+        """A stale but unchanged snapshot costs a single revalidation request"""
+        etsy_api.session.get.return_value = _page_response(self._listings(0, 10), 10, headers={"ETag": '"abc"'})
+        etsy_api.get_all_shop_listings(state="active")
+        monkeypatch.setattr(store, "is_fresh", lambda snapshot: False)
+        etsy_api.session.get.reset_mock()
+        etsy_api.session.get.return_value = _page_response([], 0, status_code=304)
+
+        result = etsy_api.get_all_shop_listings(state="active")
+
+        assert result["count"] == 10
+        assert etsy_api.session.get.call_count == 1
+        assert etsy_api.session.get.call_args.kwargs["headers"]["If-None-Match"] == '"abc"'
+
+    def test_changed_listings_trigger_refetch(self, etsy_api, store, monkeypatch):
+        """A newer last_modified_timestamp invalidates the snapshot"""
+        etsy_api.session.get.return_value = _page_response(self._listings(0, 10), 10)
+        etsy_api.get_all_shop_listings(state="active")
+        monkeypatch.setattr(store, "is_fresh", lambda snapshot: False)
+
+        updated = self._listings(0, 10)
+        updated[3]["last_modified_timestamp"] = 99999
+        etsy_api.session.get.reset_mock()
+        etsy_api.session.get.return_value = None
+        etsy_api.session.get.side_effect = lambda url, headers, params, timeout: _page_response(
+            [updated[3]] if params.get("sort_on") == "updated" else updated, 10
+        )
+
+        result = etsy_api.get_all_shop_listings(state="active")
+
+        assert etsy_api.session.get.call_count == 2  # revalidation + full pull
+        assert result["results"][3]["last_modified_timestamp"] == 99999
+
+    def test_missing_images_use_batch_endpoint(self, etsy_api):
+        """Listings without embedded images are resolved 100 at a time"""
+        listings = [{"listing_id": i} for i in range(150)]
+        etsy_api.session.get.side_effect = lambda url, headers, params, timeout: _page_response(
+            [{"listing_id": int(i), "images": [{"listing_image_id": int(i)}]} for i in params["listing_ids"].split(",")], 0
+        )
+
+        etsy_api._add_images_to_listings(listings, {})
+
+        assert etsy_api.session.get.call_count == 2
+        assert all(l["images"] for l in listings)
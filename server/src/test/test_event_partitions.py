@@ -0,0 +1,85 @@
+from datetime import datetime
+from unittest.mock import Mock
+from sqlalchemy.orm import Session
+from server.src.services import event_partitions
+from server.src.services.event_partitions import add_months, partition_name, parse_partition_name
+
+
+class TestEventPartitions:
+    """Test suite for monthly event partition maintenance"""
+
+    def _db(self, partitions, oldest_default=None, default_months=()):
+        """Session whose catalog lists the given partition names and whose
+        events_default holds rows from oldest_default in default_months"""
+        db = Mock(spec=Session)
+        statements = []
+
+        def execute(stmt, params=None):
+            sql = str(stmt)
+            statements.append(sql)
+            result = Mock()
+            result.scalars.return_value.all.return_value = partitions
+            result.scalar.return_value = oldest_default if "MIN(created_at)" in sql else 10
+            result.rowcount = 0
+            if "child.relname = :name" in sql:
+                result.first.return_value = (1,) if params['name'] in partitions else None
+            elif "FROM events_default WHERE" in sql and "LIMIT 1" in sql:
+                result.first.return_value = (1,) if params['start'] in default_months else None
+            return result
+
+        db.execute.side_effect = execute
+        db.statements = statements
+        return db
+
+    def test_month_arithmetic_and_names(self):
+        """Partition names round-trip and months roll over years"""
+        assert add_months(datetime(2024, 11, 1), 3) == datetime(2025, 2, 1)
+        assert add_months(datetime(2024, 1, 1), -1) == datetime(2023, 12, 1)
+        assert partition_name(datetime(2025, 2, 1)) == "events_y2025m02"
+        assert parse_partition_name("events_y2025m02") == datetime(2025, 2, 1)
+        assert parse_partition_name("events_default") is None
+
+    def test_ensure_partitions_creates_missing_months(self):
+        """Only months without a partition are created"""
+        db = self._db(["events_y2025m01", "events_default"])
+
+        created = event_partitions.ensure_partitions(db, months_ahead=2, now=datetime(2025, 1, 15))
+
+        assert created == ["events_y2025m02", "events_y2025m03"]
+        assert any("FROM ('2025-03-01') TO ('2025-04-01')" in sql for sql in db.statements)
+        assert not any("ATTACH PARTITION" in sql for sql in db.statements)
+
+    def test_rows_in_default_moved_into_new_partition(self):
+        """A month with rows in events_default is created by moving them and attaching"""
+        db = self._db(["events_y2025m03", "events_default"], oldest_default=datetime(2025, 1, 20),
+                      default_months=[datetime(2025, 1, 1)])
+
+        created = event_partitions.ensure_partitions(db, months_ahead=0, now=datetime(2025, 3, 15))
+
+        assert created == ["events_y2025m01", "events_y2025m02"]
+        january = [sql for sql in db.statements if "events_y2025m01" in sql]
+        assert "DELETE FROM events_default" in january[1]
+        assert "ATTACH PARTITION events_y2025m01" in january[2]
+        assert any("events_y2025m02 PARTITION OF events" in sql for sql in db.statements)
+
+    def test_drops_only_fully_expired_months(self):
+        """Months overlapping the retention window are kept"""
+        db = self._db(["events_y2025m03", "events_y2025m01", "events_y2025m02", "events_default"])
+
+        removed = event_partitions.drop_expired_partitions(db, days_to_keep=30, now=datetime(2025, 3, 15))
+
+        drops = [sql for sql in db.statements if sql.startswith("DROP TABLE")]
+        assert drops == ["DROP TABLE events_y2025m01"]
+        assert removed == 10
+        assert any(sql.startswith("DELETE FROM events_default WHERE created_at < :cutoff") for sql in db.statements)
+
+    def test_partition_detached_and_archived_before_drop(self):
+        """Retained event types are copied out of a detached partition"""
+        db = self._db(["events_y2025m01"])
+
+        event_partitions.drop_expired_partitions(db, days_to_keep=1, now=datetime(2025, 6, 1))
+
+        detach = next(i for i, sql in enumerate(db.statements) if "DETACH PARTITION" in sql)
+        archive = next(i for i, sql in enumerate(db.statements) if "events_archive" in sql)
+        drop = next(i for i, sql in enumerate(db.statements) if sql.startswith("DROP TABLE"))
+        assert detach < archive < drop
@@ -0,0 +1,130 @@
+import time
+import threading
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.orm import Session
+from server.src.routes.events import model
+from server.src.routes.events import service as event_service_module
+from server.src.routes.events.service import EventService
+from server.src.services.event_writer import AuditEventWriter
+
+
+class TestAuditEventWriter:
+    """Test suite for the buffered audit event writer"""
+
+    @pytest.fixture
+    def sessions(self):
+        """Session factory recording the rows of every insert"""
+        batches = []
+
+        def factory():
+            db = Mock(spec=Session)
+            db.execute.side_effect = lambda stmt, rows: batches.append(list(rows))
+            return db
+
+        factory.batches = batches
+        return factory
+
+    def test_sync_mode_writes_immediately(self, sessions):
+        """Sync mode inserts each event before returning"""
+        writer = AuditEventWriter(mode='sync', session_factory=sessions)
+
+        event = writer.submit(event_type='user_login', entity_type='User')
+
+        assert len(sessions.batches) == 1
+        assert sessions.batches[0][0]['id'] == event.id
+        assert event.created_at is not None
+
+    def test_async_mode_batches_events(self, sessions):
+        """Events submitted together are written in one multi-row insert"""
+        writer = AuditEventWriter(mode='async', batch_size=100, flush_interval=0.2, session_factory=sessions)
+
+        events = [writer.submit(event_type='file_upload') for _ in range(25)]
+        assert writer.flush(timeout=5)
+        writer.stop()
+
+        assert len(sessions.batches) == 1
+        assert [row['id'] for row in sessions.batches[0]] == [e.id for e in events]
+
+    def test_batch_size_triggers_flush(self, sessions):
+        """A full batch is written without waiting for the interval"""
+        writer = AuditEventWriter(mode='async', batch_size=10, flush_interval=30, session_factory=sessions)
+
+        for _ in range(20):
+            writer.submit(event_type='file_upload')
+        assert writer.flush(timeout=5)
+        writer.stop()
+
+        assert [len(batch) for batch in sessions.batches] == [10, 10]
+
+    def test_full_buffer_falls_back_to_sync_write(self, sessions):
+        """Backpressure writes in the caller rather than dropping events"""
+        release = threading.Event()
+        writes = []
+
+        def slow_factory():
+            db = Mock(spec=Session)
+
+            def execute(stmt, rows):
+                release.wait(5)
+                writes.append(len(rows))
+            db.execute.side_effect = execute
+            return db
+
+        writer = AuditEventWriter(mode='async', batch_size=1, flush_interval=0.01,
+                                  max_pending=1, session_factory=slow_factory)
+        first = threading.Thread(target=lambda: [writer.submit(event_type='a') for _ in range(3)])
+        first.start()
+        time.sleep(0.3)
+        release.set()
+        first.join(5)
+        assert writer.flush(timeout=5)
+        writer.stop()
+
+        assert sum(writes) == 3
+
+    def test_failed_batches_are_retried(self, monkeypatch):
+        """A transient database error doesn't lose the batch"""
+        monkeypatch.setattr('server.src.services.event_writer.time.sleep', lambda s: None)
+        attempts = []
+
+        def factory():
+            db = Mock(spec=Session)
+
+            def execute(stmt, rows):
+                attempts.append(len(rows))
+                if len(attempts) == 1:
+                    raise RuntimeError("connection reset")
+            db.execute.side_effect = execute
+            return db
+
+        writer = AuditEventWriter(mode='sync', session_factory=factory)
+        writer._write_with_retry([writer.build_row(event_type='a')])
+
+        assert attempts == [1, 1]
+        assert writer.written_count == 1
+
+    def test_session_mode_writes_through_caller_session(self, sessions, monkeypatch):
+        """By default EventService.create_event commits with the caller's session"""
+        writer = AuditEventWriter(mode='session', session_factory=sessions)
+        monkeypatch.setattr(event_service_module, 'audit_event_writer', writer)
+        db = Mock(spec=Session)
+
+        event = EventService.create_event(db, None, None, model.EventCreate(event_type='api_call'))
+
+        assert db.execute.call_args.args[1][0]['id'] == event.id
+        db.commit.assert_called_once()
+        assert sessions.batches == []
+
+    def test_sync_mode_does_not_use_request_session(self, sessions, monkeypatch):
+        """In sync mode EventService.create_event leaves the caller's session untouched"""
+        writer = AuditEventWriter(mode='sync', session_factory=sessions)
+        monkeypatch.setattr(event_service_module, 'audit_event_writer', writer)
+        db = Mock(spec=Session)
+
+        event = EventService.create_event(db, None, None, model.EventCreate(event_type='api_call'))
+
+        assert event.event_type == 'api_call'
+        db.add.assert_not_called()
+        db.commit.assert_not_called()
+        assert len(sessions.batches) == 1
@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+from server.src.services.print_raster_cache import PrintRasterCache
+from server.src.utils import gangsheet_engine
+
+
+class TestGangSheetLayers:
+    """Test suite for layer data of repeated gang sheet items"""
+
+    def test_copies_share_one_scaled_image(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(gangsheet_engine, "print_raster_cache", PrintRasterCache(str(tmp_path / "cache"), max_bytes=0))
+        saved = []
+        monkeypatch.setattr(gangsheet_engine, "save_image_with_format",
+                            lambda image, folder, name, **kwargs: saved.append(kwargs['placed_images']))
+        resizes = []
+        real_resize = cv2.resize
+        monkeypatch.setattr(gangsheet_engine.cv2, "resize",
+                            lambda image, size, **kwargs: resizes.append(size) or real_resize(image, size, **kwargs))
+
+        design = np.zeros((10, 20, 4), dtype=np.uint8)
+        design[:, :, 3] = 255
+        path = str(tmp_path / "design.png")
+        cv2.imwrite(path, design)
+
+        gangsheet_engine.create_gang_sheets(
+            {'Title': [path], 'Size': ['UVDTF 16oz'], 'Total': [5]}, 'UVDTF 16oz', str(tmp_path / "out") + "/", 5,
+            max_width_inches=1, max_height_inches=1, spacing_width_inches=0.01, spacing_height_inches=0.01,
+            dpi=100, std_dpi=50, file_format='SVG'
+        )
+
+        layers = saved[0]
+        assert len(layers) == 5
+        assert all(layer['image_data'] is layers[0]['image_data'] for layer in layers)
+        assert layers[0]['image_data'].shape[:2] == (10, 5)
+        # One resize for the sheet and one for the design, not one per copy
+        assert resizes.count((5, 10)) == 1
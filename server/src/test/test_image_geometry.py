@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+from types import SimpleNamespace
+from io import BytesIO
+from PIL import Image
+from server.src.utils.cropping import crop_transparent
+from server.src.utils.image_geometry import ImageGeometry, measure_array, measure_image
+
+
+def _design(width=40, height=30):
+    """BGRA image with an opaque block at x 5..14, y 10..21"""
+    image = np.zeros((height, width, 4), dtype=np.uint8)
+    image[10:22, 5:15] = (10, 20, 30, 255)
+    return image
+
+
+def _png(image, dpi, compress_level=6):
+    buffer = BytesIO()
+    Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)).save(
+        buffer, format="PNG", dpi=dpi, compress_level=compress_level)
+    return buffer.getvalue()
+
+
+class TestImageGeometry:
+    """Test suite for geometry recorded at ingest"""
+
+    def test_measure_array(self):
+        geometry = measure_array(_design(), (300, 300))
+
+        assert (geometry.width_px, geometry.height_px, geometry.channels) == (40, 30, 4)
+        assert geometry.alpha_bbox == [5, 10, 10, 12]
+        assert geometry.size_inches == (40 / 300, 30 / 300)
+
+    def test_alpha_bbox_edge_cases(self):
+        assert measure_array(np.zeros((8, 6, 4), dtype=np.uint8)).alpha_bbox is None
+        assert measure_array(np.zeros((8, 6, 3), dtype=np.uint8)).alpha_bbox == [0, 0, 6, 8]
+
+    def test_bbox_crop_matches_alpha_scan(self):
+        image = _design()
+        bbox = measure_array(image).alpha_bbox
+
+        assert np.array_equal(crop_transparent(image=image, bbox=bbox), crop_transparent(image=image))
+
+    def test_content_hash_survives_reencoding(self):
+        image = _design()
+        fast = measure_image(_png(image, (400, 400), compress_level=1))
+        small = measure_image(_png(image, (400, 400), compress_level=9))
+        changed = image.copy()
+        changed[0, 0, 3] = 1
+
+        assert fast.content_hash == small.content_hash == measure_array(image).content_hash
+        assert measure_array(changed).content_hash != fast.content_hash
+        assert round(fast.dpi_x) == 400
+
+    def test_from_row(self):
+        row = SimpleNamespace(width_px=10, height_px=20, dpi_x=None, dpi_y=300.0, channels=4,
+                              alpha_bbox=[1, 2, 3, 4], content_hash="ab")
+        geometry = ImageGeometry.from_row(row)
+
+        assert (geometry.dpi_x, geometry.dpi_y, geometry.alpha_bbox) == (400, 300.0, [1, 2, 3, 4])
+        assert ImageGeometry.from_row(SimpleNamespace(width_px=None, height_px=None)) is None
+
@@ -0,0 +1,117 @@
+import cv2
+import imagehash
+import numpy as np
+import pytest
+from datetime import datetime
+from io import BytesIO
+from unittest.mock import Mock
+from PIL import Image
+from server.src.services import image_upload_workflow as workflow_module
+from server.src.services.image_process_pool import ImageProcessPool, RenderResult, RenderSpec, render_image
+from server.src.services.image_upload_workflow import ImageUploadWorkflow, UploadedImage
+from server.src.services.sizing_registry import SizingConfigRegistry
+from server.src.utils.resizing import get_default_configs
+
+
+def _png(width=600, height=400):
+    """Opaque rectangle on a transparent background"""
+    image = np.zeros((height, width, 4), np.uint8)
+    image[50:height - 50, 80:width - 80] = (30, 120, 240, 255)
+    image[100:200, 150:300] = (250, 250, 250, 255)
+    return cv2.imencode('.png', image)[1].tobytes()
+
+
+def _spec():
+    canvas, sizing = get_default_configs()
+    return RenderSpec("UVDTF 16oz", sizing, canvas, filename="design.png")
+
+
+def _upload(content, name="design.png"):
+    return UploadedImage(original_filename=name, content=content, size=len(content),
+                         upload_time=datetime.now(), user_id="user-1")
+
+
+class TestImageProcessPool:
+    """Test suite for the image process pool"""
+
+    def test_render_image_encodes_and_hashes(self):
+        """The rendered PNG is resized to the sizing config and hashed"""
+        result = render_image(_png(), _spec())
+
+        rendered = Image.open(BytesIO(result.content))
+        assert result.error is None
+        assert rendered.size == (result.output_shape[1], result.output_shape[0])
+        assert result.phash == str(imagehash.phash(rendered, hash_size=16))
+
+    def test_pool_renders_from_shared_memory_in_order(self):
+        """Results come back in input order and bad images fail individually"""
+        pool = ImageProcessPool(workers=2, start_method="fork")
+        try:
+            results = pool.render([(_png(), _spec()), (b"not an image", _spec()), (_png(300, 300), _spec())])
+        finally:
+            pool.shutdown()
+
+        assert results[0].error is None
+        assert results[1].error == "Could not decode image from content"
+        assert results[2].error is None
+        assert results[0].phash == render_image(_png(), _spec()).phash
+
+    def test_pool_reads_spooled_files(self, tmp_path):
+        """A file path is read from disk into shared memory like bytes"""
+        spooled = tmp_path / "upload"
+        spooled.write_bytes(_png())
+        pool = ImageProcessPool(workers=1, start_method="fork")
+        try:
+            results = pool.render([(str(spooled), _spec()), (_png(300, 300), _spec())])
+        finally:
+            pool.shutdown()
+
+        assert [result.error for result in results] == [None, None]
+        assert results[0].phash == render_image(_png(), _spec()).phash
+
+
+class TestImageUploadWorkflowBackend:
+    """Test suite for how the workflow uses the process pool"""
+
+    @pytest.fixture
+    def workflow(self, monkeypatch):
+        workflow = ImageUploadWorkflow("user-1", Mock())
+        monkeypatch.setattr(workflow, "_generate_filename", lambda name, template_id, index: f"{index}-{name}")
+        return workflow
+
+    def test_process_backend_maps_results_and_empty_uploads(self, workflow, monkeypatch):
+        """Pool results are mapped back to uploads; empty uploads never reach the pool"""
+        rendered = []
+
+        def fake_render(items):
+            rendered.extend(items)
+            return [RenderResult(content=b"png", phash="a" * 64, ahash="b", dhash="c", whash="d",
+                                 source_shape=(1, 1, 4), output_shape=(1, 1, 4))]
+
+        monkeypatch.setattr(workflow_module, "IMAGE_WORKFLOW_BACKEND", "process")
+        monkeypatch.setattr(workflow_module.image_process_pool, "render", fake_render)
+
+        processed = workflow._render_batch([_upload(b""), _upload(b"bytes", "b.png")])
+
+        assert len(rendered) == 1
+        assert rendered[0][1].sizing == get_default_configs()[1]
+        assert processed[0].error == "Empty image content"
+        assert processed[1].final_filename == "1-b.png"
+        assert processed[1].phash == "a" * 64
+
+    def test_sizing_configs_resolved_once(self, workflow, monkeypatch):
+        """Configs are loaded from the DB once per canvas/template, not per image"""
+        loads = []
+        monkeypatch.setattr(workflow_module, "sizing_registry", SizingConfigRegistry(
+            loader=lambda db, canvas_id, template_id: loads.append(template_id) or get_default_configs()))
+        images = [_upload(_png()) for _ in range(3)]
+        for image in images:
+            image.template_id = "template-1"
+        design_data = Mock(canvas_config_id="canvas-1")
+
+        workflow._preload_sizing_configs(images, design_data)
+        monkeypatch.setattr(workflow_module, "IMAGE_WORKFLOW_BACKEND", "thread")
+        processed = workflow._render_batch(images, design_data)
+
+        assert loads == ["template-1"]
+        assert all(p.error is None and p.phash for p in processed)
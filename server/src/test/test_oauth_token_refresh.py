@@ -0,0 +1,181 @@
+import asyncio
+import time
+import uuid
+import httpx
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock
+from sqlalchemy.orm import Session
+from server.src.entities.platform_connection import PlatformType
+from server.src.services import etsy_token_store
+from server.src.services import oauth_token_refresh_service as refresh_module
+from server.src.services.oauth_token_refresh_service import OAuthTokenRefreshService
+from server.src.services.token_refresh_lock import TokenRefreshLock, connection_lock_key
+from server.src.utils import etsy_api_engine
+from server.src.utils.etsy_api_engine import EtsyAPI
+
+
+def _connection(access_token="old-token", needs_refresh=True):
+    """Stand-in for an Etsy PlatformConnection"""
+    return SimpleNamespace(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), platform=PlatformType.ETSY, is_active=True,
+        access_token=access_token, refresh_token="refresh-1", token_expires_at=None,
+        last_verified_at=None, needs_token_refresh=lambda threshold: needs_refresh
+    )
+
+
+class TestTokenRefreshLock:
+    """Test suite for the per-connection refresh lock"""
+
+    def test_local_lock_is_exclusive_per_key(self):
+        """A held key can't be taken again until released; other keys are free"""
+        lock = TokenRefreshLock()
+        lock.redis_client = None
+        key = connection_lock_key(PlatformType.ETSY, "user-1")
+
+        token = lock.acquire(key, wait_seconds=0)
+
+        assert token is not None
+        assert lock.acquire(key, wait_seconds=0) is None
+        assert lock.acquire(connection_lock_key("etsy", "user-2"), wait_seconds=0) is not None
+        lock.release(key, token)
+        assert lock.acquire(key, wait_seconds=0) is not None
+
+    def test_key_is_shared_by_service_and_etsy_api(self):
+        """The service's enum platform and EtsyAPI's literal map to one key"""
+        assert connection_lock_key(PlatformType.ETSY, "u") == connection_lock_key("etsy", "u")
+
+
+class TestOAuthTokenRefreshService:
+    """Test suite for concurrent OAuth token refresh"""
+
+    @pytest.fixture(autouse=True)
+    def token_tables(self, monkeypatch):
+        """In-memory ThirdPartyOAuthToken and PlatformConnection rows, keyed by table"""
+        tables = {"third_party_oauth_tokens": None, "platform_connections": None}
+        monkeypatch.setattr(etsy_token_store, "_token_record", lambda db, user_id: tables["third_party_oauth_tokens"])
+        monkeypatch.setattr(etsy_token_store, "_connection_record", lambda db, user_id: tables["platform_connections"])
+        monkeypatch.setattr(etsy_token_store, "ThirdPartyOAuthToken", SimpleNamespace)
+        return tables
+
+    def _service(self):
+        lock = TokenRefreshLock()
+        lock.redis_client = None
+        return OAuthTokenRefreshService(lock=lock, concurrency=4)
+
+    def test_refreshes_run_concurrently(self, monkeypatch):
+        """Expiring connections are refreshed in parallel, bounded by concurrency"""
+        service = self._service()
+        connection_ids = [uuid.uuid4() for _ in range(4)]
+        monkeypatch.setattr(refresh_module, "SessionLocal", lambda: Mock(spec=Session))
+        monkeypatch.setattr(service, "_expiring_connection_ids", lambda db: connection_ids)
+
+        async def refresh(connection_id):
+            await asyncio.sleep(0.1)
+            return True
+
+        monkeypatch.setattr(service, "_refresh_connection_by_id", refresh)
+
+        start = time.monotonic()
+        asyncio.run(service._check_and_refresh_tokens())
+
+        assert time.monotonic() - start < 0.3
+
+    def test_skips_token_refreshed_by_another_holder(self):
+        """A token changed while waiting for the lock is not refreshed again"""
+        service = self._service()
+        connection = _connection()
+        db = MagicMock(spec=Session)
+        db.refresh.side_effect = lambda c: setattr(c, "access_token", "new-token")
+
+        refreshed = asyncio.run(service._refresh_connection_token(connection, db))
+
+        assert refreshed is False
+        db.commit.assert_not_called()
+
+    def test_etsy_refresh_uses_async_client(self, monkeypatch):
+        """The Etsy token endpoint is called on the async client and the connection updated"""
+        monkeypatch.setenv("ETSY_API_KEY", "key")
+        monkeypatch.setenv("ETSY_API_SECRET", "secret")
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, json={"access_token": "new-token", "refresh_token": "refresh-2",
+                                             "expires_in": 3600})
+
+        service = self._service()
+        service._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        connection = _connection()
+        db = MagicMock(spec=Session)
+
+        refreshed = asyncio.run(service._refresh_connection_token(connection, db))
+
+        assert refreshed is True
+        assert len(requests_seen) == 1
+        assert connection.access_token == "new-token"
+        assert connection.refresh_token == "refresh-2"
+        db.commit.assert_called_once()
+
+    def _interleaved(self, monkeypatch, token_tables):
+        """A service, an EtsyAPI and an Etsy connection sharing one stale grant and one lock"""
+        monkeypatch.setenv("ETSY_API_KEY", "key")
+        monkeypatch.setenv("ETSY_API_SECRET", "secret")
+        service = self._service()
+        monkeypatch.setattr(etsy_api_engine, "token_refresh_lock", service.lock)
+
+        connection = _connection()
+        connection.token_expires_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        token_tables["platform_connections"] = connection
+        token_tables["third_party_oauth_tokens"] = SimpleNamespace(
+            access_token="old-token", refresh_token="refresh-1", expires_at=connection.token_expires_at
+        )
+
+        etsy_api = EtsyAPI.__new__(EtsyAPI)
+        etsy_api.user_id, etsy_api.db, etsy_api.client_id = connection.user_id, MagicMock(spec=Session), "key"
+        etsy_api.oauth_token, etsy_api.refresh_token, etsy_api.token_expiry = "old-token", "refresh-1", time.time()
+        etsy_api.session = Mock()
+        etsy_api.session.post.return_value = Mock(status_code=200, json=lambda: {
+            "access_token": "api-token", "refresh_token": "refresh-api", "expires_in": 3600
+        })
+
+        etsy_calls = []
+        service._http = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: etsy_calls.append(request) or httpx.Response(
+                200, json={"access_token": "service-token", "refresh_token": "refresh-service", "expires_in": 3600})
+        ))
+        return service, etsy_api, connection, etsy_calls
+
+    def test_service_adopts_token_rotated_by_etsy_api(self, monkeypatch, token_tables):
+        """EtsyAPI rotates the grant while the service waits for the lock; the service doesn't refresh again"""
+        service, etsy_api, connection, etsy_calls = self._interleaved(monkeypatch, token_tables)
+        acquire = service.lock.acquire
+
+        def etsy_api_wins_the_lock(key, *args, **kwargs):
+            monkeypatch.setattr(service.lock, "acquire", acquire)
+            etsy_api.refresh_access_token()
+            return acquire(key, *args, **kwargs)
+
+        monkeypatch.setattr(service.lock, "acquire", etsy_api_wins_the_lock)
+        db = MagicMock(spec=Session)
+
+        refreshed = asyncio.run(service._refresh_connection_token(connection, db))
+
+        assert refreshed is False
+        assert etsy_calls == []
+        assert etsy_api.session.post.call_count == 1
+        assert token_tables["third_party_oauth_tokens"].refresh_token == "refresh-api"
+        assert (connection.access_token, connection.refresh_token) == ("api-token", "refresh-api")
+
+    def test_etsy_api_adopts_token_rotated_by_service(self, monkeypatch, token_tables):
+        """The service rotates the grant first; EtsyAPI picks it up instead of spending the old refresh token"""
+        service, etsy_api, connection, etsy_calls = self._interleaved(monkeypatch, token_tables)
+
+        assert asyncio.run(service._refresh_connection_token(connection, MagicMock(spec=Session))) is True
+        etsy_api.refresh_access_token()
+
+        assert len(etsy_calls) == 1
+        etsy_api.session.post.assert_not_called()
+        assert (etsy_api.oauth_token, etsy_api.refresh_token) == ("service-token", "refresh-service")
+        assert token_tables["third_party_oauth_tokens"].access_token == "service-token"
@@ -0,0 +1,136 @@
+import io
+import threading
+import pytest
+from unittest.mock import Mock
+from PyPDF2 import PdfReader
+from reportlab.pdfgen import canvas
+from server.src.routes.packing_slip.routes import _WorkerEtsyClient
+from server.src.services.packing_slip_pipeline import PackingSlipPipeline, NoPackingSlipsGenerated
+from server.src.utils.pdf_stream_writer import IncrementalPdfWriter
+from server.src.utils.thumbnail_cache import ThumbnailCache
+
+
+def _pdf(label, pages=1):
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer)
+    for page in range(pages):
+        c.drawString(100, 100, f"{label}-{page}")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def _order(number):
+    return {
+        "shop_name": "Test Shop",
+        "order_number": str(number),
+        "customer": {"name": f"Customer {number}", "address": "1 Main St"},
+        "items": [{"name": "Mug", "quantity": 1, "price": 10.0}],
+        "subtotal": 10.0,
+        "shipping_cost": 0.0,
+        "total": 10.0
+    }
+
+
+class TestIncrementalPdfWriter:
+    """Test suite for streaming PDF concatenation"""
+
+    def test_concatenates_pages_in_order(self):
+        """Pages of every appended document appear in order in a valid PDF"""
+        output = io.BytesIO()
+        writer = IncrementalPdfWriter.to_file(output)
+
+        writer.append(_pdf("a", pages=2))
+        writer.append(_pdf("b"))
+        writer.close()
+
+        reader = PdfReader(io.BytesIO(output.getvalue()), strict=True)
+        assert [page.extract_text().strip() for page in reader.pages] == ["a-0", "a-1", "b-0"]
+
+    def test_objects_are_written_on_append(self):
+        """Output grows as documents are appended, before close()"""
+        chunks = []
+        writer = IncrementalPdfWriter(chunks.append)
+        writer.append(_pdf("a"))
+
+        assert sum(len(c) for c in chunks) > 500
+
+
+class TestPackingSlipPipeline:
+    """Test suite for the bulk packing slip pipeline"""
+
+    @pytest.fixture(autouse=True)
+    def thumbnail_cache(self, tmp_path, monkeypatch):
+        """Isolated thumbnail cache"""
+        cache = ThumbnailCache(cache_dir=str(tmp_path))
+        monkeypatch.setattr('server.src.services.packing_slip_generator.packing_slip_thumbnail_cache', cache)
+        return cache
+
+    def test_merges_slips_in_input_order_and_skips_failures(self):
+        """Failed orders are reported and the rest are merged in order"""
+        def load_order(number):
+            if number == 3:
+                raise ValueError("receipt fetch failed")
+            return _order(number)
+
+        pipeline = PackingSlipPipeline(load_order, fetch_workers=2, use_processes=False)
+        output = io.BytesIO()
+
+        count = pipeline.write_to_file(range(6), output)
+
+        reader = PdfReader(io.BytesIO(output.getvalue()))
+        texts = [page.extract_text() for page in reader.pages]
+        order_numbers = [n for n in ["0", "1", "2", "4", "5"] for text in texts if f"Customer {n}" in text]
+        assert count == 5
+        assert order_numbers == ["0", "1", "2", "4", "5"]
+        assert pipeline.failed_items == [3]
+
+    def test_stream_raises_when_nothing_generated(self):
+        """A batch with no successful slip raises instead of streaming an empty PDF"""
+        pipeline = PackingSlipPipeline(lambda item: None, fetch_workers=2, use_processes=False)
+
+        with pytest.raises(NoPackingSlipsGenerated):
+            next(pipeline.stream([1, 2]))
+
+    def test_images_fetched_once_per_batch(self, monkeypatch):
+        """A logo shared by every order is downloaded once"""
+        calls = []
+        monkeypatch.setattr(
+            'server.src.services.packing_slip_generator.PackingSlipGenerator.fetch_image_bytes',
+            staticmethod(lambda url: calls.append(url) or None)
+        )
+
+        def load_order(number):
+            order = _order(number)
+            order["shop_logo_url"] = "https://example.com/logo.png"
+            return order
+
+        pipeline = PackingSlipPipeline(load_order, fetch_workers=4, use_processes=False)
+        b"".join(pipeline.stream(range(8)))
+
+        assert calls == ["https://example.com/logo.png"]
+
+    def test_renders_in_process_pool(self):
+        """Slips rendered in worker processes merge into one document"""
+        pipeline = PackingSlipPipeline(_order, fetch_workers=2, use_processes=True)
+
+        pdf = b"".join(pipeline.stream(range(3)))
+
+        assert len(PdfReader(io.BytesIO(pdf)).pages) == 3
+
+    def test_worker_client_does_not_share_request_api(self):
+        """Workers get their own HTTP session and never call the request's EtsyAPI"""
+        etsy_api = Mock(client_id="key", oauth_token="token", base_url="https://etsy", shop_id=7)
+        etsy_api.session.verify = False
+        client = _WorkerEtsyClient(etsy_api)
+        etsy_api.ensure_valid_token.assert_called_once()
+
+        sessions = []
+        threads = [threading.Thread(target=lambda: sessions.append(client.session)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(session) for session in sessions}) == 2
+        assert all(session is not etsy_api.session and session.verify is False for session in sessions)
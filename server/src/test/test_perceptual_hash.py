@@ -0,0 +1,65 @@
+import cv2
+import imagehash
+import numpy as np
+import pytest
+from PIL import Image
+from server.src.utils.perceptual_hash import compute_hashes, compute_hashes_batch
+
+
+def _imagehash_hashes(image, hash_size):
+    """The hashes as computed before the fused hasher"""
+    return {
+        'phash': str(imagehash.phash(image, hash_size=hash_size)),
+        'ahash': str(imagehash.average_hash(image, hash_size=hash_size)),
+        'dhash': str(imagehash.dhash(image, hash_size=hash_size)),
+        'whash': str(imagehash.whash(image, hash_size=hash_size))
+    }
+
+
+def _bgra_images():
+    """Noise, flat colour, designs on transparency and tiny images, as OpenCV BGRA arrays"""
+    rng = np.random.default_rng(7)
+    images = []
+    for height, width in [(300, 420), (517, 233), (64, 64), (12, 30), (1030, 700)]:
+        noise = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+        flat = np.full((height, width, 4), (10, 20, 30, 255), np.uint8)
+        design = np.zeros((height, width, 4), np.uint8)
+        design[height // 4:height // 2, width // 5:] = (30, 120, 240, 255)
+        design[:, :width // 7] = rng.integers(0, 256, (height, width // 7, 4), dtype=np.uint8)
+        images.extend([noise, flat, design])
+    return images
+
+
+def _to_pil(image):
+    return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA))
+
+
+class TestPerceptualHash:
+    """Test suite for the fused perceptual hasher"""
+
+    @pytest.mark.parametrize("hash_size", [8, 16])
+    def test_matches_imagehash(self, hash_size):
+        """Every hash type matches imagehash bit for bit"""
+        for image in _bgra_images():
+            pil_image = _to_pil(image)
+            assert compute_hashes(pil_image, hash_size) == _imagehash_hashes(pil_image, hash_size)
+
+    def test_batch_matches_single_and_opencv_input(self):
+        """Batched hashing of OpenCV arrays matches hashing each PIL image alone"""
+        images = _bgra_images()
+        expected = [compute_hashes(_to_pil(image)) for image in images]
+
+        assert compute_hashes_batch(images) == expected
+        assert compute_hashes(images[0][:, :, :3].copy()) == _imagehash_hashes(_to_pil(images[0]).convert('RGB'), 16)
+
+    def test_image_hash_objects(self):
+        """as_hex=False returns ImageHash objects for distance comparisons"""
+        pil_image = _to_pil(_bgra_images()[2])
+        hashes = compute_hashes(pil_image, as_hex=False)
+
+        assert hashes['whash'] == imagehash.whash(pil_image, hash_size=16)
+        assert hashes['phash'] - imagehash.phash(pil_image, hash_size=16) == 0
+
+    def test_rejects_invalid_hash_size(self):
+        with pytest.raises(ValueError):
+            compute_hashes(Image.new('L', (32, 32)), hash_size=12)
@@ -0,0 +1,95 @@
+import zlib
+import numpy as np
+import pytest
+from io import BytesIO
+from PIL import Image
+from server.src.services.png_recompressor import PNGRecompressor, RecompressJob
+from server.src.utils.png_encoding import encode_png, parallel_deflate
+
+
+def _design(mode="RGBA", width=640, height=480):
+    """Flat shapes, a gradient and some noise on transparency"""
+    rng = np.random.default_rng(5)
+    pixels = np.zeros((height, width, 4), np.uint8)
+    pixels[40:440, 60:580] = (30, 120, 240, 255)
+    pixels[100:300, 100:400, 0] = np.arange(300, dtype=np.uint8)
+    pixels[320:400, 200:360] = rng.integers(0, 256, (80, 160, 4), dtype=np.uint8)
+    return Image.fromarray(pixels, "RGBA").convert(mode)
+
+
+class FakeStorage:
+    """Records replacements; refuses if the stored size doesn't match"""
+
+    def __init__(self, stored_size=None):
+        self.stored_size = stored_size
+        self.replaced = []
+
+    def replace_file_content(self, content, shop_name, relative_path, expected_size=None):
+        if self.stored_size is not None and self.stored_size != expected_size:
+            return False
+        self.replaced.append((shop_name, relative_path, content))
+        return True
+
+
+class TestPNGEncoding:
+    """Test suite for the PNG encoding profiles"""
+
+    @pytest.mark.parametrize("profile", ["fast", "balanced", "archival"])
+    @pytest.mark.parametrize("mode", ["RGBA", "RGB", "L"])
+    def test_profiles_round_trip(self, profile, mode):
+        """Every profile decodes to the same pixels with the DPI Pillow would write"""
+        image = _design(mode)
+
+        decoded = Image.open(BytesIO(encode_png(image, profile, dpi=(400, 400))))
+
+        assert decoded.mode == mode
+        assert np.array_equal(np.asarray(decoded), np.asarray(image))
+        assert decoded.info["dpi"] == Image.open(BytesIO(encode_png(image, "archival", dpi=(400, 400)))).info["dpi"]
+
+    def test_chunked_deflate_is_one_zlib_stream(self):
+        """Chunks compressed independently concatenate into a valid stream"""
+        data = np.random.default_rng(1).integers(0, 4, 300_000, dtype=np.uint8).tobytes()
+
+        for chunk_size in (1000, 65536, 1 << 20):
+            assert zlib.decompress(b"".join(parallel_deflate(data, 6, chunk_size))) == data
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            encode_png(_design(), "tiny")
+
+
+class TestPNGRecompressor:
+    """Test suite for background PNG recompression"""
+
+    def test_replaces_stored_file_with_archival_encoding(self):
+        """A fast-encoded upload is re-encoded and swapped in on the NAS"""
+        content = encode_png(_design(), "fast", dpi=(400, 400))
+        storage = FakeStorage(stored_size=len(content))
+        recompressor = PNGRecompressor(enabled=True, storage=storage)
+
+        assert recompressor.submit("shop", "UVDTF 16oz/design.png", content)
+        assert recompressor.flush(timeout=30)
+        recompressor.stop()
+
+        shop_name, relative_path, archival = storage.replaced[0]
+        assert (shop_name, relative_path) == ("shop", "UVDTF 16oz/design.png")
+        assert len(archival) < len(content)
+        assert Image.open(BytesIO(archival)).info["dpi"] == Image.open(BytesIO(content)).info["dpi"]
+        assert recompressor.replaced_count == 1
+
+    def test_leaves_file_written_since(self):
+        """A file replaced after the upload isn't overwritten"""
+        content = encode_png(_design(), "fast")
+        recompressor = PNGRecompressor(enabled=True, storage=FakeStorage(stored_size=len(content) + 1))
+
+        assert recompressor.recompress(RecompressJob("shop", "design.png", content)) is False
+        assert recompressor.replaced_count == 0
+
+    def test_queue_is_bounded_by_bytes(self):
+        """Files beyond the pending byte budget keep their upload encoding"""
+        recompressor = PNGRecompressor(enabled=True, max_pending_bytes=10, storage=FakeStorage())
+        recompressor._ensure_started = lambda: None
+
+        assert recompressor.submit("shop", "a.png", b"12345678")
+        assert not recompressor.submit("shop", "b.png", b"12345678")
+        assert recompressor.skipped_count == 1
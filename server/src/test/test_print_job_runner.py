@@ -0,0 +1,167 @@
+import threading
+import time
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock
+from sqlalchemy.orm import Session
+from server.src.entities.print_job import PrintJob, PrintJobStatus, PrintJobType
+from server.src.routes.print_jobs.service import PrintJobService
+from server.src.services import print_job_runner as runner_module
+from server.src.services.print_job_runner import PrintJobRunner
+
+
+def _chain(result):
+    """Query mock whose filter/order_by/with_for_update chain returns itself"""
+    query = MagicMock()
+    for method in ("filter", "order_by", "with_for_update"):
+        getattr(query, method).return_value = query
+    query.first.return_value = result
+    query.one.return_value = result
+    return query
+
+
+class TestPrintJobClaiming:
+    """Test suite for atomic print job claims"""
+
+    def test_claim_locks_with_skip_locked_and_marks_processing(self):
+        """The claimed job is locked, marked processing and leased to the worker"""
+        job = PrintJob(id=uuid.uuid4(), job_type=PrintJobType.GANG_SHEETS, status=PrintJobStatus.QUEUED)
+        db = MagicMock(spec=Session)
+        query = _chain(job)
+        db.query.return_value = query
+
+        claimed = PrintJobService.get_next_queued_job(db, worker_id="worker-1", per_printer_limit=1)
+
+        query.with_for_update.assert_called_once_with(skip_locked=True)
+        assert claimed.status == PrintJobStatus.PROCESSING
+        assert claimed.locked_by == "worker-1"
+        assert claimed.heartbeat_at is not None
+        db.commit.assert_called_once()
+
+    def test_claim_rechecks_printer_slots_under_advisory_lock(self):
+        """A printer filled by another worker while waiting for its lock is skipped"""
+        printer_id = uuid.uuid4()
+        job = PrintJob(id=uuid.uuid4(), job_type=PrintJobType.GANG_SHEETS,
+                       status=PrintJobStatus.QUEUED, printer_id=printer_id)
+        db = MagicMock(spec=Session)
+        db.bind = SimpleNamespace(dialect=SimpleNamespace(name='postgresql'))
+        query = _chain(job)
+        query.first.side_effect = [job, None]
+        db.query.return_value = query
+        db.execute.return_value.scalar.return_value = 1
+
+        claimed = PrintJobService.get_next_queued_job(db, worker_id="worker-1", per_printer_limit=1)
+
+        assert claimed is None
+        assert "pg_advisory_xact_lock" in str(db.execute.call_args_list[0].args[0])
+        db.rollback.assert_called_once()
+        assert job.status == PrintJobStatus.QUEUED
+
+    def test_queue_info_reports_throughput(self):
+        """Wait time is queue depth over last-hour throughput"""
+        db = MagicMock(spec=Session)
+        oldest = datetime.utcnow() - timedelta(seconds=90)
+        db.query.return_value = _chain((10, 2, 30, 1, oldest, 12.0))
+
+        info = PrintJobService.get_queue_info(db)
+
+        assert info["queued_jobs"] == 10
+        assert info["throughput_per_minute"] == 0.5
+        assert info["estimated_wait_time"] == 1200
+        assert 89 <= info["oldest_queued_seconds"] <= 95
+
+
+class TestPrintJobRunner:
+    """Test suite for the concurrent print job runner"""
+
+    def _runner(self, monkeypatch, jobs, handler, concurrency=2):
+        queue = list(jobs)
+        statuses = {}
+        monkeypatch.setattr(PrintJobService, "get_next_queued_job",
+                            staticmethod(lambda db, **kw: queue.pop(0) if queue else None))
+        monkeypatch.setattr(PrintJobService, "get_job_by_id",
+                            staticmethod(lambda db, job_id: next(j for j in jobs if j.id == job_id)))
+        monkeypatch.setattr(PrintJobService, "update_job_status",
+                            staticmethod(lambda db, job_id, status, **kw: statuses.__setitem__(job_id, status)))
+        runner = PrintJobRunner(handlers={PrintJobType.GANG_SHEETS: handler}, concurrency=concurrency,
+                                session_factory=lambda: Mock(spec=Session), worker_id="worker-1")
+        return runner, statuses
+
+    def _job(self):
+        return SimpleNamespace(id=uuid.uuid4(), job_type=PrintJobType.GANG_SHEETS, locked_by="worker-1")
+
+    def _wait_idle(self, runner):
+        deadline = time.monotonic() + 5
+        while runner.running_job_ids() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_runs_up_to_concurrency_jobs(self, monkeypatch):
+        """Only as many jobs as free slots are claimed"""
+        release = threading.Event()
+        jobs = [self._job() for _ in range(3)]
+        runner, statuses = self._runner(monkeypatch, jobs, lambda db, job: release.wait(5) and None)
+
+        assert runner.claim_and_start() == 2
+        assert runner.claim_and_start() == 0
+        release.set()
+        self._wait_idle(runner)
+
+        assert runner.claim_and_start() == 1
+        self._wait_idle(runner)
+        assert set(statuses.values()) == {PrintJobStatus.COMPLETED}
+        assert len(statuses) == 3
+
+    def test_handler_error_fails_job(self, monkeypatch):
+        """A raising handler marks the job failed"""
+        job = self._job()
+
+        def handler(db, job):
+            raise RuntimeError("printer offline")
+
+        runner, statuses = self._runner(monkeypatch, [job], handler)
+        runner.claim_and_start()
+        self._wait_idle(runner)
+
+        assert statuses[job.id] == PrintJobStatus.FAILED
+
+    def test_unsuccessful_result_fails_job(self, monkeypatch):
+        """Order services that report failure in their result fail the job"""
+        job = self._job()
+        job.template_name, job.created_by, job.printer_id, job.config = "UVDTF 16oz", None, None, {}
+        monkeypatch.setattr("server.src.routes.orders.service.create_gang_sheets_from_mockups",
+                            lambda *args, **kwargs: {"success": False, "error": "No mockup images found"})
+
+        with pytest.raises(RuntimeError, match="No mockup images found"):
+            runner_module._run_gang_sheets(Mock(spec=Session), job)
+
+    def test_maintain_heartbeats_and_requeues(self, monkeypatch):
+        """Heartbeats cover running jobs and expired jobs are requeued"""
+        heartbeats = []
+        requeues = []
+        monkeypatch.setattr(PrintJobService, "heartbeat_jobs",
+                            staticmethod(lambda db, ids, worker_id: heartbeats.append((ids, worker_id))))
+        monkeypatch.setattr(PrintJobService, "requeue_expired_jobs",
+                            staticmethod(lambda db, timeout, attempts: requeues.append((timeout, attempts))))
+        runner = PrintJobRunner(handlers={}, session_factory=lambda: Mock(spec=Session), worker_id="worker-1")
+
+        runner.maintain(force=True)
+
+        assert heartbeats == [([], "worker-1")]
+        assert requeues == [(runner_module.PRINT_JOB_HEARTBEAT_TIMEOUT, runner_module.PRINT_JOB_MAX_ATTEMPTS)]
+
+    def test_external_worker_heartbeat(self, monkeypatch):
+        """External claimers keep their job alive and learn when they lost it"""
+        from fastapi import HTTPException
+        from server.src.routes.print_jobs import routes
+        held = {}
+        monkeypatch.setattr(PrintJobService, "heartbeat_jobs",
+                            staticmethod(lambda db, job_ids, worker_id: held.get((job_ids[0], worker_id), 0)))
+        job_id = uuid.uuid4()
+        held[(job_id, "external-1")] = 1
+
+        assert routes.heartbeat_job_for_worker(job_id, "external-1", Mock(spec=Session)) == {"message": "Heartbeat recorded"}
+        with pytest.raises(HTTPException) as error:
+            routes.heartbeat_job_for_worker(job_id, "external-2", Mock(spec=Session))
+        assert error.value.status_code == 409
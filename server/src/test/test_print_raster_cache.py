@@ -0,0 +1,129 @@
+import os
+import time
+import cv2
+import numpy as np
+from server.src.services.print_raster_cache import PrintRasterCache, raster_key
+from server.src.utils import gangsheet_engine
+
+
+def _raster(value, size=16):
+    return np.full((size, size, 4), value, dtype=np.uint8)
+
+
+class TestPrintRasterCache:
+    """Test suite for the on-disk print raster cache"""
+
+    def test_round_trip_is_memory_mapped(self, tmp_path):
+        cache = PrintRasterCache(str(tmp_path), max_bytes=1024 * 1024)
+        raster = _raster(7)
+
+        assert cache.get("abc", 400, 90) is None
+        assert cache.put("abc", 400, 90, raster)
+
+        cached = cache.get("abc", 400, 90)
+        assert isinstance(cached, np.memmap)
+        assert not cached.flags.writeable
+        assert np.array_equal(cached, raster)
+        assert cache.get("abc", 300, 90) is None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        size = _raster(0).nbytes + 128  # raster plus .npy header
+        cache = PrintRasterCache(str(tmp_path), max_bytes=size * 2)
+
+        cache.put("a", 400, 90, _raster(1))
+        cache.put("b", 400, 90, _raster(2))
+        past = time.time() - 60
+        os.utime(cache.path_for("a", 400, 90), (past, past))
+        os.utime(cache.path_for("b", 400, 90), (past - 60, past - 60))
+        cache.get("b", 400, 90)  # b becomes most recently used
+        cache.put("c", 400, 90, _raster(3))
+
+        assert not cache.contains("a", 400, 90)
+        assert cache.contains("b", 400, 90) and cache.contains("c", 400, 90)
+
+    def test_discards_unreadable_entries(self, tmp_path):
+        cache = PrintRasterCache(str(tmp_path), max_bytes=1024 * 1024)
+        with open(cache.path_for("bad", 400, 90), 'wb') as f:
+            f.write(b"not a raster")
+
+        assert cache.get("bad", 400, 90) is None
+        assert not cache.contains("bad", 400, 90)
+
+    def test_load_print_raster_skips_missing_file_on_hit(self, tmp_path, monkeypatch):
+        cache = PrintRasterCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+        monkeypatch.setattr(gangsheet_engine, "print_raster_cache", cache)
+        design = np.zeros((20, 10, 4), dtype=np.uint8)
+        design[:, :, 3] = 255
+        path = str(tmp_path / "design.png")
+        cv2.imwrite(path, design)
+
+        processed = gangsheet_engine.load_print_raster(path, content_hash="h1", source_dpi=(400, 400))
+        os.unlink(path)
+        cached = gangsheet_engine.load_print_raster(path, content_hash="h1", source_dpi=(400, 400))
+
+        assert processed.shape == (10, 20, 4)
+        assert np.array_equal(cached, processed)
+        assert cache.hits == 1
+
+    def test_contains_touches_entry(self, tmp_path):
+        cache = PrintRasterCache(str(tmp_path), max_bytes=1024 * 1024)
+        cache.put("a", 400, 90, _raster(1))
+        past = time.time() - 60
+        os.utime(cache.path_for("a", 400, 90), (past, past))
+
+        assert cache.contains("a", 400, 90)
+        assert os.path.getmtime(cache.path_for("a", 400, 90)) > past
+        assert not cache.contains("missing", 400, 90)
+
+    def test_load_print_raster_fetches_evicted_design(self, tmp_path, monkeypatch):
+        cache = PrintRasterCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+        monkeypatch.setattr(gangsheet_engine, "print_raster_cache", cache)
+        design = np.zeros((20, 10, 4), dtype=np.uint8)
+        design[:, :, 3] = 255
+        local_path = str(tmp_path / "design.png")
+        cv2.imwrite(local_path, design)
+        fetched = []
+
+        def fetch(path):
+            fetched.append(path)
+            return local_path
+
+        # Download skipped for "Shop/design.png", then the entry is evicted
+        processed = gangsheet_engine.load_print_raster("Shop/design.png", content_hash="h1",
+                                                       source_dpi=(400, 400), fetch_design=fetch)
+
+        assert fetched == ["Shop/design.png"]
+        assert processed.shape == (10, 20, 4)
+        assert cache.contains(raster_key("h1", (400, 400)), 400, gangsheet_engine.PRINT_RASTER_ROTATION)
+
+    def test_same_pixels_at_different_dpi_cached_separately(self, tmp_path, monkeypatch):
+        cache = PrintRasterCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+        monkeypatch.setattr(gangsheet_engine, "print_raster_cache", cache)
+        design = np.zeros((20, 10, 4), dtype=np.uint8)
+        design[:, :, 3] = 255
+        path = str(tmp_path / "design.png")
+        cv2.imwrite(path, design)
+
+        full = gangsheet_engine.load_print_raster(path, content_hash="same", source_dpi=(400, 400))
+        half = gangsheet_engine.load_print_raster(path, content_hash="same", source_dpi=(200, 200))
+        os.unlink(path)
+        cached_half = gangsheet_engine.load_print_raster(path, content_hash="same", source_dpi=(200, 200))
+
+        assert full.shape == (10, 20, 4)
+        assert half.shape == (20, 40, 4)
+        assert np.array_equal(cached_half, half)
+        assert raster_key("same", (400, 400)) != raster_key("same", (200, 200))
+        assert raster_key("same", None) is None
+
+    def test_dpi_probed_from_file_when_not_given(self, tmp_path, monkeypatch):
+        cache = PrintRasterCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+        monkeypatch.setattr(gangsheet_engine, "print_raster_cache", cache)
+        design = np.zeros((20, 10, 4), dtype=np.uint8)
+        design[:, :, 3] = 255
+        path = str(tmp_path / "design.png")
+        cv2.imwrite(path, design)  # no pHYs chunk: taken as the target DPI
+
+        gangsheet_engine.load_print_raster(path, content_hash="h1")
+
+        assert cache.contains(raster_key("h1", (400, 400)), 400, gangsheet_engine.PRINT_RASTER_ROTATION)
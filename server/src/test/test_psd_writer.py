@@ -0,0 +1,164 @@
+import struct
+import cv2
+import numpy as np
+from PIL import Image
+from server.src.utils import psd_writer
+from server.src.utils.psd_writer import packbits_rows, write_layered_psd
+
+
+def _unpackbits(data, size):
+    """Reference PackBits decoder"""
+    out, i = bytearray(), 0
+    while len(out) < size:
+        header = data[i]
+        i += 1
+        if header < 128:
+            out += data[i:i + header + 1]
+            i += header + 1
+        elif header > 128:
+            out += bytes([data[i]]) * (257 - header)
+            i += 1
+    return bytes(out)
+
+
+def _read_rle(data, offset, rows, width, channels, count_size):
+    """Decode RLE channel planes starting after the compression flag"""
+    fmt = '>' + ('I' if count_size == 4 else 'H') * (rows * channels)
+    counts = struct.unpack_from(fmt, data, offset)
+    offset += rows * channels * count_size
+    planes = []
+    for channel in range(channels):
+        plane = bytearray()
+        for row in range(rows):
+            length = counts[channel * rows + row]
+            plane += _unpackbits(data[offset:offset + length], width)
+            offset += length
+        planes.append(np.frombuffer(bytes(plane), np.uint8).reshape(rows, width))
+    return planes, offset
+
+
+def _read_psd(path):
+    """Minimal PSD/PSB reader: (version, layers as (name, bounds, RGBA), composite RGBA)"""
+    data = open(path, 'rb').read()
+    _, version, channels, height, width, depth, mode = struct.unpack_from('>4sH6xHIIHH', data, 0)
+    large = version == 2
+    offset = 26
+    for _ in range(2):  # color mode data, image resources
+        offset += 4 + struct.unpack_from('>I', data, offset)[0]
+
+    length_fmt = '>Q' if large else '>I'
+    length_size = struct.calcsize(length_fmt)
+    section_end = offset + length_size + struct.unpack_from(length_fmt, data, offset)[0]
+    offset += 2 * length_size
+    count, = struct.unpack_from('>h', data, offset)
+    offset += 2
+
+    records = []
+    for _ in range(abs(count)):
+        top, left, bottom, right, n_channels = struct.unpack_from('>iiiiH', data, offset)
+        offset += 18
+        lengths = []
+        for _ in range(n_channels):
+            channel_id, = struct.unpack_from('>h', data, offset)
+            lengths.append((channel_id, struct.unpack_from(length_fmt, data, offset + 2)[0]))
+            offset += 2 + length_size
+        offset += 12
+        extra, = struct.unpack_from('>I', data, offset)
+        name_length = data[offset + 12]
+        records.append((data[offset + 13:offset + 13 + name_length].decode(), (top, left, bottom, right), lengths))
+        offset += 4 + extra
+
+    layers = []
+    for name, (top, left, bottom, right), lengths in records:
+        planes = {}
+        for channel_id, length in lengths:
+            assert struct.unpack_from('>H', data, offset)[0] == 1
+            (plane,), end = _read_rle(data, offset + 2, bottom - top, right - left, 1, 4 if large else 2)
+            assert end == offset + length
+            planes[channel_id] = plane
+            offset += length
+        layers.append((name, (left, top, right, bottom), np.dstack([planes[0], planes[1], planes[2], planes[-1]])))
+
+    assert struct.unpack_from('>H', data, section_end)[0] == 1
+    planes, end = _read_rle(data, section_end + 2, height, width, channels, 4 if large else 2)
+    assert end == len(data)
+    return version, layers, np.dstack(planes)
+
+
+def _sheet():
+    """A sheet with a noisy design placed twice and one clipped at the right edge"""
+    rng = np.random.default_rng(0)
+    design = rng.integers(0, 256, (30, 20, 4), dtype=np.uint8)
+    design[:10] = (10, 20, 30, 255)
+    sheet = np.zeros((60, 70, 4), dtype=np.uint8)
+    layers = []
+    for label, x, y in (("UV 101", 0, 0), ("UV 101", 25, 0), ("Ünïcode", 55, 30)):
+        width = min(20, 70 - x)
+        sheet[y:y + 30, x:x + width] = design[:, :width]
+        layers.append({'label': label, 'x': x, 'y': y, 'width': 20, 'height': 30, 'image_data': design})
+    return sheet, layers, design
+
+
+class TestPsdWriter:
+    """Test suite for the streaming layered PSD/PSB writer"""
+
+    def test_packbits_round_trip(self):
+        rng = np.random.default_rng(1)
+        block = rng.integers(0, 3, (7, 300), dtype=np.uint8)
+        block[2] = 9
+        block[4, 100:290] = 5
+
+        encoded, lengths = packbits_rows(block)
+        data, offset = encoded.tobytes(), 0
+        for row, length in zip(block, lengths):
+            assert _unpackbits(data[offset:offset + length], row.size) == row.tobytes()
+            offset += length
+        assert offset == len(data)
+        assert lengths[2] == 6  # 128 + 128 + 44 repeats
+
+    def test_layers_at_their_bounds(self, tmp_path):
+        sheet, layers, design = _sheet()
+        path = str(tmp_path / "sheet.psd")
+
+        assert write_layered_psd(path, sheet, layers, (300, 300)) is False
+        version, read_layers, composite = _read_psd(path)
+
+        assert version == 1
+        assert [(name, bounds) for name, bounds, _ in read_layers] == [
+            ("UV 101", (0, 0, 20, 30)), ("UV 101", (25, 0, 45, 30)), ("?n?code", (55, 30, 70, 60))]
+        rgba = cv2.cvtColor(design, cv2.COLOR_BGRA2RGBA)
+        assert np.array_equal(read_layers[1][2], rgba)
+        assert np.array_equal(read_layers[2][2], rgba[:, :15])
+        assert np.array_equal(composite, cv2.cvtColor(sheet, cv2.COLOR_BGRA2RGBA))
+
+    def test_readable_by_pil(self, tmp_path):
+        sheet, layers, _ = _sheet()
+        path = str(tmp_path / "sheet.psd")
+        write_layered_psd(path, sheet, layers)
+
+        with Image.open(path) as psd:
+            assert (psd.size, psd.mode) == ((70, 60), "RGBA")
+            assert [bbox for _, _, bbox, _ in psd.layers] == [(0, 0, 20, 30), (25, 0, 45, 30), (55, 30, 70, 60)]
+            assert np.array_equal(np.array(psd), cv2.cvtColor(sheet, cv2.COLOR_BGRA2RGBA))
+
+    def test_large_sheets_are_psb(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(psd_writer, "PSD_MAX_DIMENSION", 64)
+        monkeypatch.setattr(psd_writer, "RLE_BLOCK_PIXELS", 100)  # several blocks per channel
+        sheet, layers, _ = _sheet()
+        path = str(tmp_path / "sheet.psb")
+
+        assert write_layered_psd(path, sheet, layers) is True
+        version, read_layers, composite = _read_psd(path)
+
+        assert version == 2
+        assert len(read_layers) == 3
+        assert np.array_equal(composite, cv2.cvtColor(sheet, cv2.COLOR_BGRA2RGBA))
+
+    def test_single_layer_without_placements(self, tmp_path):
+        sheet = np.full((8, 9, 3), 200, dtype=np.uint8)
+        path = str(tmp_path / "flat.psd")
+        write_layered_psd(path, sheet)
+
+        _, read_layers, composite = _read_psd(path)
+        assert [(name, bounds) for name, bounds, _ in read_layers] == [("Background", (0, 0, 9, 8))]
+        assert (composite[:, :, 3] == 255).all()
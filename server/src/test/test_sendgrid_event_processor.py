@@ -0,0 +1,175 @@
+import uuid
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from server.src.services.sendgrid_event_processor import (
+    SendGridEventQueue, apply_batch, dedupe_events, process_events, reduce_events
+)
+
+
+def _log(message_id="msg1", email="a@example.com", customer_id=None, opened_at=None):
+    return SimpleNamespace(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), customer_id=customer_id, recipient_email=email,
+        sendgrid_message_id=message_id, opened_at=opened_at, clicked_at=None
+    )
+
+
+def _event(event, email="a@example.com", ts=1700000000, **extra):
+    return {"sg_message_id": "msg1.filter0001", "event": event, "email": email, "timestamp": ts, **extra}
+
+
+class TestSendGridEventProcessor:
+    """Test suite for set-based SendGrid webhook processing"""
+
+    def test_duplicate_and_incomplete_events_dropped(self):
+        """Retried events and events without IDs are ignored"""
+        events = [
+            _event("open", sg_event_id="e1"),
+            _event("open", sg_event_id="e1"),
+            {"event": "open"},
+            _event("delivered"),
+            _event("delivered"),
+        ]
+
+        assert len(dedupe_events(events)) == 2
+
+    def test_events_matched_by_message_id_and_recipient(self):
+        """Batched sends share a message ID; the recipient picks the log"""
+        log_a = _log(email="a@example.com")
+        log_b = _log(email="b@example.com")
+
+        batch = reduce_events([_event("delivered", email="B@example.com")], [log_a, log_b])
+
+        assert list(batch.log_updates) == [log_b.id]
+
+    def test_email_log_id_custom_arg_takes_precedence(self):
+        """The email_log_id custom arg resolves the log directly"""
+        log = _log(message_id="other")
+
+        batch = reduce_events([_event("delivered", email_log_id=str(log.id))], [log])
+
+        assert batch.log_updates[log.id].delivered_at is not None
+
+    def test_first_open_counts_once(self):
+        """Repeated opens only bump the subscriber counter the first time"""
+        customer_id = uuid.uuid4()
+        log = _log(customer_id=customer_id)
+        already_opened = _log(email="b@example.com", opened_at=object())
+
+        batch = reduce_events([
+            _event("open", ts=1), _event("open", ts=2), _event("click", ts=3),
+            _event("open", email="b@example.com")
+        ], [log, already_opened])
+
+        assert batch.subscriber_counts == {(log.user_id, customer_id, None): [1, 1]}
+        assert batch.log_updates[log.id].status == "click"
+        assert already_opened.id in batch.log_updates
+        assert batch.log_updates[already_opened.id].opened_at is None
+
+    def test_dropped_and_spam_report(self):
+        """Dropped marks the log failed and spam reports unsubscribe"""
+        log = _log()
+
+        batch = reduce_events([_event("dropped", reason="Invalid", ts=1), _event("spamreport", ts=2)], [log])
+
+        update = batch.log_updates[log.id]
+        assert update.error_message == "Dropped: Invalid"
+        assert batch.spam_reports == {(log.user_id, "a@example.com")}
+
+    def test_batch_applied_with_fixed_statement_count(self):
+        """A large batch costs one lookup plus one UPDATE per change type"""
+        logs = [_log(email=f"user{i}@example.com") for i in range(200)]
+        db = Mock(spec=Session)
+        db.execute.return_value.all.return_value = logs
+        events = [_event(kind, email=f"user{i}@example.com") for i in range(200) for kind in ("delivered", "open")]
+
+        process_events(db, events)
+
+        # select + email log update + subscriber counter update
+        assert db.execute.call_count == 3
+        db.commit.assert_called_once()
+
+    def test_updates_compile_to_update_from_values(self):
+        """Log updates render as UPDATE ... FROM (VALUES ...)"""
+        log = _log()
+        batch = reduce_events([_event("delivered")], [log])
+        db = Mock(spec=Session)
+
+        apply_batch(db, batch)
+
+        sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "UPDATE ecommerce_email_logs" in sql
+        assert "FROM (VALUES" in sql
+
+    def test_worker_backs_off_after_errors(self, monkeypatch):
+        """Repeated queue errors back off exponentially up to the cap, and success resets it"""
+        monkeypatch.setattr('server.src.services.sendgrid_event_processor.SENDGRID_EVENT_BACKOFF_MAX', 4)
+        delays = []
+
+        def sleep(seconds):
+            delays.append(seconds)
+            if len(delays) == 6:
+                raise KeyboardInterrupt
+        monkeypatch.setattr('server.src.services.sendgrid_event_processor.time.sleep', sleep)
+
+        results = iter([RuntimeError("down")] * 5 + [None] + [RuntimeError("down")])
+
+        def next_batch():
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        processor = SendGridEventQueue(mode='async', backend='memory', session_factory=Mock())
+        processor._next_batch = next_batch
+        with pytest.raises(KeyboardInterrupt):
+            processor._run()
+
+        assert delays == [0.5, 1, 2, 4, 4, 0.5]
+
+    def _drain(self, processor):
+        """Run the worker until its memory queue is empty"""
+        next_batch = processor._next_batch
+
+        def next_or_stop():
+            if processor._memory.empty():
+                raise KeyboardInterrupt
+            return next_batch()
+        processor._next_batch = next_or_stop
+        with pytest.raises(KeyboardInterrupt):
+            processor._run()
+
+    def test_failed_batch_is_retried(self, monkeypatch):
+        monkeypatch.setattr('server.src.services.sendgrid_event_processor.time.sleep', lambda seconds: None)
+        applied = []
+
+        def process(db, events):
+            if not applied:
+                applied.append(None)
+                raise RuntimeError("connection reset")
+            applied.append(events)
+        monkeypatch.setattr('server.src.services.sendgrid_event_processor.process_events', process)
+
+        processor = SendGridEventQueue(mode='async', backend='memory', session_factory=Mock())
+        events = [_event("delivered")]
+        processor._memory.put((events, 0))
+        self._drain(processor)
+
+        assert applied == [None, events]
+        assert not processor.dead_letters
+
+    def test_batch_dead_lettered_after_max_attempts(self, monkeypatch):
+        monkeypatch.setattr('server.src.services.sendgrid_event_processor.time.sleep', lambda seconds: None)
+        monkeypatch.setattr('server.src.services.sendgrid_event_processor.SENDGRID_EVENT_MAX_ATTEMPTS', 3)
+        process = Mock(side_effect=RuntimeError("bad batch"))
+        monkeypatch.setattr('server.src.services.sendgrid_event_processor.process_events', process)
+
+        processor = SendGridEventQueue(mode='async', backend='memory', session_factory=Mock())
+        events = [_event("delivered")]
+        processor._memory.put((events, 0))
+        self._drain(processor)
+
+        assert process.call_count == 3
+        assert list(processor.dead_letters) == [{'events': events, 'attempts': 3}]
@@ -0,0 +1,123 @@
+import pytest
+from unittest.mock import Mock
+from server.src.entities.shopify_store import ShopifyStore
+from server.src.services.shopify_bulk_create import ShopifyBulkProductCreator
+from server.src.utils.shopify_client import ShopifyAPIError, ShopifyCallLimitBucket
+
+
+def _response(payload):
+    response = Mock()
+    response.json.return_value = payload
+    return response
+
+
+class TestShopifyBulkProductCreator:
+    """Test suite for concurrent Shopify bulk product creation"""
+
+    @pytest.fixture
+    def mock_store(self):
+        """Mock ShopifyStore"""
+        store = Mock(spec=ShopifyStore)
+        store.shop_domain = "test-store.myshopify.com"
+        store.shop_name = "Test Store"
+        store.access_token = "test-access-token"
+        return store
+
+    @pytest.fixture
+    def client(self):
+        """Mock ShopifyClient answering product and image creates"""
+        client = Mock()
+        client.API_VERSION = "2023-10"
+        client._get_headers.return_value = {}
+
+        def request(method, url, headers, json):
+            if url.endswith("/products.json"):
+                return _response({"product": {"id": json["product"]["title"], **json["product"]}})
+            return _response({"image": {"id": 1, **json["image"]}})
+
+        client._make_request_with_retry.side_effect = request
+        return client
+
+    def test_creates_all_products_with_images(self, client, mock_store):
+        """Every product is created once and gets every image"""
+        creator = ShopifyBulkProductCreator(client, mock_store, max_workers=4)
+        products = [{"title": f"P{i}", "variants": [{"price": "1"}]} for i in range(10)]
+
+        results = creator.run(products, images=[{"src": "https://a.png"}, {"src": "https://b.png"}])
+
+        assert [r["title"] for r in results] == [f"P{i}" for i in range(10)]
+        assert all(r["success"] and r["images_uploaded"] == 2 for r in results)
+        urls = [call.args[1] for call in client._make_request_with_retry.call_args_list]
+        assert sum(url.endswith("/products.json") for url in urls) == 10
+        assert sum(url.endswith("/images.json") for url in urls) == 20
+        # Product payloads are wrapped exactly once
+        create_call = next(c for c in client._make_request_with_retry.call_args_list if c.args[1].endswith("/products.json"))
+        assert "title" in create_call.kwargs["json"]["product"]
+
+    def test_partial_failures_are_reported(self, client, mock_store):
+        """A failed create is reported without stopping the rest"""
+        default = client._make_request_with_retry.side_effect
+
+        def request(method, url, headers, json):
+            if url.endswith("/products.json") and json["product"]["title"] == "P2":
+                raise ShopifyAPIError("boom")
+            return default(method, url, headers, json)
+
+        client._make_request_with_retry.side_effect = request
+        progress = []
+        creator = ShopifyBulkProductCreator(client, mock_store, max_workers=3)
+
+        results = creator.run(
+            [{"title": f"P{i}"} for i in range(5)],
+            progress_callback=lambda done, total, result: progress.append((done, total, result["title"]))
+        )
+
+        assert [r["success"] for r in results] == [True, True, False, True, True]
+        assert "boom" in results[2]["errors"][0]
+        assert sorted(done for done, _, _ in progress) == [1, 2, 3, 4, 5]
+        assert all(total == 5 for _, total, _ in progress)
+
+
+class TestShopifyCallLimitBucket:
+    """Test suite for the client-side leaky bucket"""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Fake monotonic clock advanced by sleep"""
+        state = {"now": 0.0, "sleeps": []}
+        monkeypatch.setattr('server.src.utils.shopify_client.time.monotonic', lambda: state["now"])
+
+        def fake_sleep(seconds):
+            state["sleeps"].append(seconds)
+            state["now"] += seconds
+
+        monkeypatch.setattr('server.src.utils.shopify_client.time.sleep', fake_sleep)
+        return state
+
+    def test_burst_then_leak_rate(self, clock):
+        """Requests up to capacity minus headroom are free, then paced at the leak rate"""
+        bucket = ShopifyCallLimitBucket(capacity=4, leak_rate=2, headroom=1)
+
+        for _ in range(5):
+            bucket.acquire()
+
+        assert clock["sleeps"] == [0.5, 0.5]
+
+    def test_header_resyncs_level(self, clock):
+        """A fuller server-reported level makes the next acquire wait"""
+        bucket = ShopifyCallLimitBucket(capacity=40, leak_rate=2, headroom=0)
+
+        bucket.observe("40/40")
+        bucket.acquire()
+
+        assert clock["sleeps"] == [0.5]
+
+    def test_malformed_header_ignored(self, clock):
+        """Missing or malformed headers leave the estimate unchanged"""
+        bucket = ShopifyCallLimitBucket(capacity=40, leak_rate=2, headroom=0)
+
+        bucket.observe(None)
+        bucket.observe("garbage")
+        bucket.acquire()
+
+        assert clock["sleeps"] == []
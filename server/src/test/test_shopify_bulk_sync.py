@@ -0,0 +1,201 @@
+import json
+import uuid
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+from sqlalchemy.orm import Session
+from server.src.entities.shopify_store import ShopifyStore
+from server.src.services.shopify_bulk_sync import (
+    ShopifyBulkSyncService,
+    iter_bulk_objects,
+    order_row,
+    product_row
+)
+from server.src.utils.shopify_client import ShopifyAPIError
+
+
+def _jsonl(*objects):
+    return [json.dumps(obj) for obj in objects]
+
+
+class TestShopifyBulkSync:
+    """Test suite for the Shopify GraphQL bulk sync"""
+
+    @pytest.fixture
+    def mock_store(self):
+        """Mock ShopifyStore"""
+        store = Mock(spec=ShopifyStore)
+        store.id = uuid.uuid4()
+        store.user_id = uuid.uuid4()
+        store.shop_name = "Test Store"
+        return store
+
+    @pytest.fixture
+    def service(self):
+        """ShopifyBulkSyncService with a mock session"""
+        return ShopifyBulkSyncService(Mock(spec=Session))
+
+    def test_children_grouped_under_parent(self):
+        """Variant lines following a product are attached to it"""
+        lines = _jsonl(
+            {"id": "gid://shopify/Product/1", "title": "A"},
+            {"id": "gid://shopify/ProductVariant/11", "__parentId": "gid://shopify/Product/1"},
+            {"id": "gid://shopify/ProductVariant/12", "__parentId": "gid://shopify/Product/1"},
+            {"id": "gid://shopify/Product/2", "title": "B"},
+        )
+
+        objects = list(iter_bulk_objects(lines))
+
+        assert [o["id"] for o in objects] == ["gid://shopify/Product/1", "gid://shopify/Product/2"]
+        assert [c["id"] for c in objects[0]["_children"]] == [
+            "gid://shopify/ProductVariant/11", "gid://shopify/ProductVariant/12"
+        ]
+        assert objects[1]["_children"] == []
+
+    def test_product_row_uses_rest_ids_and_tags(self, mock_store):
+        """Products map onto the REST-shaped shopify_products columns"""
+        obj = {
+            "id": "gid://shopify/Product/123",
+            "title": "Shirt",
+            "tags": ["summer", "cotton"],
+            "status": "ACTIVE",
+            "productType": "Apparel",
+            "_children": [{
+                "id": "gid://shopify/ProductVariant/9",
+                "price": "10.00",
+                "selectedOptions": [{"name": "Size", "value": "M"}]
+            }]
+        }
+
+        row = product_row(obj, mock_store)
+
+        assert row["shopify_product_id"] == "123"
+        assert row["tags"] == "summer, cotton"
+        assert row["status"] == "active"
+        assert row["user_id"] == mock_store.user_id
+        assert row["variants"][0]["id"] == "9"
+        assert row["variants"][0]["option1"] == "M"
+
+    def test_order_row_matches_rest_shape(self, mock_store):
+        """Orders carry REST-style totals and line items for analytics"""
+        obj = {
+            "id": "gid://shopify/Order/55",
+            "createdAt": "2024-05-01T10:00:00Z",
+            "displayFinancialStatus": "PAID",
+            "totalPriceSet": {"shopMoney": {"amount": "42.50", "currencyCode": "USD"}},
+            "_children": [
+                {"title": "Mug", "quantity": 2, "originalUnitPriceSet": {"shopMoney": {"amount": "10.00"}}},
+                {"title": "Cap", "quantity": 1, "originalUnitPriceSet": {"shopMoney": {"amount": "22.50"}}},
+            ]
+        }
+
+        row = order_row(obj, mock_store)
+
+        assert row["shopify_order_id"] == "55"
+        assert row["total_price"] == 42.5
+        assert row["financial_status"] == "paid"
+        assert row["item_count"] == 3
+        assert row["line_items"][0] == {
+            "id": None, "title": "Mug", "quantity": 2, "sku": None,
+            "price": "10.00", "product_id": None, "variant_id": None
+        }
+        assert row["order_created_at"].year == 2024
+
+    def test_user_errors_reject_bulk_operation(self, service):
+        """userErrors from bulkOperationRunQuery raise instead of polling"""
+        service.client.graphql = Mock(return_value={
+            "bulkOperationRunQuery": {"bulkOperation": None, "userErrors": [{"message": "already running"}]}
+        })
+
+        with pytest.raises(ShopifyAPIError):
+            service._start_bulk_operation("store", "{ products { edges { node { id } } } }")
+
+    def test_wait_polls_until_completed(self, service, monkeypatch):
+        """Polling continues through RUNNING and returns the completed operation"""
+        monkeypatch.setattr('server.src.services.shopify_bulk_sync.time.sleep', lambda s: None)
+        statuses = iter(["CREATED", "RUNNING", "COMPLETED"])
+        service.client.graphql = Mock(side_effect=lambda store_id, query: {
+            "currentBulkOperation": {"id": "op-1", "status": next(statuses), "url": "https://x/result.jsonl"}
+        })
+
+        operation = service._wait_for_bulk_operation("store", "op-1")
+
+        assert operation["url"] == "https://x/result.jsonl"
+        assert service.client.graphql.call_count == 3
+
+    def test_has_synced_rejects_non_uuid_store(self, service):
+        """Unknown store ids fall back to the REST path"""
+        assert service.has_synced("not-a-uuid", "products") is False
+
+    def test_has_synced_ignores_stale_data(self, service):
+        """Local data older than the maximum age is not served"""
+        scalar = service.db.query.return_value.filter.return_value.scalar
+        store_id = str(uuid.uuid4())
+
+        scalar.return_value = datetime.now(timezone.utc) - timedelta(minutes=5)
+        assert service.has_synced(store_id, "orders", max_age_seconds=3600) is True
+        scalar.return_value = datetime.now(timezone.utc) - timedelta(hours=2)
+        assert service.has_synced(store_id, "orders", max_age_seconds=3600) is False
+        scalar.return_value = None
+        assert service.has_synced(store_id, "orders") is False
+
+    def test_due_resources_synced(self, service):
+        """Only resources synced before the interval and claimed by this worker are synced"""
+        now = datetime.now(timezone.utc)
+        store_id = uuid.uuid4()
+        service.db.query.return_value.filter.return_value.all.return_value = [(store_id,)]
+        states = {
+            "products": Mock(last_synced_at=now - timedelta(minutes=1)),
+            "orders": Mock(last_synced_at=now - timedelta(days=1)),
+        }
+        service._get_state = Mock(side_effect=lambda store, resource: states[resource])
+        service._claim = Mock(return_value=True)
+        service.sync_resource = Mock(return_value={"resource": "orders", "synced": 3, "status": "completed"})
+
+        results = service.sync_due_resources(now=now)
+
+        service.sync_resource.assert_called_once_with(str(store_id), "orders")
+        assert results == [{"resource": "orders", "synced": 3, "status": "completed"}]
+
+    def test_due_resource_skipped_when_claimed_elsewhere(self, service):
+        """A resource another worker is syncing is left alone"""
+        service.db.query.return_value.filter.return_value.all.return_value = [(uuid.uuid4(),)]
+        service._get_state = Mock(return_value=Mock(last_synced_at=None))
+        service.db.execute.return_value.rowcount = 0
+        service.sync_resource = Mock()
+
+        assert service.sync_due_resources() == []
+        service.sync_resource.assert_not_called()
+
+    def test_stale_products_deleted_after_full_sync(self, service, mock_store, monkeypatch):
+        """Local products missing from the export are removed"""
+        service.client._get_store_info = Mock(return_value=mock_store)
+        service._get_state = Mock(return_value=Mock(last_synced_at=None))
+        service._start_bulk_operation = Mock(return_value="op-1")
+        service._wait_for_bulk_operation = Mock(return_value={"url": "https://x/result.jsonl"})
+        service._stream_results = Mock(return_value=iter([{"id": "gid://shopify/Product/1", "_children": []}]))
+        service._upsert = Mock()
+        kept, stale = uuid.uuid4(), uuid.uuid4()
+        service.db.execute.return_value.all.return_value = [
+            Mock(id=kept, shopify_product_id="1"), Mock(id=stale, shopify_product_id="2")
+        ]
+
+        service.sync_resource(str(mock_store.id), "products")
+
+        delete_stmt = service.db.execute.call_args_list[-1].args[0]
+        assert delete_stmt.is_delete
+        assert delete_stmt.compile().params["id_1"] == [stale]
+
+    def test_result_stream_closed_on_error(self, service, monkeypatch):
+        """The streamed response is closed when consuming the results fails"""
+        response = Mock()
+        response.__enter__ = Mock(return_value=response)
+        response.__exit__ = Mock(return_value=False)
+        response.iter_lines.return_value = iter(_jsonl({"id": "gid://shopify/Product/1"}, {"id": "gid://shopify/Product/2"}))
+        monkeypatch.setattr('server.src.services.shopify_bulk_sync.requests.get', Mock(return_value=response))
+
+        objects = service._stream_results("https://x/result.jsonl")
+        next(objects)
+        objects.close()
+
+        response.__exit__.assert_called_once()
@@ -0,0 +1,61 @@
+from unittest.mock import Mock
+from server.src.services.sizing_registry import SizingConfigRegistry
+from server.src.utils.resizing import get_default_configs
+
+
+def _registry(**kwargs):
+    loads = []
+
+    def loader(db, canvas_id, template_id):
+        loads.append((canvas_id, template_id))
+        return {'UVDTF Decal': {'width': 4.0, 'height': 4.0}}, {'UVDTF 16oz': {'width': 9.5, 'height': 4.33 + len(loads)}}
+
+    return SizingConfigRegistry(loader=loader, **kwargs), loads
+
+
+class TestSizingConfigRegistry:
+    """Test suite for the sizing config registry"""
+
+    def test_loads_each_pair_once(self):
+        registry, loads = _registry()
+        db = Mock()
+
+        first = registry.get(db, "canvas-1", "template-1")
+        assert registry.get(db, "canvas-1", "template-1") == first
+        registry.get(db, "canvas-2", "template-1")
+
+        assert loads == [("canvas-1", "template-1"), ("canvas-2", "template-1")]
+
+    def test_returns_copies(self):
+        """Callers can't change what other requests get"""
+        registry, _ = _registry()
+        canvas, sizing = registry.get(Mock(), "canvas-1", "template-1")
+        sizing['UVDTF 16oz']['width'] = 1
+
+        assert registry.get(Mock(), "canvas-1", "template-1")[1]['UVDTF 16oz']['width'] == 9.5
+
+    def test_invalidate_drops_only_that_template(self):
+        registry, loads = _registry()
+        db = Mock()
+        registry.preload(db, [("canvas-1", "template-1"), ("canvas-1", "template-2")])
+
+        registry.invalidate("template-1")
+        registry.get(db, "canvas-1", "template-1")
+        registry.get(db, "canvas-1", "template-2")
+
+        assert loads.count(("canvas-1", "template-1")) == 2
+        assert loads.count(("canvas-1", "template-2")) == 1
+
+    def test_entries_expire(self):
+        registry, loads = _registry(ttl=0)
+        registry.get(Mock(), "canvas-1", "template-1")
+        registry.get(Mock(), "canvas-1", "template-1")
+
+        assert len(loads) == 2
+
+    def test_defaults_without_session_or_ids(self):
+        registry, loads = _registry()
+
+        assert registry.get(None, "canvas-1", "template-1") == get_default_configs()
+        assert registry.get(Mock(), None, "template-1") == get_default_configs()
+        assert loads == []
@@ -0,0 +1,98 @@
+import uuid
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy.orm import Session
+from server.src.entities.print_job import PrintJobStatus, PrintJobType
+from server.src.routes.events.service import EventService
+from server.src.routes.print_jobs.service import PrintJobService
+from server.src.routes.printers.service import PrinterService
+from server.src.utils.stats_cache import StatsCache, stats_cache
+
+
+def _grouped(rows):
+    """Session whose single grouped query returns rows"""
+    db = MagicMock(spec=Session)
+    query = db.query.return_value
+    query.filter.return_value = query
+    query.group_by.return_value.all.return_value = rows
+    return db
+
+
+class TestStatsQueries:
+    """Test suite for single-pass stats aggregates"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        stats_cache.clear()
+        yield
+        stats_cache.clear()
+
+    def test_job_stats_single_query(self):
+        """Status, type and processing time totals come from one grouped query"""
+        db = _grouped([
+            (PrintJobStatus.COMPLETED, PrintJobType.GANG_SHEETS, 3, 30.0, 3),
+            (PrintJobStatus.COMPLETED, PrintJobType.PRINT_FILES, 1, 10.0, 1),
+            (PrintJobStatus.FAILED, PrintJobType.GANG_SHEETS, 2, None, 0),
+        ])
+
+        stats = PrintJobService.get_job_stats(db, uuid.uuid4())
+
+        assert db.query.call_count == 1
+        assert stats["total_jobs"] == 6
+        assert stats["by_status"] == {PrintJobStatus.COMPLETED.value: 4, PrintJobStatus.FAILED.value: 2}
+        assert stats["by_type"] == {PrintJobType.GANG_SHEETS.value: 5, PrintJobType.PRINT_FILES.value: 1}
+        assert stats["avg_processing_time"] == 10.0
+
+    def test_event_stats_cached_per_org_and_window(self):
+        """A second load within the TTL does not query; another window does"""
+        org_id = uuid.uuid4()
+        db = _grouped([("order_created", "Order", 5, 2), ("system_info", None, 1, 1)])
+
+        first = EventService.get_event_stats(db, org_id, days=30)
+        first["total_events"] = 0
+        second = EventService.get_event_stats(db, org_id, days=30)
+        EventService.get_event_stats(db, org_id, days=7)
+
+        assert second == {
+            "total_events": 6,
+            "by_type": {"order_created": 5, "system_info": 1},
+            "by_entity_type": {"Order": 5},
+            "recent_activity_count": 3,
+        }
+        assert db.query.call_count == 2
+
+    def test_printer_stats_single_query_and_invalidation(self):
+        """Printer stats come from one query and are dropped when printers change"""
+        user_id, default_id = uuid.uuid4(), uuid.uuid4()
+        db = _grouped([("DTF", 3, 2, 600, 2, [default_id]), ("UV", 1, 0, None, 0, None)])
+
+        stats = PrinterService.get_printer_stats(db, user_id, None)
+        stats_cache.invalidate("printer_stats", user_id)
+        PrinterService.get_printer_stats(db, user_id, None)
+
+        assert stats.total_printers == 4
+        assert stats.active_printers == 2
+        assert stats.by_type == {"DTF": 2}
+        assert stats.default_printer_id == default_id
+        assert stats.average_dpi == 300.0
+        assert db.query.call_count == 2
+
+    def test_errors_are_not_cached(self):
+        """A failed stats query is retried on the next load"""
+        db = MagicMock(spec=Session)
+        db.query.side_effect = RuntimeError("db gone")
+
+        assert PrintJobService.get_job_stats(db, uuid.uuid4()) == {}
+        assert PrinterService.get_printer_stats(db, uuid.uuid4(), None).total_printers == 0
+        assert stats_cache.get("print_job_stats", None) is None
+
+    def test_cache_expires(self, monkeypatch):
+        """Entries older than the TTL are recomputed"""
+        cache = StatsCache(ttl_seconds=30)
+        clock = [1000.0]
+        monkeypatch.setattr("server.src.utils.stats_cache.time.monotonic", lambda: clock[0])
+
+        cache.set("ns", "org", 30, {"total": 1})
+        clock[0] += 31
+
+        assert cache.get("ns", "org", 30) is None
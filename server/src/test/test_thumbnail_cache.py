@@ -0,0 +1,122 @@
+import io
+import os
+import pytest
+from PIL import Image as PILImage
+from server.src.services.packing_slip_generator import PackingSlipGenerator
+from server.src.utils.thumbnail_cache import ThumbnailCache, image_cache_key
+
+
+def _photo(size=(3000, 2400), mode="RGB"):
+    img = PILImage.effect_noise(size, 64).convert(mode)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG" if mode == "RGBA" else "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+class TestThumbnailCache:
+    """Test suite for the packing slip thumbnail cache"""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Cache in a temp directory"""
+        return ThumbnailCache(cache_dir=str(tmp_path))
+
+    def test_key_uses_etsy_listing_image_id(self):
+        """Etsy URLs of any rendition map to the listing image ID"""
+        full = "https://i.etsystatic.com/123/r/il/abc/456789/il_fullxfull.456789_xyz.jpg"
+        small = "https://i.etsystatic.com/123/r/il/abc/456789/il_570xN.456789_xyz.jpg"
+
+        assert image_cache_key(full) == image_cache_key(small) == "etsy_456789"
+        assert image_cache_key("https://example.com/a.png", image_id=42) == "etsy_42"
+        assert image_cache_key("https://example.com/a.png").startswith("url_")
+
+    def test_downscales_to_requested_size(self, cache):
+        """Thumbnails fit within the requested pixel size"""
+        content = cache.put("etsy_1", 460, _photo())
+
+        with PILImage.open(io.BytesIO(content)) as img:
+            assert max(img.size) == 460
+            assert img.format == "JPEG"
+
+    def test_transparent_images_flattened(self, cache):
+        """Alpha is composited onto white for JPEG output"""
+        content = cache.put("logo", 100, _photo((400, 400), mode="RGBA"))
+
+        with PILImage.open(io.BytesIO(content)) as img:
+            assert img.mode == "RGB"
+
+    def test_disk_hit_survives_restart(self, cache, tmp_path):
+        """A new cache instance reads thumbnails written by another"""
+        cache.put("etsy_1", 200, _photo())
+
+        fresh = ThumbnailCache(cache_dir=str(tmp_path))
+        loads = []
+        content = fresh.get_or_create("etsy_1", 200, lambda: loads.append(1))
+
+        assert content is not None
+        assert loads == []
+
+    def test_identical_images_share_a_blob(self, cache, tmp_path):
+        """Blobs are content-addressed"""
+        source = _photo((800, 800))
+        cache.put("etsy_1", 200, source)
+        cache.put("etsy_2", 200, source)
+
+        blobs = list((tmp_path / "blobs").rglob("*.jpg"))
+        assert len(blobs) == 1
+
+    def test_failed_loads_not_retried(self, cache):
+        """A failing source is remembered briefly"""
+        loads = []
+
+        assert cache.get_or_create("etsy_9", 200, lambda: loads.append(1)) is None
+        assert cache.get_or_create("etsy_9", 200, lambda: loads.append(1)) is None
+        assert loads == [1]
+
+    def test_disk_store_evicts_least_recently_used(self, tmp_path, monkeypatch):
+        """Old blobs and their index entries are removed once the disk limit is hit"""
+        monkeypatch.setattr('server.src.utils.thumbnail_cache.DISK_EVICTION_TARGET', 1.0)
+        sources = [_photo((300 + i * 10, 300)) for i in range(3)]
+        probe = ThumbnailCache(cache_dir=str(tmp_path / "probe"))
+        sizes = [len(probe.put(f"k{i}", 200, source)) for i, source in enumerate(sources)]
+        cache = ThumbnailCache(cache_dir=str(tmp_path / "cache"), memory_bytes=0,
+                               disk_bytes=sizes[1] + sizes[2] + sizes[0] // 2)
+
+        cache.put("etsy_1", 200, sources[0])
+        first = next((tmp_path / "cache" / "blobs").rglob("*.jpg"))
+        os.utime(first, (1, 1))
+        cache.put("etsy_2", 200, sources[1])
+        cache.put("etsy_3", 200, sources[2])
+
+        assert not first.exists()
+        assert not (tmp_path / "cache" / "index" / "etsy_1_200").exists()
+        assert cache.get("etsy_1", 200) is None
+        assert cache.get("etsy_2", 200) is not None and cache.get("etsy_3", 200) is not None
+
+    def test_failure_memory_is_capped(self, cache, monkeypatch):
+        """Remembered failures expire and never exceed the cap"""
+        monkeypatch.setattr('server.src.utils.thumbnail_cache.NEGATIVE_CACHE_MAX_ENTRIES', 3)
+        for i in range(10):
+            cache.get_or_create(f"bad_{i}", 200, lambda: None)
+
+        assert list(cache._failures) == [("bad_7", 200), ("bad_8", 200), ("bad_9", 200)]
+
+        for entry in cache._failures:
+            cache._failures[entry] -= 3600
+        cache.get_or_create("bad_10", 200, lambda: None)
+        assert list(cache._failures) == [("bad_10", 200)]
+
+    def test_packing_slip_embeds_thumbnail(self, cache, monkeypatch):
+        """A full-resolution mockup no longer bloats the slip"""
+        monkeypatch.setattr('server.src.services.packing_slip_generator.packing_slip_thumbnail_cache', cache)
+        source = _photo()
+        monkeypatch.setattr(PackingSlipGenerator, "fetch_image_bytes", staticmethod(lambda url: source))
+
+        pdf = PackingSlipGenerator().generate_packing_slip({
+            "shop_name": "Shop",
+            "customer": {"name": "A", "address": "1 Main St"},
+            "items": [{"name": "Mug", "quantity": 1, "price": 1.0, "mockup_url": "https://example.com/m.jpg"}],
+            "subtotal": 1.0, "shipping_cost": 0.0, "total": 1.0
+        })
+
+        assert len(pdf) < len(source) / 4
@@ -0,0 +1,105 @@
+import os
+import threading
+import pytest
+from unittest.mock import Mock
+from server.src.services.image_upload_workflow import BatchResult, ImageUploadWorkflow
+from server.src.services.upload_spool import MultipartSpoolParser, UploadSpool, UploadStreamError
+
+BOUNDARY = "----designs"
+
+
+def _multipart(fields, files):
+    """A multipart/form-data body with fields first, then files"""
+    body = b""
+    for name, value in fields:
+        body += (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n").encode()
+    for filename, content in files:
+        body += (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"files\"; filename=\"{filename}\"\r\n"
+                 f"Content-Type: image/png\r\n\r\n").encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = UploadSpool(max_inflight_bytes=1000, spool_dir=str(tmp_path))
+    yield spool
+    spool.cleanup()
+
+
+class TestUploadSpool:
+    """Test suite for streaming upload ingestion"""
+
+    def test_parser_spools_files_as_they_complete(self, spool):
+        """Fields are kept in memory; each file is handed over when its part ends"""
+        files = [("a.png", b"\x89PNG" + b"a" * 300), ("b.png", b"\r\n--" + b"b" * 200)]
+        completed = []
+        parser = MultipartSpoolParser(f"multipart/form-data; boundary={BOUNDARY}", spool,
+                                      on_file=lambda spooled: completed.append(spooled.filename))
+
+        body = _multipart([("design_data", '{"name": "x"}'), ("session_id", "s1")], files)
+        early = []
+        for start in range(0, len(body), 7):
+            parser.write(body[start:start + 7])
+            if completed == ["a.png"] and not early:
+                # The first file is ready before the second has arrived
+                early.append(spool.get_nowait())
+        parser.finalize()
+
+        assert early[0].filename == "a.png" and early[0].size == len(files[0][1])
+
+        assert parser.fields == {"design_data": '{"name": "x"}', "session_id": "s1"}
+        spooled = list(spool)
+        assert [s.filename for s in spooled] == ["b.png"]
+        with open(spooled[0].path, "rb") as f:
+            assert f.read() == files[1][1]
+        assert spool.received_bytes == sum(len(content) for _, content in files)
+
+    def test_rejects_non_multipart(self, spool):
+        with pytest.raises(UploadStreamError):
+            MultipartSpoolParser("application/json", spool)
+
+    def test_backpressure_until_files_are_released(self, spool):
+        """Completed files over the cap block the producer until released"""
+        spool.begin_file("big.png")
+        spool.write(b"x" * 1500)
+        # A single file over the cap still goes through
+        assert not spool.over_capacity()
+        first = spool.end_file()
+
+        spool.begin_file("next.png")
+        spool.write(b"x" * 10)
+        assert spool.over_capacity()
+        assert not spool.wait_for_capacity(timeout=0.01)
+
+        threading.Timer(0.05, spool.release, [first]).start()
+        assert spool.wait_for_capacity(timeout=5)
+        assert not os.path.exists(first.path)
+
+
+class TestStreamingWorkflow:
+    """Test suite for processing a spool while it is being filled"""
+
+    def test_files_are_processed_from_disk_and_released(self, spool, monkeypatch):
+        workflow = ImageUploadWorkflow("user-1", Mock(), max_threads=1)
+        monkeypatch.setattr(workflow, "_load_existing_phashes", lambda: None)
+        batches = []
+
+        def fake_process_batch(images, batch_id, design_data=None):
+            batches.append([(image.original_filename, image.read_content()) for image in images])
+            return BatchResult(batch_id, len(images), 0, 0, 0, 0.0, len(images), len(images), 0)
+
+        monkeypatch.setattr(workflow, "_process_batch", fake_process_batch)
+
+        for index in range(3):
+            spool.begin_file(f"{index}.png")
+            spool.write(bytes([index]) * 100)
+            spool.end_file()
+        spool.close()
+
+        result = workflow.process_upload_stream(spool, Mock(product_template_id=None, starting_name=100),
+                                                max_batch_images=2)
+
+        assert batches == [[("0.png", b"\x00" * 100), ("1.png", b"\x01" * 100)], [("2.png", b"\x02" * 100)]]
+        assert (result.total_images, result.processed_images) == (3, 3)
+        assert os.listdir(spool.directory) == []
+        assert not spool.over_capacity()
@@ -2,12 +2,17 @@ import os, cv2, numpy as np
 os.environ["OPENCV_IO_MAX_IMAGE_PIXELS"] = str(pow(2,40))
 os.environ["OPENCV_LOG_LEVEL"] = "ERROR"
 
-def crop_transparent(image_path='', image=None):
+def crop_transparent(image_path='', image=None, bbox=None):
     # Read the image with OpenCV
     if image is None:
         img = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
     else:
         img = image
+
+    # Alpha bounding box recorded at ingest ([x, y, width, height]), no need to scan the alpha channel
+    if bbox is not None and img is not None and img.ndim == 3 and img.shape[2] == 4:
+        x, y, width, height = bbox
+        return img[y:y+height, x:x+width]
     
     # Ensure the image has an alpha channel
     if img.shape[2] != 4:
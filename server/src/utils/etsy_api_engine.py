@@ -3,8 +3,13 @@ from typing import List, Dict, Optional
 from urllib.parse import urlencode
 from collections import deque
 from server.src.entities.third_party_oauth import ThirdPartyOAuthToken
+from server.src.services.etsy_token_store import load_etsy_token, save_etsy_token
+from server.src.services.token_refresh_lock import connection_lock_key, token_refresh_lock
 from server.src.utils.nas_storage import nas_storage
 
+# Concurrent page requests when pulling a full shop listing
+ETSY_LISTING_PAGE_WORKERS = int(os.getenv('ETSY_LISTING_PAGE_WORKERS', '4'))
+
 class EtsyAPI:
     # Class-level cache for order data {cache_key: {'data': ..., 'timestamp': ...}}
     _order_cache = {}
@@ -121,7 +126,40 @@ class EtsyAPI:
     def is_token_expired(self):
         return time.time() > self.token_expiry - 60  # refresh 1 min before expiry
 
+    def _adopt_stored_token(self) -> bool:
+        """Use the stored token if another process refreshed it since we loaded ours"""
+        if not (self.user_id and self.db):
+            return False
+        stored = load_etsy_token(self.db, self.user_id)
+        if not stored or stored.access_token == self.oauth_token or not stored.expires_at:
+            return False
+        if stored.expires_at.timestamp() <= time.time() + 60:
+            return False
+        self.oauth_token = stored.access_token
+        self.refresh_token = stored.refresh_token or self.refresh_token
+        self.token_expiry = stored.expires_at.timestamp()
+        logging.info("Using Etsy token refreshed by another process")
+        return True
+
     def refresh_access_token(self):
+        """
+        Refresh the OAuth token under the connection's refresh lock.
+
+        Etsy refresh tokens are single use, so this shares the lock with the
+        background OAuth refresh service and picks up a token another holder
+        refreshed while we waited instead of refreshing again.
+        """
+        if not self.user_id:
+            return self._refresh_access_token()
+
+        with token_refresh_lock.hold(connection_lock_key('etsy', self.user_id)) as acquired:
+            if self._adopt_stored_token():
+                return
+            if not acquired:
+                raise Exception("Etsy token refresh is already in progress elsewhere.")
+            self._refresh_access_token()
+
+    def _refresh_access_token(self):
         token_url = "https://api.etsy.com/v3/public/oauth/token"
         refresh_token = self.refresh_token
         if not refresh_token:
@@ -146,37 +184,13 @@ class EtsyAPI:
             expires_in = token_info.get('expires_in', 3600)
             self.token_expiry = time.time() + expires_in
 
-            # Save refreshed tokens to database first (primary storage)
+            # Save refreshed tokens to database first (primary storage); the Etsy
+            # platform connection gets the rotated token too, since the old one is spent
             if self.user_id and self.db:
                 try:
                     from datetime import datetime, timezone
                     expires_at = datetime.fromtimestamp(self.token_expiry, tz=timezone.utc)
-
-                    # Find existing token record
-                    token_obj = self.db.query(ThirdPartyOAuthToken).filter(
-                        ThirdPartyOAuthToken.user_id == self.user_id
-                    ).first()
-
-                    if token_obj:
-                        # Update existing record
-                        token_obj.access_token = self.oauth_token
-                        if new_refresh_token:
-                            token_obj.refresh_token = self.refresh_token
-                        token_obj.expires_at = expires_at
-                        token_obj.updated_at = datetime.now(timezone.utc)
-                    else:
-                        # Create new record
-                        token_obj = ThirdPartyOAuthToken(
-                            user_id=self.user_id,
-                            provider='etsy',
-                            access_token=self.oauth_token,
-                            refresh_token=self.refresh_token,
-                            expires_at=expires_at,
-                            created_at=datetime.now(timezone.utc),
-                            updated_at=datetime.now(timezone.utc)
-                        )
-                        self.db.add(token_obj)
-
+                    save_etsy_token(self.db, self.user_id, self.oauth_token, new_refresh_token, expires_at)
                     self.db.commit()
                     logging.info("Successfully saved refreshed tokens to database")
 
@@ -1276,64 +1290,82 @@ class EtsyAPI:
                 "total": 0
             }
 
-    def get_shop_listings(self, state: str = "active", limit: int = 100, offset: int = 0, include_images: bool = True) -> dict:
+    def _listing_headers(self) -> dict:
+        return {
+            'x-api-key': self.client_id,
+            'Authorization': f'Bearer {self.oauth_token}',
+        }
+
+    def _normalize_listing_images(self, listings: list) -> None:
+        """Expose embedded listing images under the 'images' key regardless of casing"""
+        for listing in listings:
+            if isinstance(listing, dict) and 'images' not in listing and 'Images' in listing:
+                listing['images'] = listing.get('Images') or []
+
+    def _fetch_listings_page(self, state: str, limit: int, offset: int, include_images: bool = True,
+                             extra_params: Optional[dict] = None, extra_headers: Optional[dict] = None) -> requests.Response:
+        """Request one page of shop listings and return the raw response"""
+        headers = self._listing_headers()
+        if extra_headers:
+            headers.update(extra_headers)
+
+        params = {
+            'limit': min(limit, 100),  # Etsy max is 100
+            'offset': offset,
+            'state': state
+        }
+        # Ask Etsy to embed images so we never need a request per listing
+        if include_images:
+            params['includes'] = 'Images'
+        if extra_params:
+            params.update(extra_params)
+
+        url = f"{self.base_url}/application/shops/{self.shop_id}/listings"
+        return self.session.get(url, headers=headers, params=params, timeout=30)
+
+    def get_shop_listings(self, state: str = "active", limit: int = 100, offset: int = 0,
+                          include_images: bool = True, use_cache: bool = True) -> dict:
         """
         Get all shop listings with optional filtering by state
         
+        Pages are served from the local listing snapshot when a fresh one
+        exists; otherwise the page is fetched from Etsy with embedded images.
+        
         Args:
             state (str): Filter by listing state ('active', 'draft', 'expired', etc.)
             limit (int): Number of listings to return (max 100)
             offset (int): Number of listings to skip for pagination
             include_images (bool): Whether to include listing images
+            use_cache (bool): Whether a fresh local snapshot may be used
             
         Returns:
             dict: Response containing listings data with images
         """
-        self.ensure_valid_token()
-        logging.info(f"Using shop_id: {self.shop_id}")
-        logging.info(f"OAuth token exists: {bool(self.oauth_token)}")
-        headers = {
-            'x-api-key': self.client_id,
-            'Authorization': f'Bearer {self.oauth_token}',
-        }
+        from server.src.utils.etsy_listing_cache import listing_snapshot_store
 
-        url = f"{self.base_url}/application/shops/{self.shop_id}/listings"
-        params = {
-            'limit': min(limit, 100),  # Etsy max is 100
-            'offset': offset,
-            'state': state
-        }
-        
-        # Add includes parameter to get images
-        if include_images:
-            params['includes'] = 'Images'
-        
+        limit = min(limit, 100)
+        if use_cache and include_images:
+            snapshot = listing_snapshot_store.get(self.shop_id, state)
+            if snapshot and listing_snapshot_store.is_fresh(snapshot):
+                logging.info(f"Serving listings {offset}-{offset + limit} for shop {self.shop_id} from local snapshot")
+                return {
+                    'results': snapshot['listings'][offset:offset + limit],
+                    'count': snapshot['count']
+                }
+
+        self.ensure_valid_token()
         try:
-            logging.info(f"Making Etsy API request: {url} with params: {params}")
-            response = self.session.get(url, headers=headers, params=params)
+            response = self._fetch_listings_page(state, limit, offset, include_images)
             logging.info(f"Etsy API response status: {response.status_code}")
             response.raise_for_status()
             listings_data = response.json()
 
-            results_count = len(listings_data.get('results', []))
-            total_count = listings_data.get('count', 0)
-            logging.info(f"Etsy API returned {results_count} listings out of {total_count} total")
-
-            if results_count > 0:
-                first_listing = listings_data.get('results', [{}])[0]
-                logging.info(f"First listing keys: {list(first_listing.keys()) if isinstance(first_listing, dict) else 'Not a dict'}")
-                if 'Images' in first_listing:
-                    logging.info(f"First listing has {len(first_listing['Images'])} images")
-                elif 'images' in first_listing:
-                    logging.info(f"First listing has {len(first_listing['images'])} images")
-                else:
-                    logging.info("First listing has no Images or images key")
+            listings = listings_data.get('results', [])
+            logging.info(f"Etsy API returned {len(listings)} listings out of {listings_data.get('count', 0)} total")
 
-            # If images are included, they should be in the response
-            # If not included via the includes parameter, we need to fetch them separately
-            if include_images and 'includes' not in params:
-                logging.info("Adding images to listings separately...")
-                self._add_images_to_listings(listings_data.get('results', []), headers)
+            if include_images:
+                self._normalize_listing_images(listings)
+                self._add_images_to_listings(listings, self._listing_headers())
 
             return listings_data
         except Exception as e:
@@ -1368,18 +1400,18 @@ class EtsyAPI:
             logging.error(f"Failed to fetch listing {listing_id}: {e}")
             raise Exception(f"Failed to fetch listing {listing_id}: {e}")
 
-    def update_listing(self, listing_id: int, update_data: dict) -> dict:
+    def send_listing_update(self, listing_id: int, update_data: dict) -> requests.Response:
         """
-        Update a specific listing
+        Send a listing PATCH and return the raw response without raising,
+        so callers can inspect status codes and rate limit headers
         
         Args:
             listing_id (int): The listing ID to update
             update_data (dict): Fields to update (title, description, price, etc.)
             
         Returns:
-            dict: Updated listing data
+            requests.Response: The Etsy API response
         """
-        self.ensure_valid_token()
         headers = {
             'x-api-key': self.client_id,
             'Authorization': f'Bearer {self.oauth_token}',
@@ -1387,97 +1419,217 @@ class EtsyAPI:
         }
         
         url = f"{self.base_url}/application/shops/{self.shop_id}/listings/{listing_id}"
+        return self.session.patch(url, headers=headers, json=update_data, timeout=30)
+
+    def update_listing(self, listing_id: int, update_data: dict) -> dict:
+        """
+        Update a specific listing
+        
+        Args:
+            listing_id (int): The listing ID to update
+            update_data (dict): Fields to update (title, description, price, etc.)
+            
+        Returns:
+            dict: Updated listing data
+        """
+        self.ensure_valid_token()
         
         try:
-            response = self.session.patch(url, headers=headers, json=update_data)
+            response = self.send_listing_update(listing_id, update_data)
             response.raise_for_status()
+            self._invalidate_listing_snapshots()
             return response.json()
         except Exception as e:
             logging.error(f"Failed to update listing {listing_id}: {e}")
             raise Exception(f"Failed to update listing {listing_id}: {e}")
 
-    def bulk_update_listings(self, listing_updates: List[dict]) -> dict:
+    def bulk_update_listings(self, listing_updates: List[dict], job_id: Optional[str] = None,
+                             progress_callback=None, max_workers: Optional[int] = None) -> dict:
         """
         Update multiple listings in bulk
         
+        Updates run concurrently under the shop's rate budget, transient
+        failures are retried with backoff, and per-listing results are
+        checkpointed so the job can be resumed by passing the same job_id.
+        
         Args:
             listing_updates (List[dict]): List of updates, each containing 'listing_id' and update fields
+            job_id (str): Optional ID of a previous job to resume
+            progress_callback (callable): Optional (completed, total, result) callback per listing
+            max_workers (int): Optional override of the number of concurrent requests
             
         Returns:
             dict: Results of bulk update operation
         """
-        results = {
-            'successful': [],
-            'failed': [],
-            'total': len(listing_updates)
-        }
+        from server.src.services.etsy_bulk_update import EtsyBulkUpdater
+
+        updater = EtsyBulkUpdater(self, max_workers=max_workers)
+        try:
+            return updater.run(listing_updates, job_id=job_id, progress_callback=progress_callback)
+        finally:
+            self._invalidate_listing_snapshots()
+
+    def _invalidate_listing_snapshots(self):
+        """Drop local listing snapshots for this shop after listings change"""
+        from server.src.utils.etsy_listing_cache import listing_snapshot_store
+        listing_snapshot_store.invalidate(self.shop_id)
+
+    def _add_images_to_listings(self, listings: list, headers: dict) -> None:
+        """
+        Helper method to add images to listings if not already included
         
-        for update in listing_updates:
-            listing_id = update.pop('listing_id')  # Remove listing_id from update data
+        Listings missing embedded images are resolved with the batch listings
+        endpoint, 100 listing IDs per request, rather than one request each.
+        """
+        missing = [l for l in listings if l.get('listing_id') is not None and 'images' not in l]
+        if not missing:
+            return
+
+        by_id = {l['listing_id']: l for l in missing}
+        ids = list(by_id.keys())
+        url = f"{self.base_url}/application/listings/batch"
+
+        for i in range(0, len(ids), 100):
+            chunk = ids[i:i + 100]
             try:
-                updated_listing = self.update_listing(listing_id, update)
-                results['successful'].append({
-                    'listing_id': listing_id,
-                    'data': updated_listing
-                })
+                response = self.session.get(
+                    url,
+                    headers=headers,
+                    params={'listing_ids': ','.join(str(listing_id) for listing_id in chunk), 'includes': 'Images'},
+                    timeout=30
+                )
+                if response.status_code == 200:
+                    for result in response.json().get('results', []):
+                        listing = by_id.get(result.get('listing_id'))
+                        if listing is not None:
+                            listing['images'] = result.get('images') or result.get('Images') or []
+                else:
+                    logging.warning(f"Batch image fetch returned {response.status_code} for {len(chunk)} listings")
             except Exception as e:
-                results['failed'].append({
-                    'listing_id': listing_id,
-                    'error': str(e)
-                })
-        
-        return results
+                logging.warning(f"Failed to batch fetch images for {len(chunk)} listings: {e}")
 
-    def _add_images_to_listings(self, listings: list, headers: dict) -> None:
+        for listing in missing:
+            listing.setdefault('images', [])
+
+    def _listing_snapshot_is_current(self, snapshot: dict, state: str) -> bool:
         """
-        Helper method to add images to listings if not already included
+        Revalidate a listing snapshot with a single cheap request
+        
+        Sends the snapshot's ETag/Last-Modified validators and asks for the most
+        recently updated listing. The snapshot is current if Etsy answers 304, or
+        if the listing count is unchanged and nothing was modified since.
         """
-        for listing in listings:
-            listing_id = listing.get('listing_id')
-            if listing_id and 'images' not in listing:
-                try:
-                    images_url = f"{self.base_url}/application/listings/{listing_id}/images"
-                    images_response = self.session.get(images_url, headers=headers)
-                    if images_response.status_code == 200:
-                        images_data = images_response.json()
-                        listing['images'] = images_data.get('results', [])
-                    else:
-                        listing['images'] = []
-                except Exception as e:
-                    logging.warning(f"Failed to fetch images for listing {listing_id}: {e}")
-                    listing['images'] = []
+        conditional_headers = {}
+        if snapshot.get('etag'):
+            conditional_headers['If-None-Match'] = snapshot['etag']
+        if snapshot.get('last_modified'):
+            conditional_headers['If-Modified-Since'] = snapshot['last_modified']
+
+        try:
+            response = self._fetch_listings_page(
+                state, 1, 0, include_images=False,
+                extra_params={'sort_on': 'updated', 'sort_order': 'desc'},
+                extra_headers=conditional_headers
+            )
+            if response.status_code == 304:
+                return True
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            logging.warning(f"Listing snapshot revalidation failed, refetching: {e}")
+            return False
 
-    def get_all_shop_listings(self, state: str = "active", include_images: bool = True) -> dict:
+        results = data.get('results', [])
+        newest = results[0].get('last_modified_timestamp', 0) if results else 0
+        return data.get('count', 0) == snapshot.get('count') and newest <= snapshot.get('max_last_modified_timestamp', 0)
+
+    def get_all_shop_listings(self, state: str = "active", include_images: bool = True, use_cache: bool = True) -> dict:
         """
         Get ALL shop listings by paginating through all pages
         
+        Repeat calls are served from the local listing snapshot, revalidated
+        against Etsy once it is no longer fresh. A full pull fetches the first
+        page to learn the total, then the remaining pages concurrently under
+        the shop's rate budget.
+        
         Args:
             state (str): Filter by listing state ('active', 'draft', 'expired', etc.)
             include_images (bool): Whether to include listing images
+            use_cache (bool): Whether the local snapshot may be used
             
         Returns:
             dict: All listings data with images
         """
-        all_listings = []
-        offset = 0
+        from concurrent.futures import ThreadPoolExecutor
+        from server.src.utils.etsy_listing_cache import listing_snapshot_store
+        from server.src.services.etsy_bulk_update import get_rate_budget
+
+        self.ensure_valid_token()
+        cacheable = include_images
+
+        if use_cache and cacheable:
+            snapshot = listing_snapshot_store.get(self.shop_id, state)
+            if snapshot:
+                if listing_snapshot_store.is_fresh(snapshot) or self._listing_snapshot_is_current(snapshot, state):
+                    listing_snapshot_store.touch(self.shop_id, state, snapshot)
+                    logging.info(f"Serving {snapshot['count']} listings for shop {self.shop_id} from local snapshot")
+                    return {
+                        'results': snapshot['listings'],
+                        'count': snapshot['count'],
+                        'total': snapshot['count']
+                    }
+
         limit = 100  # Max per request
-        
-        while True:
-            response = self.get_shop_listings(state=state, limit=limit, offset=offset, include_images=include_images)
-            listings = response.get('results', [])
-            all_listings.extend(listings)
-            
-            # Check if we have more pages
-            total_count = response.get('count', 0)
-            if offset + limit >= total_count:
-                break
-                
-            offset += limit
-        
+        budget = get_rate_budget(self.shop_id)
+
+        def fetch_page(offset: int) -> requests.Response:
+            budget.acquire()
+            response = self._fetch_listings_page(state, limit, offset, include_images)
+            response.raise_for_status()
+            return response
+
+        try:
+            first_response = fetch_page(0)
+            first_page = first_response.json()
+            all_listings = list(first_page.get('results', []))
+            total_count = first_page.get('count', 0)
+
+            offsets = list(range(limit, total_count, limit))
+            if offsets:
+                with ThreadPoolExecutor(max_workers=min(len(offsets), ETSY_LISTING_PAGE_WORKERS),
+                                        thread_name_prefix="etsy-listing-pages-") as executor:
+                    # map preserves page order
+                    for response in executor.map(fetch_page, offsets):
+                        all_listings.extend(response.json().get('results', []))
+        except Exception as e:
+            logging.error(f"Failed to fetch all shop listings: {e}")
+            raise Exception(f"Failed to fetch shop listings: {e}")
+
+        # Listings can shift between pages while paging concurrently
+        seen = set()
+        unique_listings = []
+        for listing in all_listings:
+            listing_id = listing.get('listing_id')
+            if listing_id in seen:
+                continue
+            seen.add(listing_id)
+            unique_listings.append(listing)
+
+        if include_images:
+            self._normalize_listing_images(unique_listings)
+            self._add_images_to_listings(unique_listings, self._listing_headers())
+
+        if cacheable:
+            listing_snapshot_store.put(
+                self.shop_id, state, unique_listings,
+                etag=first_response.headers.get('ETag'),
+                last_modified=first_response.headers.get('Last-Modified')
+            )
+
         return {
-            'results': all_listings,
-            'count': len(all_listings),
-            'total': len(all_listings)
+            'results': unique_listings,
+            'count': len(unique_listings),
+            'total': len(unique_listings)
         }
 
     def get_all_active_listings_images(self) -> list:
@@ -0,0 +1,131 @@
+"""
+Local snapshots of Etsy shop listings
+
+Keeps the last full listing pull per (shop, state) in memory and on disk so
+repeat listings-manager and gallery loads don't re-page the Etsy API.
+Snapshots carry the ETag / Last-Modified validators of the first page and the
+newest last_modified_timestamp seen, which are used to revalidate cheaply.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+ETSY_LISTING_CACHE_DIR = os.getenv('ETSY_LISTING_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'etsy_listing_snapshots'))
+# Serve snapshots without revalidating for this long
+ETSY_LISTING_CACHE_FRESH_SECONDS = int(os.getenv('ETSY_LISTING_CACHE_FRESH_SECONDS', '120'))
+# Drop snapshots entirely after this long
+ETSY_LISTING_CACHE_MAX_AGE_SECONDS = int(os.getenv('ETSY_LISTING_CACHE_MAX_AGE_SECONDS', '86400'))
+
+
+class ListingSnapshotStore:
+    """Memory + disk store of full listing snapshots keyed by shop and state"""
+
+    def __init__(self, cache_dir: str = ETSY_LISTING_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, shop_id, state: str) -> str:
+        return f"{shop_id}_{state}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, shop_id, state: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot, or None if missing or past its maximum age"""
+        key = self._key(shop_id, state)
+        with self._lock:
+            snapshot = self._memory.get(key)
+
+        if snapshot is None:
+            try:
+                with open(self._path(key), 'r') as f:
+                    snapshot = json.load(f)
+                with self._lock:
+                    self._memory[key] = snapshot
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                logger.warning(f"Failed to read listing snapshot {key}: {e}")
+                return None
+
+        if time.time() - snapshot.get('fetched_at', 0) > ETSY_LISTING_CACHE_MAX_AGE_SECONDS:
+            self.invalidate(shop_id, state)
+            return None
+        return snapshot
+
+    def is_fresh(self, snapshot: Dict[str, Any]) -> bool:
+        """Whether a snapshot can be served without revalidation"""
+        return time.time() - snapshot.get('validated_at', 0) < ETSY_LISTING_CACHE_FRESH_SECONDS
+
+    def put(self, shop_id, state: str, listings: List[dict], etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> Dict[str, Any]:
+        """Store a full listing pull as the current snapshot"""
+        now = time.time()
+        snapshot = {
+            'shop_id': str(shop_id),
+            'state': state,
+            'listings': listings,
+            'count': len(listings),
+            'etag': etag,
+            'last_modified': last_modified,
+            'max_last_modified_timestamp': max((l.get('last_modified_timestamp') or 0 for l in listings), default=0),
+            'fetched_at': now,
+            'validated_at': now
+        }
+        key = self._key(shop_id, state)
+        with self._lock:
+            self._memory[key] = snapshot
+        self._write(key, snapshot)
+        return snapshot
+
+    def touch(self, shop_id, state: str, snapshot: Dict[str, Any]):
+        """Mark a snapshot as revalidated against Etsy"""
+        snapshot['validated_at'] = time.time()
+        key = self._key(shop_id, state)
+        with self._lock:
+            self._memory[key] = snapshot
+        self._write(key, snapshot)
+
+    def invalidate(self, shop_id, state: Optional[str] = None):
+        """Drop snapshots for a shop (all states when state is None)"""
+        prefix = f"{shop_id}_"
+        with self._lock:
+            keys = [k for k in self._memory if k == self._key(shop_id, state)] if state else \
+                [k for k in self._memory if k.startswith(prefix)]
+            for key in keys:
+                self._memory.pop(key, None)
+
+        try:
+            if state:
+                paths = [self._path(self._key(shop_id, state))]
+            elif os.path.isdir(self.cache_dir):
+                paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.startswith(prefix)]
+            else:
+                paths = []
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+        except Exception as e:
+            logger.warning(f"Failed to remove listing snapshot for shop {shop_id}: {e}")
+
+    def _write(self, key: str, snapshot: Dict[str, Any]):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logger.warning(f"Failed to persist listing snapshot {key}: {e}")
+
+
+# Global snapshot store shared by all EtsyAPI instances
+listing_snapshot_store = ListingSnapshotStore()
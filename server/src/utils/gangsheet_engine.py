@@ -2,7 +2,9 @@ import numpy as np
 import cv2, os, tempfile
 from datetime import date
 from functools import lru_cache
-from server.src.utils.util import inches_to_pixels, rotate_image_90, save_single_image, save_image_with_format
+from server.src.utils.util import inches_to_pixels, rotate_image_90, save_single_image, save_image_with_format, read_image_with_dpi, probe_file_dpi
+from server.src.utils.image_geometry import load_geometry_by_path
+from server.src.services.print_raster_cache import print_raster_cache, raster_key
 
 # Optional memory monitoring (install with: pip install psutil)
 # This provides detailed memory usage reporting and prevents out-of-memory errors
@@ -28,12 +30,13 @@ GANG_SHEET_SPACING = {
 }
 GANG_SHEET_MAX_HEIGHT = 215  # inches - USE printer.max_height_inches instead
 STD_DPI = 400  # USE printer.dpi or canvas_config.dpi instead
+PRINT_RASTER_ROTATION = 90  # process_image() rotates every design by 90 degrees
 
 @lru_cache(maxsize=None)
 def cached_inches_to_pixels(inches, dpi):
    return inches_to_pixels(inches, dpi)
 
-def process_image(img_path, normalize_dpi=True, target_dpi=400):
+def process_image(img_path, normalize_dpi=True, target_dpi=400, source_dpi=None):
    """
    Process a single image: load, convert to BGRA, normalize DPI, and rotate.
 
@@ -41,13 +44,15 @@ def process_image(img_path, normalize_dpi=True, target_dpi=400):
        img_path: Path to the image file
        normalize_dpi: If True, normalize DPI metadata to target_dpi (default: True)
        target_dpi: Target DPI for normalization (default: 400)
+       source_dpi: (x, y) DPI recorded at ingest; otherwise probed from the file header
 
    Returns:
        Processed image as numpy array or None if failed
    """
    import logging
    if os.path.exists(img_path):
-       img = cv2.imread(img_path, cv2.IMREAD_UNCHANGED)
+       # Read the file once: decode and probe the DPI from the same bytes
+       img, header_dpi = read_image_with_dpi(img_path)
        if img is None:
            logging.warning(f"Failed to load image: {img_path}")
            return None
@@ -68,33 +73,30 @@ def process_image(img_path, normalize_dpi=True, target_dpi=400):
        # when combined in a gang sheet even if pixel dimensions are identical
        if normalize_dpi:
            try:
-               from PIL import Image
-               # Read DPI metadata using PIL
-               with Image.open(img_path) as pil_img:
-                   current_dpi = pil_img.info.get('dpi', (target_dpi, target_dpi))
-                   if isinstance(current_dpi, (int, float)):
-                       current_dpi = (current_dpi, current_dpi)
-
-                   # Log DPI normalization
-                   if current_dpi[0] != target_dpi or current_dpi[1] != target_dpi:
-                       logging.info(f"Normalizing DPI: {img_path} from {current_dpi} to ({target_dpi}, {target_dpi})")
-
-                       # Calculate scale factor based on DPI difference
-                       # If image is 72 DPI but we want 400 DPI, we need to scale it up
-                       # to maintain the same physical size
-                       scale_x = target_dpi / current_dpi[0]
-                       scale_y = target_dpi / current_dpi[1]
-
-                       # Only scale if there's a significant difference (> 1% variation)
-                       if abs(scale_x - 1.0) > 0.01 or abs(scale_y - 1.0) > 0.01:
-                           h, w = img.shape[:2]
-                           new_w = int(w * scale_x)
-                           new_h = int(h * scale_y)
-
-                           # Use high-quality interpolation
-                           interpolation = cv2.INTER_CUBIC if scale_x > 1 else cv2.INTER_AREA
-                           img = cv2.resize(img, (new_w, new_h), interpolation=interpolation)
-                           logging.info(f"Resized from {w}x{h} to {new_w}x{new_h} (scale: {scale_x:.2f}x, {scale_y:.2f}x)")
+               current_dpi = source_dpi or header_dpi or (target_dpi, target_dpi)
+               if isinstance(current_dpi, (int, float)):
+                   current_dpi = (current_dpi, current_dpi)
+
+               # Log DPI normalization
+               if current_dpi[0] != target_dpi or current_dpi[1] != target_dpi:
+                   logging.info(f"Normalizing DPI: {img_path} from {current_dpi} to ({target_dpi}, {target_dpi})")
+
+                   # Calculate scale factor based on DPI difference
+                   # If image is 72 DPI but we want 400 DPI, we need to scale it up
+                   # to maintain the same physical size
+                   scale_x = target_dpi / current_dpi[0]
+                   scale_y = target_dpi / current_dpi[1]
+
+                   # Only scale if there's a significant difference (> 1% variation)
+                   if abs(scale_x - 1.0) > 0.01 or abs(scale_y - 1.0) > 0.01:
+                       h, w = img.shape[:2]
+                       new_w = int(w * scale_x)
+                       new_h = int(h * scale_y)
+
+                       # Use high-quality interpolation
+                       interpolation = cv2.INTER_CUBIC if scale_x > 1 else cv2.INTER_AREA
+                       img = cv2.resize(img, (new_w, new_h), interpolation=interpolation)
+                       logging.info(f"Resized from {w}x{h} to {new_w}x{new_h} (scale: {scale_x:.2f}x, {scale_y:.2f}x)")
            except Exception as e:
                logging.warning(f"Failed to normalize DPI for {img_path}: {e}")
 
@@ -108,7 +110,69 @@ def process_image_cached(img_path):
    """Cached version of process_image for frequently accessed images."""
    return process_image(img_path)
 
-def process_images_parallel(img_paths, max_workers=4):
+def file_content_hash(img_path):
+   """BLAKE2b digest of a file's bytes, the cache key for designs without a stored content hash"""
+   import hashlib
+   digest = hashlib.blake2b(digest_size=32)
+   with open(img_path, 'rb') as f:
+       for chunk in iter(lambda: f.read(1024 * 1024), b''):
+           digest.update(chunk)
+   return digest.hexdigest()
+
+def load_print_raster(img_path, content_hash=None, target_dpi=400, source_dpi=None, fetch_design=None):
+   """
+   process_image() through the print raster cache.
+
+   With the design's stored content hash and DPI a cached raster is
+   returned without touching img_path, so the file need not be downloaded.
+   Rasters are cached per source DPI, since that sets the resample factor.
+   Cached rasters are read-only memory maps.
+
+   Args:
+       img_path: Path to the image file
+       content_hash: Content hash stored for the design (hash of the file if not given)
+       target_dpi: Target DPI for normalization (default: 400)
+       source_dpi: (x, y) DPI recorded at ingest (probed from the file if not given)
+       fetch_design: Optional callable returning a local copy of img_path, used on a
+           cache miss when the file was not downloaded (the entry was evicted meanwhile)
+
+   Returns:
+       Processed image as numpy array or None if failed
+   """
+   import logging
+   if not print_raster_cache.enabled:
+       return process_image(img_path, target_dpi=target_dpi, source_dpi=source_dpi)
+
+   def identify(path, content_hash, source_dpi):
+       """Fill in the hash and DPI from the file, as process_image() would use them"""
+       if not os.path.exists(path):
+           return content_hash, source_dpi
+       try:
+           if content_hash is None:
+               content_hash = file_content_hash(path)
+           if source_dpi is None:
+               source_dpi = probe_file_dpi(path) or (target_dpi, target_dpi)
+       except OSError as e:
+           logging.warning(f"Could not identify {path}: {e}")
+       return content_hash, source_dpi
+
+   content_hash, source_dpi = identify(img_path, content_hash, source_dpi)
+   key = raster_key(content_hash, source_dpi)
+   img = print_raster_cache.get(key, target_dpi, PRINT_RASTER_ROTATION)
+   if img is not None:
+       return img
+
+   if fetch_design is not None and not os.path.exists(img_path):
+       img_path = fetch_design(img_path) or img_path
+       content_hash, source_dpi = identify(img_path, content_hash, source_dpi)
+       key = raster_key(content_hash, source_dpi)
+
+   img = process_image(img_path, target_dpi=target_dpi, source_dpi=source_dpi)
+   if img is not None:
+       print_raster_cache.put(key, target_dpi, PRINT_RASTER_ROTATION, img)
+   return img
+
+def process_images_parallel(img_paths, max_workers=4, source_dpis=None, content_hashes=None):
    """
    OPTIMIZATION: Process multiple images in parallel using ThreadPoolExecutor.
    Returns a dict mapping index to processed image.
@@ -116,6 +180,8 @@ def process_images_parallel(img_paths, max_workers=4):
    Args:
        img_paths: List of image paths to process
        max_workers: Maximum number of concurrent threads (default: 4)
+       source_dpis: Optional dict mapping path to its stored (x, y) DPI
+       content_hashes: Optional dict mapping path to its stored content hash (print raster cache key)
 
    Returns:
        Dict mapping image index to processed numpy array
@@ -136,7 +202,8 @@ def process_images_parallel(img_paths, max_workers=4):
    with ThreadPoolExecutor(max_workers=max_workers) as executor:
        # Submit all image processing tasks
        future_to_index = {
-           executor.submit(process_image, path): i
+           executor.submit(load_print_raster, path, content_hash=(content_hashes or {}).get(path),
+                           source_dpi=(source_dpis or {}).get(path)): i
            for i, path in valid_paths
        }
 
@@ -366,7 +433,14 @@ def create_gang_sheets_from_db(
    logging.info(f"Processing {len(image_paths_to_process)} images in parallel...")
    import time
    start_time = time.time()
-   processed_images = process_images_parallel(image_paths_to_process, max_workers=6)
+   # Geometry recorded at ingest: DPI and content hash without opening the files
+   from server.src.entities.mockup import MockupImage
+   geometries = load_geometry_by_path(db, MockupImage, image_paths_to_process)
+   processed_images = process_images_parallel(
+       image_paths_to_process, max_workers=6,
+       source_dpis={path: (geometry.dpi_x, geometry.dpi_y) for path, geometry in geometries.items()},
+       content_hashes={path: geometry.content_hash for path, geometry in geometries.items()}
+   )
    processing_time = time.time() - start_time
    logging.info(f"Parallel image processing completed in {processing_time:.2f}s ({len(processed_images)} images)")
 
@@ -418,7 +492,10 @@ def create_gang_sheets(
     std_dpi=None,
     text='Single ',
     processed_images=None,
-    file_format='PNG'
+    file_format='PNG',
+    content_hashes=None,
+    source_dpis=None,
+    fetch_design=None
 ):
    """
    Create gang sheets from image data.
@@ -436,6 +513,12 @@ def create_gang_sheets(
        std_dpi: Standard DPI for output scaling (defaults to dpi)
        text: Text prefix for output filename
        file_format: Output file format ('PNG', 'SVG', or 'PSD')
+       content_hashes: Optional dict mapping title to the design's stored content hash;
+           cached print rasters are used for them even if the file isn't there
+       source_dpis: Optional dict mapping title to the design's stored (x, y) DPI,
+           needed with content_hashes to find a cached raster without the file
+       fetch_design: Optional callable returning a local copy of a title whose file
+           isn't there and whose cached raster is gone (see load_print_raster)
    """
    import logging
 
@@ -549,7 +632,9 @@ def create_gang_sheets(
                                    del processed_images[k]
                                    logging.debug(f"Removed image {k} from cache to free memory")
 
-                       processed_images[index] = process_image(titles[index])
+                       processed_images[index] = load_print_raster(
+                           titles[index], content_hash=(content_hashes or {}).get(titles[index]),
+                           source_dpi=(source_dpis or {}).get(titles[index]), fetch_design=fetch_design)
                    else:
                        processed_images[index] = None
                except Exception as e:
@@ -696,7 +781,8 @@ def create_gang_sheets(
                            # Place image on gang sheet
                            gang_sheet[current_y:y_end, current_x:x_end] = img[:y_end-current_y, :x_end-current_x]
 
-                           # Track this image's position and metadata for layered export
+                           # Track this image's position and metadata for layered export.
+                           # Every copy references the same image array instead of its own copy
                            image_label = os.path.splitext(os.path.basename(str(titles[i])))[0] if titles[i] else f"Image_{i}"
                            placed_images.append({
                                'label': image_label,
@@ -704,7 +790,7 @@ def create_gang_sheets(
                                'y': current_y,
                                'width': img_width,
                                'height': img_height,
-                               'image_data': img.copy()  # Store copy of the image data
+                               'image_data': img
                            })
 
                            # For memory-mapped arrays, flush data periodically
@@ -798,7 +884,11 @@ def create_gang_sheets(
                        # Adjust placed_images positions to account for cropping and scaling
                        scale_factor = std_dpi / dpi
                        adjusted_placed_images = []
-                       for img_info in placed_images:
+                       # Scaled layer per unique image, shared by all of its copies
+                       scaled_images = {}
+                       # PNG output is flattened, it doesn't use the layers
+                       layered_placements = placed_images if file_format.upper() != 'PNG' else []
+                       for img_info in layered_placements:
                            # Adjust for cropping
                            adj_x = img_info['x'] - xmin
                            adj_y = img_info['y'] - ymin
@@ -808,8 +898,15 @@ def create_gang_sheets(
                            scaled_width = int(img_info['width'] * scale_factor)
                            scaled_height = int(img_info['height'] * scale_factor)
 
-                           # Resize the image data as well
-                           scaled_image = cv2.resize(img_info['image_data'], (scaled_width, scaled_height), interpolation=cv2.INTER_CUBIC)
+                           # Resize the image data as well, once per unique image and size
+                           scaled_key = (id(img_info['image_data']), scaled_width, scaled_height)
+                           scaled_image = scaled_images.get(scaled_key)
+                           if scaled_image is None:
+                               if scale_factor == 1 and img_info['image_data'].shape[:2] == (scaled_height, scaled_width):
+                                   scaled_image = img_info['image_data']
+                               else:
+                                   scaled_image = cv2.resize(img_info['image_data'], (scaled_width, scaled_height), interpolation=cv2.INTER_CUBIC)
+                               scaled_images[scaled_key] = scaled_image
 
                            adjusted_placed_images.append({
                                'label': img_info['label'],
@@ -829,7 +926,7 @@ def create_gang_sheets(
                            target_dpi=(dpi, dpi),
                            placed_images=adjusted_placed_images
                        )
-                       logging.info(f"Successfully created gang sheet with {len(adjusted_placed_images)} layers: {base_filename}.{file_format.lower()}")
+                       logging.info(f"Successfully created gang sheet with {len(adjusted_placed_images)} layers ({len(scaled_images)} unique images): {base_filename}.{file_format.lower()}")
                        
                        # CRITICAL: Immediately free memory after successful save
                        # This frees up the ~2.95GB gang sheet memory before starting next part
@@ -0,0 +1,148 @@
+"""
+Image geometry recorded at ingest
+
+Layout, mockup fitting and DPI normalization only need an image's pixel
+size, DPI, channel count and the bounding box of its opaque pixels. These
+are measured once when a design or mockup image is ingested, while the
+decoded pixels are at hand anyway, and stored on the row (see
+DesignImages / MockupImage). Planners read them back with
+load_geometry_by_path() and never decode the file.
+
+content_hash is a BLAKE2b digest of the decoded pixels and their shape,
+so re-encoding the file (e.g. background PNG recompression) keeps it.
+"""
+
+import hashlib
+import logging
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from server.src.utils.util import probe_dpi
+
+DEFAULT_DPI = 400
+
+
+@dataclass
+class ImageGeometry:
+    """Pixel geometry of a stored image"""
+    width_px: int
+    height_px: int
+    dpi_x: float
+    dpi_y: float
+    channels: int
+    # [x, y, width, height] of the non-transparent pixels; None if fully transparent
+    alpha_bbox: Optional[List[int]]
+    content_hash: str
+
+    def to_columns(self) -> Dict:
+        """Column values for DesignImages / MockupImage"""
+        return asdict(self)
+
+    @classmethod
+    def from_row(cls, row) -> Optional["ImageGeometry"]:
+        """Geometry stored on a row, or None for rows ingested before it was recorded"""
+        if getattr(row, 'width_px', None) is None or getattr(row, 'height_px', None) is None:
+            return None
+        return cls(
+            width_px=row.width_px,
+            height_px=row.height_px,
+            dpi_x=row.dpi_x or DEFAULT_DPI,
+            dpi_y=row.dpi_y or DEFAULT_DPI,
+            channels=row.channels or 4,
+            alpha_bbox=list(row.alpha_bbox) if row.alpha_bbox else None,
+            content_hash=row.content_hash
+        )
+
+    @property
+    def size_inches(self) -> Tuple[float, float]:
+        return self.width_px / self.dpi_x, self.height_px / self.dpi_y
+
+
+def alpha_bbox(image: np.ndarray) -> Optional[List[int]]:
+    """[x, y, width, height] of the pixels with non-zero alpha (the whole image without alpha)"""
+    height, width = image.shape[:2]
+    if image.ndim != 3 or image.shape[2] != 4:
+        return [0, 0, width, height]
+
+    alpha = image[:, :, 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(alpha[rows[0]:rows[-1] + 1].any(axis=0))
+    return [int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1)]
+
+
+def pixel_hash(image: np.ndarray) -> str:
+    """Hex digest of the decoded pixels, independent of the file encoding"""
+    digest = hashlib.blake2b(digest_size=32)
+    digest.update(f"{image.shape}|{image.dtype}".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def measure_array(image: np.ndarray, dpi: Optional[Tuple[float, float]] = None) -> ImageGeometry:
+    """Geometry of a decoded image (as cv2 returns it) saved at dpi"""
+    dpi_x, dpi_y = dpi or (DEFAULT_DPI, DEFAULT_DPI)
+    return ImageGeometry(
+        width_px=int(image.shape[1]),
+        height_px=int(image.shape[0]),
+        dpi_x=float(dpi_x),
+        dpi_y=float(dpi_y),
+        channels=1 if image.ndim == 2 else int(image.shape[2]),
+        alpha_bbox=alpha_bbox(image),
+        content_hash=pixel_hash(image)
+    )
+
+
+def read_dpi(data) -> Tuple[float, float]:
+    """DPI from the header of encoded image bytes; the pixels are not decoded"""
+    dpi = probe_dpi(data) or (DEFAULT_DPI, DEFAULT_DPI)
+    return float(dpi[0]), float(dpi[1])
+
+
+def measure_image(source) -> Optional[ImageGeometry]:
+    """Geometry of an encoded image given as bytes or a file path; None if it can't be decoded"""
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            data = np.frombuffer(source, np.uint8)
+        else:
+            data = np.fromfile(source, dtype=np.uint8)
+        image = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            return None
+        return measure_array(image, read_dpi(data))
+    except Exception as e:
+        logging.warning(f"Could not measure image geometry: {e}")
+        return None
+
+
+def load_geometry_by_path(db, entity, file_paths: Iterable[str]) -> Dict[str, ImageGeometry]:
+    """
+    Stored geometry for file paths of an entity with geometry columns
+    (DesignImages or MockupImage), in one query. Paths without it are omitted.
+    """
+    paths = {path for path in file_paths if path}
+    if not paths:
+        return {}
+
+    table = entity.__table__
+    try:
+        rows = db.execute(
+            table.select()
+            .with_only_columns(table.c.file_path, table.c.width_px, table.c.height_px, table.c.dpi_x,
+                               table.c.dpi_y, table.c.channels, table.c.alpha_bbox, table.c.content_hash)
+            .where(table.c.file_path.in_(paths))
+        ).all()
+    except Exception as e:
+        logging.warning(f"Could not load stored image geometry: {e}")
+        return {}
+
+    geometries = {}
+    for row in rows:
+        geometry = ImageGeometry.from_row(row)
+        if geometry is not None:
+            geometries[row.file_path] = geometry
+    return geometries
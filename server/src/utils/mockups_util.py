@@ -5,6 +5,7 @@ import os, cv2, re, logging, json
 import numpy as np
 from typing import List, Tuple, Dict, Any, Optional
 from server.src.utils.cropping import crop_transparent
+from server.src.utils.image_geometry import ImageGeometry
 from server.src.utils.resizing import resize_image_by_inches
 from server.src.entities.designs import DesignImages
 from server.src.entities.mockup import Mockups
@@ -486,20 +487,22 @@ class MockupImageProcessor:
         logger.info(f"✅ Watermark successfully applied with {opacity*100}% opacity")
         return image
 
-def process_design_image(design_file_path: str, template_name: str) -> Tuple[np.ndarray, str]:
+def process_design_image(design_file_path: str, template_name: str,
+                         geometry: Optional[ImageGeometry] = None) -> Tuple[np.ndarray, str]:
     """
     Process a design image for mockup creation.
     
     Args:
         design_file_path: Path to the design file
         template_name: Name of the template for resizing
+        geometry: Geometry stored for the design; its alpha bbox skips the transparency scan
     
     Returns:
         Tuple of (processed_image, temp_file_path)
     """
     
     # Process the design image
-    design_image = crop_transparent(design_file_path)
+    design_image = crop_transparent(design_file_path, bbox=geometry.alpha_bbox if geometry else None)
     if design_image is None:
         raise ValueError(f"Failed to process design image: {design_file_path}")
     
@@ -520,7 +523,8 @@ def create_mockup_images(
     root_path: str,
     starting_name: int,
     mask_data: Dict[str, Any],
-    watermark_path: Optional[str] = None
+    watermark_path: Optional[str] = None,
+    design_geometries: Optional[Dict[str, ImageGeometry]] = None
 ) -> List[dict]:
     """
     Create mockup images from a design file.
@@ -533,6 +537,7 @@ def create_mockup_images(
         starting_name: Starting name for file numbering
         mask_data: Dictionary containing 'masks', 'points', 'is_cropped', and 'alignment'
         watermark_path: Path to the watermark file (if not provided, uses default)
+        design_geometries: Stored geometry by design file path (see load_geometry_by_path)
     
     Returns:
         List of dictionaries with mockup image information
@@ -570,7 +575,8 @@ def create_mockup_images(
             raise FileNotFoundError(f"Design file not found: {design_file_path}")
 
         # Resize and crop the design image
-        resized_image = process_design_image(design_file_path, template_name)
+        resized_image = process_design_image(design_file_path, template_name,
+                                             (design_geometries or {}).get(design_file_path))
 
         # Create temporary design file for mockup processing
         temp_design_filename = f"temp_design_{mockup_id}_{os.path.basename(design_file_path)}"
@@ -3,6 +3,7 @@ import stat
 import logging
 import threading
 import time
+import uuid
 import queue
 from pathlib import Path
 from typing import Optional, Union, Dict, Any
@@ -360,7 +361,52 @@ class NASStorage:
         except Exception as e:
             logging.error(f"Failed to upload content to NAS: {e}")
             return False
-    
+
+    def replace_file_content(self, file_content: bytes, shop_name: str, relative_path: str,
+                             expected_size: Optional[int] = None) -> bool:
+        """
+        Atomically replace an existing file on the NAS
+
+        The content is written to a temporary file next to the target and
+        renamed over it, so readers see either the old or the new file.
+
+        Args:
+            file_content: New file content as bytes
+            shop_name: Name of the shop
+            relative_path: Relative path within the shop directory
+            expected_size: Only replace if the current file has this size
+
+        Returns:
+            bool: True if the file was replaced, False otherwise
+        """
+        if not self.enabled:
+            return False
+
+        remote_file_path = f"{self.base_path}/{shop_name}/{relative_path}"
+        temp_file_path = f"{remote_file_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with self.get_sftp_connection() as sftp:
+                current = sftp.stat(remote_file_path)
+                if expected_size is not None and current.st_size != expected_size:
+                    logging.info(f"Not replacing {remote_file_path}: it changed since it was written")
+                    return False
+
+                sftp.putfo(BytesIO(file_content), temp_file_path)
+                try:
+                    sftp.posix_rename(temp_file_path, remote_file_path)
+                except Exception:
+                    sftp.remove(temp_file_path)
+                    raise
+                logging.info(f"Successfully replaced content on NAS: {remote_file_path}")
+                return True
+
+        except FileNotFoundError:
+            logging.info(f"Not replacing {remote_file_path}: it no longer exists")
+            return False
+        except Exception as e:
+            logging.error(f"Failed to replace content on NAS: {e}")
+            return False
+
     def download_file(self, shop_name: str, relative_path: str, local_file_path: str) -> bool:
         """
         Download a file from the NAS
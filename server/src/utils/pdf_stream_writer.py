@@ -0,0 +1,145 @@
+"""
+Incremental PDF concatenation
+
+Appends whole PDF documents to a single output PDF, writing each document's
+objects as soon as it is appended. Only the cross-reference offsets and page
+references are kept in memory, so merging hundreds of documents uses memory
+proportional to one document rather than the whole batch (PdfMerger keeps
+every appended document until write()).
+
+Output layout: header, appended objects, then the page tree, catalog, xref
+table and trailer on close().
+"""
+
+import io
+import logging
+from typing import BinaryIO, Callable, Dict, List, Tuple
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+logger = logging.getLogger(__name__)
+
+# Object 1 is the page tree root, object 2 the catalog; both are written on close
+PAGES_OBJECT = 1
+CATALOG_OBJECT = 2
+
+
+class IncrementalPdfWriter:
+    """Concatenate PDFs into one document, streaming objects to a sink"""
+
+    def __init__(self, sink: Callable[[bytes], None]):
+        """
+        Args:
+            sink: Callable receiving output bytes in order (file.write, a queue put, ...)
+        """
+        self._sink = sink
+        self._position = 0
+        self._offsets: Dict[int, int] = {}
+        self._next_object = CATALOG_OBJECT + 1
+        self._page_refs: List[int] = []
+        self._closed = False
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    @classmethod
+    def to_file(cls, fileobj: BinaryIO) -> "IncrementalPdfWriter":
+        return cls(fileobj.write)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_refs)
+
+    def _write(self, data: bytes):
+        self._sink(data)
+        self._position += len(data)
+
+    def _allocate(self) -> int:
+        number = self._next_object
+        self._next_object += 1
+        return number
+
+    def _remap(self, value, mapping: Dict[Tuple[int, int], int], pending: List[Tuple[int, int]]):
+        """Rewrite indirect references in place to object numbers in the output"""
+        if isinstance(value, IndirectObject):
+            key = (value.idnum, value.generation)
+            if key not in mapping:
+                mapping[key] = self._allocate()
+                pending.append(key)
+            return IndirectObject(mapping[key], 0, None)
+
+        if isinstance(value, DictionaryObject):
+            # dict.items avoids DictionaryObject resolving references on access
+            for key, item in list(dict.items(value)):
+                dict.__setitem__(value, key, self._remap(item, mapping, pending))
+        elif isinstance(value, ArrayObject):
+            for index, item in enumerate(list.__iter__(value)):
+                list.__setitem__(value, index, self._remap(item, mapping, pending))
+        return value
+
+    def _write_object(self, number: int, obj):
+        self._offsets[number] = self._position
+        buffer = io.BytesIO()
+        buffer.write(f"{number} 0 obj\n".encode())
+        obj.write_to_stream(buffer, None)
+        buffer.write(b"\nendobj\n")
+        self._write(buffer.getvalue())
+
+    def append(self, pdf_bytes: bytes) -> int:
+        """
+        Append every page of a PDF document.
+
+        Args:
+            pdf_bytes: Complete PDF file content
+
+        Returns:
+            Number of pages appended
+        """
+        if self._closed:
+            raise ValueError("Cannot append to a closed PDF writer")
+
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        mapping: Dict[Tuple[int, int], int] = {}
+        pending: List[Tuple[int, int]] = []
+        pages = []
+
+        for page in reader.pages:
+            ref = page.indirect_reference
+            number = self._allocate()
+            mapping[(ref.idnum, ref.generation)] = number
+            pages.append((number, page))
+
+        for number, page in pages:
+            # Inherited attributes were already flattened onto the page by the reader
+            dict.__setitem__(page, NameObject("/Parent"), IndirectObject(PAGES_OBJECT, 0, None))
+            self._remap(page, mapping, pending)
+            self._write_object(number, page)
+            self._page_refs.append(number)
+
+        while pending:
+            idnum, generation = pending.pop()
+            obj = reader.get_object(IndirectObject(idnum, generation, reader))
+            self._remap(obj, mapping, pending)
+            self._write_object(mapping[(idnum, generation)], obj)
+
+        return len(pages)
+
+    def close(self):
+        """Write the page tree, catalog, xref table and trailer"""
+        if self._closed:
+            return
+        self._closed = True
+
+        kids = " ".join(f"{number} 0 R" for number in self._page_refs)
+        self._offsets[PAGES_OBJECT] = self._position
+        self._write(f"{PAGES_OBJECT} 0 obj\n<< /Type /Pages /Kids [{kids}] /Count {len(self._page_refs)} >>\nendobj\n".encode())
+        self._offsets[CATALOG_OBJECT] = self._position
+        self._write(f"{CATALOG_OBJECT} 0 obj\n<< /Type /Catalog /Pages {PAGES_OBJECT} 0 R >>\nendobj\n".encode())
+
+        xref_position = self._position
+        size = self._next_object
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for number in range(1, size):
+            offset = self._offsets.get(number)
+            lines.append(f"{offset:010d} 00000 n \n" if offset is not None else "0000000000 65535 f \n")
+        lines.append(f"trailer\n<< /Size {size} /Root {CATALOG_OBJECT} 0 R >>\nstartxref\n{xref_position}\n%%EOF\n")
+        self._write("".join(lines).encode())
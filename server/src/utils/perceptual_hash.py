@@ -0,0 +1,214 @@
+"""
+Fused perceptual hashing
+
+Computes phash, ahash, dhash and whash together, producing the same hex
+strings as the imagehash library (and so as the hashes already stored on
+design_images) for the same input image.
+
+imagehash converts and resizes the full-resolution image once per hash.
+Here the image is converted to grayscale once and every hash resizes that
+shared grayscale image. The resizes are the same LANCZOS resizes imagehash
+uses, because downscaling once to a shared working image would change the
+stored hashes. Everything after the resize is vectorized over a batch:
+
+- phash: the 2D DCT runs on the stacked (N, 64, 64) images with scipy
+- ahash/dhash: mean and column differences run on the stacked images
+- whash: a NumPy Haar transform replaces pywt. It does the same float64
+  operations in the same order, so its coefficients are bit-identical, and
+  the LL band is the only output computed for the final decomposition
+"""
+
+from typing import Dict, List, Sequence, Union
+
+import cv2
+import imagehash
+import numpy as np
+import scipy.fftpack
+from PIL import Image
+
+HASH_TYPES = ('phash', 'ahash', 'dhash', 'whash')
+
+# imagehash's phash resizes to hash_size * 4 before the DCT
+PHASH_HIGHFREQ_FACTOR = 4
+
+# Upper bound on float64 pixels stacked for one batched whash transform
+WHASH_BATCH_PIXELS = 1 << 24
+
+_HAAR = 0.7071067811865476  # pywt's haar filter taps (1/sqrt(2))
+
+ImageInput = Union[Image.Image, np.ndarray]
+
+
+def to_grayscale(image: ImageInput) -> Image.Image:
+    """
+    Grayscale ('L') PIL image, exactly as imagehash's image.convert('L').
+
+    Accepts PIL images or OpenCV arrays (BGR, BGRA or single channel).
+    """
+    if isinstance(image, np.ndarray):
+        if image.ndim == 3 and image.shape[2] == 4:
+            # Alpha is ignored by the RGBA -> L conversion, so drop it here
+            image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGRA2RGB))
+        elif image.ndim == 3 and image.shape[2] == 3:
+            image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        else:
+            image = Image.fromarray(image)
+    return image if image.mode == 'L' else image.convert('L')
+
+
+def _whash_scale(size, hash_size: int) -> int:
+    """imagehash's default whash image_scale for an image of this size"""
+    return max(2 ** int(np.log2(min(size))), hash_size)
+
+
+def _haar_dec_axis(x: np.ndarray, axis: int, detail: bool = True):
+    """One Haar analysis step along axis, as pywt computes it"""
+    even = [slice(None)] * x.ndim
+    odd = [slice(None)] * x.ndim
+    even[axis] = slice(0, None, 2)
+    odd[axis] = slice(1, None, 2)
+    x0 = _HAAR * x[tuple(even)]
+    x1 = _HAAR * x[tuple(odd)]
+    return x1 + x0, (x0 - x1 if detail else None)
+
+
+def _haar_rec_axis(a: np.ndarray, d: np.ndarray, axis: int) -> np.ndarray:
+    """One Haar synthesis step along axis, as pywt computes it"""
+    shape = list(a.shape)
+    shape[axis] *= 2
+    out = np.empty(shape)
+    even = [slice(None)] * a.ndim
+    odd = [slice(None)] * a.ndim
+    even[axis] = slice(0, None, 2)
+    odd[axis] = slice(1, None, 2)
+    ca = _HAAR * a
+    cd = _HAAR * d
+    out[tuple(even)] = ca + cd
+    out[tuple(odd)] = ca - cd
+    return out
+
+
+def _haar_dec2(x: np.ndarray):
+    """2D Haar analysis over the last two axes: (LL, (LH, HL, HH))"""
+    a, d = _haar_dec_axis(x, -2)
+    aa, ad = _haar_dec_axis(a, -1)
+    da, dd = _haar_dec_axis(d, -1)
+    return aa, (da, ad, dd)
+
+
+def _haar_rec2(aa: np.ndarray, details) -> np.ndarray:
+    """2D Haar synthesis over the last two axes"""
+    da, ad, dd = details
+    a = _haar_rec_axis(aa, ad, -1)
+    d = _haar_rec_axis(da, dd, -1)
+    return _haar_rec_axis(a, d, -2)
+
+
+def _whash_low(pixels: np.ndarray, hash_size: int) -> np.ndarray:
+    """
+    LL band used by imagehash.whash (haar, remove_max_haar_ll=True).
+
+    pixels is (N, scale, scale) float64 in [0, 1]. The full decomposition has
+    its top LL zeroed and is reconstructed, then decomposed again down to
+    hash_size, matching pywt wavedec2/waverec2 bit for bit.
+    """
+    ll_max_level = int(np.log2(pixels.shape[-1]))
+    dwt_level = ll_max_level - int(np.log2(hash_size))
+
+    low = pixels
+    details = []
+    for _ in range(ll_max_level):
+        low, level_details = _haar_dec2(low)
+        details.append(level_details)
+    low = low * 0
+    for level_details in reversed(details):
+        low = _haar_rec2(low, level_details)
+
+    for _ in range(dwt_level):
+        low, _ = _haar_dec_axis(low, -2, detail=False)
+        low, _ = _haar_dec_axis(low, -1, detail=False)
+    return low
+
+
+def _resize_stack(grays: Sequence[Image.Image], size) -> np.ndarray:
+    return np.stack([np.asarray(gray.resize(size, Image.Resampling.LANCZOS)) for gray in grays])
+
+
+def _above_median(values: np.ndarray) -> np.ndarray:
+    flat = values.reshape(len(values), -1)
+    return values > np.median(flat, axis=1).reshape((-1,) + (1,) * (values.ndim - 1))
+
+
+def hash_bits_batch(images: Sequence[ImageInput], hash_size: int = 16) -> List[Dict[str, np.ndarray]]:
+    """Boolean hash matrices for each image, keyed by hash type"""
+    if hash_size < 2:
+        raise ValueError('Hash size must be greater than or equal to 2')
+    if hash_size & (hash_size - 1):
+        raise ValueError('Hash size must be a power of 2')
+    if not images:
+        return []
+
+    grays = [to_grayscale(image) for image in images]
+
+    # ahash: pixels above their mean
+    pixels = _resize_stack(grays, (hash_size, hash_size))
+    ahash = pixels > pixels.mean(axis=(1, 2), keepdims=True)
+
+    # dhash: each column against its left neighbour
+    pixels = _resize_stack(grays, (hash_size + 1, hash_size))
+    dhash = pixels[:, :, 1:] > pixels[:, :, :-1]
+
+    # phash: low frequencies of the DCT above their median
+    img_size = hash_size * PHASH_HIGHFREQ_FACTOR
+    pixels = _resize_stack(grays, (img_size, img_size))
+    dct = scipy.fftpack.dct(scipy.fftpack.dct(pixels, axis=1), axis=2)
+    phash = _above_median(dct[:, :hash_size, :hash_size])
+
+    # whash: images sharing a wavelet scale are transformed together
+    whash = [None] * len(grays)
+    by_scale: Dict[int, List[int]] = {}
+    for index, gray in enumerate(grays):
+        by_scale.setdefault(_whash_scale(gray.size, hash_size), []).append(index)
+    for scale, indexes in by_scale.items():
+        chunk = max(1, WHASH_BATCH_PIXELS // (scale * scale))
+        for start in range(0, len(indexes), chunk):
+            group = indexes[start:start + chunk]
+            pixels = _resize_stack([grays[i] for i in group], (scale, scale)) / 255.
+            bits = _above_median(_whash_low(pixels, hash_size))
+            for i, value in zip(group, bits):
+                whash[i] = value
+
+    return [
+        {'phash': phash[i], 'ahash': ahash[i], 'dhash': dhash[i], 'whash': whash[i]}
+        for i in range(len(grays))
+    ]
+
+
+def bits_to_hex(bits: np.ndarray) -> str:
+    """Hex string of a boolean hash matrix, as str(imagehash.ImageHash)"""
+    flat = bits.ravel()
+    if flat.size % 8 == 0:
+        return np.packbits(flat).tobytes().hex()
+    bit_string = ''.join('1' if bit else '0' for bit in flat)
+    return '{:0>{width}x}'.format(int(bit_string, 2), width=-(-flat.size // 4))
+
+
+def compute_hashes_batch(images: Sequence[ImageInput], hash_size: int = 16, as_hex: bool = True) -> List[Dict]:
+    """
+    phash, ahash, dhash and whash for each image.
+
+    Returns hex strings by default, or imagehash.ImageHash objects (for
+    Hamming distance comparisons) with as_hex=False.
+    """
+    results = []
+    for bits in hash_bits_batch(images, hash_size):
+        if as_hex:
+            results.append({hash_type: bits_to_hex(bits[hash_type]) for hash_type in HASH_TYPES})
+        else:
+            results.append({hash_type: imagehash.ImageHash(bits[hash_type]) for hash_type in HASH_TYPES})
+    return results
+
+
+def compute_hashes(image: ImageInput, hash_size: int = 16, as_hex: bool = True) -> Dict:
+    """phash, ahash, dhash and whash for one image"""
+    return compute_hashes_batch([image], hash_size, as_hex)[0]
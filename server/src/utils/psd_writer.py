@@ -0,0 +1,268 @@
+"""
+Streaming layered PSD/PSB writer
+
+Writes a gang sheet as a Photoshop document with one layer per placed
+image. Each layer is stored at its own bounding box with its offsets
+instead of as a sheet-sized canvas, and channel data is PackBits (RLE)
+compressed and written to the file as it is produced; section lengths
+and row byte counts are patched in afterwards. Peak memory is therefore
+the flat composite plus one layer and one block of rows being encoded.
+
+Sheets wider or taller than PSD_MAX_DIMENSION are written as PSB (large
+document format), which Photoshop opens the same way.
+"""
+
+import struct
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+PSD_MAX_DIMENSION = 30000
+PSB_MAX_DIMENSION = 300000
+# Pixels per encoded block; bounds the temporary arrays of the RLE encoder
+RLE_BLOCK_PIXELS = 4 * 1024 * 1024
+
+# Photoshop channel ids for R, G, B and transparency, and where they sit in a BGRA array
+CHANNELS = ((-1, 3), (0, 2), (1, 1), (2, 0))
+COMPOSITE_CHANNELS = (2, 1, 0, 3)
+
+
+def packbits_rows(block: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    PackBits-encode every row of a 2D uint8 array.
+
+    Returns the encoded bytes of all rows back to back and the encoded
+    length of each row. Runs of 3 or more equal bytes become repeat
+    packets, everything in between literal packets of up to 128 bytes.
+    """
+    height, width = block.shape
+    flat = np.ascontiguousarray(block).reshape(-1)
+    size = flat.size
+    if size == 0:
+        return np.empty(0, dtype=np.uint8), np.zeros(height, dtype=np.int64)
+
+    # Runs of equal bytes, never crossing a row start
+    boundary = np.empty(size, dtype=bool)
+    boundary[0] = True
+    np.not_equal(flat[1:], flat[:-1], out=boundary[1:])
+    boundary[::width] = True
+    run_starts = np.flatnonzero(boundary)
+    run_lengths = np.diff(np.append(run_starts, size))
+    repeat = run_lengths >= 3
+
+    # Each repeat run is a segment; consecutive short runs within a row form one literal segment
+    after_repeat = np.concatenate(([True], repeat[:-1]))
+    segment_runs = np.flatnonzero(repeat | after_repeat | (run_starts % width == 0))
+    segment_starts = run_starts[segment_runs]
+    segment_lengths = np.add.reduceat(run_lengths, segment_runs)
+    segment_repeat = repeat[segment_runs]
+
+    # Split segments into packets of at most 128 bytes
+    packet_counts = (segment_lengths + 127) // 128
+    packet_segment = np.repeat(np.arange(segment_runs.size), packet_counts)
+    packet_index = np.arange(packet_segment.size) - np.repeat(np.cumsum(packet_counts) - packet_counts, packet_counts)
+    packet_starts = segment_starts[packet_segment] + packet_index * 128
+    packet_lengths = np.minimum(segment_lengths[packet_segment] - packet_index * 128, 128)
+    packet_repeat = segment_repeat[packet_segment]
+
+    # Header byte plus one value (repeat) or the bytes themselves (literal)
+    encoded_sizes = 1 + np.where(packet_repeat, 1, packet_lengths)
+    offsets = np.cumsum(encoded_sizes) - encoded_sizes
+    encoded = np.empty(int(offsets[-1] + encoded_sizes[-1]), dtype=np.uint8)
+    # A repeat of n is stored as 1 - n (two's complement), a literal of n as n - 1
+    encoded[offsets] = np.where(packet_repeat, (257 - packet_lengths) & 0xFF, packet_lengths - 1)
+
+    repeats = np.flatnonzero(packet_repeat)
+    encoded[offsets[repeats] + 1] = flat[packet_starts[repeats]]
+
+    literal_bytes = np.flatnonzero(~np.repeat(packet_repeat, packet_lengths))
+    if literal_bytes.size:
+        shift = np.repeat(offsets + 1 - packet_starts, packet_lengths)
+        encoded[literal_bytes + shift[literal_bytes]] = flat[literal_bytes]
+
+    row_lengths = np.bincount(packet_starts // width, weights=encoded_sizes, minlength=height).astype(np.int64)
+    return encoded, row_lengths
+
+
+class PsdWriter:
+    """Writes one layered PSD/PSB document to a binary file object"""
+
+    def __init__(self, out: BinaryIO, width: int, height: int, dpi: Tuple[float, float] = (400, 400)):
+        if width > PSB_MAX_DIMENSION or height > PSB_MAX_DIMENSION:
+            raise ValueError(f"{width}x{height} exceeds the PSB limit of {PSB_MAX_DIMENSION} pixels")
+        self.out = out
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.is_psb = width > PSD_MAX_DIMENSION or height > PSD_MAX_DIMENSION
+
+        # Section lengths and row counts are wider in PSB
+        self._length_format = '>Q' if self.is_psb else '>I'
+        self._count_dtype = np.dtype('>u4' if self.is_psb else '>u2')
+
+    def write(self, composite: np.ndarray, layers: List[Dict]):
+        """
+        Write the document.
+
+        Args:
+            composite: Flat BGR(A) image of the whole sheet
+            layers: Dicts with label, x, y and image_data (BGR(A)), bottom to top
+        """
+        self._write_header()
+        self._write_section(b'')  # Color mode data
+        self._write_section(self._resolution_resource())
+        self._write_layer_and_mask_info(layers)
+        self._write_composite(composite)
+
+    def _write_header(self):
+        self.out.write(struct.pack('>4sH6xHIIHH', b'8BPS', 2 if self.is_psb else 1, 4,
+                                   self.height, self.width, 8, 3))  # 4 channels, 8 bit, RGB
+
+    def _write_section(self, data: bytes):
+        self.out.write(struct.pack('>I', len(data)) + data)
+
+    def _resolution_resource(self) -> bytes:
+        # ResolutionInfo (1005): 16.16 fixed point pixels per inch, shown in inches
+        resolution = struct.pack('>IHHIHH', int(self.dpi[0] * 65536), 1, 1, int(self.dpi[1] * 65536), 1, 1)
+        return b'8BIM' + struct.pack('>H', 1005) + b'\x00\x00' + struct.pack('>I', len(resolution)) + resolution
+
+    def _write_layer_and_mask_info(self, layers: List[Dict]):
+        placed = [layer for layer in (self._clip_layer(layer) for layer in layers) if layer is not None]
+
+        section_start = self._placeholder(self._length_format)
+        layer_info_start = self._placeholder(self._length_format)
+
+        # A negative count marks the composite's alpha channel as its transparency
+        self.out.write(struct.pack('>h', -len(placed)))
+        length_positions = [self._write_layer_record(layer) for layer in placed]
+        for layer, positions in zip(placed, length_positions):
+            image = layer['image']
+            for (_, channel), position in zip(CHANNELS, positions):
+                start = self.out.tell()
+                self._write_channel(self._channel(image, channel))
+                self._patch(position, self._length_format, self.out.tell() - start)
+
+        if (self.out.tell() - layer_info_start) % 2:
+            self.out.write(b'\x00')
+        self._patch_length(layer_info_start)
+
+        self.out.write(struct.pack('>I', 0))  # No global layer mask
+        self._patch_length(section_start)
+
+    def _clip_layer(self, layer: Dict) -> Optional[Dict]:
+        """The part of a placed image that lies on the sheet, with its bounds"""
+        image = layer.get('image_data')
+        if not isinstance(image, np.ndarray) or image.ndim not in (2, 3):
+            return None
+        x, y = int(layer.get('x', 0)), int(layer.get('y', 0))
+        left, top = max(x, 0), max(y, 0)
+        right = min(x + image.shape[1], self.width)
+        bottom = min(y + image.shape[0], self.height)
+        if right <= left or bottom <= top:
+            return None
+        return {
+            'label': str(layer.get('label', 'Layer')),
+            'bounds': (top, left, bottom, right),
+            'image': image[top - y:bottom - y, left - x:right - x],
+        }
+
+    def _write_layer_record(self, layer: Dict) -> List[int]:
+        """Layer record with placeholder channel lengths; returns their positions"""
+        self.out.write(struct.pack('>iiiiH', *layer['bounds'], len(CHANNELS)))
+        positions = []
+        for channel_id, _ in CHANNELS:
+            self.out.write(struct.pack('>h', channel_id))
+            positions.append(self._placeholder(self._length_format))
+
+        # Normal blending, fully opaque, visible
+        self.out.write(b'8BIMnorm' + struct.pack('>BBBB', 255, 0, 0, 0))
+        extra = struct.pack('>II', 0, 0) + self._pascal_name(layer['label']) + self._unicode_name(layer['label'])
+        self.out.write(struct.pack('>I', len(extra)) + extra)
+        return positions
+
+    @staticmethod
+    def _pascal_name(label: str) -> bytes:
+        name = label.encode('ascii', 'replace')[:255]
+        data = struct.pack('>B', len(name)) + name
+        return data + b'\x00' * (-len(data) % 4)
+
+    @staticmethod
+    def _unicode_name(label: str) -> bytes:
+        name = label.encode('utf-16-be')
+        data = struct.pack('>I', len(name) // 2) + name
+        data += b'\x00' * (-len(data) % 4)
+        return b'8BIMluni' + struct.pack('>I', len(data)) + data
+
+    @staticmethod
+    def _channel(image: np.ndarray, channel: int) -> np.ndarray:
+        """One 8-bit plane of a BGR(A) or grayscale image; opaque alpha if it has none"""
+        if image.ndim == 3 and channel < image.shape[2]:
+            plane = image[:, :, channel]
+        elif channel == 3 or image.ndim == 3 and image.shape[2] < 3:
+            return np.full(image.shape[:2], 255, dtype=np.uint8)
+        else:
+            plane = image
+        if plane.dtype == np.uint16:
+            plane = (plane >> 8).astype(np.uint8)
+        return plane
+
+    def _write_channel(self, channel: np.ndarray):
+        """Compression flag, row byte counts and RLE data of one layer channel"""
+        self.out.write(struct.pack('>H', 1))
+        self._write_rle_rows([channel])
+
+    def _write_composite(self, composite: np.ndarray):
+        """Merged image data: all channels share one row count table"""
+        self.out.write(struct.pack('>H', 1))
+        self._write_rle_rows([self._channel(composite, channel) for channel in COMPOSITE_CHANNELS])
+
+    def _write_rle_rows(self, channels: List[np.ndarray]):
+        """Row byte count table for the channels, followed by their encoded rows"""
+        height, width = channels[0].shape
+        table_start = self.out.tell()
+        self.out.write(b'\x00' * (self._count_dtype.itemsize * height * len(channels)))
+
+        rows_per_block = max(1, RLE_BLOCK_PIXELS // max(width, 1))
+        row_lengths = []
+        for channel in channels:
+            for start in range(0, height, rows_per_block):
+                encoded, lengths = packbits_rows(channel[start:start + rows_per_block])
+                self.out.write(encoded.tobytes())
+                row_lengths.append(lengths)
+
+        end = self.out.tell()
+        self.out.seek(table_start)
+        if row_lengths:
+            self.out.write(np.concatenate(row_lengths).astype(self._count_dtype).tobytes())
+        self.out.seek(end)
+
+    def _placeholder(self, fmt: str) -> int:
+        position = self.out.tell()
+        self.out.write(b'\x00' * struct.calcsize(fmt))
+        return position
+
+    def _patch(self, position: int, fmt: str, value: int):
+        end = self.out.tell()
+        self.out.seek(position)
+        self.out.write(struct.pack(fmt, value))
+        self.out.seek(end)
+
+    def _patch_length(self, position: int):
+        """Set a section length placeholder to the bytes written after it"""
+        self._patch(position, self._length_format,
+                    self.out.tell() - position - struct.calcsize(self._length_format))
+
+
+def write_layered_psd(output_path: str, composite: np.ndarray, layers: Optional[List[Dict]] = None,
+                      dpi: Tuple[float, float] = (400, 400)) -> bool:
+    """
+    Write composite and its layers (dicts with label, x, y, image_data) to
+    output_path. Returns True if the file was written as PSB.
+    """
+    height, width = composite.shape[:2]
+    if not layers:
+        layers = [{'label': 'Background', 'x': 0, 'y': 0, 'image_data': composite}]
+    with open(output_path, 'w+b') as out:
+        writer = PsdWriter(out, width, height, dpi)
+        writer.write(composite, layers)
+    return writer.is_psb
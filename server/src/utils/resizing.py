@@ -11,6 +11,7 @@ from server.src.utils.util import (
 )
 from server.src.routes.canvas_sizes.service import get_resizing_canvas_configs
 from server.src.routes.size_config.service import get_resizing_size_configs
+from server.src.services.sizing_registry import sizing_registry
 
 os.environ["OPENCV_LOG_LEVEL"] = "ERROR"
 STD_DPI = 400
@@ -44,12 +45,13 @@ def fit_image_to_center_canvas(resized_img, new_width_px, new_height_px, target_
     This function creates a canvas and centers the image into the canvas.
     Now requires db, user_id, and product_template_id to fetch configs from DB.
     """
-    # Get canvas configs from database or fallback to defaults
-    if db and canvas_id and product_template_id:
-        CANVAS, _ = get_resizing_configs_from_db(db, canvas_id, product_template_id)
-    else:
-        CANVAS, _ = get_default_configs()
-    
+    # Get canvas configs from the registry (loaded from the DB once) or fallback to defaults
+    CANVAS, _ = sizing_registry.get(db, canvas_id, product_template_id)
+
+    return center_on_canvas(resized_img, new_width_px, new_height_px, target_dpi, image_type, CANVAS)
+
+def center_on_canvas(resized_img, new_width_px, new_height_px, target_dpi, image_type, CANVAS):
+    """Center the resized image on a transparent canvas sized from resolved CANVAS configs."""
     if image_type not in CANVAS:
         raise ValueError(f"No canvas configuration found for image type: {image_type}")
     
@@ -80,16 +82,18 @@ def resize_image_by_inches(
         image=None, 
         target_dpi=STD_DPI, 
         is_new_mk=False, 
-        shop_name=None):
+        shop_name=None,
+        configs=None):
     """
     This function resizes an image based on inches.
-    Now requires db, user_id, and product_template_id to fetch configs from DB.
+    Pass configs=(CANVAS, SIZING) already resolved for the batch; otherwise
+    they come from the sizing registry for db, canvas_id and product_template_id.
     """
-    # Get sizing configs from database or fallback to defaults
-    if db and canvas_id and product_template_id:
-        _, SIZING = get_resizing_configs_from_db(db, canvas_id, product_template_id)
+    # Get sizing configs from the registry (loaded from the DB once) or fallback to defaults
+    if configs is not None:
+        CANVAS, SIZING = configs
     else:
-        _, SIZING = get_default_configs()
+        CANVAS, SIZING = sizing_registry.get(db, canvas_id, product_template_id)
     
     # Use the provided image array if available, otherwise load from disk
     if isinstance(image, np.ndarray):
@@ -101,6 +105,14 @@ def resize_image_by_inches(
     if img is None:
         raise ValueError(f"Image could not be loaded from array or path: {image_path}")
 
+    return resize_image_with_configs(img, image_type, SIZING, CANVAS, target_dpi, image_size, is_new_mk, image_path)
+
+def resize_image_with_configs(img, image_type, SIZING, CANVAS, target_dpi=STD_DPI, image_size=None, is_new_mk=False, image_path=''):
+    """
+    Resize an image array using already-resolved SIZING and CANVAS configs.
+
+    Needs no database session, so it can run in worker processes.
+    """
     # Convert 16-bit images to 8-bit if needed
     if img.dtype == np.uint16:
         img = (img / 256).astype(np.uint8)
@@ -181,12 +193,12 @@ def resize_image_by_inches(
 
     # Fit the resized images into a canvas
     if image_type == 'UVDTF Decal' or image_type == 'UVDTF Bookmark' or image_type == 'UVDTF Lid' or image_type == 'Custom 2x2' or image_type == 'UVDTF Ornament' or image_type == 'UVDTF Logo Cup Care Decal' or image_type == 'UVDTF Logo Bottom Shot Decal' or image_type == 'UVDTF Logo Sticker':
-        return fit_image_to_center_canvas(resized_img, new_width_px, new_height_px, target_dpi, image_type, db, user_id, product_template_id, shop_name=shop_name)
+        return center_on_canvas(resized_img, new_width_px, new_height_px, target_dpi, image_type, CANVAS)
     elif image_type == 'MK' or image_type == 'MK Tapered' or image_type == 'MK Rectangle' or image_type == 'UVDTF Shot':
         if (new_width_px > new_height_px) and is_new_mk:
             rotated_img = rotate_image_90(resized_img)
-            return fit_image_to_center_canvas(rotated_img, rotated_img.shape[1], rotated_img.shape[0], target_dpi, image_type, db, user_id, product_template_id, shop_name=shop_name)
+            return center_on_canvas(rotated_img, rotated_img.shape[1], rotated_img.shape[0], target_dpi, image_type, CANVAS)
         else:
-            return fit_image_to_center_canvas(resized_img, new_width_px, new_height_px, target_dpi, image_type, db, user_id, product_template_id, shop_name=shop_name)
+            return center_on_canvas(resized_img, new_width_px, new_height_px, target_dpi, image_type, CANVAS)
 
     return resized_img 
\ No newline at end of file
@@ -4,7 +4,9 @@ import hmac
 import hashlib
 import base64
 import logging
+import threading
 from typing import Optional, Dict, List, Any, BinaryIO
+from urllib.parse import urlparse
 from datetime import datetime, timezone
 import requests
 from requests.adapters import HTTPAdapter
@@ -14,6 +16,84 @@ from server.src.entities.shopify_store import ShopifyStore
 
 logger = logging.getLogger(__name__)
 
+CALL_LIMIT_HEADER = 'X-Shopify-Shop-Api-Call-Limit'
+# Shopify REST leaky bucket defaults (standard plans: 40 requests, leaking 2/s)
+SHOPIFY_REST_BUCKET_SIZE = int(os.getenv('SHOPIFY_REST_BUCKET_SIZE', '40'))
+SHOPIFY_REST_LEAK_RATE = float(os.getenv('SHOPIFY_REST_LEAK_RATE', '2'))
+# Slots kept free for requests from other processes sharing the app's bucket
+SHOPIFY_REST_BUCKET_HEADROOM = int(os.getenv('SHOPIFY_REST_BUCKET_HEADROOM', '2'))
+
+
+class ShopifyCallLimitBucket:
+    """
+    Client-side mirror of Shopify's REST leaky bucket for one shop.
+
+    Each request adds one unit and the bucket drains at the leak rate.
+    Callers block in acquire() until a slot is free, so concurrent workers
+    run at the maximum sustained rate instead of bursting into 429s. The
+    estimate is re-synced from X-Shopify-Shop-Api-Call-Limit on every response.
+    """
+
+    def __init__(self, capacity: int = SHOPIFY_REST_BUCKET_SIZE, leak_rate: float = SHOPIFY_REST_LEAK_RATE,
+                 headroom: int = SHOPIFY_REST_BUCKET_HEADROOM):
+        self.capacity = capacity
+        self.leak_rate = leak_rate
+        self.headroom = headroom
+        self._level = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _leak(self, now: float):
+        self._level = max(0.0, self._level - (now - self._updated) * self.leak_rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until the bucket has room for one more request"""
+        while True:
+            with self._lock:
+                self._leak(time.monotonic())
+                limit = max(1, self.capacity - self.headroom)
+                if self._level + 1 <= limit:
+                    self._level += 1
+                    return
+                wait = (self._level + 1 - limit) / self.leak_rate
+            time.sleep(wait)
+
+    def observe(self, header_value: Optional[str]):
+        """Sync with a 'used/capacity' call limit header"""
+        if not isinstance(header_value, str) or '/' not in header_value:
+            return
+        try:
+            used, capacity = (int(part) for part in header_value.split('/', 1))
+        except ValueError:
+            return
+
+        with self._lock:
+            self._leak(time.monotonic())
+            self.capacity = capacity
+            # Requests still in flight are only counted locally, so keep the fuller estimate
+            self._level = max(self._level, float(used))
+
+    def mark_full(self):
+        """Treat the bucket as full after a 429"""
+        with self._lock:
+            self._leak(time.monotonic())
+            self._level = float(self.capacity)
+
+
+_call_limit_buckets: Dict[str, ShopifyCallLimitBucket] = {}
+_call_limit_buckets_lock = threading.Lock()
+
+
+def get_call_limit_bucket(shop_domain: str) -> ShopifyCallLimitBucket:
+    """Get the process-wide call limit bucket for a shop"""
+    with _call_limit_buckets_lock:
+        bucket = _call_limit_buckets.get(shop_domain)
+        if bucket is None:
+            bucket = ShopifyCallLimitBucket()
+            _call_limit_buckets[shop_domain] = bucket
+        return bucket
+
 class ShopifyAPIError(Exception):
     """Base exception for Shopify API errors"""
     pass
@@ -139,12 +219,21 @@ class ShopifyClient:
         retry_count = 0
         delay = self.BASE_RETRY_DELAY
 
+        # REST calls share the shop's leaky bucket; GraphQL is cost-throttled separately
+        bucket = None if url.endswith('/graphql.json') else get_call_limit_bucket(urlparse(url).netloc)
+
         while retry_count <= self.MAX_RETRIES:
             try:
+                if bucket:
+                    bucket.acquire()
                 response = self.session.request(method, url, headers=headers, timeout=30, **kwargs)
+                if bucket:
+                    bucket.observe(response.headers.get(CALL_LIMIT_HEADER))
 
                 # Handle rate limiting
                 if response.status_code == 429:
+                    if bucket:
+                        bucket.mark_full()
                     retry_after = int(response.headers.get('Retry-After', delay))
 
                     if retry_count >= self.MAX_RETRIES:
@@ -470,6 +559,52 @@ class ShopifyClient:
             logger.error(f"Failed to delete product {product_id} from store {store_id}: {e}")
             raise
 
+    def graphql(self, store_id: str, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Execute a GraphQL Admin API query against a Shopify store.
+
+        Throttled responses are retried with exponential backoff; other
+        GraphQL errors are raised.
+
+        Args:
+            store_id: UUID of the store
+            query: GraphQL query or mutation
+            variables: Optional GraphQL variables
+
+        Returns:
+            The 'data' object of the GraphQL response
+
+        Raises:
+            ShopifyAPIError: If the request or query fails
+        """
+        store = self._get_store_info(store_id)
+        url = f"https://{store.shop_domain}/admin/api/{self.API_VERSION}/graphql.json"
+        headers = self._get_headers(store.access_token)
+        payload = {'query': query, 'variables': variables or {}}
+
+        delay = self.BASE_RETRY_DELAY
+        for attempt in range(self.MAX_RETRIES + 1):
+            response = self._make_request_with_retry('POST', url, headers, json=payload)
+            data = response.json()
+            errors = data.get('errors')
+
+            if not errors:
+                return data.get('data', {})
+
+            throttled = any(
+                (error.get('extensions') or {}).get('code') == 'THROTTLED'
+                for error in errors if isinstance(error, dict)
+            )
+            if throttled and attempt < self.MAX_RETRIES:
+                logger.warning(f"GraphQL request throttled, retrying after {delay} seconds (attempt {attempt + 1})")
+                time.sleep(delay)
+                delay = min(delay * 2, self.MAX_RETRY_DELAY)
+                continue
+
+            raise ShopifyAPIError(f"Shopify GraphQL error: {errors}")
+
+        raise ShopifyAPIError("Maximum retries exceeded")
+
     @staticmethod
     def verify_webhook_signature(headers: Dict[str, str], body: bytes,
                                 webhook_secret: Optional[str] = None) -> bool:
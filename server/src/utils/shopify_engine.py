@@ -12,6 +12,7 @@ import logging
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from server.src.utils.shopify_client import ShopifyClient, ShopifyAPIError
+from server.src.services.shopify_bulk_sync import ShopifyBulkSyncService
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +44,11 @@ class ShopifyEngine(ShopifyClient):
             List of unique product types
         """
         try:
+            # Answer from the bulk-synced catalogue while it is fresh
+            sync = ShopifyBulkSyncService(self.db)
+            if sync.has_synced(store_id, 'products'):
+                return sync.get_product_types(store_id)
+
             products = self.get_products(store_id, limit=limit, published_status="any")
 
             # Extract unique product types
@@ -72,6 +78,11 @@ class ShopifyEngine(ShopifyClient):
             List of unique vendors
         """
         try:
+            # Answer from the bulk-synced catalogue while it is fresh
+            sync = ShopifyBulkSyncService(self.db)
+            if sync.has_synced(store_id, 'products'):
+                return sync.get_vendors(store_id)
+
             products = self.get_products(store_id, limit=limit, published_status="any")
 
             # Extract unique vendors
@@ -101,6 +112,11 @@ class ShopifyEngine(ShopifyClient):
             List of unique tags
         """
         try:
+            # Answer from the bulk-synced catalogue while it is fresh
+            sync = ShopifyBulkSyncService(self.db)
+            if sync.has_synced(store_id, 'products'):
+                return sync.get_tags(store_id)
+
             products = self.get_products(store_id, limit=limit, published_status="any")
 
             # Extract unique tags
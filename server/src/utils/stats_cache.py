@@ -0,0 +1,89 @@
+"""
+Short-TTL cache for dashboard statistics
+
+Stats panels are polled and reloaded often while the underlying counts move
+slowly, so results are kept in-process for STATS_CACHE_TTL_SECONDS keyed by
+(namespace, scope, window). Writers that change what a panel shows can drop
+a scope explicitly with invalidate().
+"""
+
+import os
+import copy
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_TTL_SECONDS = float(os.getenv('STATS_CACHE_TTL_SECONDS', '30'))
+STATS_CACHE_MAX_ENTRIES = int(os.getenv('STATS_CACHE_MAX_ENTRIES', '5000'))
+
+CacheKey = Tuple[str, Hashable, Hashable]
+
+
+class StatsCache:
+    """Thread-safe TTL cache; values are copied out so callers can't mutate entries"""
+
+    def __init__(self, ttl_seconds: float = STATS_CACHE_TTL_SECONDS,
+                 max_entries: int = STATS_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[CacheKey, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, scope: Hashable, window: Hashable = None) -> Optional[Any]:
+        key = (namespace, scope, window)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def set(self, namespace: str, scope: Hashable, window: Hashable, value: Any):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict_expired()
+                if len(self._entries) >= self.max_entries:
+                    # Drop the entry closest to expiry
+                    oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                    del self._entries[oldest]
+            self._entries[(namespace, scope, window)] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+
+    def get_or_compute(self, namespace: str, scope: Hashable, window: Hashable,
+                       compute: Callable[[], Any], cache_if: Callable[[Any], bool] = bool) -> Any:
+        """Return the cached value or compute and store it; falsy results (errors) aren't cached"""
+        cached = self.get(namespace, scope, window)
+        if cached is not None:
+            return cached
+        value = compute()
+        if cache_if(value):
+            self.set(namespace, scope, window, value)
+        return value
+
+    def invalidate(self, namespace: str, scope: Hashable = None):
+        """Drop every window cached for a scope, or the whole namespace"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == namespace and (scope is None or k[1] == scope)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+
+
+# Global stats cache instance
+stats_cache = StatsCache()
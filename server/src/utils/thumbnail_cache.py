@@ -0,0 +1,301 @@
+"""
+Packing slip thumbnail cache
+
+Stores product and logo images downscaled to the size they are drawn on a
+packing slip, so bulk runs neither re-download the same listing image for
+every order nor embed full-resolution photos that print an inch or two wide.
+
+Entries are keyed by (image key, pixel size), where the image key is the Etsy
+listing image ID when known and a URL hash otherwise. On disk an index file
+per key points to a content-addressed JPEG blob, so identical images shared
+by several listings are stored once. A byte-bounded LRU keeps hot thumbnails
+in memory.
+
+The disk store is bounded by PACKING_SLIP_THUMBNAIL_DISK_MB: reads bump a
+blob's mtime, and once the blobs exceed the limit the least recently used
+ones are removed together with the index files pointing to them. Failed
+downloads are remembered for NEGATIVE_CACHE_SECONDS, at most
+NEGATIVE_CACHE_MAX_ENTRIES of them.
+"""
+
+import io
+import os
+import re
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image as PILImage
+
+logger = logging.getLogger(__name__)
+
+PACKING_SLIP_THUMBNAIL_DIR = os.getenv('PACKING_SLIP_THUMBNAIL_DIR', os.path.join(tempfile.gettempdir(), 'packing_slip_thumbnails'))
+PACKING_SLIP_THUMBNAIL_MEMORY_MB = int(os.getenv('PACKING_SLIP_THUMBNAIL_MEMORY_MB', '64'))
+PACKING_SLIP_THUMBNAIL_DISK_MB = int(os.getenv('PACKING_SLIP_THUMBNAIL_DISK_MB', '1024'))
+PACKING_SLIP_THUMBNAIL_QUALITY = int(os.getenv('PACKING_SLIP_THUMBNAIL_QUALITY', '85'))
+# Failed downloads are not retried for this long
+NEGATIVE_CACHE_SECONDS = 300
+NEGATIVE_CACHE_MAX_ENTRIES = 10000
+# Eviction frees space down to this share of the disk limit, so it doesn't run on every write
+DISK_EVICTION_TARGET = 0.9
+
+# https://i.etsystatic.com/<shop>/r/il/<hash>/<listing_image_id>/il_570xN.<listing_image_id>_<suffix>.jpg
+ETSY_IMAGE_ID_PATTERN = re.compile(r'/il_[^/.]+\.(\d+)_')
+
+
+def image_cache_key(url: str, image_id=None) -> str:
+    """Cache key for an image: the Etsy listing image ID when known, else a URL hash"""
+    if image_id:
+        return f"etsy_{image_id}"
+    match = ETSY_IMAGE_ID_PATTERN.search(url or '')
+    if match:
+        return f"etsy_{match.group(1)}"
+    return f"url_{hashlib.sha256((url or '').encode()).hexdigest()[:32]}"
+
+
+def make_thumbnail(content: bytes, max_px: int, quality: int = PACKING_SLIP_THUMBNAIL_QUALITY) -> bytes:
+    """Downscale image bytes so the longest side is at most max_px, as JPEG on white"""
+    with PILImage.open(io.BytesIO(content)) as img:
+        img.draft('RGB', (max_px, max_px))  # cheap JPEG DCT downscale before resampling
+        img.thumbnail((max_px, max_px), PILImage.LANCZOS)
+
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            rgba = img.convert('RGBA')
+            flattened = PILImage.new('RGB', rgba.size, (255, 255, 255))
+            flattened.paste(rgba, mask=rgba.split()[-1])
+            img = flattened
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        output = io.BytesIO()
+        img.save(output, format='JPEG', quality=quality, optimize=True)
+        return output.getvalue()
+
+
+class ThumbnailCache:
+    """Memory + disk cache of downscaled images"""
+
+    def __init__(self, cache_dir: str = PACKING_SLIP_THUMBNAIL_DIR,
+                 memory_bytes: int = PACKING_SLIP_THUMBNAIL_MEMORY_MB * 1024 * 1024,
+                 disk_bytes: int = PACKING_SLIP_THUMBNAIL_DISK_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        self._memory_used = 0
+        # Estimate of the blob bytes on disk, recounted by every eviction pass
+        self._disk_used: Optional[int] = None
+        # Oldest failure first, so the cap drops the stalest entries
+        self._failures: "OrderedDict[Tuple[str, int], float]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, int], threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def _index_path(self, key: str, px: int) -> str:
+        return os.path.join(self.cache_dir, 'index', f"{key}_{px}")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, 'blobs', digest[:2], f"{digest}.jpg")
+
+    def _remember(self, entry: Tuple[str, int], content: bytes):
+        with self._lock:
+            if entry in self._memory:
+                self._memory.move_to_end(entry)
+                return
+            self._memory[entry] = content
+            self._memory_used += len(content)
+            while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+
+    def _read_disk(self, key: str, px: int) -> Optional[bytes]:
+        index_path = self._index_path(key, px)
+        try:
+            with open(index_path, 'r') as f:
+                digest = f.read().strip()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read thumbnail {key}_{px}: {e}")
+            return None
+
+        blob_path = self._blob_path(digest)
+        try:
+            with open(blob_path, 'rb') as f:
+                content = f.read()
+            os.utime(blob_path)
+            return content
+        except FileNotFoundError:
+            # Blob evicted by another process: drop the dangling index entry
+            self._remove(index_path)
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read thumbnail {key}_{px}: {e}")
+            return None
+
+    def _write_atomic(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _write_disk(self, key: str, px: int, content: bytes):
+        if self.disk_bytes <= 0:
+            return
+        try:
+            digest = hashlib.sha256(content).hexdigest()
+            blob_path = self._blob_path(digest)
+            added = 0
+            if not os.path.exists(blob_path):
+                self._write_atomic(blob_path, content)
+                added = len(content)
+            self._write_atomic(self._index_path(key, px), digest.encode())
+        except Exception as e:
+            logger.warning(f"Failed to persist thumbnail {key}_{px}: {e}")
+            return
+
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = sum(size for _, size, _ in self._scan_blobs())
+            else:
+                self._disk_used += added
+            over = self._disk_used > self.disk_bytes
+        if over:
+            self.evict()
+
+    def _scan_blobs(self):
+        """(mtime, size, path) of every blob on disk"""
+        blobs = []
+        for root, _, files in os.walk(os.path.join(self.cache_dir, 'blobs')):
+            for name in files:
+                if not name.endswith('.jpg'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+        return blobs
+
+    def evict(self):
+        """Remove the least recently used blobs and their index entries until the disk store fits"""
+        with self._lock:
+            blobs = self._scan_blobs()
+            total = sum(size for _, size, _ in blobs)
+            target = self.disk_bytes * DISK_EVICTION_TARGET
+            removed = set()
+            for _, size, path in sorted(blobs):
+                if total <= target:
+                    break
+                self._remove(path)
+                removed.add(os.path.basename(path)[:-len('.jpg')])
+                total -= size
+            self._disk_used = total
+
+        if not removed:
+            return
+        index_dir = os.path.join(self.cache_dir, 'index')
+        try:
+            names = os.listdir(index_dir)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            path = os.path.join(index_dir, name)
+            try:
+                with open(path, 'r') as f:
+                    if f.read().strip() in removed:
+                        self._remove(path)
+            except (FileNotFoundError, IsADirectoryError):
+                continue
+        logger.info(f"🧹 Evicted {len(removed)} packing slip thumbnail(s), disk cache now {total / (1024 * 1024):.0f}MB")
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def _record_failure(self, entry: Tuple[str, int]):
+        """Remember a failed download; caller holds the lock"""
+        now = time.time()
+        self._failures.pop(entry, None)
+        self._failures[entry] = now
+        while self._failures:
+            oldest_entry, failed_at = next(iter(self._failures.items()))
+            if len(self._failures) <= NEGATIVE_CACHE_MAX_ENTRIES and now - failed_at < NEGATIVE_CACHE_SECONDS:
+                break
+            del self._failures[oldest_entry]
+
+    def get(self, key: str, px: int) -> Optional[bytes]:
+        """Get a cached thumbnail from memory or disk"""
+        entry = (key, px)
+        with self._lock:
+            content = self._memory.get(entry)
+            if content is not None:
+                self._memory.move_to_end(entry)
+                return content
+
+        content = self._read_disk(key, px)
+        if content is not None:
+            self._remember(entry, content)
+        return content
+
+    def put(self, key: str, px: int, source: bytes) -> bytes:
+        """Downscale source image bytes, store and return the thumbnail"""
+        content = make_thumbnail(source, px)
+        self._remember((key, px), content)
+        self._write_disk(key, px, content)
+        return content
+
+    def get_or_create(self, key: str, px: int, load_source: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """
+        Get a thumbnail, downloading and downscaling it on a miss.
+
+        Concurrent misses for the same entry share one download; failed
+        downloads are remembered briefly so a batch doesn't retry them per order.
+        """
+        entry = (key, px)
+        while True:
+            content = self.get(key, px)
+            if content is not None:
+                return content
+
+            with self._lock:
+                failed_at = self._failures.get(entry)
+                if failed_at and time.time() - failed_at < NEGATIVE_CACHE_SECONDS:
+                    return None
+                if failed_at:
+                    del self._failures[entry]
+                event = self._inflight.get(entry)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[entry] = event
+                    break
+            # Another thread is creating this thumbnail
+            event.wait()
+
+        content = None
+        try:
+            source = load_source()
+            if source:
+                content = self.put(key, px, source)
+        except Exception as e:
+            logger.warning(f"Failed to create thumbnail {key}_{px}: {e}")
+        finally:
+            with self._lock:
+                if content is None:
+                    self._record_failure(entry)
+                else:
+                    self._failures.pop(entry, None)
+                self._inflight.pop(entry).set()
+        return content
+
+
+# Global cache shared by packing slip generators in this process
+packing_slip_thumbnail_cache = ThumbnailCache()
@@ -1,5 +1,4 @@
 import cv2, os, numpy as np, struct, zlib, math
-from PIL import Image
 from typing import Tuple, List
 
 STD_DPI = 400
@@ -43,7 +42,7 @@ def get_width_and_height(image, image_path, target_dpi=None):
     if target_dpi:
         dpi_x = dpi_y = target_dpi
     else:
-        # Try to get DPI information using PIL
+        # Probe the DPI from the file header (image_path may also be the encoded bytes already read)
         dpi_x, dpi_y = get_dpi_from_image(image_path)
         
         if dpi_x is None or dpi_y is None:
@@ -60,7 +59,7 @@ def save_image_with_format(image, folder_path, filename, file_format='PNG', targ
         image: numpy array image data
         folder_path: output directory path
         filename: base filename (extension will be added based on format)
-        file_format: output format ('PNG', 'SVG', or 'PSD')
+        file_format: output format ('PNG', 'SVG', or 'PSD'; PSD sheets over 30,000 px are saved as .psb)
         target_dpi: DPI tuple for the output image
         placed_images: list of dicts with individual image metadata for layered formats
                        Each dict contains: label, x, y, width, height, image_data
@@ -95,8 +94,7 @@ def save_image_with_format(image, folder_path, filename, file_format='PNG', targ
         output_path = os.path.join(folder_path, f"{base_filename}.svg")
         _save_as_svg(image, output_path, target_dpi, placed_images)
     elif file_format == 'PSD':
-        output_path = os.path.join(folder_path, f"{base_filename}.psd")
-        _save_as_psd(image, output_path, target_dpi, placed_images)
+        output_path = _save_as_psd(image, os.path.join(folder_path, f"{base_filename}.psd"), target_dpi, placed_images)
     else:
         raise ValueError(f"Unsupported format: {file_format}. Use PNG, SVG, or PSD")
 
@@ -130,6 +128,9 @@ def _save_as_svg(image, output_path, target_dpi=(STD_DPI, STD_DPI), placed_image
         if placed_images and len(placed_images) > 0:
             logging.info(f"Creating SVG with {len(placed_images)} individual labeled layers")
 
+            # Copies of a design share one image array; encode each array once
+            encoded_images = {}
+
             # Create a group for each individual image
             for idx, img_info in enumerate(placed_images):
                 label = img_info.get('label', f'Image_{idx}')
@@ -141,10 +142,12 @@ def _save_as_svg(image, output_path, target_dpi=(STD_DPI, STD_DPI), placed_image
 
                 if img_data is not None and isinstance(img_data, np.ndarray):
                     # Encode individual image as PNG
-                    retval, buffer = cv2.imencode(".png", img_data)
-                    if retval:
-                        png_base64 = base64.b64encode(buffer).decode('utf-8')
-
+                    png_base64 = encoded_images.get(id(img_data))
+                    if png_base64 is None:
+                        retval, buffer = cv2.imencode(".png", img_data)
+                        png_base64 = base64.b64encode(buffer).decode('utf-8') if retval else ''
+                        encoded_images[id(img_data)] = png_base64
+                    if png_base64:
                         # Create a labeled group for this image
                         # Using id and inkscape:label for compatibility with design software
                         svg_content += f'''  <g id="{label}" inkscape:label="{label}">
@@ -180,104 +183,28 @@ def _save_as_svg(image, output_path, target_dpi=(STD_DPI, STD_DPI), placed_image
 
 
 def _save_as_psd(image, output_path, target_dpi=(STD_DPI, STD_DPI), placed_images=None):
-    """Convert numpy array image to PSD format with individual labeled layers."""
+    """
+    Save numpy array image as a PSD with individual labeled layers.
+
+    Layers are written at their own bounding boxes and streamed to the file
+    (see psd_writer). Sheets over 30,000 px are written as PSB, with a .psb
+    extension. Returns the path written.
+    """
     import logging
+    from server.src.utils.psd_writer import PSD_MAX_DIMENSION, write_layered_psd
 
     try:
-        # Try using psd-tools library first (if available)
-        try:
-            from psd_tools import PSDImage
-            from psd_tools.api.layers import PixelLayer
-
-            # Get canvas dimensions
-            height, width = image.shape[:2]
-
-            # Create PSD document
-            psd = PSDImage.new("RGBA", (width, height))
-
-            # If we have individual image data, create separate layers for each
-            if placed_images and len(placed_images) > 0:
-                logging.info(f"Creating PSD with {len(placed_images)} individual labeled layers")
-
-                # Create a layer for each individual image
-                for idx, img_info in enumerate(placed_images):
-                    label = img_info.get('label', f'Image_{idx}')
-                    x = img_info.get('x', 0)
-                    y = img_info.get('y', 0)
-                    img_width = img_info.get('width', 0)
-                    img_height = img_info.get('height', 0)
-                    img_data = img_info.get('image_data')
-
-                    if img_data is not None and isinstance(img_data, np.ndarray):
-                        # Convert OpenCV BGR(A) to RGB(A) for PIL
-                        if img_data.shape[2] == 4:
-                            img_rgb = cv2.cvtColor(img_data, cv2.COLOR_BGRA2RGBA)
-                        else:
-                            img_rgb = cv2.cvtColor(img_data, cv2.COLOR_BGR2RGB)
-                            # Add alpha channel
-                            img_rgb = np.dstack([img_rgb, np.ones((img_rgb.shape[0], img_rgb.shape[1], 1), dtype=np.uint8) * 255])
-
-                        # Create PIL image for this layer
-                        layer_pil = Image.fromarray(img_rgb, 'RGBA')
-
-                        # Create a blank canvas and paste the image at the correct position
-                        canvas = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-                        canvas.paste(layer_pil, (x, y))
-
-                        # Create layer from canvas
-                        layer = PixelLayer.frompil(canvas, psd, label)
-
-                logging.info(f"Created {len(placed_images)} labeled layers in PSD")
-            else:
-                # Fallback: create single layer with entire image
-                logging.info("No individual image data provided, creating single layer")
-
-                # Convert OpenCV BGR(A) to RGB(A) for PIL
-                if image.shape[2] == 4:
-                    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
-                else:
-                    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-                # Create PIL image
-                pil_image = Image.fromarray(image_rgb)
-                pil_image.info['dpi'] = target_dpi
-
-                # Create single layer
-                layer = PixelLayer.frompil(pil_image, psd, "Background")
-
-            # Save PSD
-            psd.save(output_path)
-            logging.info(f"Successfully saved PSD using psd-tools: {output_path}")
-            return
-        except ImportError:
-            logging.warning("psd-tools not available, falling back to PIL method")
-
-        # Fallback: Save as layered TIFF using PIL (Photoshop compatible)
-        # Convert OpenCV BGR(A) to RGB(A)
-        if image.shape[2] == 4:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
-            mode = 'RGBA'
+        if max(image.shape[:2]) > PSD_MAX_DIMENSION:
+            output_path = os.path.splitext(output_path)[0] + '.psb'
+
+        if placed_images:
+            logging.info(f"Creating PSD with {len(placed_images)} individual labeled layers")
         else:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            mode = 'RGB'
-
-        # Create PIL image and save
-        pil_image = Image.fromarray(image_rgb, mode)
-        pil_image.info['dpi'] = target_dpi
-
-        # PIL doesn't have native PSD support, so we'll save as TIFF with layers
-        # which is compatible with Photoshop
-        logging.warning("Saving as multi-layer TIFF (Photoshop compatible) instead of native PSD")
-        logging.warning("For full PSD layer support, install psd-tools: pip install psd-tools")
-        tiff_path = output_path.replace('.psd', '.tif')
-        pil_image.save(tiff_path, format='TIFF', dpi=target_dpi, compression='tiff_lzw')
-
-        # If user expects .psd, also save a copy with .psd extension
-        # (it's actually a TIFF but Photoshop can open it)
-        import shutil
-        shutil.copy2(tiff_path, output_path)
-
-        logging.info(f"Successfully saved PSD-compatible TIFF: {output_path}")
+            logging.info("No individual image data provided, creating single layer")
+
+        is_psb = write_layered_psd(output_path, image, placed_images, target_dpi)
+        logging.info(f"Successfully saved {'PSB' if is_psb else 'PSD'}: {output_path}")
+        return output_path
     except Exception as e:
         logging.error(f"Error saving PSD {output_path}: {e}")
         raise
@@ -354,11 +281,147 @@ def save_single_image(image, folder_path, filename, target_dpi=(STD_DPI,STD_DPI)
             logging.error(f"Fallback save also failed for {filename}: {fallback_error}")
             raise RuntimeError(f"Failed to save image {filename}: {e}, fallback also failed: {fallback_error}")
 
+DPI_PROBE_BYTES = 64 * 1024
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def _probe_png_dpi(data):
+    """pHYs chunk of a PNG; returns (dpi, done) where done means the header was fully scanned"""
+    offset = len(PNG_SIGNATURE)
+    while offset + 8 <= len(data):
+        length, = struct.unpack_from('!I', data, offset)
+        chunk_type = bytes(data[offset + 4:offset + 8])
+        if chunk_type == b'pHYs':
+            if offset + 17 > len(data):
+                return None, False
+            ppu_x, ppu_y, unit = struct.unpack_from('!IIB', data, offset + 8)
+            # Unit 1 is pixels per metre; 0 only gives the aspect ratio
+            if unit == 1 and ppu_x and ppu_y:
+                return (ppu_x * 0.0254, ppu_y * 0.0254), True
+            return None, True
+        # pHYs must come before the image data
+        if chunk_type in (b'IDAT', b'IEND'):
+            return None, True
+        offset += 12 + length
+    return None, False
+
+def _probe_exif_dpi(tiff):
+    """XResolution/YResolution from the first IFD of EXIF (TIFF) data"""
+    endian = {b'II': '<', b'MM': '>'}.get(bytes(tiff[:2]))
+    if endian is None or len(tiff) < 8:
+        return None
+    ifd_offset, = struct.unpack_from(endian + 'I', tiff, 4)
+    if ifd_offset + 2 > len(tiff):
+        return None
+    count, = struct.unpack_from(endian + 'H', tiff, ifd_offset)
+
+    resolution, unit = {}, 2
+    for index in range(count):
+        entry = ifd_offset + 2 + index * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, field_type, _, value = struct.unpack_from(endian + 'HHII', tiff, entry)
+        if tag in (0x011A, 0x011B) and field_type == 5 and value + 8 <= len(tiff):
+            numerator, denominator = struct.unpack_from(endian + 'II', tiff, value)
+            if denominator:
+                resolution[tag] = numerator / denominator
+        elif tag == 0x0128 and field_type == 3:
+            unit, = struct.unpack_from(endian + 'H', tiff, entry + 8)
+
+    if 0x011A not in resolution:
+        return None
+    dpi_x = resolution[0x011A]
+    dpi_y = resolution.get(0x011B, dpi_x)
+    # Unit 3 is pixels per centimetre
+    if unit == 3:
+        dpi_x, dpi_y = dpi_x * 2.54, dpi_y * 2.54
+    return (dpi_x, dpi_y) if dpi_x and dpi_y else None
+
+def _probe_jpeg_dpi(data):
+    """JFIF density, falling back to EXIF resolution like PIL; returns (dpi, done)"""
+    offset, exif_dpi = 2, None
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return exif_dpi, True
+        marker = data[offset + 1]
+        # Start of scan/frame: no more header segments that matter
+        if marker == 0xDA or 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return exif_dpi, True
+        if marker == 0xFF:
+            offset += 1
+            continue
+        length, = struct.unpack_from('!H', data, offset + 2)
+        segment = offset + 4
+        if segment + length - 2 > len(data):
+            return exif_dpi, False
+        if marker == 0xE0 and bytes(data[segment:segment + 5]) == b'JFIF\x00' and length >= 16:
+            unit, density_x, density_y = struct.unpack_from('!BHH', data, segment + 7)
+            if unit in (1, 2) and density_x and density_y:
+                scale = 2.54 if unit == 2 else 1
+                return (density_x * scale, density_y * scale), True
+        elif marker == 0xE1 and exif_dpi is None and bytes(data[segment:segment + 6]) == b'Exif\x00\x00':
+            try:
+                exif_dpi = _probe_exif_dpi(data[segment + 6:segment + length - 2])
+            except struct.error:
+                exif_dpi = None
+        offset = segment + length - 2
+    return exif_dpi, False
+
+def _probe_dpi_header(data):
+    data = memoryview(data).cast('B')
+    try:
+        if bytes(data[:8]) == PNG_SIGNATURE:
+            return _probe_png_dpi(data)
+        if bytes(data[:2]) == b'\xff\xd8':
+            return _probe_jpeg_dpi(data)
+    except struct.error:
+        return None, False
+    return None, True
+
+def probe_dpi(data):
+    """
+    DPI stored in the header of encoded PNG (pHYs) or JPEG (JFIF/EXIF) bytes,
+    without decoding the image. Returns (dpi_x, dpi_y) or None when the
+    header has no DPI or the format isn't supported.
+    """
+    return _probe_dpi_header(data)[0]
+
+def read_image_with_dpi(image_path, flags=cv2.IMREAD_UNCHANGED):
+    """
+    Read an image file once and return (image, dpi). The image is decoded
+    from the bytes read and the DPI is probed from the same bytes; either is
+    None if unavailable.
+    """
+    try:
+        data = np.fromfile(image_path, dtype=np.uint8)
+    except (OSError, ValueError):
+        return None, None
+    if data.size == 0:
+        return None, None
+    return cv2.imdecode(data, flags), probe_dpi(data)
+
+def probe_file_dpi(image_path):
+    """DPI stored in an image file's header, or None; only the header is read"""
+    with open(image_path, 'rb') as f:
+        header = f.read(DPI_PROBE_BYTES)
+        dpi, done = _probe_dpi_header(header)
+        if not done and len(header) == DPI_PROBE_BYTES:
+            # Large metadata before the DPI: scan the rest of the header
+            dpi = probe_dpi(header + f.read())
+    return dpi
+
 def get_dpi_from_image(image_path):
+    """
+    DPI of an image file path or of its encoded bytes, 400 if not specified.
+    Only the header is read from a file.
+    """
+    if isinstance(image_path, (bytes, bytearray, memoryview, np.ndarray)):
+        dpi = probe_dpi(image_path)
+    else:
+        dpi = probe_file_dpi(image_path)
+
     # Default DPI for PNG images if not specified
-    with Image.open(image_path) as img:
-        dpi_x, dpi_y = img.info.get('dpi', (400, 400))
-        return math.ceil(dpi_x), math.ceil(dpi_y)
+    dpi_x, dpi_y = dpi or (400, 400)
+    return math.ceil(dpi_x), math.ceil(dpi_y)
     
 def find_png_files(folder_path: str) -> Tuple[List[str], List[str]]:
     """Find all PNG files in a directory"""
@@ -7,6 +7,7 @@ import os
 import sys
 import logging
 import signal
+import threading
 import time
 from typing import Dict, Any
 import redis
@@ -37,7 +38,9 @@ class WorkerService:
             'process_mockup': self.process_mockup_job,
             'process_design': self.process_design_job,
             'create_print_files': self.create_print_files_job,
-            'sync_etsy_orders': self.sync_etsy_orders_job
+            'sync_etsy_orders': self.sync_etsy_orders_job,
+            'sync_shopify_store': self.sync_shopify_store_job,
+            'maintain_event_partitions': self.maintain_event_partitions_job
         }
         
         logger.info("Worker service initialized")
@@ -156,6 +159,67 @@ class WorkerService:
                 'error': str(e)
             }
     
+    def sync_shopify_store_job(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Sync Shopify products and orders via GraphQL bulk operations"""
+        try:
+            logger.info(f"Processing Shopify sync job: {job_data.get('job_id')}")
+            
+            # Import here to avoid circular dependencies
+            from server.src.services.shopify_bulk_sync import ShopifyBulkSyncService
+            from server.src.database.core import get_db
+            
+            # Extract job parameters
+            store_id = job_data.get('store_id')
+            resource = job_data.get('resource')
+            
+            db = next(get_db())
+            service = ShopifyBulkSyncService(db)
+            if resource:
+                results = [service.sync_resource(store_id, resource)]
+            else:
+                results = service.sync_store(store_id)
+            
+            failed = [r for r in results if r.get('status') == 'failed']
+            return {
+                'status': 'failed' if failed else 'completed',
+                'result': results,
+                'message': 'Shopify store synced successfully' if not failed else 'Shopify sync finished with errors'
+            }
+            
+        except Exception as e:
+            logger.error(f"Error syncing Shopify store: {e}")
+            return {
+                'status': 'failed',
+                'error': str(e)
+            }
+    
+    def maintain_event_partitions_job(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create upcoming event partitions and drop expired ones"""
+        try:
+            logger.info(f"Processing event partition maintenance job: {job_data.get('job_id')}")
+            
+            # Import here to avoid circular dependencies
+            from server.src.routes.events.service import EventService
+            from server.src.database.core import get_db
+            
+            days_to_keep = int(job_data.get('days_to_keep', 90))
+            
+            db = next(get_db())
+            deleted_count = EventService.cleanup_old_events(db, days_to_keep=days_to_keep)
+            
+            return {
+                'status': 'completed',
+                'result': {'deleted_events': deleted_count},
+                'message': 'Event partitions maintained successfully'
+            }
+            
+        except Exception as e:
+            logger.error(f"Error maintaining event partitions: {e}")
+            return {
+                'status': 'failed',
+                'error': str(e)
+            }
+    
     def process_job(self, job_data: Dict[str, Any]) -> None:
         """Process a single job"""
         try:
@@ -197,6 +261,33 @@ class WorkerService:
         logger.info("Starting worker service...")
         self.running = True
         
+        # Scheduled email campaigns are claimed and sent on a background thread
+        if os.getenv('ENABLE_EMAIL_CAMPAIGN_SCHEDULER', 'true').lower() == 'true':
+            from server.src.services.email_campaign_scheduler import run_email_campaign_scheduler
+            threading.Thread(target=run_email_campaign_scheduler, name="email-campaign-scheduler", daemon=True).start()
+        
+        # Print jobs are claimed from the database queue and run concurrently
+        self.print_job_runner = None
+        if os.getenv('ENABLE_PRINT_JOB_RUNNER', 'true').lower() == 'true':
+            from server.src.services.print_job_runner import PrintJobRunner
+            self.print_job_runner = PrintJobRunner()
+            threading.Thread(target=self.print_job_runner.run_forever, name="print-job-runner", daemon=True).start()
+        
+        # Pending custom domains are verified in batches off the request path
+        if os.getenv('ENABLE_DNS_VERIFICATION_SWEEP', 'true').lower() == 'true':
+            from server.src.services.dns_verification_service import run_domain_verification_sweep
+            threading.Thread(target=run_domain_verification_sweep, name="dns-verification-sweep", daemon=True).start()
+        
+        # Local Shopify products and orders are re-synced once they get old
+        if os.getenv('ENABLE_SHOPIFY_SYNC_SCHEDULER', 'true').lower() == 'true':
+            from server.src.services.shopify_bulk_sync import run_shopify_sync_scheduler
+            threading.Thread(target=run_shopify_sync_scheduler, name="shopify-sync-scheduler", daemon=True).start()
+        
+        # Upcoming event partitions are created and expired ones dropped periodically
+        if os.getenv('ENABLE_EVENT_PARTITION_MAINTENANCE', 'true').lower() == 'true':
+            from server.src.services.event_partitions import run_event_partition_maintenance
+            threading.Thread(target=run_event_partition_maintenance, name="event-partition-maintenance", daemon=True).start()
+        
         # Set up signal handlers
         signal.signal(signal.SIGTERM, self.shutdown)
         signal.signal(signal.SIGINT, self.shutdown)
@@ -234,6 +325,33 @@ class WorkerService:
         """Graceful shutdown"""
         logger.info("Shutting down worker service...")
         self.running = False
+        
+        try:
+            from server.src.services.email_campaign_scheduler import stop_email_campaign_scheduler
+            stop_email_campaign_scheduler()
+        except Exception as e:
+            logger.error(f"Error stopping email campaign scheduler: {e}")
+        
+        if getattr(self, 'print_job_runner', None):
+            self.print_job_runner.stop()
+        
+        try:
+            from server.src.services.dns_verification_service import stop_domain_verification_sweep
+            stop_domain_verification_sweep()
+        except Exception as e:
+            logger.error(f"Error stopping domain verification sweep: {e}")
+        
+        try:
+            from server.src.services.event_partitions import stop_event_partition_maintenance
+            stop_event_partition_maintenance()
+        except Exception as e:
+            logger.error(f"Error stopping event partition maintenance: {e}")
+        
+        try:
+            from server.src.services.shopify_bulk_sync import stop_shopify_sync_scheduler
+            stop_shopify_sync_scheduler()
+        except Exception as e:
+            logger.error(f"Error stopping Shopify sync scheduler: {e}")
 
 def main():
     """Entry point for the worker service"""